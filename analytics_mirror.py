@@ -0,0 +1,587 @@
+#!/usr/bin/env python3
+"""
+Analytics Mirror
+Optional DuckDB copy of the database for heavy aggregations
+
+Aggregations over the costing / path / tariff tables - the tariff
+validation in Reference/Domain Knowledge/sql_queries, COUNT and SUM
+DISTINCT over five joined tables - run row at a time in SQLite. sync()
+mirrors the SQLite tables into a columnar DuckDB file,
+<name>_analytics.duckdb, and run_query() runs the registered
+ANALYTICS_QUERIES there. The SQLite write path is untouched: the mirror
+reads what every report reads - the read replica once one has been taken
+(read_replica.reporting_path), supply_chain.db until then - inside one
+read transaction per sync, and skips the sync when that file has not
+changed since the last one.
+
+Tables are mirrored incrementally where the schema allows:
+
+  - 'watermark' - tables with a modified column (modified_date /
+    updated_at) and a single-column key: rows modified at or after the
+    last sync, or added since, replace their mirror rows
+  - 'append'    - APPEND_ONLY_TABLES: rows added since the last sync
+  - 'reload'    - everything else (small reference and link tables, and
+    agent_tasks, which archiving keeps small) is copied whole
+
+A table whose row count differs from the mirror after the incremental
+step (rows were deleted) is copied whole; sync(full=True) copies every
+table, e.g. after bulk updates that did not touch the modified column.
+
+Column types follow SQLite affinity: INTEGER / BOOLEAN -> BIGINT,
+REAL / NUMERIC -> DOUBLE, everything else (including dates, compared as
+strings exactly as in SQLite) -> VARCHAR. A value that does not fit its
+column's type (text in a REAL column) is NULL in the mirror.
+
+Rows travel through a temporary CSV file read by DuckDB's read_csv -
+DuckDB's sqlite extension has to be downloaded on first use, and
+executemany() inserts rows one at a time.
+
+The registered queries are written in the SQL both engines accept, so
+run_query(engine='sqlite') runs the same text on that same SQLite file
+(read_replica.connect_for_reporting), so both engines return the same rows -
+the fallback when duckdb is not installed, and the baseline of benchmark().
+
+Requires duckdb (pip install duckdb); without it, run_query() reads SQLite.
+
+Usage:
+    python analytics_mirror.py sync [db_path] [--full]
+    python analytics_mirror.py query <name> [--param as_of=2024-01-01] [--engine sqlite] [--db supply_chain.db]
+    python analytics_mirror.py list
+    python analytics_mirror.py benchmark [db_path] [--param as_of=2024-01-01] [--output analytics_benchmark.json]
+"""
+
+import contextlib
+import io
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+from read_replica import connect_for_reporting, last_modified, reporting_path
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+# Modified-timestamp columns, in order of preference
+WATERMARK_COLUMNS = ('modified_date', 'updated_at')
+
+# Tables that are only ever inserted into
+APPEND_ONLY_TABLES = (
+    'data_quality_log',
+    'terminal_alias_errors',
+    'product_alias_errors',
+    'line_item_type_alias_errors',
+    'index_alias_errors',
+    'price_day_alias_errors',
+)
+
+# Tables not mirrored: derived (mv_*) and replica bookkeeping
+EXCLUDED_PREFIXES = ('mv_', 'sqlite_')
+EXCLUDED_TABLES = ('replica_snapshot',)
+
+# Rows read from SQLite per fetch while writing the CSV
+MIRROR_FETCH_SIZE = 10000
+
+# Registered analytical queries. SQL that both SQLite and DuckDB accept;
+# $name parameters, defaults in 'params' ('today' means date.today()).
+ANALYTICS_QUERIES = {
+    'tariff_validation': {
+        'description': 'Costing tariff count/sum vs path tariffs per terminal and category '
+                       '(0 - Validate EN Costing Tariff Values.sql)',
+        'params': {'as_of': 'today'},
+        'sql': """
+            WITH path_tariffs AS (
+                SELECT co.terminal_id, co.product_category_id,
+                       COUNT(DISTINCT tarpl.tariff_id) AS tariff_count,
+                       SUM(DISTINCT tc.tariff_value) AS tariff_cost,
+                       MAX(tl.tariff_start_date) AS tariff_start,
+                       MIN(tl.tariff_end_date) AS tariff_end
+                FROM costing co
+                JOIN product_categories pc ON pc.category_id = co.product_category_id
+                JOIN terminal_path_links terpl ON terpl.terminal_id = co.terminal_id
+                                              AND terpl.product_category_id = co.product_category_id
+                JOIN tariff_path_links tarpl ON tarpl.shipping_path_id = terpl.shipping_path_id
+                JOIN pipeline_tariffs tar ON tar.tariff_id = tarpl.tariff_id
+                JOIN tariff_costs tc ON tc.tariff_id = tarpl.tariff_id
+                JOIN tariff_libraries tl ON tl.tariff_library_id = tc.tariff_library_id
+                WHERE tl.tariff_start_date <= $as_of AND tl.tariff_end_date >= $as_of
+                  AND pc.category_code IN ('GAS', 'ETH')
+                GROUP BY co.terminal_id, co.product_category_id
+            )
+            SELECT co.terminal_id, co.product_category_id, ter.terminal_name, pc.category_code,
+                   COUNT(co.costing_id) AS costing_count, SUM(co.costing_value) AS costing_value,
+                   MAX(co.start_date) AS costing_start, MIN(co.end_date) AS costing_end,
+                   pt.tariff_count, pt.tariff_cost, pt.tariff_start, pt.tariff_end
+            FROM costing co
+            JOIN terminals ter ON ter.terminal_id = co.terminal_id
+            JOIN product_categories pc ON pc.category_id = co.product_category_id
+            JOIN costing_items ci ON ci.costing_item_id = co.costing_item_id
+            JOIN path_tariffs pt ON pt.terminal_id = co.terminal_id
+                                AND pt.product_category_id = co.product_category_id
+            WHERE co.start_date <= $as_of AND (co.end_date IS NULL OR co.end_date > $as_of)
+              AND ci.costing_item_name = 'tariff'
+              AND pc.category_code IN ('GAS', 'ETH')
+            GROUP BY co.terminal_id, co.product_category_id, ter.terminal_name, pc.category_code,
+                     pt.tariff_count, pt.tariff_cost, pt.tariff_start, pt.tariff_end
+            ORDER BY ter.terminal_name, pc.category_code, pt.tariff_start
+        """,
+    },
+    'costing_by_month': {
+        'description': 'Costing rows and values per month, product category and costing item',
+        'params': {},
+        'sql': """
+            SELECT substr(co.start_date, 1, 7) AS month, pc.category_code, ci.costing_item_name,
+                   COUNT(*) AS costing_count, SUM(co.costing_value) AS total_value,
+                   AVG(co.costing_value) AS avg_value
+            FROM costing co
+            JOIN product_categories pc ON pc.category_id = co.product_category_id
+            JOIN costing_items ci ON ci.costing_item_id = co.costing_item_id
+            GROUP BY substr(co.start_date, 1, 7), pc.category_code, ci.costing_item_name
+            ORDER BY month, pc.category_code, ci.costing_item_name
+        """,
+    },
+    'shipping_line_items_by_month': {
+        'description': 'Shipping line items per period month and line item type',
+        'params': {},
+        'sql': """
+            SELECT substr(sp.start_date, 1, 7) AS month, lit.line_item_type_name,
+                   COUNT(*) AS line_items, COUNT(DISTINCT sp.terminal_id) AS terminals,
+                   SUM(sli.line_item_adder) AS total_adder, AVG(sli.line_item_percent) AS avg_percent
+            FROM shipping_line_items sli
+            JOIN shipping_periods sp ON sp.shipping_period_id = sli.shipping_period_id
+            JOIN line_item_types lit ON lit.line_item_type_id = sli.line_item_type_id
+            GROUP BY substr(sp.start_date, 1, 7), lit.line_item_type_name
+            ORDER BY month, lit.line_item_type_name
+        """,
+    },
+    'bcs_line_items_by_month': {
+        'description': 'BCS line items per period month and period status',
+        'params': {},
+        'sql': """
+            SELECT substr(bp.start_date, 1, 7) AS month, bps.bcs_period_status_name,
+                   COUNT(DISTINCT bp.bcs_id) AS bcs_count, COUNT(*) AS line_items,
+                   SUM(bli.line_item_adder) AS total_adder
+            FROM bcs_line_items bli
+            JOIN bcs_periods bp ON bp.bcs_period_id = bli.bcs_period_id
+            JOIN bcs_period_statuses bps ON bps.bcs_period_status_id = bp.bcs_period_status_id
+            GROUP BY substr(bp.start_date, 1, 7), bps.bcs_period_status_name
+            ORDER BY month, bps.bcs_period_status_name
+        """,
+    },
+}
+
+
+def _require_duckdb():
+    if duckdb is None:
+        raise ImportError("duckdb is required for the analytics mirror: pip install duckdb")
+
+
+def mirror_path_for(db_path):
+    """supply_chain.db -> supply_chain_analytics.duckdb"""
+    return f"{os.path.splitext(db_path)[0]}_analytics.duckdb"
+
+
+def _duckdb_type(declared_type):
+    """DuckDB column type for a SQLite declared type, by SQLite's affinity rules"""
+    declared_type = (declared_type or '').upper()
+    if 'INT' in declared_type or declared_type == 'BOOLEAN':
+        return 'BIGINT'
+    if any(name in declared_type for name in ('REAL', 'FLOA', 'DOUB', 'NUMERIC', 'DECIMAL')):
+        return 'DOUBLE'
+    return 'VARCHAR'
+
+
+def _select_expression(column, column_type):
+    """SQLite expression reading column as a value of column_type"""
+    if column_type == 'BIGINT':
+        return f"CASE WHEN typeof({column}) IN ('integer', 'real') THEN CAST({column} AS INTEGER) END"
+    if column_type == 'DOUBLE':
+        return f"CASE WHEN typeof({column}) IN ('integer', 'real') THEN CAST({column} AS REAL) END"
+    return f"CAST({column} AS TEXT)"
+
+
+def mirror_tables(conn):
+    """
+    The SQLite tables to mirror and how
+
+    Returns:
+        dict: table -> {'columns': [(name, duckdb type)], 'strategy', 'key', 'watermark'}
+    """
+    tables = {}
+    for table_name, sql in conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'table' ORDER BY name").fetchall():
+        if table_name.startswith(EXCLUDED_PREFIXES) or table_name in EXCLUDED_TABLES:
+            continue
+        info = conn.execute(f"PRAGMA table_info({table_name})").fetchall()
+        columns = [(row[1], _duckdb_type(row[2])) for row in info]
+        key = [row[1] for row in info if row[5]]
+        names = [name for name, _ in columns]
+        watermark = next((column for column in WATERMARK_COLUMNS if column in names), None)
+
+        if 'WITHOUT ROWID' in sql.upper():
+            strategy = 'reload'
+        elif table_name in APPEND_ONLY_TABLES:
+            strategy = 'append'
+        elif watermark and len(key) == 1:
+            strategy = 'watermark'
+        else:
+            strategy = 'reload'
+        tables[table_name] = {'columns': columns, 'strategy': strategy,
+                              'key': key[0] if len(key) == 1 else None, 'watermark': watermark}
+    return tables
+
+
+def _write_csv(cursor, path):
+    """Write a cursor's rows as CSV: NULL unquoted-empty, strings always quoted; returns rows"""
+    def field(value):
+        if value is None:
+            return ''
+        if isinstance(value, str):
+            return '"' + value.replace('"', '""') + '"'
+        return repr(value)
+
+    rows = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        while True:
+            batch = cursor.fetchmany(MIRROR_FETCH_SIZE)
+            if not batch:
+                break
+            f.writelines(','.join(map(field, row)) + '\n' for row in batch)
+            rows += len(batch)
+    return rows
+
+
+def _read_csv_sql(columns):
+    """DuckDB read_csv() call for a file written by _write_csv (path is parameter ?)"""
+    types = ', '.join(f"'{name}': '{column_type}'" for name, column_type in columns)
+    return (f"read_csv(?, header = false, delim = ',', quote = '\"', escape = '\"', "
+            f"new_line = '\\n', allow_quoted_nulls = false, columns = {{{types}}})")
+
+
+def _ensure_state(mirror):
+    mirror.execute("""
+        CREATE TABLE IF NOT EXISTS mirror_state (
+            table_name VARCHAR PRIMARY KEY,
+            strategy VARCHAR,
+            columns VARCHAR,
+            watermark VARCHAR,
+            max_rowid BIGINT,
+            row_count BIGINT,
+            synced_at TIMESTAMP
+        )
+    """)
+    mirror.execute("""
+        CREATE TABLE IF NOT EXISTS mirror_source (
+            source_path VARCHAR,
+            source_modified DOUBLE,
+            synced_at TIMESTAMP
+        )
+    """)
+
+
+def _sync_table(source, mirror, table_name, spec, state, csv_path, full):
+    """Bring one mirror table up to date; returns (strategy used, rows copied)"""
+    columns = spec['columns']
+    signature = json.dumps(columns)
+    select = ", ".join(_select_expression(name, column_type) for name, column_type in columns)
+    quoted = ", ".join(f'"{name}"' for name, _ in columns)
+    count, max_rowid = source.execute(f"SELECT COUNT(*), MAX(rowid) FROM {table_name}").fetchone()
+    watermark = (source.execute(f"SELECT MAX({spec['watermark']}) FROM {table_name}").fetchone()[0]
+                 if spec['strategy'] == 'watermark' else None)
+
+    incremental = (not full and state and state['columns'] == signature
+                   and spec['strategy'] in ('watermark', 'append'))
+    copied = 0
+    if incremental:
+        conditions = ["rowid > ?"]
+        params = [state['max_rowid'] or 0]
+        if spec['strategy'] == 'watermark' and state['watermark'] is not None:
+            # >= : rows sharing the last watermark may have arrived after it was read
+            conditions.append(f"{spec['watermark']} >= ?")
+            params.append(state['watermark'])
+        copied = _write_csv(source.execute(
+            f"SELECT {select} FROM {table_name} WHERE {' OR '.join(conditions)}", params), csv_path)
+        mirror.execute("BEGIN TRANSACTION")
+        if copied:
+            mirror.execute(f"CREATE OR REPLACE TEMP TABLE mirror_stage AS SELECT * FROM {_read_csv_sql(columns)}",
+                           [csv_path])
+            if spec['strategy'] == 'watermark':
+                mirror.execute(f'DELETE FROM "{table_name}" WHERE "{spec["key"]}" IN '
+                               f'(SELECT "{spec["key"]}" FROM mirror_stage)')
+            mirror.execute(f'INSERT INTO "{table_name}" ({quoted}) SELECT * FROM mirror_stage')
+            mirror.execute("DROP TABLE mirror_stage")
+        mirrored = mirror.execute(f'SELECT COUNT(*) FROM "{table_name}"').fetchone()[0]
+        if mirrored != count:
+            # Deleted rows - only a whole copy finds them
+            mirror.execute("ROLLBACK")
+            incremental = False
+        strategy = spec['strategy']
+
+    if not incremental:
+        copied = _write_csv(source.execute(f"SELECT {select} FROM {table_name}"), csv_path)
+        mirror.execute("BEGIN TRANSACTION")
+        definitions = ", ".join(f'"{name}" {column_type}' for name, column_type in columns)
+        mirror.execute(f'CREATE OR REPLACE TABLE "{table_name}" ({definitions})')
+        if copied:
+            mirror.execute(f'INSERT INTO "{table_name}" SELECT * FROM {_read_csv_sql(columns)}', [csv_path])
+        strategy = 'reload'
+
+    mirror.execute("""
+        INSERT OR REPLACE INTO mirror_state VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, [table_name, spec['strategy'], signature, watermark, max_rowid, count, datetime.now()])
+    mirror.execute("COMMIT")
+    return strategy, copied
+
+
+def sync(db_path='supply_chain.db', mirror_path=None, full=False):
+    """
+    Bring the DuckDB mirror of db_path up to date
+
+    The mirror is copied from db_path's read replica once one has been
+    taken (the file run_query(engine='sqlite') reads), otherwise from
+    db_path itself. A change of source file means a full copy.
+
+    Returns:
+        dict: mirror_path, source_path (the file copied), skipped (source
+              unchanged), tables ({table: {'strategy', 'rows'}}), seconds
+    """
+    _require_duckdb()
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"{db_path} not found")
+    mirror_path = mirror_path or mirror_path_for(db_path)
+    started = time.perf_counter()
+    source_path = os.path.abspath(reporting_path(db_path))
+    source_modified = last_modified(source_path)
+
+    mirror = duckdb.connect(mirror_path)
+    source = sqlite3.connect(source_path, isolation_level=None)
+    csv_fd, csv_path = tempfile.mkstemp(suffix='.csv', prefix='mirror_')
+    os.close(csv_fd)
+    results = {}
+    try:
+        _ensure_state(mirror)
+        last = mirror.execute("SELECT source_path, source_modified FROM mirror_source").fetchone()
+        if last and last[0] != source_path:
+            full = True
+        if not full and last and last[1] is not None and source_modified <= last[1]:
+            return {'mirror_path': mirror_path, 'source_path': source_path, 'skipped': True,
+                    'tables': {}, 'seconds': round(time.perf_counter() - started, 3)}
+
+        states = {}
+        cursor = mirror.execute("SELECT table_name, columns, watermark, max_rowid FROM mirror_state")
+        for table_name, columns, watermark, max_rowid in cursor.fetchall():
+            states[table_name] = {'columns': columns, 'watermark': watermark, 'max_rowid': max_rowid}
+
+        # One read transaction: every table is read from the same snapshot
+        source.execute("BEGIN")
+        try:
+            tables = mirror_tables(source)
+            for table_name, spec in tables.items():
+                strategy, rows = _sync_table(source, mirror, table_name, spec,
+                                             states.get(table_name), csv_path, full)
+                results[table_name] = {'strategy': strategy, 'rows': rows}
+        finally:
+            source.execute("COMMIT")
+
+        for table_name in set(states) - set(tables):
+            mirror.execute(f'DROP TABLE IF EXISTS "{table_name}"')
+            mirror.execute("DELETE FROM mirror_state WHERE table_name = ?", [table_name])
+        mirror.execute("DELETE FROM mirror_source")
+        mirror.execute("INSERT INTO mirror_source VALUES (?, ?, ?)",
+                       [source_path, source_modified, datetime.now()])
+    finally:
+        source.close()
+        mirror.close()
+        os.remove(csv_path)
+
+    return {'mirror_path': mirror_path, 'source_path': source_path, 'skipped': False, 'tables': results,
+            'seconds': round(time.perf_counter() - started, 3)}
+
+
+def _query_params(name, params):
+    spec = ANALYTICS_QUERIES[name]
+    unknown = sorted(set(params) - set(spec['params']))
+    if unknown:
+        raise ValueError(f"{name} has no parameter {', '.join(unknown)} "
+                         f"(parameters: {', '.join(spec['params']) or 'none'})")
+    values = {}
+    for param, default in spec['params'].items():
+        value = params.get(param, default)
+        values[param] = date.today().isoformat() if value == 'today' else value
+    return values
+
+
+def run_query(name, db_path='supply_chain.db', engine='auto', sync_first=True, **params):
+    """
+    Run a registered analytical query
+
+    Args:
+        engine: 'duckdb' (the mirror), 'sqlite' (db_path's read replica, or
+                db_path itself without one) or 'auto' (duckdb when installed)
+        sync_first: Sync the mirror before a duckdb query
+        params: Query parameters, e.g. as_of='2024-01-01'
+
+    Returns:
+        list: Dicts, one per row - the same from either engine
+    """
+    if name not in ANALYTICS_QUERIES:
+        raise ValueError(f"Unknown query {name} (one of: {', '.join(ANALYTICS_QUERIES)})")
+    if engine not in ('auto', 'duckdb', 'sqlite'):
+        raise ValueError(f"Unknown engine {engine} (auto, duckdb or sqlite)")
+    values = _query_params(name, params)
+    sql = ANALYTICS_QUERIES[name]['sql']
+
+    if engine == 'auto':
+        engine = 'duckdb' if duckdb is not None else 'sqlite'
+    if engine == 'sqlite':
+        conn, _ = connect_for_reporting(db_path)
+    else:
+        _require_duckdb()
+        if sync_first:
+            sync(db_path)
+        conn = duckdb.connect(mirror_path_for(db_path), read_only=True)
+    try:
+        cursor = conn.execute(sql, values)
+        names = [column[0] for column in cursor.description]
+        return [dict(zip(names, row)) for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+
+def _comparable(rows):
+    """Rows as sorted tuples with floats rounded - engines sum floats in different orders"""
+    return sorted(tuple(round(value, 6) if isinstance(value, float) else value for value in row.values())
+                  for row in rows)
+
+
+def benchmark(db_path='supply_chain.db', output=None, **params):
+    """
+    Time every registered query on SQLite and on the mirror
+
+    Args:
+        params: Query parameters; as_of defaults to the latest costing
+                start date, so the dated queries find rows in any database
+
+    Returns:
+        dict: sync results and per-query seconds, speedup and whether the
+              engines returned the same rows
+    """
+    _require_duckdb()
+    print(f"\n→ Syncing {mirror_path_for(db_path)}")
+    first = sync(db_path, full=True)
+    print(f"  ✓ Full sync: {sum(t['rows'] for t in first['tables'].values()):,} rows "
+          f"in {len(first['tables'])} tables, {first['seconds']:.2f}s")
+
+    # The SQLite baseline reads what any report reads (see run_query)
+    conn, _ = connect_for_reporting(db_path)
+    if 'as_of' not in params:
+        params['as_of'] = conn.execute("SELECT MAX(start_date) FROM costing").fetchone()[0] or 'today'
+    conn.close()
+    print(f"  Parameters: {', '.join(f'{param}={value}' for param, value in params.items())}")
+
+    report = {'database': db_path, 'params': params, 'full_sync_seconds': first['seconds'], 'queries': {}}
+    print(f"\n  {'Query':<32} {'Rows':>7} {'SQLite':>9} {'DuckDB':>9} {'Speedup':>8}")
+    print("  " + "-" * 70)
+    for name in ANALYTICS_QUERIES:
+        timings = {}
+        results = {}
+        for engine in ('sqlite', 'duckdb'):
+            started = time.perf_counter()
+            query_params = {param: value for param, value in params.items()
+                            if param in ANALYTICS_QUERIES[name]['params']}
+            # The replica notice was printed once above
+            with contextlib.redirect_stdout(io.StringIO()):
+                results[engine] = run_query(name, db_path, engine=engine, sync_first=False, **query_params)
+            timings[engine] = time.perf_counter() - started
+        same = _comparable(results['sqlite']) == _comparable(results['duckdb'])
+        speedup = timings['sqlite'] / timings['duckdb'] if timings['duckdb'] else None
+        report['queries'][name] = {
+            'rows': len(results['duckdb']),
+            'sqlite_seconds': round(timings['sqlite'], 4),
+            'duckdb_seconds': round(timings['duckdb'], 4),
+            'speedup': round(speedup, 1) if speedup else None,
+            'same_results': same,
+        }
+        flag = '✓' if same else '❌'
+        print(f"  {flag} {name:<30} {len(results['duckdb']):>7,} {timings['sqlite']:>8.3f}s "
+              f"{timings['duckdb']:>8.3f}s {speedup:>7.1f}x")
+
+    if output:
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n  Report: {output}")
+    return report
+
+
+# Command-line interface
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='DuckDB analytics mirror of the database')
+    subparsers = parser.add_subparsers(dest='command')
+
+    sync_parser = subparsers.add_parser('sync', help='Bring the mirror up to date')
+    sync_parser.add_argument('db_path', nargs='?', default='supply_chain.db')
+    sync_parser.add_argument('--full', action='store_true', help='Copy every table whole')
+
+    query_parser = subparsers.add_parser('query', help='Run a registered query')
+    query_parser.add_argument('name', choices=sorted(ANALYTICS_QUERIES))
+    query_parser.add_argument('--param', action='append', default=[], metavar='NAME=VALUE')
+    query_parser.add_argument('--engine', choices=('auto', 'duckdb', 'sqlite'), default='auto')
+    query_parser.add_argument('--limit', type=int, default=20, help='Rows to print')
+    query_parser.add_argument('--db', default='supply_chain.db', help='Database path')
+
+    subparsers.add_parser('list', help='List the registered queries')
+
+    benchmark_parser = subparsers.add_parser('benchmark', help='Time the queries on SQLite and DuckDB')
+    benchmark_parser.add_argument('db_path', nargs='?', default='supply_chain.db')
+    benchmark_parser.add_argument('--param', action='append', default=[], metavar='NAME=VALUE')
+    benchmark_parser.add_argument('--output', default='analytics_benchmark.json', help='JSON report path')
+
+    args = parser.parse_args()
+    if not args.command:
+        parser.print_help()
+        sys.exit(1)
+
+    try:
+        if args.command == 'list':
+            for name, spec in ANALYTICS_QUERIES.items():
+                params = ', '.join(f"{param}={default}" for param, default in spec['params'].items())
+                print(f"  {name}({params})\n      {spec['description']}")
+
+        elif args.command == 'sync':
+            result = sync(args.db_path, full=args.full)
+            if result['skipped']:
+                print(f"✓ {result['mirror_path']} is current ({result['source_path']} unchanged)")
+            else:
+                for table_name, table in result['tables'].items():
+                    if table['rows']:
+                        print(f"  ✓ {table_name}: {table['rows']:,} rows ({table['strategy']})")
+                print(f"\n✓ Synced {result['mirror_path']} from {result['source_path']} "
+                      f"in {result['seconds']:.2f}s")
+
+        elif args.command == 'query':
+            params = dict(param.split('=', 1) for param in args.param)
+            started = time.perf_counter()
+            rows = run_query(args.name, args.db, engine=args.engine, **params)
+            engine = args.engine if args.engine != 'auto' else ('duckdb' if duckdb else 'sqlite')
+            print(f"\n{args.name}: {len(rows):,} rows ({engine}, {time.perf_counter() - started:.3f}s)")
+            for row in rows[:args.limit]:
+                print("  " + ", ".join(f"{key}={value}" for key, value in row.items()))
+            if len(rows) > args.limit:
+                print(f"  ... {len(rows) - args.limit:,} more")
+
+        elif args.command == 'benchmark':
+            print("\n" + "=" * 80)
+            print(f"ANALYTICS MIRROR BENCHMARK - {args.db_path}")
+            print("=" * 80)
+            benchmark(args.db_path, args.output, **dict(param.split('=', 1) for param in args.param))
+
+    except (ImportError, FileNotFoundError, sqlite3.Error, ValueError, *((duckdb.Error,) if duckdb else ())) as e:
+        print(f"\n❌ {e}")
+        sys.exit(1)
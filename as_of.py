@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+As-Of Queries
+The rows of an effective-dated table that were in effect on a given date
+
+Effective-dated rows follow one convention across the schema: a row is in
+effect from its start date (inclusive) to its end date (exclusive), and an
+open row has end_date NULL. v_active_terminals and v_active_pipeline_tariffs
+answer "today" only; rows_as_of() answers any date, with the same cost for a
+date two years back as for today:
+
+  - Versioned tables (AS_OF_TABLES entries with a 'series') keep one row per
+    version of a series - a terminal's shipping periods, a BCS's periods, a
+    costing component of a terminal. The version in effect on D is the
+    series' latest version starting on or before D, found with one seek
+    into the (series, start) index. The cost is one seek per series, however
+    many versions the series has before or after D.
+  - Entity tables (terminals, pipeline_tariffs) have no series. Their open
+    rows and their ended rows have separate partial indexes, so a lookup
+    reads the open rows plus the rows that ended after D - never the whole
+    history.
+
+Usage:
+    python as_of.py <table> [--date 2024-02-01] [--where terminal_id=...] [--db supply_chain.db]
+"""
+
+import sqlite3
+import sys
+import time
+from datetime import date
+
+# Effective-dated tables: start column and, for versioned tables, the
+# columns identifying a series (its versions never overlap)
+AS_OF_TABLES = {
+    'terminals': {
+        'start': 'effective_date',
+    },
+    'pipeline_tariffs': {
+        'start': 'effective_date',
+    },
+    'transportation_costs': {
+        'start': 'effective_date',
+        'series': ('terminal_id', 'product_type'),
+    },
+    'costing': {
+        'start': 'start_date',
+        'series': ('terminal_id', 'product_category_id', 'costing_item_id'),
+    },
+    'shipping_periods': {
+        'start': 'start_date',
+        'series': ('terminal_id',),
+    },
+    'bcs_periods': {
+        'start': 'start_date',
+        'series': ('bcs_id',),
+    },
+}
+
+
+def as_of_sql(table_name, filter_columns=()):
+    """
+    SELECT for the rows of table_name in effect on :as_of
+
+    Each filter column is matched against the parameter :<column>; filters
+    on series columns narrow the series looked up, so a single terminal or
+    BCS costs one seek per series it has.
+
+    Returns:
+        str: The query
+    """
+    if table_name not in AS_OF_TABLES:
+        raise ValueError(f"{table_name} is not an effective-dated table "
+                         f"(one of: {', '.join(AS_OF_TABLES)})")
+    spec = AS_OF_TABLES[table_name]
+    start = spec['start']
+    series = spec.get('series')
+
+    if not series:
+        filters = ''.join(f" AND {column} = :{column}" for column in filter_columns)
+        # Open rows started by :as_of, open rows with no start date, ended
+        # rows still in effect - each branch is a seek into a partial index
+        return f"""
+            SELECT * FROM {table_name}
+            WHERE end_date IS NULL AND {start} <= :as_of{filters}
+            UNION ALL
+            SELECT * FROM {table_name}
+            WHERE end_date IS NULL AND {start} IS NULL{filters}
+            UNION ALL
+            SELECT * FROM {table_name}
+            WHERE end_date > :as_of
+              AND ({start} IS NULL OR {start} <= :as_of){filters}
+        """
+
+    series_filters = [column for column in filter_columns if column in series]
+    row_filters = [column for column in filter_columns if column not in series]
+    series_where = (" WHERE " + " AND ".join(f"{column} = :{column}" for column in series_filters)
+                    if series_filters else "")
+    match_series = " AND ".join(f"x.{column} = s.{column}" for column in series)
+    return f"""
+        SELECT v.* FROM {table_name} v
+        WHERE v.rowid IN (
+            SELECT (
+                SELECT x.rowid FROM {table_name} x
+                WHERE {match_series} AND x.{start} <= :as_of
+                ORDER BY x.{start} DESC
+                LIMIT 1
+            )
+            FROM (SELECT DISTINCT {', '.join(series)} FROM {table_name}{series_where}) s
+        )
+        AND (v.end_date IS NULL OR v.end_date > :as_of)
+        {''.join(f" AND v.{column} = :{column}" for column in row_filters)}
+    """
+
+
+def rows_as_of(cursor, table_name, as_of_date=None, **filters):
+    """
+    Rows of table_name in effect on as_of_date (default: today)
+
+    Args:
+        filters: column=value equality filters, e.g. terminal_id='...'
+
+    Returns:
+        list: Dicts, one per row
+    """
+    columns = [row[1] for row in cursor.execute(f"PRAGMA table_info({table_name})")]
+    unknown = sorted(set(filters) - set(columns))
+    if unknown:
+        raise ValueError(f"{table_name} has no column {', '.join(unknown)}")
+
+    as_of_date = as_of_date or date.today().isoformat()
+    params = dict(filters, as_of=str(as_of_date))
+    rows = cursor.execute(as_of_sql(table_name, list(filters)), params)
+    names = [column[0] for column in rows.description]
+    return [dict(zip(names, row)) for row in rows]
+
+
+# Command-line interface
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Rows of an effective-dated table in effect on a date')
+    parser.add_argument('table', choices=sorted(AS_OF_TABLES), help='Effective-dated table')
+    parser.add_argument('--date', help='As-of date, YYYY-MM-DD (default: today)')
+    parser.add_argument('--where', action='append', default=[], metavar='COLUMN=VALUE',
+                        help='Equality filter (repeatable)')
+    parser.add_argument('--limit', type=int, default=20, help='Rows to print')
+    parser.add_argument('--db', default='supply_chain.db', help='Database path')
+    args = parser.parse_args()
+
+    filters = dict(condition.split('=', 1) for condition in args.where)
+    conn = sqlite3.connect(args.db)
+    try:
+        started = time.perf_counter()
+        rows = rows_as_of(conn.cursor(), args.table, args.date, **filters)
+        elapsed = time.perf_counter() - started
+    except (sqlite3.Error, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
+
+    print(f"\n{args.table} as of {args.date or date.today().isoformat()}: "
+          f"{len(rows):,} rows ({elapsed:.3f}s)")
+    for row in rows[:args.limit]:
+        print("  " + ", ".join(f"{key}={value}" for key, value in row.items() if value is not None))
+    if len(rows) > args.limit:
+        print(f"  ... {len(rows) - args.limit:,} more")
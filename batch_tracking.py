@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Batch Tracking
+Progress and totals for ETL runs, recorded in the batches table
+
+Every ingestion run opens a batch, updates its counts at chunk boundaries
+and closes it with phase timings (parse / transform / write) and rows per
+second. A multi-file import is one parent batch with one child batch per
+source file (linked through parent_batch_id), so a finished run can be
+audited file by file:
+
+    SELECT source_path, batch_status, records_succeeded, records_failed
+    FROM batches WHERE parent_batch_id = ?
+
+Chunk-level updates are written through the caller's cursor, inside the
+import transaction - an outside reader sees them when the file commits, and
+a rolled-back file is recorded as Failed after the rollback.
+
+Compare throughput across recent runs (flags regressions):
+
+    python batch_tracking.py [--type "Excel Import"] [--limit 20]
+"""
+
+import json
+import sqlite3
+import statistics
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+# Columns added to batches after the original schema
+BATCH_COLUMNS = {
+    'parent_batch_id': 'TEXT',
+    'source_path': 'TEXT',
+    'rows_per_second': 'REAL',
+    'phase_timings': 'TEXT',
+}
+
+# A run slower than this fraction of the median of earlier runs is flagged
+REGRESSION_THRESHOLD = 0.75
+
+
+class PhaseTimer:
+    """
+    Accumulates wall-clock seconds per phase of a run
+
+    Usage:
+        timer = PhaseTimer()
+        with timer.phase('transform'):
+            rows = build_rows(records)
+    """
+
+    def __init__(self):
+        self.seconds = {}
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def add(self, name, seconds):
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+
+    def get(self, name):
+        return self.seconds.get(name, 0.0)
+
+    def as_dict(self):
+        return {name: round(seconds, 4) for name, seconds in self.seconds.items()}
+
+
+def ensure_batch_table(cursor):
+    """Create batches (or add its newer columns) on databases that predate them"""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS batches (
+        batch_id TEXT PRIMARY KEY,
+        batch_type TEXT,
+        batch_status TEXT DEFAULT 'Pending',
+        records_processed INTEGER DEFAULT 0,
+        records_succeeded INTEGER DEFAULT 0,
+        records_failed INTEGER DEFAULT 0,
+        error_message TEXT,
+        started_at TIMESTAMP,
+        completed_at TIMESTAMP,
+        created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(batches)")}
+    for column_name, column_type in BATCH_COLUMNS.items():
+        if column_name not in columns:
+            cursor.execute(f"ALTER TABLE batches ADD COLUMN {column_name} {column_type}")
+
+
+def start_batch(cursor, batch_type, parent_batch_id=None, source_path=None):
+    """
+    Record the start of a batch
+
+    Returns:
+        batch_id of the new batches row
+    """
+    batch_id = str(uuid.uuid4())
+    cursor.execute("""
+        INSERT INTO batches (
+            batch_id, batch_type, batch_status, parent_batch_id,
+            source_path, started_at
+        ) VALUES (?, ?, 'Running', ?, ?, ?)
+    """, (batch_id, batch_type, parent_batch_id, source_path, datetime.now()))
+    return batch_id
+
+
+def update_batch_progress(cursor, batch_id, records_processed,
+                          records_succeeded, records_failed=0):
+    """Record running totals at a chunk boundary"""
+    cursor.execute("""
+        UPDATE batches
+        SET records_processed = ?,
+            records_succeeded = ?,
+            records_failed = ?
+        WHERE batch_id = ?
+    """, (records_processed, records_succeeded, records_failed, batch_id))
+
+
+def finish_batch(cursor, batch_id, status, records_processed=0,
+                 records_succeeded=0, records_failed=0, error_message=None,
+                 phase_timings=None, rows_per_second=None):
+    """
+    Record the outcome and totals of a batch
+
+    Args:
+        phase_timings: Optional {phase: seconds} (a PhaseTimer.as_dict())
+        rows_per_second: Optional throughput of the run
+    """
+    cursor.execute("""
+        UPDATE batches
+        SET batch_status = ?,
+            records_processed = ?,
+            records_succeeded = ?,
+            records_failed = ?,
+            error_message = ?,
+            phase_timings = ?,
+            rows_per_second = ?,
+            completed_at = ?
+        WHERE batch_id = ?
+    """, (
+        status,
+        records_processed,
+        records_succeeded,
+        records_failed,
+        error_message,
+        json.dumps(phase_timings) if phase_timings is not None else None,
+        round(rows_per_second, 1) if rows_per_second is not None else None,
+        datetime.now(),
+        batch_id
+    ))
+
+
+def throughput_report(cursor, batch_type=None, limit=20):
+    """
+    Recent finished batches with their throughput compared to earlier runs
+
+    Each batch is compared with the median rows/sec of the earlier batches
+    of the same type in the window; a run below REGRESSION_THRESHOLD of that
+    median is marked as a regression.
+
+    Returns:
+        list: Dicts, newest first
+    """
+    query = """
+        SELECT batch_id, batch_type, batch_status, source_path,
+               records_processed, records_failed, rows_per_second,
+               phase_timings, started_at, completed_at
+        FROM batches
+        WHERE rows_per_second IS NOT NULL
+    """
+    params = []
+    if batch_type:
+        query += " AND batch_type = ?"
+        params.append(batch_type)
+    query += " ORDER BY started_at DESC LIMIT ?"
+    params.append(limit)
+
+    columns = ['batch_id', 'batch_type', 'batch_status', 'source_path',
+               'records_processed', 'records_failed', 'rows_per_second',
+               'phase_timings', 'started_at', 'completed_at']
+    batches = [dict(zip(columns, row)) for row in cursor.execute(query, params)]
+
+    # Oldest first, so each run is compared only with the runs before it
+    history = {}
+    for batch in reversed(batches):
+        batch['phase_timings'] = json.loads(batch['phase_timings']) if batch['phase_timings'] else {}
+        earlier = history.setdefault(batch['batch_type'], [])
+        baseline = statistics.median(earlier) if earlier else None
+        batch['baseline_rows_per_second'] = baseline
+        batch['vs_baseline'] = round(batch['rows_per_second'] / baseline, 2) if baseline else None
+        batch['regression'] = bool(baseline) and batch['rows_per_second'] < baseline * REGRESSION_THRESHOLD
+        earlier.append(batch['rows_per_second'])
+    return batches
+
+
+def print_throughput_report(db_path, batch_type=None, limit=20):
+    """Print recent batch throughput, newest first, with regressions flagged"""
+    conn = sqlite3.connect(db_path)
+    try:
+        ensure_batch_table(conn.cursor())
+        batches = throughput_report(conn.cursor(), batch_type, limit)
+    finally:
+        conn.close()
+
+    print("\n" + "=" * 100)
+    print("IMPORT THROUGHPUT - RECENT BATCHES")
+    print("=" * 100)
+    if not batches:
+        print("  No instrumented batches yet")
+        return batches
+
+    print(f"  {'Started':<20} {'Type':<22} {'Status':<10} {'Rows':>8} {'Rows/sec':>10} "
+          f"{'vs median':>9}  Phases (s)")
+    print("  " + "-" * 96)
+    for batch in batches:
+        phases = ', '.join(f"{name} {seconds:.2f}" for name, seconds in batch['phase_timings'].items())
+        ratio = f"{batch['vs_baseline']:.2f}x" if batch['vs_baseline'] else '-'
+        flag = '  ⚠️  REGRESSION' if batch['regression'] else ''
+        print(f"  {str(batch['started_at'])[:19]:<20} {batch['batch_type'][:22]:<22} "
+              f"{batch['batch_status'][:10]:<10} {batch['records_processed'] or 0:>8} "
+              f"{batch['rows_per_second']:>10.1f} {ratio:>9}  {phases}{flag}")
+
+    regressions = [batch for batch in batches if batch['regression']]
+    print("=" * 100)
+    if regressions:
+        print(f"  ⚠️  {len(regressions)} run(s) below {REGRESSION_THRESHOLD:.0%} of the median of earlier runs")
+    else:
+        print("  ✓ No throughput regressions")
+    return batches
+
+
+# Command-line interface
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Compare import throughput across recent batches')
+    parser.add_argument('--db', default='supply_chain.db', help='Database path')
+    parser.add_argument('--type', dest='batch_type', help='Only batches of this type (e.g., "Excel Import")')
+    parser.add_argument('--limit', type=int, default=20, help='Number of recent batches')
+    args = parser.parse_args()
+
+    print_throughput_report(args.db, args.batch_type, args.limit)
@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+Compact Keys
+A copy of the database keyed by INTEGER rowids instead of TEXT UUIDs
+
+Every primary key in create_database.py is a 36-character TEXT id, and so is
+every foreign key, index entry and join comparison on it. The compact copy
+keeps the schema and the column names but stores the keys as integers:
+
+  - a table with a single TEXT primary key gets <key> INTEGER PRIMARY KEY
+    (the rowid itself) and keeps the original id in external_id, a UNIQUE
+    indexed column - the id exchanged with the EN system
+  - declared foreign keys and the undeclared references in
+    IMPLICIT_REFERENCES hold the parent's integer key
+  - indexes, views and triggers are copied unchanged, so every query and
+    view runs on either database; the materialized views are rebuilt
+
+The compact copy is built from a TEXT-keyed database (the import agents keep
+writing TEXT ids); it is a read / reporting database. A reference whose id
+has no parent row keeps its TEXT value and is counted in the build summary.
+
+Usage:
+    python compact_keys.py <source.db> <compact.db> [--force]
+    python compact_keys.py --benchmark [--scale 1.0] [--seed 42] [--output compact_keys_report.json]
+"""
+
+import json
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from materialized_views import rebuild as rebuild_materialized_views
+
+# Column holding the original TEXT id of a compact-keyed table
+EXTERNAL_ID_COLUMN = 'external_id'
+
+# TEXT primary keys that are names, not ids
+UNKEYED_TABLES = ('mv_refresh_state',)
+
+# References to keyed tables without a FOREIGN KEY clause
+IMPLICIT_REFERENCES = {
+    ('shipping_setup', 'index_id'): 'spot_indices',
+    ('shipping_line_items', 'spot_index_id'): 'spot_indices',
+    ('pipeline_tariffs', 'spot_index_id'): 'spot_indices',
+    ('terminal_rates', 'spot_index_id'): 'spot_indices',
+    ('transportation_costs', 'spot_index_id'): 'spot_indices',
+    ('pipeline_tariffs', 'shipping_period_id'): 'shipping_periods',
+    ('terminal_rates', 'shipping_period_id'): 'shipping_periods',
+    ('transportation_costs', 'shipping_period_id'): 'shipping_periods',
+    ('rail_rates', 'shipping_period_id'): 'shipping_periods',
+    ('bcs', 'primary_terminal_alias'): 'terminals',
+    ('batches', 'parent_batch_id'): 'batches',
+}
+
+# Whole-table joins on key columns, timed on both databases by the benchmark
+# (in addition to the query_benchmark.py queries)
+JOIN_QUERIES = [
+    {
+        'name': 'join_costing_shipping_setup',
+        'sql': """
+            SELECT COUNT(*), SUM(co.costing_value)
+            FROM terminal_products tp
+            JOIN shipping_setup ss ON ss.terminal_product_id = tp.terminal_product_id
+            JOIN products bpr ON bpr.product_id = ss.base_product_id
+            JOIN costing co ON co.terminal_id = tp.terminal_id
+                AND co.product_category_id = bpr.product_category_id
+        """,
+    },
+    {
+        'name': 'join_shipping_line_items_periods',
+        'sql': """
+            SELECT sp.terminal_id, COUNT(*)
+            FROM shipping_line_items sli
+            JOIN shipping_periods sp ON sp.shipping_period_id = sli.shipping_period_id
+            GROUP BY sp.terminal_id
+        """,
+    },
+    {
+        'name': 'join_bcs_line_items_bcs',
+        'sql': """
+            SELECT b.bcs_type_id, COUNT(*)
+            FROM bcs_line_items bli
+            JOIN bcs_periods bp ON bp.bcs_period_id = bli.bcs_period_id
+            JOIN bcs b ON b.bcs_id = bp.bcs_id
+            GROUP BY b.bcs_type_id
+        """,
+    },
+]
+
+
+# ============================================================================
+# SCHEMA
+# ============================================================================
+
+def keyed_tables(conn, schema='main'):
+    """table -> primary key column, for the tables with a single TEXT primary key"""
+    keyed = {}
+    for table_name, sql in conn.execute(f"""
+        SELECT name, sql FROM {schema}.sqlite_master
+        WHERE type = 'table' AND name NOT LIKE 'sqlite_%'
+    """).fetchall():
+        if 'WITHOUT ROWID' in sql.upper() or table_name in UNKEYED_TABLES:
+            continue
+        key = [row for row in conn.execute(f"PRAGMA {schema}.table_info({table_name})") if row[5]]
+        if len(key) == 1 and key[0][2].upper() == 'TEXT':
+            keyed[table_name] = key[0][1]
+    return keyed
+
+
+def reference_columns(conn, keyed, schema='main'):
+    """(table, column) -> referenced table, for references to the primary key of a keyed table"""
+    references = {}
+    tables = [row[0] for row in conn.execute(
+        f"SELECT name FROM {schema}.sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")]
+    for table_name in tables:
+        for row in conn.execute(f"PRAGMA {schema}.foreign_key_list({table_name})"):
+            parent, column, parent_column = row[2], row[3], row[4]
+            if keyed.get(parent) == parent_column:
+                references[(table_name, column)] = parent
+        columns = {row[1] for row in conn.execute(f"PRAGMA {schema}.table_info({table_name})")}
+        for (ref_table, column), parent in IMPLICIT_REFERENCES.items():
+            if ref_table == table_name and column in columns and parent in keyed:
+                references.setdefault((table_name, column), parent)
+    return references
+
+
+def _retype_column(sql, column, definition):
+    """Replace the start of a column's definition line in a CREATE TABLE statement"""
+    pattern = re.compile(rf'^(\s*){column}\s+TEXT\b(\s+PRIMARY\s+KEY)?', re.MULTILINE | re.IGNORECASE)
+    sql, count = pattern.subn(lambda match: match.group(1) + definition.replace('\n', '\n' + match.group(1)), sql)
+    if count != 1:
+        raise ValueError(f"Cannot find the definition of column {column} in:\n{sql}")
+    return sql
+
+
+def compact_table_sql(sql, key_column, reference_columns_):
+    """CREATE TABLE statement with INTEGER keys and the external_id column"""
+    if key_column:
+        sql = _retype_column(sql, key_column,
+                             f"{key_column} INTEGER PRIMARY KEY,\n{EXTERNAL_ID_COLUMN} TEXT NOT NULL UNIQUE")
+    for column in reference_columns_:
+        if column != key_column:
+            sql = _retype_column(sql, column, f"{column} INTEGER")
+    return sql
+
+
+# ============================================================================
+# BUILD
+# ============================================================================
+
+def build_compact_database(source_path, target_path, overwrite=False):
+    """
+    Copy source_path into a new compact-keyed database at target_path
+
+    Returns:
+        dict: Keyed tables, converted references, rows copied and the
+              references left unresolved ((table, column) -> count)
+    """
+    if not os.path.exists(source_path):
+        raise FileNotFoundError(f"{source_path} not found")
+    if os.path.exists(target_path):
+        if not overwrite:
+            raise FileExistsError(f"{target_path} exists - use --force to replace it")
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(target_path + suffix):
+                os.remove(target_path + suffix)
+
+    started = time.perf_counter()
+    conn = sqlite3.connect(target_path)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("ATTACH DATABASE ? AS src", (source_path,))
+        cursor.execute("PRAGMA main.journal_mode = OFF").fetchone()
+        cursor.execute("PRAGMA main.synchronous = OFF")
+        cursor.execute("PRAGMA cache_size = -262144")
+
+        keyed = keyed_tables(conn, 'src')
+        for name in keyed:
+            columns = [row[1] for row in cursor.execute(f"PRAGMA src.table_info({name})")]
+            if EXTERNAL_ID_COLUMN in columns:
+                raise ValueError(f"{name} already has a {EXTERNAL_ID_COLUMN} column")
+        references = reference_columns(conn, keyed, 'src')
+        objects = cursor.execute("""
+            SELECT type, name, tbl_name, sql FROM src.sqlite_master
+            WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%'
+            ORDER BY rowid
+        """).fetchall()
+
+        # Tables and rows
+        rows_copied = 0
+        cursor.execute("BEGIN")
+        for object_type, table_name, _, sql in objects:
+            if object_type != 'table':
+                continue
+            key_column = keyed.get(table_name)
+            table_references = [column for (ref_table, column) in references if ref_table == table_name]
+            cursor.execute(compact_table_sql(sql, key_column, table_references))
+
+            columns = [row[1] for row in cursor.execute(f"PRAGMA src.table_info({table_name})")]
+            select = []
+            for column in columns:
+                if column == key_column:
+                    select.append("s.rowid")
+                elif (table_name, column) in references:
+                    parent = references[(table_name, column)]
+                    select.append(f"COALESCE((SELECT p.rowid FROM src.{parent} p "
+                                  f"WHERE p.{keyed[parent]} = s.{column}), s.{column})")
+                else:
+                    select.append(f"s.{column}")
+            insert_columns = list(columns)
+            if key_column:
+                insert_columns.append(EXTERNAL_ID_COLUMN)
+                select.append(f"s.{key_column}")
+            cursor.execute(f"""
+                INSERT INTO main.{table_name} ({', '.join(insert_columns)})
+                SELECT {', '.join(select)} FROM src.{table_name} s
+            """)
+            rows_copied += cursor.rowcount
+        conn.commit()
+
+        # Indexes, views and triggers once the rows are in
+        for object_type, name, _, sql in objects:
+            if object_type != 'table':
+                cursor.execute(sql)
+        # Materialized views were copied with TEXT ids
+        cursor.execute("DELETE FROM main.mv_change_log")
+        conn.commit()
+        rebuild_materialized_views(conn)
+        cursor.execute("ANALYZE main")
+        version = cursor.execute("PRAGMA src.user_version").fetchone()[0]
+        cursor.execute(f"PRAGMA main.user_version = {int(version)}")
+        conn.commit()
+
+        # References that kept their TEXT id (no parent row)
+        unresolved = {}
+        for table_name, column in references:
+            count = cursor.execute(
+                f"SELECT COUNT(*) FROM main.{table_name} WHERE typeof({column}) = 'text'"
+            ).fetchone()[0]
+            if count:
+                unresolved[(table_name, column)] = count
+
+        cursor.execute("DETACH DATABASE src")
+        cursor.execute("PRAGMA journal_mode = WAL").fetchone()
+    finally:
+        conn.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"  ✓ {len(keyed)} tables re-keyed, {len(references)} references converted, "
+          f"{rows_copied:,} rows in {elapsed:.1f}s")
+    for (table_name, column), count in sorted(unresolved.items()):
+        print(f"  ⚠️  {table_name}.{column}: {count:,} ids with no parent row kept as TEXT")
+    return {
+        'keyed_tables': keyed,
+        'references': {f"{table}.{column}": parent for (table, column), parent in references.items()},
+        'rows': rows_copied,
+        'unresolved': {f"{table}.{column}": count for (table, column), count in unresolved.items()},
+        'seconds': round(elapsed, 2),
+    }
+
+
+def key_for(cursor, table_name, external_id):
+    """Integer key of the row with this external (TEXT) id, or None"""
+    key_column = next(row[1] for row in cursor.execute(f"PRAGMA table_info({table_name})") if row[5])
+    row = cursor.execute(
+        f"SELECT {key_column} FROM {table_name} WHERE {EXTERNAL_ID_COLUMN} = ?", (external_id,)
+    ).fetchone()
+    return row[0] if row else None
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def database_size(db_path):
+    """
+    File size and bytes per table / index (dbstat, where SQLite has it)
+
+    Returns:
+        dict: bytes, objects (name -> bytes, or None without dbstat)
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        try:
+            objects = dict(conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name"))
+        except sqlite3.OperationalError:
+            objects = None
+    finally:
+        conn.close()
+    return {'bytes': page_size * page_count, 'objects': objects}
+
+
+def _time_query(conn, sql, params, repeats):
+    """Rows and best-of-repeats seconds of one query"""
+    timings = []
+    rows = 0
+    for _ in range(repeats):
+        started = time.perf_counter()
+        rows = len(conn.execute(sql, params).fetchall())
+        timings.append(time.perf_counter() - started)
+    return rows, min(timings)
+
+
+def run_benchmark(scale=1.0, seed=42, output_path='compact_keys_report.json'):
+    """
+    Size and join speed of a synthetic database and its compact copy
+
+    Returns:
+        dict: The report
+    """
+    from query_benchmark import BENCHMARK_REPEATS, QUERIES, benchmark_params
+    from synthetic_data import generate_database
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        text_path = os.path.join(temp_dir, 'text_keys.db')
+        compact_path = os.path.join(temp_dir, 'compact_keys.db')
+        generate_database(text_path, scale, seed)
+        print("\n→ Building compact copy")
+        build = build_compact_database(text_path, compact_path)
+
+        # Same page layout for both: freshly packed
+        for path in (text_path, compact_path):
+            conn = sqlite3.connect(path)
+            conn.execute("VACUUM")
+            conn.close()
+        sizes = {'text': database_size(text_path), 'compact': database_size(compact_path)}
+
+        queries = JOIN_QUERIES + [{'name': query['name'], 'sql': query['sql']} for query in QUERIES]
+        results = {query['name']: {'name': query['name']} for query in queries}
+        for mode, path in (('text', text_path), ('compact', compact_path)):
+            conn = sqlite3.connect(path)
+            try:
+                params = benchmark_params(conn)
+                for query in queries:
+                    rows, seconds = _time_query(conn, query['sql'], params, BENCHMARK_REPEATS)
+                    results[query['name']][f'{mode}_rows'] = rows
+                    results[query['name']][f'{mode}_seconds'] = round(seconds, 6)
+            finally:
+                conn.close()
+
+    for result in results.values():
+        result['speedup'] = (round(result['text_seconds'] / result['compact_seconds'], 2)
+                             if result['compact_seconds'] else None)
+
+    objects = []
+    if sizes['text']['objects'] and sizes['compact']['objects']:
+        for name, text_bytes in sorted(sizes['text']['objects'].items(), key=lambda item: -item[1]):
+            compact_bytes = sizes['compact']['objects'].get(name)
+            objects.append({'name': name, 'text_bytes': text_bytes, 'compact_bytes': compact_bytes})
+
+    report = {
+        'generated_at': datetime.now().isoformat(),
+        'sqlite_version': sqlite3.sqlite_version,
+        'scale': scale,
+        'seed': seed,
+        'build': build,
+        'size': {
+            'text_bytes': sizes['text']['bytes'],
+            'compact_bytes': sizes['compact']['bytes'],
+            'ratio': round(sizes['compact']['bytes'] / sizes['text']['bytes'], 3),
+        },
+        'objects': objects,
+        'queries': list(results.values()),
+    }
+    with open(output_path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    mb = 1024 * 1024
+    print(f"\n  Database size: TEXT keys {sizes['text']['bytes'] / mb:,.1f} MB, "
+          f"compact keys {sizes['compact']['bytes'] / mb:,.1f} MB ({report['size']['ratio']:.0%})")
+    if objects:
+        print(f"\n  {'Largest tables / indexes':<40} {'TEXT MB':>10} {'Compact MB':>11}")
+        for entry in objects[:10]:
+            compact = f"{entry['compact_bytes'] / mb:>11.1f}" if entry['compact_bytes'] else f"{'-':>11}"
+            print(f"  {entry['name'][:40]:<40} {entry['text_bytes'] / mb:>10.1f} {compact}")
+
+    print(f"\n  {'Query':<36} {'TEXT s':>9} {'Compact s':>10} {'Speedup':>8}")
+    print("  " + "-" * 66)
+    for result in report['queries']:
+        mismatch = '  ⚠️  row counts differ' if result['text_rows'] != result['compact_rows'] else ''
+        speedup = f"{result['speedup']:.2f}x" if result['speedup'] else '-'
+        print(f"  {result['name'][:36]:<36} {result['text_seconds']:>9.4f} "
+              f"{result['compact_seconds']:>10.4f} {speedup:>8}{mismatch}")
+    print(f"\n  Report: {output_path}")
+    return report
+
+
+# Command-line interface
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Build an INTEGER-keyed copy of a database, or benchmark one')
+    parser.add_argument('source', nargs='?', help='TEXT-keyed database to copy')
+    parser.add_argument('target', nargs='?', help='Compact database to create')
+    parser.add_argument('--force', action='store_true', help='Replace an existing target')
+    parser.add_argument('--benchmark', action='store_true', help='Compare size and join speed on synthetic data')
+    parser.add_argument('--scale', type=float, default=1.0, help='Synthetic data scale (1.0 = 1,000 terminals)')
+    parser.add_argument('--seed', type=int, default=42, help='Synthetic data seed')
+    parser.add_argument('--output', default='compact_keys_report.json', help='Benchmark JSON report path')
+    args = parser.parse_args()
+
+    print("\n" + "=" * 80)
+    print("COMPACT KEYS")
+    print("=" * 80)
+
+    if args.benchmark:
+        run_benchmark(args.scale, args.seed, args.output)
+    elif args.source and args.target:
+        try:
+            build_compact_database(args.source, args.target, args.force)
+        except (OSError, ValueError, sqlite3.Error) as e:
+            print(f"\n❌ {e}")
+            sys.exit(1)
+        print(f"\n✅ Compact database: {args.target}")
+    else:
+        parser.print_usage()
+        sys.exit(2)
@@ -44,16 +44,29 @@ against simplified SQLite implementation. Includes:
     line_item_type_alias_errors, index_alias_errors,
     price_day_alias_errors
 
-  ETL TRACKING (2 tables)
-  - batches, shipping_tracking
+  ETL TRACKING (4 tables)
+  - batches, shipping_tracking, run_checkpoints, source_row_fingerprints
+
+  MATERIALIZED VIEWS (3 tables, see materialized_views.py)
+  - mv_active_shipping, mv_change_log, mv_refresh_state
+
+  ARCHIVING (1 table, see history_archive.py)
+  - archive_index
 
 Total: ~52 tables, 5+ views, seed data
+
+New databases are stamped with the latest schema version (PRAGMA
+user_version); existing databases are upgraded with migrations.py.
 """
 
 import sqlite3
 from datetime import datetime
 import uuid
 
+from history_archive import ensure_archive_schema
+from materialized_views import ensure_materialized_views
+from migrations import SCHEMA_VERSION, set_version
+
 
 def generate_id():
     """Generate a UUID for primary keys"""
@@ -132,6 +145,7 @@ def create_complete_database(db_path='supply_chain.db'):
         end_date DATE,
         data_quality_score REAL DEFAULT 0.0,
         last_verified TIMESTAMP,
+        row_fingerprint TEXT,
         created_by TEXT,
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
         updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
@@ -959,6 +973,10 @@ def create_complete_database(db_path='supply_chain.db'):
         error_message TEXT,
         started_at TIMESTAMP,
         completed_at TIMESTAMP,
+        parent_batch_id TEXT,
+        source_path TEXT,
+        rows_per_second REAL,
+        phase_timings TEXT,
         created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
     )
     """)
@@ -978,6 +996,32 @@ def create_complete_database(db_path='supply_chain.db'):
     """)
     print("  ✓ shipping_tracking")
 
+    # 54. Run Checkpoints (per-phase staging so interrupted agent runs can resume)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS run_checkpoints (
+        run_id TEXT NOT NULL,
+        agent_type TEXT NOT NULL,
+        phase TEXT NOT NULL,
+        payload TEXT,
+        completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (run_id, phase)
+    )
+    """)
+    print("  ✓ run_checkpoints")
+
+    # 55. Source Row Fingerprints (per-row hashes from the last import of each document)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS source_row_fingerprints (
+        document_type TEXT NOT NULL,
+        document_name TEXT NOT NULL,
+        table_name TEXT NOT NULL,
+        record_id TEXT NOT NULL,
+        row_fingerprint TEXT NOT NULL,
+        PRIMARY KEY (document_type, document_name, table_name, record_id)
+    )
+    """)
+    print("  ✓ source_row_fingerprints")
+
     # ========================================================================
     # INDEXES
     # ========================================================================
@@ -989,26 +1033,34 @@ def create_complete_database(db_path='supply_chain.db'):
         ("idx_terminals_tcn", "terminals(irs_tcn)"),
         ("idx_terminals_code", "terminals(terminal_code)"),
         ("idx_terminals_market", "terminals(terminal_market_id)"),
+        ("idx_terminals_open", "terminals(effective_date) WHERE end_date IS NULL"),
+        ("idx_terminals_ended", "terminals(end_date, effective_date) WHERE end_date IS NOT NULL"),
+        ("idx_terminals_location", "terminals(UPPER(TRIM(COALESCE(state, ''))))"),
         ("idx_terminal_products_terminal", "terminal_products(terminal_id)"),
         ("idx_terminal_products_product", "terminal_products(product_id)"),
         ("idx_products_category", "products(product_category_id)"),
-        ("idx_tasks_status", "agent_tasks(status)"),
         ("idx_tasks_agent_type", "agent_tasks(agent_type)"),
+        ("idx_source_documents_name", "source_documents(document_type, document_name)"),
         ("idx_tariffs_pipeline", "pipeline_tariffs(pipeline_id)"),
         ("idx_tariffs_library", "pipeline_tariffs(tariff_library_id)"),
+        ("idx_tariffs_open", "pipeline_tariffs(effective_date) WHERE end_date IS NULL"),
+        ("idx_tariffs_ended", "pipeline_tariffs(end_date, effective_date) WHERE end_date IS NOT NULL"),
         ("idx_transport_costs_terminal", "transportation_costs(terminal_id)"),
         ("idx_costing_terminal_category", "costing(terminal_id, product_category_id)"),
         ("idx_costing_dates", "costing(start_date, end_date)"),
         ("idx_costing_item", "costing(costing_item_id)"),
-        ("idx_shipping_periods_terminal", "shipping_periods(terminal_id)"),
+        ("idx_shipping_periods_terminal_start", "shipping_periods(terminal_id, start_date)"),
         ("idx_shipping_periods_dates", "shipping_periods(start_date, end_date)"),
+        ("idx_shipping_periods_status", "shipping_periods(period_status, end_date)"),
+        ("idx_shipping_periods_modified", "shipping_periods(modified_date)"),
         ("idx_shipping_line_items_period", "shipping_line_items(shipping_period_id)"),
         ("idx_shipping_line_items_product", "shipping_line_items(product_id)"),
         ("idx_shipping_line_items_lit", "shipping_line_items(line_item_type_id)"),
         ("idx_spot_indices_market", "spot_indices(spot_market_id)"),
         ("idx_spot_indices_product", "spot_indices(product_id)"),
         ("idx_bcs_type", "bcs(bcs_type_id)"),
-        ("idx_bcs_periods_bcs", "bcs_periods(bcs_id)"),
+        ("idx_bcs_terminal_alias", "bcs(primary_terminal_alias)"),
+        ("idx_bcs_periods_bcs_dates", "bcs_periods(bcs_id, start_date, end_date)"),
         ("idx_bcs_line_items_period", "bcs_line_items(bcs_period_id)"),
         ("idx_terminal_path_links_terminal", "terminal_path_links(terminal_id)"),
         ("idx_terminal_path_links_path", "terminal_path_links(shipping_path_id)"),
@@ -1017,11 +1069,28 @@ def create_complete_database(db_path='supply_chain.db'):
         ("idx_tariff_costs_library", "tariff_costs(tariff_library_id)"),
         ("idx_shipping_setup_tp", "shipping_setup(terminal_product_id)"),
         ("idx_shipping_setup_lit", "shipping_setup(line_item_type_id)"),
+        ("idx_batches_parent", "batches(parent_batch_id)"),
+        ("idx_batches_type_started", "batches(batch_type, started_at)"),
     ]
 
     for idx_name, idx_def in indexes:
         cursor.execute(f"CREATE INDEX IF NOT EXISTS {idx_name} ON {idx_def}")
-    print(f"  ✓ Created {len(indexes)} indexes")
+
+    # One transportation_costs version per terminal, product and effective date
+    cursor.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_transport_costs_version
+        ON transportation_costs(terminal_id, product_type, effective_date)
+    """)
+    cursor.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_costing_version
+        ON costing(terminal_id, product_category_id, costing_item_id, start_date)
+    """)
+    print(f"  ✓ Created {len(indexes) + 2} indexes")
+
+    # Month-by-month archiving of agent_tasks / data_quality_log: the index
+    # of archived months and the timestamp indexes the archiver seeks
+    ensure_archive_schema(cursor)
+    print("  ✓ archive_index (+ archiver indexes)")
 
     # ========================================================================
     # VIEWS
@@ -1146,6 +1215,11 @@ def create_complete_database(db_path='supply_chain.db'):
     """)
     print("  ✓ v_bcs_detail")
 
+    # Stored copy of v_active_shipping, kept current
+    # through triggers and a change log
+    ensure_materialized_views(cursor)
+    print("  ✓ mv_active_shipping (materialized)")
+
     conn.commit()
 
     # ========================================================================
@@ -1225,6 +1299,7 @@ def create_complete_database(db_path='supply_chain.db'):
         (generate_id(), 'transloading_estimate', 'Ethanol transloading cost', 1),
         (generate_id(), 'truck_freight_estimate', 'Ethanol truck freight cost', 1),
         (generate_id(), 'line_loss', 'Pipeline line loss', 1),
+        (generate_id(), 'transportation_estimate', 'Estimated transportation cost (if not itemized)', 1),
     ]
     cursor.executemany("""
         INSERT OR IGNORE INTO costing_items (costing_item_id, costing_item_name, costing_item_description, shipping_status)
@@ -1289,6 +1364,9 @@ def create_complete_database(db_path='supply_chain.db'):
     """, index_components_data)
     print(f"  ✓ Seeded {len(index_components_data)} index components")
 
+    # Built at the latest schema - nothing for migrations.py to apply
+    set_version(cursor, SCHEMA_VERSION)
+
     conn.commit()
 
     # ========================================================================
@@ -1314,6 +1392,7 @@ def create_complete_database(db_path='supply_chain.db'):
     print(f"\n  Tables created: {table_count}")
     print(f"  Views created:  {view_count}")
     print(f"  Indexes created: {index_count}")
+    print(f"  Schema version: {SCHEMA_VERSION}")
     print(f"\n  Database file: {db_path}")
 
     print("\n  Table Groups:")
@@ -1327,7 +1406,8 @@ def create_complete_database(db_path='supply_chain.db'):
     print("    Alias/Tenant:     7 tables (aliases for multi-tenant)")
     print("    Management:       5 tables (tasks, quality, metrics)")
     print("    Error Tracking:   5 tables (alias errors)")
-    print("    ETL:              2 tables (batches, shipping tracking)")
+    print("    ETL:              4 tables (batches, shipping tracking, checkpoints, row fingerprints)")
+    print("    Materialized:     3 tables (mv_active_shipping, change log, refresh state)")
 
     print("\n  Seed Data:")
     print("    Product Categories: GAS, ETH, DSL")
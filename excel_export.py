@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Excel Export - Shipping and BCS QA workbooks
+Streams query results into the tab layouts of the EN QA workbooks
+
+The QA workflow in Reference/Domain Knowledge/sql_queries pastes query
+output into tabs of "EN Costing to EN Shipping" and "EN Shipping to EN BCS".
+This exporter writes those tabs directly:
+
+  - openpyxl write_only mode - rows go straight to the sheet XML, nothing
+    is kept per cell
+  - cursor.fetchmany() chunks - at most EXPORT_FETCH_SIZE rows are in
+    memory at once
+
+so a full-history export costs the same memory as a one-period export.
+The v_active_shipping tab reads its materialized copy (materialized_views.py),
+refreshed before the first tab; the v_bcs_detail tab reads the view.
+Exports read the read replica (read_replica.py) when there is one, so a
+long export does not hold up the agents' writes; --primary reads
+supply_chain.db itself.
+The table tabs (Sheet6, Sheet7) match the template tabs and the
+sheet_mappings used to import them, so they can be re-imported as-is. The
+view tabs (v_active_shipping, v_bcs_detail) are not in the templates -
+they are new tabs named after the view, with the view's columns; the
+templates' "after trigger" and query_expected tabs are not exported.
+"""
+
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+from materialized_views import READ_SQL, refresh as refresh_materialized_views
+from read_replica import connect_for_reporting
+from sheet_mappings import EN_SHIPPING_PERIODS, EN_SHIPPING_LINE_ITEMS
+
+try:
+    import openpyxl
+except ImportError:
+    print("\n❌ ERROR: openpyxl library not installed")
+    print("Please install it: pip install openpyxl")
+    sys.exit(1)
+
+# Rows fetched from SQLite per round trip
+EXPORT_FETCH_SIZE = 5000
+
+# Workbooks and their tabs - template tabs first, then the view tabs
+EXPORTS = {
+    'en_shipping': {
+        'filename': 'EN Costing to EN Shipping.xlsx',
+        'tabs': [
+            {
+                'tab': EN_SHIPPING_PERIODS['sheet'],
+                'query': """
+                    SELECT shipping_period_id, terminal_id, start_date, end_date,
+                           created_date, modified_date
+                    FROM shipping_periods
+                    ORDER BY terminal_id, start_date
+                """,
+                'date_columns': ('start_date', 'end_date', 'created_date', 'modified_date'),
+            },
+            {
+                'tab': EN_SHIPPING_LINE_ITEMS['sheet'],
+                'query': """
+                    SELECT shipping_line_item_id, shipping_period_id, product_id,
+                           line_item_type_id, base_product_id, spot_index_id,
+                           line_item_adder, line_item_percent,
+                           created_at AS created_date, updated_at AS modified_date
+                    FROM shipping_line_items
+                    ORDER BY shipping_period_id, product_id, line_item_type_id
+                """,
+                'date_columns': ('created_date', 'modified_date'),
+            },
+            {
+                'tab': 'v_active_shipping',
+                'query': READ_SQL['v_active_shipping'] + """
+                    ORDER BY terminal_name, start_date, product_code, line_item_type_name
+                """,
+                'date_columns': ('start_date', 'end_date'),
+            },
+        ],
+    },
+    'en_bcs': {
+        'filename': 'EN Shipping to EN BCS.xlsx',
+        'tabs': [
+            {
+                'tab': 'v_bcs_detail',
+                'query': """
+                    SELECT * FROM v_bcs_detail
+                    ORDER BY bcs_code, start_date
+                """,
+                'date_columns': ('start_date', 'end_date'),
+            },
+        ],
+    },
+}
+
+
+def _to_excel_datetime(value):
+    """SQLite date/timestamp text -> datetime, so Excel sees a real date"""
+    if not value or not isinstance(value, str):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return value
+
+
+class ExcelExporter:
+    """Exports shipping and BCS result sets to QA workbooks"""
+
+    def __init__(self, db_path='supply_chain.db', fetch_size=EXPORT_FETCH_SIZE, use_replica=True):
+        self.db_path = db_path
+        self.fetch_size = fetch_size
+        self.use_replica = use_replica
+
+    def export(self, name, output_dir='.'):
+        """
+        Write one QA workbook
+
+        Args:
+            name: Key of EXPORTS ('en_shipping' or 'en_bcs')
+            output_dir: Directory for the workbook (template file name is kept)
+
+        Returns:
+            dict: Output path and rows written per tab
+        """
+        spec = EXPORTS[name]
+        output_path = os.path.join(output_dir, spec['filename'])
+        print(f"\n→ Exporting {name} to {output_path}")
+
+        started = time.perf_counter()
+        workbook = openpyxl.Workbook(write_only=True)
+        if self.use_replica:
+            conn, reading_replica = connect_for_reporting(self.db_path)
+        else:
+            conn, reading_replica = sqlite3.connect(self.db_path), False
+        tabs = {}
+        try:
+            # A replica's materialized views were refreshed when it was taken
+            if not reading_replica:
+                for mv_name, result in refresh_materialized_views(conn).items():
+                    if result['keys']:
+                        print(f"  ✓ Refreshed {mv_name} ({result['keys']} keys, {result['seconds']:.2f}s)")
+            for tab in spec['tabs']:
+                tabs[tab['tab']] = self._write_tab(conn, workbook, tab)
+                print(f"  ✓ {tab['tab']}: {tabs[tab['tab']]} rows")
+        finally:
+            conn.close()
+
+        workbook.save(output_path)
+        elapsed = time.perf_counter() - started
+        print(f"  ✓ Saved in {elapsed:.2f}s")
+
+        return {'path': output_path, 'tabs': tabs, 'elapsed_seconds': round(elapsed, 3)}
+
+    def _write_tab(self, conn, workbook, tab):
+        """Stream one query into a new sheet, fetch_size rows at a time"""
+        sheet = workbook.create_sheet(tab['tab'])
+        cursor = conn.execute(tab['query'])
+        headers = [column[0] for column in cursor.description]
+        sheet.append(headers)
+
+        # Positions of date columns, resolved once for the whole tab
+        date_positions = [i for i, header in enumerate(headers)
+                          if header in tab.get('date_columns', ())]
+
+        written = 0
+        while True:
+            rows = cursor.fetchmany(self.fetch_size)
+            if not rows:
+                break
+            for row in rows:
+                if date_positions:
+                    row = list(row)
+                    for i in date_positions:
+                        row[i] = _to_excel_datetime(row[i])
+                sheet.append(row)
+            written += len(rows)
+        return written
+
+
+# Command-line interface
+if __name__ == "__main__":
+    print("\n" + "="*80)
+    print("  EXCEL EXPORT - SHIPPING & BCS QA WORKBOOKS")
+    print("="*80)
+
+    use_replica = '--primary' not in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg != '--primary']
+    if not args or args[0] not in list(EXPORTS) + ['all']:
+        print("\nUsage:")
+        print(f"  python excel_export.py {{{'|'.join(EXPORTS)}|all}} [output_dir] [--primary]")
+        print("\n  --primary  Read supply_chain.db instead of its read replica")
+        sys.exit(1)
+
+    output_dir = args[1] if len(args) > 1 else '.'
+    os.makedirs(output_dir, exist_ok=True)
+
+    exporter = ExcelExporter('supply_chain.db', use_replica=use_replica)
+    names = list(EXPORTS) if args[0] == 'all' else [args[0]]
+    for name in names:
+        exporter.export(name, output_dir)
+
+    print("\n✅ Export complete")
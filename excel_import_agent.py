@@ -7,9 +7,33 @@ Each row = one terminal with all cost data in columns
 import sqlite3
 import json
 from datetime import datetime, date
-import hashlib
 import sys
 import os
+import posixpath
+import glob
+import itertools
+import re
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from source_fingerprints import (
+    file_hash, row_fingerprint, get_last_checksum, record_source_document,
+    ensure_row_fingerprint_table, load_row_fingerprints,
+    save_row_fingerprints, delete_row_fingerprints,
+)
+from terminal_ids import TerminalIdService, terminal_natural_key
+from quality_log import QualityLogSink
+from batch_tracking import (
+    PhaseTimer, ensure_batch_table, start_batch, update_batch_progress, finish_batch,
+)
+from sheet_mappings import (
+    COERCERS, COSTING_DETAIL, MAPPINGS, read_sheet, read_source, table_mapping,
+)
+
+# source_documents type for imported costing workbooks
+SOURCE_DOCUMENT_TYPE = 'Costing Workbook'
 
 try:
     import openpyxl
@@ -18,48 +42,346 @@ except ImportError:
     print("Please install it: pip install openpyxl")
     sys.exit(1)
 
+# Terminal rows buffered before each write to the database
+IMPORT_CHUNK_SIZE = 1000
+
+# Keys per IN (...) lookup - stays well under SQLite's bound-parameter limit
+LOOKUP_CHUNK_SIZE = 500
+
+# Parsed workbooks in flight per parser process - bounds the rows held in
+# memory while the writer catches up
+PARSE_AHEAD_PER_WORKER = 2
+
+# Tables the importer writes, and the record field its row hashes are keyed on
+IMPORT_TABLES = {
+    'terminals': 'terminal_id',
+    'transportation_costs': 'transport_cost_id',
+    'costing': 'costing_series',
+}
+
+# Effective-dated tables: one row per series and start date; a changed value
+# adds a version and the version it supersedes is end-dated
+VERSIONED_TABLES = {
+    'transportation_costs': {
+        'key': 'transport_cost_id',
+        'series': ('terminal_id', 'product_type'),
+        'value': 'combined_adder',
+        'start': 'effective_date',
+        'modified': 'updated_at',
+    },
+    'costing': {
+        'key': 'costing_id',
+        'series': ('terminal_id', 'product_category_id', 'costing_item_id'),
+        'value': 'costing_value',
+        'start': 'start_date',
+        'modified': 'modified_date',
+    },
+}
+
+# Namespace for UUIDv5 costing IDs - never change this, IDs depend on it
+COSTING_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, 'supply-chain-mapping/costing')
+
+# Namespace for UUIDv5 transportation cost IDs - never change this either
+TRANSPORT_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, 'supply-chain-mapping/transportation-cost')
+
+# Costing Detail component groups and their product_categories code
+COMPONENT_GROUPS = {
+    'eth_components': 'ETH',
+    'gas_components': 'GAS',
+}
+
+# Costing Detail component header -> costing_items name
+COSTING_ITEMS = {
+    'facilities charge': 'facilities_charge',
+    'throughput': 'throughput',
+    'terminaling estimate': 'terminaling_estimate',
+    'generic additive': 'additive',
+    'tariff': 'tariff',
+    'tvm': 'tvm',
+    'basis': 'basis',
+    'line loss': 'line_loss',
+    'fuel surcharge': 'fuel_surcharge',
+    'transload': 'transloading_estimate',
+    'truck freight': 'truck_freight_estimate',
+    'wholesale margin': 'margin',
+    'transportation estimate': 'transportation_estimate',
+}
+
+# Sheet holding one terminal per row
+COSTING_SHEET = COSTING_DETAIL['sheet']
+
+# Costing sources: workbooks go through openpyxl, exports through the columnar readers
+WORKBOOK_EXTENSIONS = ('.xlsx', '.xlsm')
+EXPORT_EXTENSIONS = ('.csv', '.parquet')
+
+# Effective date used when neither the run nor the file supplies one
+DEFAULT_EFFECTIVE_DATE = date(2024, 1, 1)
+
+# A YYYY-MM or YYYY-MM-DD date in a file name, e.g. Costing_2024-03.xlsx, costing_20240315.csv
+FILE_NAME_DATE = re.compile(
+    r'(?<!\d)(20\d{2})[-_.]?(0[1-9]|1[0-2])(?:[-_.]?(0[1-9]|[12]\d|3[01]))?(?!\d)'
+)
+
+# Label of an effective date cell above the Costing Detail headers
+EFFECTIVE_DATE_LABEL = 'effective date'
+
+
+def is_workbook(path):
+    """True for Excel workbooks, False for CSV / Parquet exports"""
+    return os.path.splitext(path)[1].lower() in WORKBOOK_EXTENSIONS
+
+
+def file_effective_date(path, workbook=None):
+    """
+    Effective date a costing file declares, or None
+    
+    Looks for an "Effective Date" label above the Costing Detail headers
+    (the date is the next filled cell to its right), then for a YYYY-MM[-DD]
+    date in the file name - a month alone means the 1st.
+    """
+    if workbook is not None and COSTING_SHEET in workbook.sheetnames:
+        for row in workbook[COSTING_SHEET].iter_rows(
+                min_row=1, max_row=COSTING_DETAIL['header_row'] - 1, values_only=True):
+            for i, value in enumerate(row):
+                if not isinstance(value, str) or value.strip().lower().rstrip(':') != EFFECTIVE_DATE_LABEL:
+                    continue
+                found = next((cell for cell in row[i + 1:] if cell is not None), None)
+                found = COERCERS['date'](found)
+                if found:
+                    return found
+    
+    match = FILE_NAME_DATE.search(os.path.basename(path))
+    if match:
+        year, month, day = match.groups()
+        try:
+            return date(int(year), int(month), int(day or 1))
+        except ValueError:
+            return None
+    return None
+
+
+def document_key(path, root=None):
+    """
+    Name a source document by its path relative to the import root
+    
+    Two folders can each hold a Costing_2024-01.xlsx; keyed by file name alone
+    they would share a checksum and one set of row hashes. A file directly in
+    the root (by default, its own directory) keeps its plain file name.
+    """
+    root = root if root is not None else os.path.dirname(os.path.abspath(path))
+    return os.path.relpath(os.path.abspath(path), os.path.abspath(root)).replace(os.sep, '/')
+
+
+def import_root(source):
+    """Directory an import_many source is keyed from - the folder, or a glob's fixed prefix"""
+    if os.path.isdir(source):
+        return source
+    return os.path.dirname(re.split(r'[*?[]', source, maxsplit=1)[0]) or '.'
+
+
+def document_series(document_name):
+    """Document name without the file name's date - the snapshots of one workbook share a series"""
+    directory, file_name = posixpath.split(document_name)
+    return posixpath.join(directory, FILE_NAME_DATE.sub('', file_name))
+
+
+def iter_costing_detail(records):
+    """
+    Turn mapped Costing Detail records into terminals, their transport costs
+    and their unpivoted cost components
+    
+    Yields:
+        tuple: (terminal, transport_costs, costings) for each record
+    """
+    for record in records:
+        # Terminal ID is resolved in bulk when the chunk is flushed
+        natural_key = terminal_natural_key(
+            terminal_code=record['terminal_code'], state=record['state'], city=record['city']
+        )
+        
+        terminal = {
+            'natural_key': natural_key,
+            'terminal_name': record['terminal_name'],
+            'terminal_code': record['terminal_code'],
+            'state': record['state'],
+            'city': record['city'],
+            'market': record['market'],
+            'region': record['region']
+        }
+        
+        # For each product, the combined adder becomes a transportation cost
+        transport_costs = [{
+            'natural_key': natural_key,
+            'product_type': product_name,
+            'combined_adder': combined_adder
+        } for product_name, combined_adder in record['products'].items()
+            if combined_adder is not None]
+        
+        # Each component column becomes a costing row for its product category
+        costings = [{
+            'natural_key': natural_key,
+            'category_code': category_code,
+            'costing_item_name': COSTING_ITEMS[header.lower()],
+            'costing_value': value
+        } for group, category_code in COMPONENT_GROUPS.items()
+            for header, value in record.get(group, {}).items()
+            if value is not None]
+        
+        yield terminal, transport_costs, costings
+
+
+def parse_costing_workbook(excel_path):
+    """
+    Parse a whole workbook (or CSV / Parquet export) into plain rows - no database access
+    
+    Runs in a worker process during multi-workbook imports, so it only
+    returns picklable data; IDs and writes are left to the single writer.
+    
+    Returns:
+        dict: path, rows [(terminal, transport_costs, costings), ...], the file's
+              effective_date (or None), parse_seconds and error (if any)
+    """
+    workbook = None
+    started = time.perf_counter()
+    try:
+        if is_workbook(excel_path):
+            workbook = openpyxl.load_workbook(excel_path, read_only=True, data_only=True)
+        effective_date = file_effective_date(excel_path, workbook)
+        compiled, records = read_source(excel_path, COSTING_DETAIL, workbook)
+        rows = list(iter_costing_detail(records)) if compiled else []
+        return {'path': excel_path, 'rows': rows, 'effective_date': effective_date,
+                'error': None, 'parse_seconds': time.perf_counter() - started}
+    except Exception as e:
+        return {'path': excel_path, 'rows': [], 'effective_date': None,
+                'error': str(e), 'parse_seconds': time.perf_counter() - started}
+    finally:
+        if workbook:
+            workbook.close()
+
+
+def find_workbooks(source):
+    """
+    Expand a directory or glob pattern into workbook paths
+    
+    Directories are searched recursively for .xlsx files and CSV / Parquet
+    exports; Excel lock files (~$name.xlsx) are ignored.
+    """
+    if os.path.isdir(source):
+        paths = [path for extension in WORKBOOK_EXTENSIONS + EXPORT_EXTENSIONS
+                 for path in glob.glob(os.path.join(source, '**', f'*{extension}'), recursive=True)]
+    else:
+        paths = glob.glob(source, recursive=True)
+    return sorted(path for path in paths
+                  if os.path.isfile(path) and not os.path.basename(path).startswith('~$'))
+
+
 class ExcelImportAgent:
-    """Imports costing data from Costing_Data_Final.xlsx"""
+    """
+    Imports costing data from Costing_Data_Final.xlsx
     
-    def __init__(self, db_path='supply_chain.db'):
+    Transportation costs and the unpivoted cost components in costing are
+    kept as a time series: each file is a snapshot as of its effective date,
+    a changed value adds a new version of the row and the version it
+    supersedes gets that date as its end_date.
+    """
+    
+    def __init__(self, db_path='supply_chain.db', chunk_size=IMPORT_CHUNK_SIZE,
+                 effective_date=None):
+        """
+        Args:
+            effective_date: Effective date for every import by this agent; if
+                            None, each file's own date is used (file_effective_date),
+                            falling back to DEFAULT_EFFECTIVE_DATE
+        """
         self.db_path = db_path
-        self.effective_date = date(2024, 1, 1)
+        self.chunk_size = chunk_size
+        self.effective_date = effective_date
+    
+    def _resolve_effective_date(self, file_date, effective_date=None):
+        """Run argument, then agent setting, then the file's own date, then the default"""
+        return effective_date or self.effective_date or file_date or DEFAULT_EFFECTIVE_DATE
+        
+    def import_excel(self, excel_path, force=False, effective_date=None, root=None):
+        """
+        Main import workflow
         
-    def import_excel(self, excel_path):
-        """Main import workflow"""
+        Args:
+            excel_path: Path to the costing workbook, or a CSV / Parquet export
+                        of its Costing Detail sheet (columnar fast path)
+            force: If True, re-import even if the file is unchanged since last import
+            effective_date: Date the file's values take effect (default: read from the file)
+            root: Directory the document is named relative to (default: the file's
+                  own directory, i.e. its file name - see document_key)
+        """
         print("📊 Excel Import Agent - Costing Methodology")
         print("=" * 70)
         print(f"  File: {excel_path}")
-        print(f"  Effective date: {self.effective_date}")
+        
+        # Skip the whole import if this exact file was already loaded
+        document_name = document_key(excel_path, root)
+        checksum = file_hash(excel_path)
+        if not force and checksum == self._get_last_checksum(document_name):
+            print(f"\n✓ File unchanged since last import - nothing to do")
+            self._record_batch('Excel Import', excel_path, 'Skipped')
+            return {
+                'status': 'skipped',
+                'reason': 'Source document unchanged',
+                'terminals_imported': 0,
+                'terminal_rates_imported': 0,
+                'transport_costs_imported': 0,
+            }
+        
+        workbook = None
+        parse_started = time.perf_counter()
+        if is_workbook(excel_path):
+            try:
+                # read_only streams rows from the sheet XML instead of building every cell
+                workbook = openpyxl.load_workbook(excel_path, read_only=True, data_only=True)
+            except Exception as e:
+                self._record_batch('Excel Import', excel_path, 'Failed', str(e))
+                return {'status': 'failed', 'error': str(e)}
+        
+        effective_date = self._resolve_effective_date(
+            file_effective_date(excel_path, workbook), effective_date
+        )
+        print(f"  Effective date: {effective_date}")
         print("=" * 70)
+        if workbook:
+            print(f"\n✓ Excel loaded")
+            print(f"  Sheets: {workbook.sheetnames}\n")
         
         try:
-            workbook = openpyxl.load_workbook(excel_path, data_only=True)
-        except Exception as e:
+            compiled, records = read_source(excel_path, COSTING_DETAIL, workbook)
+        except (ImportError, ValueError) as e:
+            if workbook:
+                workbook.close()
+            self._record_batch('Excel Import', excel_path, 'Failed', str(e))
             return {'status': 'failed', 'error': str(e)}
+        # Rows are parsed lazily during the load; this is the open / header scan
+        parse_seconds = time.perf_counter() - parse_started
         
-        print(f"\n✓ Excel loaded")
-        print(f"  Sheets: {workbook.sheetnames}\n")
-        
-        results = {
-            'status': 'completed',
-            'terminals_imported': 0,
-            'terminal_rates_imported': 0,
-            'transport_costs_imported': 0,
-        }
+        # The whole import is one transaction; each chunk gets its own savepoint
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
         
-        # Import from Costing Detail
-        if 'Costing Detail' in workbook.sheetnames:
+        def load(cursor):
+            if compiled is None:
+                return self._costing_counts(0, 0)
             print("=" * 70)
-            print("IMPORTING: Costing Detail")
+            print(f"IMPORTING: {COSTING_SHEET}")
             print("=" * 70)
-            sheet = workbook['Costing Detail']
-            
-            # Row 3 = headers, data starts row 4
-            term_count, rate_count, trans_count = self._import_costing_detail(sheet)
-            results['terminals_imported'] = term_count
-            results['terminal_rates_imported'] = rate_count
-            results['transport_costs_imported'] = trans_count
+            return self._import_costing_detail(compiled, records, cursor)
+        
+        try:
+            results = self._run_import(conn, document_name, checksum, excel_path, load, force,
+                                       effective_date=effective_date, parse_seconds=parse_seconds)
+        except ValueError as e:
+            # _run_import has already recorded the batch as Failed
+            print(f"\n❌ {e}")
+            return {'status': 'failed', 'error': str(e)}
+        finally:
+            if workbook:
+                workbook.close()
+            conn.close()
         
         print("\n" + "=" * 70)
         print("✅ IMPORT COMPLETE!")
@@ -67,218 +389,1074 @@ class ExcelImportAgent:
         print(f"  Terminals: {results['terminals_imported']}")
         print(f"  Terminal Rates: {results['terminal_rates_imported']}")
         print(f"  Transportation Costs: {results['transport_costs_imported']}")
+        print(f"  Costings: {results['costings_imported']}")
+        for table_name, counts in results['changes'].items():
+            print(f"  {table_name}: {counts['inserted']} inserted, {counts['updated']} updated, "
+                  f"{counts['unchanged']} unchanged, {counts['removed']} removed")
+        if results['rows_failed']:
+            print(f"  Rows rejected: {results['rows_failed']} (file will be re-read on the next run)")
+        print(f"  Throughput: {results['rows_written']} rows in {results['elapsed_seconds']:.2f}s "
+              f"({results['rows_per_second']} rows/sec)")
+        print(f"  Phases: " + ", ".join(f"{phase} {seconds:.2f}s"
+                                       for phase, seconds in results['phase_timings'].items()))
+        print(f"  Batch: {results['batch_id']}")
         print("=" * 70)
         
         return results
     
-    def _import_costing_detail(self, sheet):
+    def import_many(self, source, force=False, workers=None, effective_date=None):
         """
-        Import from Costing Detail sheet
-        Row 3 = Headers
-        Row 4+ = Data (each row = one terminal)
+        Import every workbook in a directory or matching a glob pattern
+        
+        Workbooks are parsed in a process pool (openpyxl parsing is CPU-bound,
+        so threads would serialize on the GIL). Parsed rows come back to this
+        process, which is the only writer: each workbook is loaded in its own
+        transaction, in effective-date order (dates in the file names), so a
+        folder of monthly snapshots builds the cost history in one run. At
+        most PARSE_AHEAD_PER_WORKER parsed workbooks per process wait for the
+        writer, so memory does not grow with the size of the folder. The
+        run and every file are tracked in the batches table.
+        
+        Args:
+            source: Directory (searched recursively) or glob pattern
+            force: If True, re-import workbooks that are unchanged since last import
+            workers: Parser processes (default: one per CPU)
+            effective_date: Date for every file (default: each file's own date)
         """
-        print("\n→ Reading headers from row 3...")
+        paths = find_workbooks(source)
+        print("📊 Excel Import Agent - Multi-Workbook Import")
+        print("=" * 70)
+        print(f"  Source: {source}")
+        print(f"  Workbooks found: {len(paths)}")
+        print("=" * 70)
         
-        # Get headers from row 3
-        headers_row = list(sheet.iter_rows(min_row=3, max_row=3, values_only=True))[0]
-        headers = [str(h).strip() if h else f'col_{i}' for i, h in enumerate(headers_row)]
+        summary = {
+            'status': 'completed',
+            'files': len(paths),
+            'files_imported': 0,
+            'files_skipped': 0,
+            'files_failed': 0,
+            'terminals_imported': 0,
+            'transport_costs_imported': 0,
+            'costings_imported': 0,
+            'rows_failed': 0,
+            'rows_processed': 0,
+            'results': {},
+        }
+        if not paths:
+            summary['status'] = 'failed'
+            summary['error'] = f"No workbooks found: {source}"
+            return summary
         
-        print(f"  Found {len(headers)} columns")
-        print(f"  Columns A-F: {headers[:6]}")
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        cursor = conn.cursor()
+        started = time.perf_counter()
+        run_batch_id = None
         
-        # Find key columns by index
-        state_idx = 0          # Column A
-        city_idx = 1           # Column B  
-        market_idx = 2         # Column C
-        region_idx = 3         # Column D
-        code_idx = 4           # Column E
-        name_idx = 5           # Column F
+        try:
+            ensure_batch_table(cursor)
+            run_batch_id = start_batch(cursor, 'Excel Import Run', source_path=source)
+            summary['batch_id'] = run_batch_id
+            
+            # Hash first - unchanged workbooks never reach the parser pool
+            root = import_root(source)
+            to_parse = {}
+            for path in paths:
+                checksum = file_hash(path)
+                if not force and checksum == get_last_checksum(
+                        cursor, SOURCE_DOCUMENT_TYPE, document_key(path, root)):
+                    print(f"  ⏭️  {path}: unchanged since last import")
+                    batch_id = start_batch(cursor, 'Excel Import', run_batch_id, path)
+                    finish_batch(cursor, batch_id, 'Skipped')
+                    summary['results'][path] = {'status': 'skipped'}
+                    summary['files_skipped'] += 1
+                else:
+                    to_parse[path] = checksum
+            
+            if to_parse:
+                print(f"\n→ Parsing {len(to_parse)} workbook(s)...")
+                ordered = sorted(to_parse, key=lambda path: (
+                    self._resolve_effective_date(file_effective_date(path), effective_date), path
+                ))
+                workers = workers or os.cpu_count() or 1
+                pending = iter(ordered)
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    # Parsed in parallel, written oldest snapshot first; only
+                    # a window of parses is in flight, so parsed rows for the
+                    # whole folder are never held at once
+                    in_flight = deque(
+                        pool.submit(parse_costing_workbook, path)
+                        for path in itertools.islice(pending, workers * PARSE_AHEAD_PER_WORKER)
+                    )
+                    while in_flight:
+                        parsed = in_flight.popleft().result()
+                        next_path = next(pending, None)
+                        if next_path is not None:
+                            in_flight.append(pool.submit(parse_costing_workbook, next_path))
+                        path = parsed['path']
+                        result = self._write_parsed_workbook(
+                            conn, run_batch_id, parsed, to_parse[path], root, force, effective_date
+                        )
+                        summary['results'][path] = result
+                        if result['status'] == 'completed':
+                            summary['files_imported'] += 1
+                            summary['terminals_imported'] += result['terminals_imported']
+                            summary['transport_costs_imported'] += result['transport_costs_imported']
+                            summary['costings_imported'] += result['costings_imported']
+                            summary['rows_failed'] += result['rows_failed']
+                            summary['rows_processed'] += result['rows_processed']
+                        else:
+                            summary['files_failed'] += 1
+            
+            if summary['files_failed']:
+                summary['status'] = 'completed_with_errors'
+            elapsed = time.perf_counter() - started
+            finish_batch(
+                cursor, run_batch_id,
+                'Completed' if not summary['files_failed'] else 'Completed With Errors',
+                records_processed=summary['rows_processed'],
+                records_succeeded=summary['terminals_imported'] + summary['transport_costs_imported']
+                + summary['costings_imported'],
+                records_failed=summary['rows_processed'] - summary['terminals_imported']
+                - summary['transport_costs_imported'] - summary['costings_imported'],
+                error_message=f"{summary['files_failed']} file(s) failed" if summary['files_failed'] else None,
+                rows_per_second=summary['rows_processed'] / elapsed if summary['rows_processed'] else None
+            )
+        except Exception as e:
+            if run_batch_id and not conn.in_transaction:
+                finish_batch(cursor, run_batch_id, 'Failed', error_message=str(e))
+            raise
+        finally:
+            conn.close()
         
-        # Find product columns (Clear Gas, E10, E15)
-        product_columns = {}
-        for i, header in enumerate(headers):
-            if header == 'Clear Gas':
-                product_columns['Clear Gas'] = i
-            elif header == 'E10':
-                product_columns['E10'] = i
-            elif header == 'E15':
-                product_columns['E15'] = i
+        elapsed = time.perf_counter() - started
+        print("\n" + "=" * 70)
+        print("✅ MULTI-WORKBOOK IMPORT COMPLETE!")
+        print("=" * 70)
+        print(f"  Workbooks imported: {summary['files_imported']}")
+        print(f"  Workbooks skipped (unchanged): {summary['files_skipped']}")
+        print(f"  Workbooks failed: {summary['files_failed']}")
+        print(f"  Terminals: {summary['terminals_imported']}")
+        print(f"  Transportation Costs: {summary['transport_costs_imported']}")
+        print(f"  Costings: {summary['costings_imported']}")
+        print(f"  Elapsed: {elapsed:.2f}s")
+        print("=" * 70)
         
-        print(f"  Product columns found: {product_columns}")
+        return summary
+    
+    def import_mapped(self, excel_path, mapping='tables', force=False, effective_date=None, root=None):
+        """
+        Import sheets straight into tables through declarative sheet mappings
         
-        print("\n→ Processing terminal rows (starting row 4)...")
+        Args:
+            excel_path: Workbook to import
+            mapping: Name from sheet_mappings.MAPPINGS (e.g., 'en_shipping'), or
+                     'tables' to load every sheet named after a database table
+                     with that table's columns as headers (e.g., supply_chain.xlsx)
+            force: If True, re-import even if the file is unchanged since last import
+            effective_date: Effective date recorded for the source document
+            root: Directory the document is named relative to (see import_excel)
+        """
+        print("📊 Excel Import Agent - Mapped Sheet Import")
+        print("=" * 70)
+        print(f"  File: {excel_path}")
+        print(f"  Mapping: {mapping}")
+        print("=" * 70)
         
-        terminals = []
-        terminal_rates = []
-        transport_costs = []
+        if mapping != 'tables' and mapping not in MAPPINGS:
+            return {'status': 'failed', 'error': f"Unknown mapping: {mapping}"}
         
-        row_num = 0
-        for row in sheet.iter_rows(min_row=4, values_only=True):
-            if not row or not any(row):
-                continue
-            
-            row_num += 1
-            
-            # Extract terminal info
-            state = row[state_idx] if state_idx < len(row) else None
-            city = row[city_idx] if city_idx < len(row) else None
-            market = row[market_idx] if market_idx < len(row) else None
-            region = row[region_idx] if region_idx < len(row) else None
-            terminal_code = row[code_idx] if code_idx < len(row) else None
-            terminal_name = row[name_idx] if name_idx < len(row) else None
+        document_name = document_key(excel_path, root)
+        checksum = file_hash(excel_path)
+        if not force and checksum == self._get_last_checksum(document_name):
+            print(f"\n✓ File unchanged since last import - nothing to do")
+            self._record_batch('Excel Mapped Import', excel_path, 'Skipped')
+            return {'status': 'skipped', 'reason': 'Source document unchanged', 'tables': {}}
+        
+        parse_started = time.perf_counter()
+        try:
+            workbook = openpyxl.load_workbook(excel_path, read_only=True, data_only=True)
+        except Exception as e:
+            self._record_batch('Excel Mapped Import', excel_path, 'Failed', str(e))
+            return {'status': 'failed', 'error': str(e)}
+        parse_seconds = time.perf_counter() - parse_started
+        
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        
+        def load(cursor):
+            if mapping == 'tables':
+                specs = self._table_mappings(cursor, workbook.sheetnames)
+            else:
+                specs = MAPPINGS[mapping]
             
-            # Skip if missing key fields
-            if not state or not city or not terminal_name:
+            tables = {}
+            for spec in specs:
+                if spec['sheet'] not in workbook.sheetnames:
+                    print(f"  ⚠️  Sheet not found: {spec['sheet']}")
+                    continue
+                print(f"\n→ {spec['sheet']} → {spec['table']}")
+                stored = self._load_mapped_sheet(cursor, workbook[spec['sheet']], spec)
+                tables[spec['table']] = tables.get(spec['table'], 0) + stored
+                print(f"  ✓ {stored} rows")
+            return {'tables': tables}
+        
+        try:
+            results = self._run_import(
+                conn, document_name, checksum, excel_path, load, force,
+                effective_date=self._resolve_effective_date(
+                    file_effective_date(excel_path, workbook), effective_date
+                ),
+                batch_type='Excel Mapped Import', parse_seconds=parse_seconds,
+                in_date_order=False  # mapped tables keep no versions
+            )
+        finally:
+            workbook.close()
+            conn.close()
+        
+        print("\n" + "=" * 70)
+        print("✅ IMPORT COMPLETE!")
+        print("=" * 70)
+        for table_name, stored in results['tables'].items():
+            print(f"  {table_name}: {stored}")
+        if results['rows_failed']:
+            print(f"  Rows rejected: {results['rows_failed']} (file will be re-read on the next run)")
+        print(f"  Throughput: {results['rows_written']} rows in {results['elapsed_seconds']:.2f}s "
+              f"({results['rows_per_second']} rows/sec)")
+        print("=" * 70)
+        
+        return results
+    
+    def _table_mappings(self, cursor, sheet_names):
+        """Mappings for sheets named after tables (views and unknown sheets are skipped)"""
+        tables = {row[0] for row in cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'"
+        )}
+        specs = []
+        for sheet_name in sheet_names:
+            if sheet_name not in tables:
+                continue
+            table_info = cursor.execute(f"PRAGMA table_info({sheet_name})").fetchall()
+            key = [row[1] for row in sorted(table_info, key=lambda row: row[5]) if row[5]]
+            if not key:
                 continue
+            specs.append(table_mapping(sheet_name, sheet_name, [row[1] for row in table_info], key))
+        return specs
+    
+    def _load_mapped_sheet(self, cursor, sheet, spec):
+        """Stream a mapped sheet into its table a chunk at a time"""
+        compiled, records = read_sheet(sheet, spec)
+        
+        table_name = spec['table']
+        table_columns = {row[1] for row in cursor.execute(f"PRAGMA table_info({table_name})")}
+        columns = [field for field in compiled.fields if field in table_columns]
+        unknown = [field for field in compiled.fields if field not in table_columns]
+        if unknown:
+            print(f"  ⚠️  Ignoring fields not in {table_name}: {unknown}")
+        
+        key = list(spec['key'])
+        updates = [column for column in columns if column not in key]
+        sql = f"""
+            INSERT INTO {table_name} ({', '.join(columns)})
+            VALUES ({', '.join('?' * len(columns))})
+            ON CONFLICT({', '.join(key)}) DO
+            {'UPDATE SET ' + ', '.join(f'{c} = excluded.{c}' for c in updates) if updates else 'NOTHING'}
+        """
+        row_values = [columns.index(column) for column in key]
+        
+        def label(row):
+            return '/'.join(str(row[i]) for i in row_values)
+        
+        stored = 0
+        chunk = []
+        for record in records:
+            chunk.append(tuple(record[column] for column in columns))
+            if len(chunk) >= self.chunk_size:
+                chunk_stored = len(self._write_chunk(cursor, sql, chunk, table_name, label))
+                self._chunk_done(cursor, len(chunk), chunk_stored)
+                stored += chunk_stored
+                chunk = []
+        if chunk:
+            chunk_stored = len(self._write_chunk(cursor, sql, chunk, table_name, label))
+            self._chunk_done(cursor, len(chunk), chunk_stored)
+            stored += chunk_stored
+        return stored
+    
+    def _write_parsed_workbook(self, conn, run_batch_id, parsed, checksum, root, force=False,
+                               effective_date=None):
+        """Load one parsed workbook and record its batch - runs in the writer process"""
+        path = parsed['path']
+        
+        if parsed['error']:
+            print(f"  ❌ {path}: {parsed['error']}")
+            cursor = conn.cursor()
+            batch_id = start_batch(cursor, 'Excel Import', run_batch_id, path)
+            finish_batch(cursor, batch_id, 'Failed', error_message=parsed['error'],
+                         phase_timings={'parse': round(parsed['parse_seconds'], 4)})
+            return {'status': 'failed', 'error': parsed['error']}
+        
+        effective_date = self._resolve_effective_date(parsed['effective_date'], effective_date)
+        print(f"\n→ Loading {path} ({len(parsed['rows'])} terminal rows, effective {effective_date})")
+        try:
+            result = self._run_import(
+                conn, document_key(path, root), checksum, path,
+                lambda cursor: self._load_rows(cursor, parsed['rows']), force,
+                effective_date=effective_date, parent_batch_id=run_batch_id,
+                parse_seconds=parsed['parse_seconds']
+            )
+        except (sqlite3.Error, ValueError) as e:
+            # _run_import has already recorded the file's batch as Failed
+            print(f"  ❌ {path}: {e}")
+            return {'status': 'failed', 'error': str(e)}
+        
+        print(f"  ✓ {path}: {result['terminals_imported']} terminals, "
+              f"{result['transport_costs_imported']} transport costs, "
+              f"{result['costings_imported']} costings "
+              f"({result['rows_per_second']} rows/sec)")
+        return result
+    
+    def _run_import(self, conn, document_name, checksum, excel_path, load, force=False,
+                    effective_date=DEFAULT_EFFECTIVE_DATE, batch_type='Excel Import',
+                    parent_batch_id=None, parse_seconds=0.0, in_date_order=True):
+        """
+        Run one workbook's load in a single transaction, tracked as a batch
+        
+        The batch row is opened before the transaction, updated at every chunk
+        boundary and closed with parse / transform / write timings. Parse time
+        is whatever the load spends outside transform and write (rows are
+        streamed from the source while it runs) plus parse_seconds.
+        
+        Args:
+            conn: Connection opened with isolation_level=None
+            load: Callable(cursor) -> dict of counts to merge into the results
+            force: If True, rewrite rows even when their fingerprint is unchanged
+            effective_date: Date this file's values take effect
+            parse_seconds: Parsing done before the load (e.g., in a worker process)
+            in_date_order: Reject (ValueError) a snapshot dated before the latest
+                           one of its series already loaded - its removals would
+                           close rows the later snapshot kept
+        """
+        cursor = conn.cursor()
+        ensure_batch_table(cursor)
+        self._batch_id = start_batch(cursor, batch_type, parent_batch_id, excel_path)
+        started = time.perf_counter()
+        
+        try:
+            cursor.execute("BEGIN")
+            self._begin_run(cursor, document_name, effective_date, force)
+            if in_date_order:
+                self._check_snapshot_order(cursor, document_name)
             
-            # Generate terminal ID
-            terminal_id = self._generate_terminal_id(state, city, terminal_code)
+            in_load = self._timer.get('transform') + self._timer.get('write')
+            load_started = time.perf_counter()
+            counts = load(cursor)
+            in_load = (self._timer.get('transform') + self._timer.get('write')) - in_load
+            self._timer.add('parse', parse_seconds + max(time.perf_counter() - load_started - in_load, 0.0))
             
-            # Store terminal
-            terminals.append({
-                'terminal_id': terminal_id,
-                'terminal_name': terminal_name,
-                'terminal_code': terminal_code,
-                'state': state,
-                'city': city,
-                'market': market,
-                'region': region
-            })
+            with self._timer.phase('write'):
+                self._close_removed_rows(cursor)
+                self._quality_log.flush()
+                # A checksum means "nothing left to load" - with rejected rows
+                # none is kept and the unchanged file is read again on the next
+                # run; the row still records that this snapshot date was loaded
+                record_source_document(
+                    cursor, SOURCE_DOCUMENT_TYPE, document_name,
+                    checksum if not self._write_stats['failed'] else None,
+                    local_path=excel_path, effective_date=effective_date
+                )
+                cursor.execute("COMMIT")
+        except Exception as e:
+            if conn.in_transaction:
+                cursor.execute("ROLLBACK")
+            finish_batch(cursor, self._batch_id, 'Failed', error_message=str(e))
+            raise
+        
+        elapsed = time.perf_counter() - started
+        rows_written = self._write_stats['rows']
+        processed = self._progress['processed']
+        finish_batch(
+            cursor, self._batch_id, 'Completed',
+            records_processed=processed,
+            records_succeeded=self._progress['succeeded'],
+            records_failed=processed - self._progress['succeeded'],
+            phase_timings=self._timer.as_dict(),
+            # Every row read counts - an unchanged re-import is not a slowdown;
+            # empty sources have no throughput to compare
+            rows_per_second=processed / (elapsed + parse_seconds) if processed else None
+        )
+        return {
+            'status': 'completed',
+            **counts,
+            'changes': self._changes,
+            'rows_failed': len(self._write_stats['failed']),
+            'rows_processed': processed,
+            'rows_written': rows_written,
+            'elapsed_seconds': round(elapsed, 3),
+            'rows_per_second': round(rows_written / elapsed, 1) if elapsed > 0 else None,
+            'effective_date': self._effective_date,
+            'phase_timings': self._timer.as_dict(),
+            'batch_id': self._batch_id,
+        }
+    
+    def _record_batch(self, batch_type, source_path, status, error_message=None):
+        """Record a run that ended before its import transaction (skipped or unreadable)"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cursor = conn.cursor()
+            ensure_batch_table(cursor)
+            batch_id = start_batch(cursor, batch_type, source_path=source_path)
+            finish_batch(cursor, batch_id, status, error_message=error_message)
+            conn.commit()
+        finally:
+            conn.close()
+    
+    def _chunk_done(self, cursor, processed, succeeded):
+        """Add one chunk to the run totals and record them on the batch"""
+        self._progress['processed'] += processed
+        self._progress['succeeded'] += succeeded
+        update_batch_progress(
+            cursor, self._batch_id,
+            self._progress['processed'], self._progress['succeeded'],
+            self._progress['processed'] - self._progress['succeeded']
+        )
+    
+    def _begin_run(self, cursor, document_name, effective_date, force=False):
+        """Per-import state shared by every chunk of the run"""
+        # Bound as text once - sqlite3 would otherwise adapt the same values on every row
+        self._now = datetime.now().isoformat(' ')
+        self._effective_date = str(effective_date)
+        self._terminal_ids = TerminalIdService(cursor)
+        self._quality_log = QualityLogSink(cursor, checked_by='excel_import_agent')
+        self._write_stats = {'rows': 0, 'failed': []}
+        self._progress = {'processed': 0, 'succeeded': 0}
+        self._timer = PhaseTimer()
+        
+        # One version per series and start date in each effective-dated table
+        cursor.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_transport_costs_version
+            ON transportation_costs(terminal_id, product_type, effective_date)
+        """)
+        cursor.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_costing_version
+            ON costing(terminal_id, product_category_id, costing_item_id, start_date)
+        """)
+        self._costing_item_ids = self._load_costing_items(cursor)
+        self._category_ids = dict(cursor.execute(
+            "SELECT category_code, category_id FROM product_categories"
+        ))
+        
+        # Row hashes from the last import of this workbook - monthly snapshots
+        # (Costing_2024-02.xlsx after Costing_2024-01.xlsx) share one set, so
+        # rows missing from the newer snapshot are closed on its date
+        ensure_row_fingerprint_table(cursor)
+        self._document_name = document_series(document_name)
+        self._force = force
+        self._row_fingerprints = load_row_fingerprints(
+            cursor, SOURCE_DOCUMENT_TYPE, self._document_name
+        )
+        self._seen = {table_name: set() for table_name in IMPORT_TABLES}
+        self._changes = {
+            table_name: {'inserted': 0, 'updated': 0, 'unchanged': 0, 'removed': 0}
+            for table_name in IMPORT_TABLES
+        }
+    
+    def _check_snapshot_order(self, cursor, document_name):
+        """
+        Raise ValueError if a later snapshot of this workbook series is already loaded
+        
+        Versions and removals assume each snapshot follows the last one: an
+        older file would close, at its own date, rows the later snapshot kept,
+        and leave open rows the later snapshot removed.
+        """
+        rows = cursor.execute("""
+            SELECT document_name, MAX(effective_date) FROM source_documents
+            WHERE document_type = ? AND effective_date IS NOT NULL
+            GROUP BY document_name
+        """, (SOURCE_DOCUMENT_TYPE,))
+        latest = max((str(loaded) for name, loaded in rows
+                      if document_series(name) == self._document_name), default=None)
+        if latest and self._effective_date < latest:
+            raise ValueError(
+                f"{document_name} is dated {self._effective_date}, before {latest} - the latest "
+                f"snapshot of {self._document_name} already loaded. Snapshots of a workbook load "
+                f"in date order (import_many sorts a folder by date)"
+            )
+    
+    def _import_costing_detail(self, compiled, records, cursor):
+        """
+        Import from Costing Detail sheet
+        Row 3 = Headers (row 1 in CSV / Parquet exports)
+        Row 4+ = Data (each row = one terminal)
+        
+        Rows are streamed and written every chunk_size terminals, so memory
+        stays flat no matter how long the sheet is.
+        
+        Args:
+            compiled, records: read_source() output for the COSTING_DETAIL mapping
+        """
+        # Single pass over the source: the mapping compiled against the header row
+        print(f"  Found {len(compiled.headers)} columns")
+        print(f"  Columns A-F: {compiled.headers[:6]}")
+        print(f"  Product columns found: {list(compiled.groups['products'])}")
+        
+        print(f"\n→ Streaming terminal rows ({self.chunk_size} per chunk)...")
+        return self._load_rows(cursor, iter_costing_detail(records))
+    
+    def _load_rows(self, cursor, rows):
+        """
+        Write (terminal, transport_costs, costings) rows a chunk at a time
+        
+        Returns:
+            dict: terminals / terminal rates / transport costs / costings stored
+        """
+        terminals = []
+        transport_costs = []
+        costings = []
+        
+        terminal_rows = 0
+        transport_rows = 0
+        costing_rows = 0
+        term_count = 0
+        trans_count = 0
+        costing_count = 0
+        for terminal, costs, components in rows:
+            terminals.append(terminal)
+            transport_costs.extend(costs)
+            costings.extend(components)
+            terminal_rows += 1
+            transport_rows += len(costs)
+            costing_rows += len(components)
             
-            # For each product, extract costs
-            for product_name, col_idx in product_columns.items():
-                if col_idx < len(row):
-                    # Get the combined adder value for this product
-                    combined_adder = self._parse_number(row[col_idx])
-                    
-                    if combined_adder is not None:
-                        # Store transportation cost with combined adder
-                        trans_id = self._generate_transport_id(terminal_id, product_name)
-                        transport_costs.append({
-                            'transport_cost_id': trans_id,
-                            'terminal_id': terminal_id,
-                            'product_type': product_name,
-                            'combined_adder': combined_adder
-                        })
+            if terminal_rows % 50 == 0:
+                print(f"  Processed {terminal_rows} rows...")
             
-            if row_num % 50 == 0:
-                print(f"  Processed {row_num} rows...")
+            if len(terminals) >= self.chunk_size:
+                stored = self._flush_chunk(cursor, terminals, transport_costs, costings)
+                term_count += stored[0]
+                trans_count += stored[1]
+                costing_count += stored[2]
+                terminals = []
+                transport_costs = []
+                costings = []
         
-        print(f"\n  Total rows processed: {row_num}")
-        print(f"  Unique terminals: {len(terminals)}")
-        print(f"  Transport cost records: {len(transport_costs)}")
+        if terminals:
+            stored = self._flush_chunk(cursor, terminals, transport_costs, costings)
+            term_count += stored[0]
+            trans_count += stored[1]
+            costing_count += stored[2]
         
-        # Store in database
-        print("\n→ Storing in database...")
-        term_count = self._store_terminals(terminals)
-        trans_count = self._store_transport_costs(transport_costs)
+        print(f"\n  Terminal rows: {terminal_rows}")
+        print(f"  Transport cost records: {transport_rows}")
+        print(f"  Costing records: {costing_rows}")
         
-        return term_count, 0, trans_count
+        return self._costing_counts(term_count, trans_count, costing_count)
+    
+    def _costing_counts(self, term_count, trans_count, costing_count=0):
+        """Result counts for a Costing Detail load (terminal rates are not imported yet)"""
+        return {
+            'terminals_imported': term_count,
+            'terminal_rates_imported': 0,
+            'transport_costs_imported': trans_count,
+            'costings_imported': costing_count,
+        }
     
-    def _store_terminals(self, terminals):
-        """Store terminals in database"""
-        print("  → Storing terminals...")
+    def _flush_chunk(self, cursor, terminals, transport_costs, costings):
+        """Resolve IDs for one chunk of rows and write it to the database"""
+        processed = len(terminals) + len(transport_costs) + len(costings)
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        # Resolve terminal IDs through the shared ID service
+        with self._timer.phase('transform'):
+            terminal_ids = self._terminal_ids.resolve_many(
+                [terminal['natural_key'] for terminal in terminals]
+            )
+            for terminal in terminals:
+                terminal['terminal_id'] = terminal_ids[terminal['natural_key']]
+            for cost in transport_costs:
+                cost['terminal_id'] = terminal_ids[cost['natural_key']]
+                # transport_cost_id names the series (row hashes are kept per
+                # series); each effective-dated version gets its own row ID
+                cost['transport_cost_id'] = self._generate_transport_id(
+                    cost['terminal_id'], cost['product_type']
+                )
+                cost['version_id'] = self._generate_transport_id(
+                    cost['terminal_id'], cost['product_type'], self._effective_date
+                )
+            # Costing items and categories come from the maps cached for the run
+            for costing in costings:
+                costing['terminal_id'] = terminal_ids[costing['natural_key']]
+                costing['product_category_id'] = self._category_ids.get(costing['category_code'])
+                costing['costing_item_id'] = self._costing_item_ids[costing['costing_item_name']]
+            costings = [costing for costing in costings if costing['product_category_id']]
+            for costing in costings:
+                costing['costing_series'] = '|'.join(
+                    costing[column] for column in VERSIONED_TABLES['costing']['series']
+                )
         
-        count = 0
-        for terminal in terminals:
-            try:
-                cursor.execute("""
-                    INSERT OR REPLACE INTO terminals (
-                        terminal_id, terminal_name, terminal_code, state, city,
-                        market, region, effective_date, data_quality_score,
-                        created_by, created_at, updated_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    terminal['terminal_id'],
+        # Store in database - costs of rejected terminals are not written,
+        # but still count as seen so they are not treated as removed
+        stored_terminals = self._store_terminals(cursor, terminals)
+        if len(stored_terminals) < len(terminals):
+            self._seen['transportation_costs'].update(
+                cost['transport_cost_id'] for cost in transport_costs
+            )
+            self._seen['costing'].update(costing['costing_series'] for costing in costings)
+            stored_ids = {terminal['terminal_id'] for terminal in stored_terminals}
+            transport_costs = [cost for cost in transport_costs
+                               if cost['terminal_id'] in stored_ids]
+            costings = [costing for costing in costings
+                        if costing['terminal_id'] in stored_ids]
+        term_count = len(stored_terminals)
+        trans_count = self._store_transport_costs(cursor, transport_costs)
+        costing_count = self._store_costings(cursor, costings)
+        self._chunk_done(cursor, processed, term_count + trans_count + costing_count)
+        
+        print(f"  ✓ Chunk stored: {term_count} terminals, {trans_count} transport costs, "
+              f"{costing_count} costings")
+        return term_count, trans_count, costing_count
+    
+    def _store_terminals(self, cursor, terminals):
+        """
+        Store one chunk of terminals
+        
+        Only new and changed rows are written; unchanged rows are left alone
+        so their updated_at does not churn. The row hash covers the attribute
+        values only - a new monthly snapshot is not a change by itself.
+        
+        Returns:
+            list: Terminals now current in the database (written or unchanged)
+        """
+        with self._timer.phase('transform'):
+            for terminal in terminals:
+                terminal['row_fingerprint'] = row_fingerprint((
                     terminal['terminal_name'],
                     terminal.get('terminal_code'),
                     terminal['state'],
                     terminal['city'],
                     terminal.get('market'),
-                    terminal.get('region'),
-                    self.effective_date,
-                    0.95,
-                    'excel_import_agent',
-                    datetime.now(),
-                    datetime.now()
+                    terminal.get('region')
                 ))
-                count += 1
-            except Exception as e:
-                print(f"    ⚠️  Error: {terminal.get('terminal_name')}: {e}")
+            
+            changed, unchanged = self._split_changed(cursor, 'terminals', terminals)
+            existing = self._existing_ids(cursor, 'terminals', changed)
+            changed = [(terminal, terminal['terminal_id'] in existing) for terminal in changed]
+            rows = [(
+                terminal['terminal_id'],
+                terminal['terminal_name'],
+                terminal.get('terminal_code'),
+                terminal['state'],
+                terminal['city'],
+                terminal.get('market'),
+                terminal.get('region'),
+                self._effective_date,
+                0.95,
+                'excel_import_agent',
+                self._now,
+                self._now
+            ) for terminal, _ in changed]
         
-        conn.commit()
-        conn.close()
+        stored = self._write_chunk(cursor, """
+            INSERT INTO terminals (
+                terminal_id, terminal_name, terminal_code, state, city,
+                market, region, effective_date, data_quality_score,
+                created_by, created_at, updated_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(terminal_id) DO UPDATE SET
+                terminal_name = excluded.terminal_name,
+                terminal_code = excluded.terminal_code,
+                state = excluded.state,
+                city = excluded.city,
+                market = excluded.market,
+                region = excluded.region,
+                effective_date = COALESCE(MIN(terminals.effective_date, excluded.effective_date),
+                                          excluded.effective_date),
+                end_date = NULL,
+                data_quality_score = excluded.data_quality_score,
+                updated_at = excluded.updated_at
+        """, rows, 'terminals', label=lambda row: row[1])
         
-        print(f"    ✓ Stored {count} terminals")
-        return count
-    
-    def _store_transport_costs(self, transport_costs):
-        """Store transportation costs"""
-        print("  → Storing transportation costs...")
+        written = self._record_written(cursor, 'terminals', changed, stored)
+        with self._timer.phase('write'):
+            # The hash leaves out the effective date, so a snapshot older than
+            # the terminal's first one still moves its effective date back
+            cursor.executemany("""
+                UPDATE terminals SET effective_date = ?
+                WHERE terminal_id = ? AND effective_date > ?
+            """, [(self._effective_date, terminal['terminal_id'], self._effective_date)
+                  for terminal in unchanged])
+            for terminal in written:
+                self._quality_log.add(
+                    'terminals', terminal['terminal_id'], 'excel_import', 0.95,
+                    issues=[f"Missing {field}" for field in ('terminal_code', 'market', 'region')
+                            if not terminal.get(field)]
+                )
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        return written + unchanged
+    
+    def _store_transport_costs(self, cursor, transport_costs):
+        """
+        Store one chunk of transportation costs as effective-dated versions
         
-        count = 0
-        for cost in transport_costs:
-            try:
-                cursor.execute("""
-                    INSERT OR REPLACE INTO transportation_costs (
-                        transport_cost_id, terminal_id, product_type,
-                        combined_adder, effective_date,
-                        created_by, created_at, updated_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    cost['transport_cost_id'],
+        A cost whose value is already in effect on this run's date is left
+        alone; otherwise a version is written for the date (replacing one
+        for the same date) and the end_date of its neighbours is recomputed.
+        """
+        with self._timer.phase('transform'):
+            for cost in transport_costs:
+                cost['row_fingerprint'] = row_fingerprint((
                     cost['terminal_id'],
                     cost['product_type'],
                     cost['combined_adder'],
-                    self.effective_date,
-                    'excel_import_agent',
-                    datetime.now(),
-                    datetime.now()
+                    self._effective_date
                 ))
-                count += 1
-            except Exception as e:
-                print(f"    ⚠️  Error storing cost: {e}")
-        
-        conn.commit()
-        conn.close()
-        
-        print(f"    ✓ Stored {count} transport costs")
-        return count
-    
-    def _generate_terminal_id(self, state, city, terminal_code):
-        """Generate unique terminal ID"""
-        if terminal_code:
-            return f"TERM_{state}_{terminal_code}"
-        else:
-            combined = f"{state}_{city}".lower().replace(" ", "_")
-            hash_val = hashlib.md5(combined.encode()).hexdigest()[:8]
-            return f"TERM_{state}_{hash_val}"
-    
-    def _generate_transport_id(self, terminal_id, product):
-        """Generate unique transport cost ID"""
-        combined = f"{terminal_id}_{product}".lower().replace(" ", "_")
-        hash_val = hashlib.md5(combined.encode()).hexdigest()[:8]
-        return f"TRANS_{hash_val}"
-    
-    def _parse_number(self, value):
-        """Parse number from various formats"""
-        if value is None:
-            return None
-        if isinstance(value, (int, float)):
-            return float(value)
-        if isinstance(value, str):
-            cleaned = value.replace('$', '').replace(',', '').replace(' ', '').strip()
-            try:
-                return float(cleaned)
-            except ValueError:
-                return None
-        return None
+            
+            changed, unchanged = self._split_changed(cursor, 'transportation_costs', transport_costs)
+            current, pending = self._split_versions(cursor, 'transportation_costs', changed)
+            rows = [(
+                cost['version_id'],
+                cost['terminal_id'],
+                cost['product_type'],
+                cost['combined_adder'],
+                self._effective_date,
+                'excel_import_agent',
+                self._now,
+                self._now
+            ) for cost, _ in pending]
+        
+        stored = self._write_chunk(cursor, """
+            INSERT INTO transportation_costs (
+                transport_cost_id, terminal_id, product_type,
+                combined_adder, effective_date,
+                created_by, created_at, updated_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(terminal_id, product_type, effective_date) DO UPDATE SET
+                combined_adder = excluded.combined_adder,
+                end_date = NULL,
+                updated_at = excluded.updated_at
+        """, rows, 'transportation_costs', label=lambda row: f"{row[1]} / {row[2]}")
+        
+        written = self._record_written(cursor, 'transportation_costs', pending, stored, current)
+        with self._timer.phase('write'):
+            self._close_superseded_versions(cursor, 'transportation_costs', written)
+        return len(written) + len(current) + len(unchanged)
+    
+    def _store_costings(self, cursor, costings):
+        """
+        Store one chunk of unpivoted cost components in costing
+        
+        Same effective-dated versioning as transportation costs, with
+        start_date / end_date as the version dates.
+        """
+        with self._timer.phase('transform'):
+            for costing in costings:
+                costing['row_fingerprint'] = row_fingerprint((
+                    costing['costing_series'],
+                    costing['costing_value'],
+                    self._effective_date
+                ))
+            
+            changed, unchanged = self._split_changed(cursor, 'costing', costings)
+            current, pending = self._split_versions(cursor, 'costing', changed)
+            # costing_id (a UUIDv5) is only built for the versions being written
+            rows = [(
+                self._generate_costing_id(costing['costing_series'], self._effective_date),
+                costing['terminal_id'],
+                costing['product_category_id'],
+                costing['costing_item_id'],
+                costing['costing_value'],
+                self._effective_date,
+                self._now,
+                self._now
+            ) for costing, _ in pending]
+        
+        stored = self._write_chunk(cursor, """
+            INSERT INTO costing (
+                costing_id, terminal_id, product_category_id, costing_item_id,
+                costing_value, start_date, created_date, modified_date
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(terminal_id, product_category_id, costing_item_id, start_date) DO UPDATE SET
+                costing_value = excluded.costing_value,
+                end_date = NULL,
+                modified_date = excluded.modified_date
+        """, rows, 'costing', label=lambda row: f"{row[1]} / {row[3]}")
+        
+        written = self._record_written(cursor, 'costing', pending, stored, current)
+        with self._timer.phase('write'):
+            self._close_superseded_versions(cursor, 'costing', written)
+        return len(written) + len(current) + len(unchanged)
+    
+    def _load_costing_items(self, cursor):
+        """
+        costing_items name -> id map, cached for the run
+        
+        Items the Costing Detail columns need but the table lacks (databases
+        seeded before the item existed) are added first.
+        """
+        item_ids = dict(cursor.execute("SELECT costing_item_name, costing_item_id FROM costing_items"))
+        missing = sorted(set(COSTING_ITEMS.values()) - set(item_ids))
+        if missing:
+            cursor.executemany("""
+                INSERT INTO costing_items (costing_item_id, costing_item_name, costing_item_description)
+                VALUES (?, ?, ?)
+            """, [(str(uuid.uuid4()), name, f"Costing Detail '{name.replace('_', ' ')}' column")
+                  for name in missing])
+            item_ids = dict(cursor.execute("SELECT costing_item_name, costing_item_id FROM costing_items"))
+        return item_ids
+    
+    def _split_versions(self, cursor, table_name, records):
+        """
+        Compare records with the version of their series in effect on this run's date
+        
+        Returns:
+            tuple: (current, pending) - current records already hold their value;
+                   pending is a list of (record, exists) to write, where exists
+                   says a version for this exact date is being replaced
+        """
+        spec = VERSIONED_TABLES[table_name]
+        versions = self._load_versions(cursor, table_name, records)
+        
+        current = []
+        pending = []
+        for record in records:
+            in_effect = None
+            for start_date, value, end_date in versions.get(
+                    tuple(record[column] for column in spec['series']), ()):
+                if start_date > self._effective_date:
+                    break
+                in_effect = (start_date, value, end_date)
+            if (not self._force and in_effect and in_effect[1] == record[spec['value']] and
+                    (in_effect[2] is None or in_effect[2] > self._effective_date)):
+                current.append(record)
+            else:
+                pending.append((record, bool(in_effect) and in_effect[0] == self._effective_date))
+        self._changes[table_name]['unchanged'] += len(current)
+        return current, pending
+    
+    def _load_versions(self, cursor, table_name, records):
+        """
+        Every stored version of the records' series
+        
+        Returns:
+            dict: series tuple -> [(start_date, value, end_date), ...] oldest first
+        """
+        spec = VERSIONED_TABLES[table_name]
+        series_columns = ', '.join(spec['series'])
+        lookup_column = spec['series'][0]
+        
+        versions = {}
+        lookup_ids = sorted({record[lookup_column] for record in records})
+        for start in range(0, len(lookup_ids), LOOKUP_CHUNK_SIZE):
+            chunk = lookup_ids[start:start + LOOKUP_CHUNK_SIZE]
+            placeholders = ", ".join("?" * len(chunk))
+            for row in cursor.execute(f"""
+                SELECT {series_columns}, {spec['start']}, {spec['value']}, end_date
+                FROM {table_name}
+                WHERE {lookup_column} IN ({placeholders})
+                ORDER BY {series_columns}, {spec['start']}
+            """, chunk):
+                start_date, value, end_date = row[-3:]
+                versions.setdefault(row[:-3], []).append(
+                    (str(start_date), value, str(end_date) if end_date else None)
+                )
+        return versions
+    
+    def _close_superseded_versions(self, cursor, table_name, records):
+        """
+        End-date each version of the written series at the next version's date
+        
+        One set-based UPDATE per lookup chunk over the whole series, so a
+        version another workbook wrote for a later date still closes this
+        one. A version closed earlier (its row left the workbook) keeps that
+        date. Snapshots of one workbook load in date order
+        (_check_snapshot_order).
+        """
+        spec = VERSIONED_TABLES[table_name]
+        lookup_column = spec['series'][0]
+        lookup_ids = sorted({record[lookup_column] for record in records})
+        for start in range(0, len(lookup_ids), LOOKUP_CHUNK_SIZE):
+            chunk = lookup_ids[start:start + LOOKUP_CHUNK_SIZE]
+            placeholders = ", ".join("?" * len(chunk))
+            cursor.execute(f"""
+                UPDATE {table_name}
+                SET end_date = successor.next_date, {spec['modified']} = ?
+                FROM (
+                    SELECT {spec['key']},
+                           LEAD({spec['start']}) OVER (
+                               PARTITION BY {', '.join(spec['series'])}
+                               ORDER BY {spec['start']}
+                           ) AS next_date
+                    FROM {table_name}
+                    WHERE {lookup_column} IN ({placeholders})
+                ) AS successor
+                WHERE {table_name}.{spec['key']} = successor.{spec['key']}
+                  AND successor.next_date IS NOT NULL
+                  AND ({table_name}.end_date IS NULL
+                       OR {table_name}.end_date > successor.next_date)
+            """, [self._now, *chunk])
+    
+    def _split_changed(self, cursor, table_name, records):
+        """
+        Compare records with the row hashes from this workbook's last import
+        
+        Returns:
+            tuple: (changed, unchanged) lists of records
+        """
+        key_column = IMPORT_TABLES[table_name]
+        seen = self._seen[table_name]
+        
+        changed = []
+        unchanged = []
+        for record in records:
+            record_id = record[key_column]
+            seen.add(record_id)
+            if (not self._force and
+                    self._row_fingerprints.get((table_name, record_id)) == record['row_fingerprint']):
+                unchanged.append(record)
+            else:
+                changed.append(record)
+        self._changes[table_name]['unchanged'] += len(unchanged)
+        return changed, unchanged
+    
+    def _existing_ids(self, cursor, table_name, records):
+        """Keys of records already in the table - inserted vs updated for the rows being written"""
+        key_column = IMPORT_TABLES[table_name]
+        existing = set()
+        record_ids = [record[key_column] for record in records]
+        for start in range(0, len(record_ids), LOOKUP_CHUNK_SIZE):
+            chunk = record_ids[start:start + LOOKUP_CHUNK_SIZE]
+            placeholders = ", ".join("?" * len(chunk))
+            existing.update(row[0] for row in cursor.execute(
+                f"SELECT {key_column} FROM {table_name} WHERE {key_column} IN ({placeholders})",
+                chunk
+            ))
+        return existing
+    
+    def _record_written(self, cursor, table_name, changed, stored, current=()):
+        """
+        Count and fingerprint the rows _write_chunk actually stored
+        
+        Args:
+            changed: (record, exists) pairs passed to _write_chunk
+            stored: Indexes _write_chunk returned
+            current: Records not written because the database already holds
+                     their values - fingerprinted so the next import skips them
+        """
+        key_column = IMPORT_TABLES[table_name]
+        written = []
+        for index in stored:
+            record, exists = changed[index]
+            self._changes[table_name]['updated' if exists else 'inserted'] += 1
+            written.append(record)
+        
+        with self._timer.phase('write'):
+            save_row_fingerprints(
+                cursor, SOURCE_DOCUMENT_TYPE, self._document_name, table_name,
+                [(record[key_column], record['row_fingerprint'])
+                 for record in written + list(current)]
+            )
+        return written
+    
+    def _close_removed_rows(self, cursor):
+        """
+        End-date rows this workbook imported last time but no longer contains
+        
+        Rows are closed (end_date set), not deleted, so history and anything
+        that references them survive.
+        """
+        for table_name, key_column in IMPORT_TABLES.items():
+            removed = [record_id for (table, record_id) in self._row_fingerprints
+                       if table == table_name and record_id not in self._seen[table_name]]
+            if not removed:
+                continue
+            
+            if table_name in VERSIONED_TABLES:
+                spec = VERSIONED_TABLES[table_name]
+                row_key, modified = spec['key'], spec['modified']
+                removed_rows = self._open_versions(cursor, table_name, removed)
+            else:
+                row_key, modified = key_column, 'updated_at'
+                removed_rows = removed
+            cursor.executemany(f"""
+                UPDATE {table_name}
+                SET end_date = ?, {modified} = ?
+                WHERE {row_key} = ? AND end_date IS NULL
+            """, [(self._effective_date, self._now, record_id) for record_id in removed_rows])
+            delete_row_fingerprints(
+                cursor, SOURCE_DOCUMENT_TYPE, self._document_name, table_name, removed
+            )
+            self._changes[table_name]['removed'] += len(removed)
+            print(f"  ✓ Closed {len(removed)} {table_name} row(s) no longer in the workbook")
+    
+    def _open_versions(self, cursor, table_name, series_ids):
+        """Row IDs of the open versions (in effect before this date) of the given series"""
+        spec = VERSIONED_TABLES[table_name]
+        series_ids = set(series_ids)
+        return [row[0] for row in cursor.execute(f"""
+            SELECT {spec['key']}, {', '.join(spec['series'])}
+            FROM {table_name}
+            WHERE end_date IS NULL AND {spec['start']} < ?
+        """, (self._effective_date,))
+            if self._series_id(table_name, row[1:]) in series_ids]
+    
+    def _series_id(self, table_name, series):
+        """The row-hash key of a version's series (see IMPORT_TABLES)"""
+        if table_name == 'transportation_costs':
+            return self._generate_transport_id(*series)
+        return '|'.join(series)
+    
+    def _write_chunk(self, cursor, sql, rows, table_name, label):
+        """
+        Write a chunk with executemany inside a savepoint
+        
+        If the bulk write fails, the savepoint is rolled back and the chunk
+        is replayed row by row so only the bad rows are rejected (and
+        reported); the rest of the chunk - and the import - carries on.
+        
+        Returns:
+            list: Indexes of the rows that were stored
+        """
+        if not rows:
+            return []
+        
+        started = time.perf_counter()
+        cursor.execute("SAVEPOINT import_chunk")
+        try:
+            cursor.executemany(sql, rows)
+            stored = list(range(len(rows)))
+        except sqlite3.Error:
+            cursor.execute("ROLLBACK TO SAVEPOINT import_chunk")
+            stored = []
+            for index, row in enumerate(rows):
+                try:
+                    cursor.execute(sql, row)
+                    stored.append(index)
+                except sqlite3.Error as e:
+                    print(f"    ⚠️  Rejected {table_name} row {label(row)}: {e}")
+                    self._write_stats['failed'].append({
+                        'table': table_name, 'row': label(row), 'error': str(e)
+                    })
+        cursor.execute("RELEASE SAVEPOINT import_chunk")
+        
+        self._write_stats['rows'] += len(stored)
+        self._timer.add('write', time.perf_counter() - started)
+        return stored
+    
+    def _get_last_checksum(self, document_name):
+        """Hash of this workbook recorded by the last import"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return get_last_checksum(conn.cursor(), SOURCE_DOCUMENT_TYPE, document_name)
+        finally:
+            conn.close()
+    
+    def _generate_costing_id(self, costing_series, start_date):
+        """Stable costing_id for one version of a costing series"""
+        return str(uuid.uuid5(COSTING_ID_NAMESPACE, f"{costing_series}|{start_date}"))
+    
+    def _generate_transport_id(self, terminal_id, product, effective_date=None):
+        """Stable transport cost ID for a series (or one version, when a date is given)"""
+        combined = f"{terminal_id}|{product}".lower().replace(" ", "_")
+        if effective_date:
+            combined = f"{combined}|{effective_date}"
+        return str(uuid.uuid5(TRANSPORT_ID_NAMESPACE, combined))
 
 # Command-line interface
 if __name__ == "__main__":
@@ -293,8 +1471,61 @@ if __name__ == "__main__":
         os.path.join('reference', 'excel', 'Costing_Data_Final.xlsx'),
     ]
     
-    if len(sys.argv) > 1:
-        excel_path = sys.argv[1]
+    force = '--force' in sys.argv[1:]
+    workers = None
+    argv = sys.argv[1:]
+    if '--workers' in argv:
+        idx = argv.index('--workers')
+        if idx + 1 >= len(argv) or not argv[idx + 1].isdigit():
+            print("❌ --workers requires a number")
+            sys.exit(1)
+        workers = int(argv[idx + 1])
+        del argv[idx:idx + 2]
+    effective_date = None
+    if '--effective-date' in argv:
+        idx = argv.index('--effective-date')
+        try:
+            effective_date = date.fromisoformat(argv[idx + 1])
+        except (IndexError, ValueError):
+            print("❌ --effective-date requires a date (YYYY-MM-DD)")
+            sys.exit(1)
+        del argv[idx:idx + 2]
+    mapping = None
+    if '--mapping' in argv:
+        idx = argv.index('--mapping')
+        if idx + 1 >= len(argv):
+            print(f"❌ --mapping requires a name: tables, {', '.join(MAPPINGS)}")
+            sys.exit(1)
+        mapping = argv[idx + 1]
+        del argv[idx:idx + 2]
+    args = [arg for arg in argv if not arg.startswith('--')]
+    
+    # Declarative sheet mappings straight into tables
+    if mapping and mapping != 'costing_detail':
+        if not args or not os.path.exists(args[0]):
+            print("❌ --mapping needs a workbook path")
+            sys.exit(1)
+        agent = ExcelImportAgent('supply_chain.db', effective_date=effective_date)
+        results = agent.import_mapped(args[0], mapping, force=force)
+        if results['status'] == 'failed':
+            print(f"\n❌ {results['error']}")
+            sys.exit(1)
+        sys.exit(0)
+    
+    # Directory or glob pattern: parallel multi-workbook import
+    if args and (os.path.isdir(args[0]) or glob.has_magic(args[0])):
+        agent = ExcelImportAgent('supply_chain.db', effective_date=effective_date)
+        summary = agent.import_many(args[0], force=force, workers=workers)
+        if summary['status'] == 'failed':
+            print(f"\n❌ {summary['error']}")
+            sys.exit(1)
+        if summary['files_failed']:
+            print(f"\n⚠️  {summary['files_failed']} workbook(s) failed - see batches {summary['batch_id']}")
+            sys.exit(1)
+        sys.exit(0)
+    
+    if args:
+        excel_path = args[0]
     else:
         excel_path = None
         print("Searching for Excel file...")
@@ -313,14 +1544,19 @@ if __name__ == "__main__":
     if not os.path.exists(excel_path):
         print(f"\n❌ Excel file not found: {excel_path}")
         print("\nUsage:")
-        print("  python excel_import_agent.py [path/to/file.xlsx]")
+        print("  python excel_import_agent.py [path/to/file.xlsx|.csv|.parquet] [--force] [--effective-date YYYY-MM-DD]")
+        print("  python excel_import_agent.py path/to/dir_or_glob [--force] [--workers N] [--effective-date YYYY-MM-DD]")
+        print("  python excel_import_agent.py path/to/file.xlsx --mapping tables|en_shipping [--force]")
         sys.exit(1)
     
     # Run import
-    agent = ExcelImportAgent('supply_chain.db')
-    results = agent.import_excel(excel_path)
+    agent = ExcelImportAgent('supply_chain.db', effective_date=effective_date)
+    results = agent.import_excel(excel_path, force=force)
     
-    if results['status'] == 'completed' and results['terminals_imported'] > 0:
+    if results['status'] == 'skipped':
+        print("\n✅ Already up to date - file unchanged since last import")
+        print("   Use --force to re-import anyway")
+    elif results['status'] == 'completed' and results['terminals_imported'] > 0:
         print("\n✅ SUCCESS!")
         print(f"\nImported {results['terminals_imported']} terminals!")
         print("\nNext steps:")
@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+History Archive
+Monthly archive databases for agent_tasks and data_quality_log
+
+Every run adds agent_tasks rows and every quality check a data_quality_log
+row; nothing removes them, and the queue polls, status reports and review
+queries keep reading that history. archive() moves the old rows out:
+
+  - rows older than the last KEEP_MONTHS months go to one database file
+    per month, archive/<db name>_<YYYY_MM>.db, with the tables' own schema
+  - only finished history moves: completed agent_tasks whose review is
+    done (failed tasks stay for retry_failed_tasks), and quality log rows
+  - each chunk of ARCHIVE_CHUNK_SIZE rows is copied and committed in the
+    archive first, then deleted from the database in a second short
+    transaction - a crash between the two leaves the rows in both, and the
+    next run (the copy is INSERT OR REPLACE) finishes the move. Writers
+    get in between chunks.
+  - archive_index in the database keeps one row per table and month: the
+    archive file, row count and time range
+
+Historical queries attach the archives they need on demand:
+
+    conn = sqlite3.connect('supply_chain.db')
+    view = history_view(conn, 'agent_tasks', since='2024-01', until='2024-06')
+    conn.execute(f"SELECT agent_type, COUNT(*) FROM {view} GROUP BY agent_type")
+
+history_view() is bounded by SQLite's attach limit (often 10 files);
+history_batches() yields the view for one batch of months at a time, for
+longer histories.
+
+Usage:
+    python history_archive.py [db_path] [--keep-months 3] [--dry-run]
+    python history_archive.py [db_path] --status
+    python history_archive.py [db_path] --history agent_tasks [--since 2024-01] [--until 2024-06]
+"""
+
+import os
+import re
+import sqlite3
+import sys
+import time
+from datetime import date, datetime
+
+# Months of history kept in the database (the current month counts)
+KEEP_MONTHS = 3
+
+# Rows moved per transaction
+ARCHIVE_CHUNK_SIZE = 5000
+
+# Archive files live in this directory, next to the database
+ARCHIVE_DIR = 'archive'
+
+# Attached databases asked for - SQLite's own ceiling; the build's
+# SQLITE_MAX_ATTACHED (often 10) caps it further, see history_batches()
+MAX_ATTACHED = 125
+
+# Archived tables: timestamp column the month is taken from, and which
+# rows are finished history
+ARCHIVE_TABLES = {
+    'agent_tasks': {
+        'timestamp': 'completed_timestamp',
+        'where': "status = 'Completed' AND NOT (requires_human_review = 1 AND human_reviewed = 0)",
+    },
+    'data_quality_log': {
+        'timestamp': 'checked_at',
+        'where': "1 = 1",
+    },
+}
+
+# Indexes the archiver seeks by month; (status, completed_timestamp) also
+# serves every status lookup idx_tasks_status served
+ARCHIVE_INDEXES = [
+    ("idx_tasks_status_completed", "agent_tasks(status, completed_timestamp)"),
+    ("idx_quality_log_checked_at", "data_quality_log(checked_at)"),
+]
+
+
+def ensure_archive_schema(cursor):
+    """
+    Create archive_index and the timestamp indexes the archiver seeks
+
+    Returns:
+        list: Descriptions of the changes made
+    """
+    changes = []
+    live = {row[0] for row in cursor.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'index')")}
+    if 'archive_index' not in live:
+        cursor.execute("""
+            CREATE TABLE archive_index (
+                table_name TEXT NOT NULL,
+                month TEXT NOT NULL,
+                archive_path TEXT NOT NULL,
+                row_count INTEGER NOT NULL,
+                first_at TIMESTAMP,
+                last_at TIMESTAMP,
+                archived_at TIMESTAMP NOT NULL,
+                PRIMARY KEY (table_name, month)
+            )
+        """)
+        changes.append("created table archive_index")
+    for index_name, index_def in ARCHIVE_INDEXES:
+        if index_name not in live:
+            cursor.execute(f"CREATE INDEX {index_name} ON {index_def}")
+            changes.append(f"created index {index_name}")
+    return changes
+
+
+def archive_path_for(db_path, month):
+    """supply_chain.db, 2024-03 -> archive/supply_chain_2024_03.db (relative to the database)"""
+    stem = os.path.splitext(os.path.basename(db_path))[0]
+    return os.path.join(ARCHIVE_DIR, f"{stem}_{month.replace('-', '_')}.db")
+
+
+def cutoff_month(keep_months=KEEP_MONTHS, today=None):
+    """First day of the oldest month kept, e.g. 2024-07-01 for 3 months in October"""
+    today = today or date.today()
+    months = today.year * 12 + today.month - 1 - (keep_months - 1)
+    return date(months // 12, months % 12 + 1, 1).isoformat()
+
+
+def _next_month(month):
+    year, month_number = int(month[:4]), int(month[5:7])
+    return f"{year + month_number // 12:04d}-{month_number % 12 + 1:02d}-01"
+
+
+def _archive_table_sql(conn, table_name):
+    sql = conn.execute("SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = ?",
+                       (table_name,)).fetchone()[0]
+    return re.sub(r'^CREATE TABLE\s+"?\w+"?', f'CREATE TABLE IF NOT EXISTS archive.{table_name}', sql, count=1)
+
+
+def pending_months(conn, table_name, cutoff):
+    """{month: rows} of finished history older than cutoff, still in the database"""
+    spec = ARCHIVE_TABLES[table_name]
+    return dict(conn.execute(f"""
+        SELECT strftime('%Y-%m', {spec['timestamp']}) AS month, COUNT(*)
+        FROM {table_name}
+        WHERE {spec['timestamp']} < ? AND {spec['where']}
+        GROUP BY month ORDER BY month
+    """, (cutoff,)).fetchall())
+
+
+def _archive_month(conn, db_path, table_name, month, chunk_size):
+    """Move one table's rows for one month, chunk by chunk; returns rows moved"""
+    spec = ARCHIVE_TABLES[table_name]
+    relative_path = archive_path_for(db_path, month)
+    archive_path = os.path.join(os.path.dirname(os.path.abspath(db_path)), relative_path)
+    os.makedirs(os.path.dirname(archive_path), exist_ok=True)
+
+    conn.execute("ATTACH DATABASE ? AS archive", (archive_path,))
+    try:
+        conn.execute(_archive_table_sql(conn, table_name))
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS archive_chunk (row_id INTEGER PRIMARY KEY)")
+        moved = 0
+        while True:
+            conn.execute("DELETE FROM temp.archive_chunk")
+            conn.execute(f"""
+                INSERT INTO temp.archive_chunk
+                SELECT rowid FROM main.{table_name}
+                WHERE {spec['timestamp']} >= ? AND {spec['timestamp']} < ? AND {spec['where']}
+                LIMIT ?
+            """, (f"{month}-01", _next_month(month), chunk_size))
+            count = conn.execute("SELECT COUNT(*) FROM temp.archive_chunk").fetchone()[0]
+            if not count:
+                break
+
+            # Copy first, committed in the archive on its own
+            conn.execute("BEGIN")
+            conn.execute(f"""
+                INSERT OR REPLACE INTO archive.{table_name}
+                SELECT * FROM main.{table_name} WHERE rowid IN (SELECT row_id FROM temp.archive_chunk)
+            """)
+            conn.execute("COMMIT")
+
+            # Then delete and record the month in one short write transaction
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(f"DELETE FROM main.{table_name} WHERE rowid IN (SELECT row_id FROM temp.archive_chunk)")
+            conn.execute(f"""
+                INSERT OR REPLACE INTO main.archive_index
+                SELECT ?, ?, ?, COUNT(*), MIN({spec['timestamp']}), MAX({spec['timestamp']}), ?
+                FROM archive.{table_name}
+            """, (table_name, month, relative_path, datetime.now().isoformat(sep=' ', timespec='seconds')))
+            conn.execute("COMMIT")
+            moved += count
+    finally:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        conn.execute("DETACH DATABASE archive")
+    return moved
+
+
+def archive(db_path='supply_chain.db', keep_months=KEEP_MONTHS, chunk_size=ARCHIVE_CHUNK_SIZE, dry_run=False):
+    """
+    Move finished history older than keep_months into the monthly archives
+
+    Returns:
+        dict: cutoff, moved ({table: {month: rows}}), seconds
+    """
+    started = time.perf_counter()
+    cutoff = cutoff_month(keep_months)
+    moved = {}
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.execute("PRAGMA busy_timeout = 30000")
+        if not dry_run and ensure_archive_schema(conn.cursor()):
+            print("  ✓ Created archive_index and archive indexes (python migrations.py does the same)")
+        for table_name in ARCHIVE_TABLES:
+            months = pending_months(conn, table_name, cutoff)
+            moved[table_name] = {}
+            for month, rows in months.items():
+                if dry_run:
+                    moved[table_name][month] = rows
+                    print(f"  → {table_name} {month}: {rows:,} rows would move")
+                    continue
+                month_started = time.perf_counter()
+                moved[table_name][month] = _archive_month(conn, db_path, table_name, month, chunk_size)
+                print(f"  ✓ {table_name} {month}: {moved[table_name][month]:,} rows -> "
+                      f"{archive_path_for(db_path, month)} ({time.perf_counter() - month_started:.2f}s)")
+        if not dry_run and any(moved.values()):
+            conn.execute("PRAGMA optimize")
+    finally:
+        conn.close()
+    return {'cutoff': cutoff, 'moved': moved, 'seconds': round(time.perf_counter() - started, 3)}
+
+
+def archived_months(conn, table_name=None, since=None, until=None):
+    """
+    archive_index rows, oldest first
+
+    Args:
+        since, until: YYYY-MM bounds (inclusive)
+
+    Returns:
+        list: Dicts with table_name, month, archive_path, row_count, first_at, last_at
+    """
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'archive_index'").fetchone():
+        return []
+    conditions, params = [], []
+    for condition, value in (("table_name = ?", table_name), ("month >= ?", since), ("month <= ?", until)):
+        if value:
+            conditions.append(condition)
+            params.append(value)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    cursor = conn.execute(f"""
+        SELECT table_name, month, archive_path, row_count, first_at, last_at
+        FROM archive_index {where} ORDER BY month, table_name
+    """, params)
+    names = [column[0] for column in cursor.description]
+    return [dict(zip(names, row)) for row in cursor]
+
+
+def attach_limit(conn):
+    """Databases conn can attach, raised as far as this SQLite build allows"""
+    conn.setlimit(sqlite3.SQLITE_LIMIT_ATTACHED, MAX_ATTACHED)
+    return conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+
+
+def attach_archives(conn, table_name=None, since=None, until=None):
+    """
+    ATTACH the archive files covering since..until
+
+    Returns:
+        dict: month -> schema name (archive_YYYY_MM)
+    """
+    db_path = conn.execute("PRAGMA database_list").fetchone()[2]
+    attached = {row[1] for row in conn.execute("PRAGMA database_list")}
+    months = {}
+    for entry in archived_months(conn, table_name, since, until):
+        months.setdefault(entry['month'], entry['archive_path'])
+
+    limit = attach_limit(conn)
+    if len(attached - {'main', 'temp'} | {_schema_name(month) for month in months}) > limit:
+        raise ValueError(f"{len(months)} archive months requested; SQLite attaches at most {limit} "
+                         "databases - narrow since/until or use history_batches()")
+
+    schemas = {}
+    for month, relative_path in months.items():
+        schema = _schema_name(month)
+        if schema not in attached:
+            conn.execute(f"ATTACH DATABASE ? AS {schema}", (os.path.join(os.path.dirname(db_path), relative_path),))
+        schemas[month] = schema
+    return schemas
+
+
+def _schema_name(month):
+    """Schema an archive month is attached as"""
+    return f"archive_{month.replace('-', '_')}"
+
+
+def _create_history_view(conn, table_name, schemas, include_main=True):
+    """(Re)create temp.<table_name>_history over the database and the given archive schemas"""
+    view_name = f"{table_name}_history"
+    selects = [f"SELECT * FROM main.{table_name}"] if include_main else []
+    selects += [f"SELECT * FROM {schema}.{table_name}" for schema in schemas]
+    conn.execute(f"DROP VIEW IF EXISTS temp.{view_name}")
+    conn.execute(f"CREATE TEMP VIEW {view_name} AS " + " UNION ALL ".join(selects))
+    return view_name
+
+
+def history_view(conn, table_name, since=None, until=None):
+    """
+    Temporary view over table_name in the database and its archives since..until
+
+    Raises ValueError when the months do not fit SQLite's attach limit -
+    history_batches() covers any number of them.
+
+    Returns:
+        str: Name of the view (temp.<table_name>_history)
+    """
+    if table_name not in ARCHIVE_TABLES:
+        raise ValueError(f"{table_name} is not archived (one of: {', '.join(ARCHIVE_TABLES)})")
+    schemas = attach_archives(conn, table_name, since, until)
+    return _create_history_view(conn, table_name, schemas.values())
+
+
+def history_batches(conn, table_name, since=None, until=None):
+    """
+    The history view, one batch of archive months at a time
+
+    Each batch attaches as many months as the attach limit leaves room for
+    (the first batch also covers the database's own rows) and detaches
+    them before the next batch, so any number of months can be read - for
+    queries whose results add up across batches, like counts.
+
+    Yields:
+        str: Name of the view over the current batch
+    """
+    if table_name not in ARCHIVE_TABLES:
+        raise ValueError(f"{table_name} is not archived (one of: {', '.join(ARCHIVE_TABLES)})")
+    attached = {row[1] for row in conn.execute("PRAGMA database_list")}
+    room = attach_limit(conn) - len(attached - {'main', 'temp'})
+    if room < 1:
+        raise ValueError("no room to attach archives - detach other databases first")
+    months = sorted({entry['month'] for entry in archived_months(conn, table_name, since, until)})
+    batches = [months[start:start + room] for start in range(0, len(months), room)] or [[]]
+
+    for number, batch in enumerate(batches):
+        schemas = attach_archives(conn, table_name, batch[0], batch[-1]) if batch else {}
+        view_name = _create_history_view(conn, table_name, schemas.values(), include_main=number == 0)
+        try:
+            yield view_name
+        finally:
+            conn.execute(f"DROP VIEW IF EXISTS temp.{view_name}")
+            for schema in schemas.values():
+                if schema not in attached:
+                    conn.execute(f"DETACH DATABASE {schema}")
+
+
+def print_status(db_path='supply_chain.db'):
+    """Rows in the database and in the archives, per table"""
+    conn = sqlite3.connect(db_path)
+    try:
+        for table_name in ARCHIVE_TABLES:
+            hot = conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+            months = archived_months(conn, table_name)
+            archived = sum(entry['row_count'] for entry in months)
+            span = f", {months[0]['month']} to {months[-1]['month']}" if months else ""
+            print(f"  {table_name}: {hot:,} rows in the database, {archived:,} archived "
+                  f"in {len(months)} months{span}")
+    finally:
+        conn.close()
+
+
+# Command-line interface
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Archive old agent_tasks / data_quality_log rows by month')
+    parser.add_argument('db_path', nargs='?', default='supply_chain.db', help='Database path')
+    parser.add_argument('--keep-months', type=int, default=KEEP_MONTHS, help='Months kept in the database')
+    parser.add_argument('--chunk-size', type=int, default=ARCHIVE_CHUNK_SIZE, help='Rows per transaction')
+    parser.add_argument('--dry-run', action='store_true', help='Show what would move')
+    parser.add_argument('--status', action='store_true', help='Show database and archive row counts')
+    parser.add_argument('--history', choices=sorted(ARCHIVE_TABLES), help='Count a table across its archives')
+    parser.add_argument('--since', help='First archive month, YYYY-MM')
+    parser.add_argument('--until', help='Last archive month, YYYY-MM')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db_path):
+        print(f"❌ {args.db_path} not found")
+        sys.exit(1)
+
+    print("\n" + "=" * 80)
+    print(f"HISTORY ARCHIVE - {args.db_path}")
+    print("=" * 80)
+
+    try:
+        if args.status:
+            print_status(args.db_path)
+        elif args.history:
+            conn = sqlite3.connect(args.db_path)
+            try:
+                counts = {}
+                for view in history_batches(conn, args.history, args.since, args.until):
+                    for status_or_table, count in conn.execute(f"""
+                        SELECT {'status' if args.history == 'agent_tasks' else 'table_name'}, COUNT(*)
+                        FROM {view} GROUP BY 1
+                    """).fetchall():
+                        counts[status_or_table] = counts.get(status_or_table, 0) + count
+                for status_or_table, count in sorted(counts.items(), key=lambda item: -item[1]):
+                    print(f"  {status_or_table}: {count:,}")
+            finally:
+                conn.close()
+        else:
+            print(f"  Keeping {args.keep_months} months (from {cutoff_month(args.keep_months)})\n")
+            result = archive(args.db_path, args.keep_months, args.chunk_size, args.dry_run)
+            total = sum(sum(months.values()) for months in result['moved'].values())
+            verb = 'would move' if args.dry_run else 'moved'
+            print(f"\n✓ {total:,} rows {verb} in {result['seconds']:.1f}s")
+    except (sqlite3.Error, ValueError) as e:
+        print(f"\n❌ {e}")
+        sys.exit(1)
@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Materialized Views
+A stored copy of v_active_shipping, refreshed from a change log
+
+The view joins six tables and is recomputed on every read. Its table
+(mv_active_shipping) has the same columns, indexed for the lookups and the
+export order, and is kept current like this:
+
+  - triggers on the source tables write the affected key (shipping period)
+    into mv_change_log - one small INSERT per changed row that skips
+    keys already pending, inside the writer's transaction
+  - refresh() deletes and re-selects the rows of the logged keys only, and
+    clears their log entries in the same transaction
+  - a change that can touch any row (a product or line item type renamed
+    or deleted) logs FULL_REBUILD_KEY, and the next refresh rebuilds the
+    whole table; so does a backlog above FULL_REBUILD_FRACTION of the keys
+
+v_active_shipping keeps only periods whose end date is not yet past
+(date('now')), which changes without any write. mv_active_shipping holds
+every Active period; the date condition is applied when reading
+(READ_SQL), on the end_date index.
+
+v_bcs_detail is not materialized: its plan already walks bcs_code order
+through indexes, and a stored copy read no faster (query_benchmark.py).
+Databases that have mv_bcs_detail drop it in migration 10.
+
+Usage:
+    python materialized_views.py [db_path] [--status] [--verify]
+    python materialized_views.py [db_path] --refresh
+    python materialized_views.py [db_path] --rebuild
+"""
+
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+# Log key meaning "rebuild the whole table"
+FULL_REBUILD_KEY = '*'
+
+# Pending keys above this fraction of the table's keys -> full rebuild
+FULL_REBUILD_FRACTION = 0.25
+
+# Keys deleted / re-selected per statement
+REFRESH_CHUNK_SIZE = 500
+
+# Materialized views. 'key' is the column rows are refreshed by; 'changes'
+# lists (table, events, UPDATE OF columns, SELECT of the affected keys as
+# key_value) - {row} is NEW or OLD.
+MATERIALIZED_VIEWS = {
+    'mv_active_shipping': {
+        'view': 'v_active_shipping',
+        'key': 'shipping_period_id',
+        'count_keys': "SELECT COUNT(*) FROM shipping_periods",
+        # v_active_shipping without its date('now') condition (see READ_SQL)
+        'select': """
+            SELECT
+                sp.shipping_period_id,
+                t.terminal_id,
+                t.terminal_name,
+                t.state,
+                t.city,
+                sp.start_date,
+                sp.end_date,
+                sp.period_status,
+                sli.shipping_line_item_id,
+                p.product_code,
+                lit.line_item_type_name,
+                sli.line_item_adder,
+                sli.line_item_percent,
+                si.spot_index_code
+            FROM shipping_periods sp
+            JOIN terminals t ON sp.terminal_id = t.terminal_id
+            LEFT JOIN shipping_line_items sli ON sp.shipping_period_id = sli.shipping_period_id
+            LEFT JOIN products p ON sli.product_id = p.product_id
+            LEFT JOIN line_item_types lit ON sli.line_item_type_id = lit.line_item_type_id
+            LEFT JOIN spot_indices si ON sli.spot_index_id = si.spot_index_id
+            WHERE sp.period_status = 'Active'
+        """,
+        'indexes': [
+            ("idx_mv_active_shipping_period", "mv_active_shipping(shipping_period_id)"),
+            ("idx_mv_active_shipping_terminal", "mv_active_shipping(terminal_id)"),
+            ("idx_mv_active_shipping_end", "mv_active_shipping(end_date)"),
+            ("idx_mv_active_shipping_export",
+             "mv_active_shipping(terminal_name, start_date, product_code, line_item_type_name)"),
+        ],
+        'changes': [
+            ('shipping_periods', ('INSERT', 'UPDATE', 'DELETE'), None,
+             "SELECT {row}.shipping_period_id AS key_value"),
+            ('shipping_line_items', ('INSERT', 'UPDATE', 'DELETE'), None,
+             "SELECT {row}.shipping_period_id AS key_value"),
+            ('terminals', ('INSERT', 'UPDATE', 'DELETE'), ('terminal_id', 'terminal_name', 'state', 'city'),
+             "SELECT shipping_period_id AS key_value FROM shipping_periods WHERE terminal_id = {row}.terminal_id"),
+            ('products', ('UPDATE', 'DELETE'), ('product_id', 'product_code'),
+             f"SELECT '{FULL_REBUILD_KEY}' AS key_value"),
+            ('line_item_types', ('UPDATE', 'DELETE'), ('line_item_type_id', 'line_item_type_name'),
+             f"SELECT '{FULL_REBUILD_KEY}' AS key_value"),
+            ('spot_indices', ('UPDATE', 'DELETE'), ('spot_index_id', 'spot_index_code'),
+             f"SELECT '{FULL_REBUILD_KEY}' AS key_value"),
+        ],
+    },
+}
+
+# Reads that return what the view returns
+READ_SQL = {
+    'v_active_shipping': """
+        SELECT * FROM mv_active_shipping
+        WHERE (end_date IS NULL OR end_date >= date('now'))
+    """,
+}
+
+
+# ============================================================================
+# SCHEMA
+# ============================================================================
+
+def _trigger_sql(mv_name, table_name, event, columns, key_select):
+    """
+    CREATE TRIGGER logging the keys a change to table_name affects
+
+    The keys of OLD and NEW go in with one plain INSERT that skips keys
+    already pending. OR IGNORE would not do: a trigger takes the conflict
+    policy of the outer statement, so an UPSERT on the source table would
+    still fail on the log's primary key.
+    """
+    rows = {'INSERT': ['NEW'], 'UPDATE': ['OLD', 'NEW'], 'DELETE': ['OLD']}[event]
+    keys = "\n        UNION ".join(
+        f"SELECT key_value FROM ({key_select.format(row=row)})" for row in rows
+    )
+    statements = (
+        f"\n    INSERT INTO mv_change_log (view_name, key_value)"
+        f"\n    SELECT DISTINCT '{mv_name}', k.key_value FROM ("
+        f"\n        {keys}"
+        f"\n    ) AS k"
+        f"\n    WHERE k.key_value IS NOT NULL"
+        f"\n      AND NOT EXISTS (SELECT 1 FROM mv_change_log AS l"
+        f"\n                      WHERE l.view_name = '{mv_name}' AND l.key_value = k.key_value);"
+    )
+    of_columns = f" OF {', '.join(columns)}" if event == 'UPDATE' and columns else ''
+    return (f"CREATE TRIGGER trg_{mv_name}_{table_name}_{event.lower()}\n"
+            f"AFTER {event}{of_columns} ON {table_name}\nBEGIN{statements}\nEND")
+
+
+def ensure_materialized_views(cursor):
+    """
+    Create the materialized view tables, indexes, change log and triggers
+
+    Creating a trigger means changes before it went unlogged, so a full
+    rebuild of that view is queued.
+
+    Returns:
+        list: Descriptions of the changes made
+    """
+    changes = []
+    # key_value is untyped like the mv_* columns: a TEXT column would store
+    # INTEGER keys (compact_keys.py) as text, and they would no longer match
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS mv_change_log (
+            view_name TEXT NOT NULL,
+            key_value NOT NULL,
+            PRIMARY KEY (view_name, key_value)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS mv_refresh_state (
+            view_name TEXT PRIMARY KEY,
+            refreshed_at TIMESTAMP,
+            rebuilt_at TIMESTAMP,
+            keys_refreshed INTEGER,
+            refresh_seconds REAL
+        )
+    """)
+
+    live = dict(cursor.execute(
+        "SELECT name, type FROM sqlite_master WHERE type IN ('table', 'index', 'trigger')"
+    ).fetchall())
+    for mv_name, spec in MATERIALIZED_VIEWS.items():
+        if mv_name not in live:
+            # Untyped columns store exactly what the view returns (TEXT or
+            # INTEGER keys alike - see compact_keys.py)
+            columns = [column[0] for column in cursor.execute(
+                f"SELECT * FROM ({spec['select']}) WHERE 0").description]
+            cursor.execute(f"CREATE TABLE {mv_name} ({', '.join(columns)})")
+            changes.append(f"created table {mv_name}")
+        for index_name, index_def in spec['indexes']:
+            if index_name not in live:
+                cursor.execute(f"CREATE INDEX {index_name} ON {index_def}")
+                changes.append(f"created index {index_name}")
+
+        created_trigger = False
+        for table_name, events, columns, key_select in spec['changes']:
+            for event in events:
+                trigger_name = f"trg_{mv_name}_{table_name}_{event.lower()}"
+                if trigger_name not in live:
+                    cursor.execute(_trigger_sql(mv_name, table_name, event, columns, key_select))
+                    changes.append(f"created trigger {trigger_name}")
+                    created_trigger = True
+        if created_trigger:
+            cursor.execute("INSERT OR IGNORE INTO mv_change_log (view_name, key_value) VALUES (?, ?)",
+                           (mv_name, FULL_REBUILD_KEY))
+            changes.append(f"queued full rebuild of {mv_name}")
+    return changes
+
+
+# ============================================================================
+# REFRESH
+# ============================================================================
+
+def _rebuild(cursor, mv_name):
+    """Replace every row of a materialized view"""
+    spec = MATERIALIZED_VIEWS[mv_name]
+    cursor.execute(f"DELETE FROM {mv_name}")
+    cursor.execute(f"INSERT INTO {mv_name} {spec['select']}")
+
+
+def _refresh_keys(cursor, mv_name, keys):
+    """Delete and re-select the rows of the given keys"""
+    spec = MATERIALIZED_VIEWS[mv_name]
+    for start in range(0, len(keys), REFRESH_CHUNK_SIZE):
+        chunk = keys[start:start + REFRESH_CHUNK_SIZE]
+        placeholders = ", ".join("?" * len(chunk))
+        cursor.execute(f"DELETE FROM {mv_name} WHERE {spec['key']} IN ({placeholders})", chunk)
+        cursor.execute(f"""
+            INSERT INTO {mv_name}
+            SELECT * FROM ({spec['select']}) AS v
+            WHERE v.{spec['key']} IN ({placeholders})
+        """, chunk)
+
+
+def refresh(conn, mv_names=None, full=False):
+    """
+    Bring materialized views up to date with their change log
+
+    Each view refreshes in one transaction (BEGIN IMMEDIATE): the logged
+    keys are re-selected and their log entries removed together, so a
+    failed refresh leaves the log in place for the next run.
+
+    Args:
+        mv_names: Views to refresh (default: all)
+        full: Rebuild every row regardless of the log
+
+    Returns:
+        dict: mv name -> {'keys': keys refreshed, 'rebuilt': bool, 'seconds': float}
+    """
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None
+    results = {}
+    try:
+        for mv_name in mv_names or MATERIALIZED_VIEWS:
+            started = time.perf_counter()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = conn.cursor()
+                keys = [row[0] for row in cursor.execute(
+                    "SELECT key_value FROM mv_change_log WHERE view_name = ?", (mv_name,))]
+                total_keys = cursor.execute(MATERIALIZED_VIEWS[mv_name]['count_keys']).fetchone()[0]
+                rebuild = (full or FULL_REBUILD_KEY in keys
+                           or len(keys) > total_keys * FULL_REBUILD_FRACTION)
+                if rebuild:
+                    _rebuild(cursor, mv_name)
+                elif keys:
+                    _refresh_keys(cursor, mv_name, keys)
+                cursor.execute("DELETE FROM mv_change_log WHERE view_name = ?", (mv_name,))
+
+                now = datetime.now().isoformat(sep=' ', timespec='seconds')
+                seconds = time.perf_counter() - started
+                cursor.execute("""
+                    INSERT INTO mv_refresh_state (view_name, refreshed_at, rebuilt_at, keys_refreshed, refresh_seconds)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(view_name) DO UPDATE SET
+                        refreshed_at = excluded.refreshed_at,
+                        rebuilt_at = COALESCE(excluded.rebuilt_at, mv_refresh_state.rebuilt_at),
+                        keys_refreshed = excluded.keys_refreshed,
+                        refresh_seconds = excluded.refresh_seconds
+                """, (mv_name, now, now if rebuild else None, total_keys if rebuild else len(keys), seconds))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            results[mv_name] = {
+                'keys': total_keys if rebuild else len(keys),
+                'rebuilt': rebuild,
+                'seconds': round(seconds, 3),
+            }
+    finally:
+        conn.isolation_level = isolation_level
+    return results
+
+
+def rebuild(conn, mv_names=None):
+    """Rebuild materialized views from scratch"""
+    return refresh(conn, mv_names, full=True)
+
+
+# ============================================================================
+# STALENESS
+# ============================================================================
+
+def staleness(cursor):
+    """
+    Pending changes and last refresh per materialized view
+
+    Returns:
+        dict: mv name -> {'pending_keys', 'full_rebuild_pending', 'refreshed_at',
+                          'rebuilt_at', 'stale'}
+    """
+    state = {row[0]: row[1:] for row in cursor.execute(
+        "SELECT view_name, refreshed_at, rebuilt_at FROM mv_refresh_state")}
+    status = {}
+    for mv_name in MATERIALIZED_VIEWS:
+        keys = [row[0] for row in cursor.execute(
+            "SELECT key_value FROM mv_change_log WHERE view_name = ?", (mv_name,))]
+        refreshed_at, rebuilt_at = state.get(mv_name, (None, None))
+        status[mv_name] = {
+            'pending_keys': len([key for key in keys if key != FULL_REBUILD_KEY]),
+            'full_rebuild_pending': FULL_REBUILD_KEY in keys,
+            'refreshed_at': refreshed_at,
+            'rebuilt_at': rebuilt_at,
+            'stale': bool(keys) or refreshed_at is None,
+        }
+    return status
+
+
+def verify(cursor, mv_name):
+    """
+    Compare a materialized view with its live view, row by row
+
+    Returns:
+        dict: missing (rows the view has and the table lacks) and extra counts
+    """
+    view = MATERIALIZED_VIEWS[mv_name]['view']
+    read_sql = READ_SQL[view]
+    missing = cursor.execute(
+        f"SELECT COUNT(*) FROM (SELECT * FROM {view} EXCEPT SELECT * FROM ({read_sql}))").fetchone()[0]
+    extra = cursor.execute(
+        f"SELECT COUNT(*) FROM (SELECT * FROM ({read_sql}) EXCEPT SELECT * FROM {view})").fetchone()[0]
+    return {'missing': missing, 'extra': extra}
+
+
+def print_status(db_path, check_rows=False):
+    """Print staleness (and optionally a row-by-row check) of each materialized view"""
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.cursor()
+        status = staleness(cursor)
+        print(f"\n  {'View':<22} {'Pending':>8}  {'Last refresh':<20} {'Last rebuild':<20}")
+        print("  " + "-" * 74)
+        for mv_name, entry in status.items():
+            pending = 'ALL' if entry['full_rebuild_pending'] else str(entry['pending_keys'])
+            flag = '⚠️ ' if entry['stale'] else '✓ '
+            print(f"  {flag}{mv_name:<20} {pending:>8}  {str(entry['refreshed_at'] or 'never'):<20} "
+                  f"{str(entry['rebuilt_at'] or 'never'):<20}")
+            if check_rows:
+                result = verify(cursor, mv_name)
+                if result['missing'] or result['extra']:
+                    print(f"      ❌ {result['missing']} rows missing, {result['extra']} extra "
+                          f"vs {MATERIALIZED_VIEWS[mv_name]['view']}")
+                else:
+                    print(f"      ✓ matches {MATERIALIZED_VIEWS[mv_name]['view']}")
+    finally:
+        conn.close()
+    return status
+
+
+# Command-line interface
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    db_path = args[0] if args else 'supply_chain.db'
+
+    print("\n" + "=" * 80)
+    print(f"MATERIALIZED VIEWS - {db_path}")
+    print("=" * 80)
+
+    if '--refresh' in sys.argv or '--rebuild' in sys.argv:
+        conn = sqlite3.connect(db_path)
+        try:
+            conn.execute("PRAGMA busy_timeout = 30000")
+            results = rebuild(conn) if '--rebuild' in sys.argv else refresh(conn)
+        except sqlite3.Error as e:
+            print(f"\n❌ Refresh failed: {e}")
+            sys.exit(1)
+        finally:
+            conn.close()
+        for mv_name, result in results.items():
+            action = 'rebuilt' if result['rebuilt'] else f"{result['keys']} keys refreshed"
+            print(f"  ✓ {mv_name}: {action} ({result['seconds']:.2f}s)")
+    else:
+        print_status(db_path, check_rows='--verify' in sys.argv)
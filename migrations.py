@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+"""
+Schema Migrations
+Brings an existing database forward in place - no rebuild, no re-import
+
+The schema version is kept in PRAGMA user_version. MIGRATIONS is the ordered
+list of steps; migrate() applies every step above the database's version:
+
+  - 'schema' runs in one transaction (BEGIN IMMEDIATE ... COMMIT) - a failed
+    step rolls back and leaves the version where it was
+  - 'backfill' entries (table, SET clause, WHERE clause) run as UPDATEs over
+    rowid ranges of BACKFILL_CHUNK_SIZE rows, one short transaction each,
+    so readers are never blocked for the length of a full-table rewrite
+  - user_version is bumped once the step and its backfills are done
+
+Every step is idempotent and every backfill WHERE clause excludes rows that
+are already filled, so an interrupted upgrade is resumed by running it again.
+The cost of an upgrade is ALTER TABLE ... ADD COLUMN (metadata only), the new
+indexes and the backfilled rows - never a reload of the data.
+
+create_database.py stamps new databases with SCHEMA_VERSION. A schema change
+is made in create_database.py AND added here as the next migration; step 1
+reconciles with the frozen version 1 schema (schema_v1.py), never the
+current create_database.py.
+
+Usage:
+    python migrations.py [db_path]            # upgrade to the latest version
+    python migrations.py [db_path] --status   # show version and pending steps
+"""
+
+import sqlite3
+import sys
+import time
+
+# Rows updated per backfill transaction
+BACKFILL_CHUNK_SIZE = 50000
+
+# Reference tables whose rows come from the create_database seed data
+SEED_TABLES = (
+    'product_categories', 'products', 'line_item_types', 'costing_items',
+    'price_days', 'bcs_types', 'bcs_period_statuses', 'alias_types',
+    'index_components',
+)
+
+# Defaults SQLite does not allow on ALTER TABLE ... ADD COLUMN
+NON_CONSTANT_DEFAULTS = ('CURRENT_TIMESTAMP', 'CURRENT_DATE', 'CURRENT_TIME')
+
+
+def _reference_schema():
+    """In-memory database with the frozen version 1 schema and seed rows - the schema to reach"""
+    from schema_v1 import SCHEMA_SQL, SEED_ROWS
+
+    reference = sqlite3.connect(':memory:')
+    for sql in SCHEMA_SQL:
+        reference.execute(sql)
+    for table_name, (columns, rows) in SEED_ROWS.items():
+        placeholders = ', '.join('?' * len(columns))
+        reference.executemany(
+            f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})", rows
+        )
+    reference.commit()
+    return reference
+
+
+def _schema_objects(cursor, object_type):
+    """name -> sql for the tables / indexes / views of a database, in creation order"""
+    rows = cursor.execute("""
+        SELECT name, sql FROM sqlite_master
+        WHERE type = ? AND name NOT LIKE 'sqlite_%' AND sql IS NOT NULL
+        ORDER BY rowid
+    """, (object_type,))
+    return dict(rows.fetchall())
+
+
+def _column_definition(column):
+    """ADD COLUMN clause for a PRAGMA table_info row of the reference schema"""
+    _, name, column_type, notnull, default, _ = column
+    definition = f"{name} {column_type}".strip()
+    constant_default = (
+        default is not None
+        and default.upper() not in NON_CONSTANT_DEFAULTS
+        and not default.startswith('(')
+    )
+    if constant_default:
+        definition += f" DEFAULT {default}"
+        if notnull:
+            definition += " NOT NULL"
+    return definition
+
+
+def reconcile_schema(cursor):
+    """
+    Add whatever the version 1 schema (schema_v1.py) has and this database lacks
+
+    Missing tables and indexes are created, missing columns are added,
+    views that differ are recreated and empty reference tables are seeded.
+    Nothing is dropped: extra tables and columns of older schemas are kept.
+
+    Returns:
+        list: Descriptions of the changes made
+    """
+    reference = _reference_schema()
+    changes = []
+    try:
+        ref_cursor = reference.cursor()
+        live_tables = _schema_objects(cursor, 'table')
+
+        for table_name, sql in _schema_objects(ref_cursor, 'table').items():
+            if table_name not in live_tables:
+                cursor.execute(sql)
+                changes.append(f"created table {table_name}")
+                continue
+            live_columns = {row[1] for row in cursor.execute(f"PRAGMA table_info({table_name})")}
+            for column in ref_cursor.execute(f"PRAGMA table_info({table_name})").fetchall():
+                if column[1] not in live_columns:
+                    cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {_column_definition(column)}")
+                    changes.append(f"added column {table_name}.{column[1]}")
+
+        live_indexes = _schema_objects(cursor, 'index')
+        for index_name, sql in _schema_objects(ref_cursor, 'index').items():
+            if index_name not in live_indexes:
+                cursor.execute(sql)
+                changes.append(f"created index {index_name}")
+
+        # Views can reference each other - drop every changed view first,
+        # then create them in reference order
+        live_views = _schema_objects(cursor, 'view')
+        ref_views = _schema_objects(ref_cursor, 'view')
+        changed_views = [name for name, sql in ref_views.items() if live_views.get(name) != sql]
+        for view_name in changed_views:
+            cursor.execute(f"DROP VIEW IF EXISTS {view_name}")
+        for view_name in changed_views:
+            cursor.execute(ref_views[view_name])
+            changes.append(f"{'recreated' if view_name in live_views else 'created'} view {view_name}")
+
+        for table_name in SEED_TABLES:
+            if cursor.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]:
+                continue
+            rows = ref_cursor.execute(f"SELECT * FROM {table_name}")
+            columns = ', '.join(column[0] for column in rows.description)
+            placeholders = ', '.join('?' * len(rows.description))
+            rows = rows.fetchall()
+            cursor.executemany(
+                f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})", rows
+            )
+            changes.append(f"seeded {len(rows)} rows into {table_name}")
+    finally:
+        reference.close()
+
+    return changes
+
+
+def _add_indexes(cursor, indexes, replaced=()):
+    """Create the (name, definition) indexes this database lacks and drop the replaced ones"""
+    changes = []
+    live_indexes = _schema_objects(cursor, 'index')
+    for index_name, index_def in indexes:
+        if index_name not in live_indexes:
+            cursor.execute(f"CREATE INDEX {index_name} ON {index_def}")
+            changes.append(f"created index {index_name}")
+    for index_name in replaced:
+        if index_name in live_indexes:
+            cursor.execute(f"DROP INDEX {index_name}")
+            changes.append(f"dropped index {index_name}")
+    return changes
+
+
+def add_query_plan_indexes(cursor):
+    """Indexes the query plan benchmark found missing (query_benchmark.py)"""
+    return _add_indexes(cursor, [
+        ("idx_shipping_periods_status", "shipping_periods(period_status, end_date)"),
+        ("idx_shipping_periods_modified", "shipping_periods(modified_date)"),
+        ("idx_bcs_terminal_alias", "bcs(primary_terminal_alias)"),
+        ("idx_bcs_periods_bcs_dates", "bcs_periods(bcs_id, start_date, end_date)"),
+    ], replaced=['idx_bcs_periods_bcs'])  # covered by idx_bcs_periods_bcs_dates
+
+
+def add_as_of_indexes(cursor):
+    """Indexes behind the as-of queries (as_of.py)"""
+    return _add_indexes(cursor, [
+        ("idx_terminals_open", "terminals(effective_date) WHERE end_date IS NULL"),
+        ("idx_terminals_ended", "terminals(end_date, effective_date) WHERE end_date IS NOT NULL"),
+        ("idx_tariffs_open", "pipeline_tariffs(effective_date) WHERE end_date IS NULL"),
+        ("idx_tariffs_ended", "pipeline_tariffs(end_date, effective_date) WHERE end_date IS NOT NULL"),
+        ("idx_shipping_periods_terminal_start", "shipping_periods(terminal_id, start_date)"),
+    ], replaced=['idx_shipping_periods_terminal'])  # covered by idx_shipping_periods_terminal_start
+
+
+def add_materialized_views(cursor):
+    """Tables, indexes and triggers of the materialized views (materialized_views.py)"""
+    from materialized_views import ensure_materialized_views
+
+    return ensure_materialized_views(cursor)
+
+
+def add_archive_schema(cursor):
+    """archive_index and the archiver's timestamp indexes (history_archive.py)"""
+    from history_archive import ensure_archive_schema
+
+    changes = ensure_archive_schema(cursor)
+    # covered by idx_tasks_status_completed
+    return changes + _add_indexes(cursor, [], replaced=['idx_tasks_status'])
+
+
+def recreate_materialized_view_triggers(cursor):
+    """Change-log triggers that no longer fail under an UPSERT (materialized_views.py)"""
+    from materialized_views import ensure_materialized_views
+
+    triggers = [name for (name,) in cursor.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg_mv_%'")]
+    for trigger_name in triggers:
+        cursor.execute(f"DROP TRIGGER {trigger_name}")
+    return [f"dropped {len(triggers)} change-log triggers"] + ensure_materialized_views(cursor)
+
+
+def untype_change_log_keys(cursor):
+    """mv_change_log.key_value without TEXT affinity, so INTEGER keys match (materialized_views.py)"""
+    from materialized_views import MATERIALIZED_VIEWS, FULL_REBUILD_KEY, ensure_materialized_views
+
+    key_type = {row[1]: row[2] for row in cursor.execute("PRAGMA table_info(mv_change_log)")}.get('key_value')
+    if not key_type:
+        return []
+    # Pending keys may have been stored as text - rebuild those views instead
+    pending = [name for (name,) in cursor.execute("SELECT DISTINCT view_name FROM mv_change_log")]
+    cursor.execute("DROP TABLE mv_change_log")
+    changes = ensure_materialized_views(cursor) + ["recreated table mv_change_log with untyped keys"]
+    for mv_name in pending:
+        if mv_name in MATERIALIZED_VIEWS:
+            cursor.execute("INSERT INTO mv_change_log (view_name, key_value) VALUES (?, ?)",
+                           (mv_name, FULL_REBUILD_KEY))
+            changes.append(f"queued full rebuild of {mv_name}")
+    return changes
+
+
+def add_terminal_location_index(cursor):
+    """Normalized-state index behind location key lookups (terminal_ids.py)"""
+    return _add_indexes(cursor, [
+        ("idx_terminals_location", "terminals(UPPER(TRIM(COALESCE(state, ''))))"),
+    ])
+
+
+def drop_bcs_detail_materialization(cursor):
+    """mv_bcs_detail, its triggers and log rows - the view reads as fast (materialized_views.py)"""
+    changes = []
+    triggers = [name for (name,) in cursor.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg_mv_bcs_detail_%'")]
+    for trigger_name in triggers:
+        cursor.execute(f"DROP TRIGGER {trigger_name}")
+        changes.append(f"dropped trigger {trigger_name}")
+    if 'mv_bcs_detail' in _schema_objects(cursor, 'table'):
+        cursor.execute("DROP TABLE mv_bcs_detail")
+        changes.append("dropped table mv_bcs_detail")
+    for table_name in ('mv_change_log', 'mv_refresh_state'):
+        if table_name in _schema_objects(cursor, 'table'):
+            cursor.execute(f"DELETE FROM {table_name} WHERE view_name = 'mv_bcs_detail'")
+    return changes
+
+
+# Ordered schema versions. Append new steps; never edit an applied one.
+MIGRATIONS = [
+    {
+        'version': 1,
+        'description': 'Reconcile with the version 1 schema (tables, columns, indexes, views, seed data)',
+        'schema': reconcile_schema,
+    },
+    {
+        'version': 2,
+        'description': 'Backfill terminals.tcn4 from the IRS TCN or the terminal name suffix',
+        'backfill': [
+            (
+                'terminals',
+                """tcn4 = CASE
+                       WHEN irs_tcn GLOB '*[0-9][0-9][0-9][0-9]' THEN substr(irs_tcn, -4)
+                       ELSE substr(terminal_name, -4)
+                   END""",
+                """tcn4 IS NULL
+                   AND (irs_tcn GLOB '*[0-9][0-9][0-9][0-9]'
+                        OR terminal_name GLOB '*[ -][0-9][0-9][0-9][0-9]')""",
+            ),
+        ],
+    },
+    {
+        'version': 3,
+        'description': 'Indexes for shipping period status / change lookups and the shipping to BCS join',
+        'schema': add_query_plan_indexes,
+    },
+    {
+        'version': 4,
+        'description': 'Open / ended row indexes and (series, start) indexes for as-of queries',
+        'schema': add_as_of_indexes,
+    },
+    {
+        'version': 5,
+        'description': 'Materialized v_active_shipping / v_bcs_detail with change-log triggers',
+        'schema': add_materialized_views,
+    },
+    {
+        'version': 6,
+        'description': 'archive_index and month indexes for archiving agent_tasks / data_quality_log',
+        'schema': add_archive_schema,
+    },
+    {
+        'version': 7,
+        'description': 'Materialized view change-log triggers skip pending keys instead of INSERT OR IGNORE',
+        'schema': recreate_materialized_view_triggers,
+    },
+    {
+        'version': 8,
+        'description': 'Untyped mv_change_log keys so INTEGER (compact) keys match the materialized rows',
+        'schema': untype_change_log_keys,
+    },
+    {
+        'version': 9,
+        'description': 'Normalized-state index for terminal location lookups',
+        'schema': add_terminal_location_index,
+    },
+    {
+        'version': 10,
+        'description': 'Drop mv_bcs_detail - v_bcs_detail is read directly',
+        'schema': drop_bcs_detail_materialization,
+    },
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1]['version']
+
+
+def current_version(conn):
+    """Schema version recorded in the database (0 = never migrated)"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def set_version(cursor, version):
+    """Record the schema version (PRAGMA does not take bound parameters)"""
+    cursor.execute(f"PRAGMA user_version = {int(version)}")
+
+
+def pending_migrations(conn, target=None):
+    """Migrations above the database's version, up to target (default: latest)"""
+    version = current_version(conn)
+    target = SCHEMA_VERSION if target is None else target
+    return [m for m in MIGRATIONS if version < m['version'] <= target]
+
+
+def backfill(conn, table_name, assignments, where, chunk_size=BACKFILL_CHUNK_SIZE):
+    """
+    UPDATE table_name SET assignments WHERE where, one rowid range at a time
+
+    Each chunk commits on its own, so the write lock is held for one chunk
+    and an interrupted backfill continues where it stopped (the WHERE clause
+    must exclude rows that are already filled).
+
+    Returns:
+        int: Rows updated
+    """
+    low, high = conn.execute(f"SELECT MIN(rowid), MAX(rowid) FROM {table_name}").fetchone()
+    if low is None:
+        return 0
+
+    updated = 0
+    for start in range(low, high + 1, chunk_size):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = conn.execute(f"""
+                UPDATE {table_name} SET {assignments}
+                WHERE rowid >= ? AND rowid < ? AND ({where})
+            """, (start, start + chunk_size))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        updated += cursor.rowcount
+    return updated
+
+
+def apply_migration(conn, migration, chunk_size=BACKFILL_CHUNK_SIZE):
+    """
+    Apply one migration step and record its version
+
+    conn must be in autocommit mode (isolation_level=None) - transactions
+    are opened here.
+    """
+    started = time.perf_counter()
+    print(f"\n→ Migration {migration['version']}: {migration['description']}")
+
+    if 'schema' in migration:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            changes = migration['schema'](conn.cursor()) or []
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        for change in changes:
+            print(f"  ✓ {change}")
+        if not changes:
+            print("  ✓ Schema already up to date")
+
+    for table_name, assignments, where in migration.get('backfill', []):
+        updated = backfill(conn, table_name, assignments, where, chunk_size)
+        print(f"  ✓ Backfilled {updated} {table_name} rows")
+
+    set_version(conn, migration['version'])
+    print(f"  ✓ Version {migration['version']} ({time.perf_counter() - started:.2f}s)")
+
+
+def migrate(db_path='supply_chain.db', target=None, chunk_size=BACKFILL_CHUNK_SIZE):
+    """
+    Upgrade a database in place to target (default: the latest version)
+
+    Returns:
+        dict: Version before and after, and the versions applied
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.execute("PRAGMA busy_timeout = 30000")
+        # Same journal mode as create_database - readers keep working while
+        # backfill chunks commit
+        conn.execute("PRAGMA journal_mode = WAL")
+
+        from_version = current_version(conn)
+        pending = pending_migrations(conn, target)
+        print("\n" + "=" * 80)
+        print(f"SCHEMA MIGRATION - {db_path}")
+        print("=" * 80)
+        print(f"  Current version: {from_version}   Target version: {target or SCHEMA_VERSION}")
+
+        if not pending:
+            print("\n  ✓ Database is up to date")
+        for migration in pending:
+            apply_migration(conn, migration, chunk_size)
+
+        return {
+            'from_version': from_version,
+            'to_version': current_version(conn),
+            'applied': [m['version'] for m in pending],
+        }
+    finally:
+        conn.close()
+
+
+def print_status(db_path='supply_chain.db'):
+    """Print the database's schema version and the steps still to apply"""
+    conn = sqlite3.connect(db_path)
+    try:
+        version = current_version(conn)
+        pending = pending_migrations(conn)
+    finally:
+        conn.close()
+
+    print(f"\n  Database: {db_path}")
+    print(f"  Schema version: {version} (latest: {SCHEMA_VERSION})")
+    if not pending:
+        print("  ✓ Up to date")
+    for migration in pending:
+        print(f"  ⏳ {migration['version']}: {migration['description']}")
+    return pending
+
+
+# Command-line interface
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    db_path = args[0] if args else 'supply_chain.db'
+
+    if '--status' in sys.argv:
+        print_status(db_path)
+    else:
+        try:
+            result = migrate(db_path)
+        except sqlite3.Error as e:
+            print(f"\n❌ Migration failed: {e}")
+            print("   The failed step was rolled back - fix the cause and run again to resume")
+            sys.exit(1)
+        print(f"\n✅ Schema version {result['from_version']} → {result['to_version']}")
@@ -204,13 +204,15 @@ class SupplyChainOrchestrator:
     # TASK EXECUTION
     # ============================================================================
     
-    def process_task_queue(self, max_tasks: int = 10, agent_type: Optional[str] = None):
+    def process_task_queue(self, max_tasks: int = 10, agent_type: Optional[str] = None,
+                           task_ids: Optional[List[str]] = None):
         """
         Process pending tasks from the queue
         
         Args:
             max_tasks: Maximum number of tasks to process
             agent_type: If specified, only process tasks for this agent type
+            task_ids: If specified, only process these tasks (e.g., the ones just retried)
         
         Returns:
             List of task results
@@ -230,6 +232,10 @@ class SupplyChainOrchestrator:
             query += " AND agent_type = ?"
             params.append(agent_type)
         
+        if task_ids is not None:
+            query += f" AND task_id IN ({', '.join('?' * len(task_ids))})"
+            params.extend(task_ids)
+        
         query += """
             ORDER BY priority DESC, assigned_timestamp ASC
             LIMIT ?
@@ -294,9 +300,16 @@ class SupplyChainOrchestrator:
             from terminal_discovery_agent import TerminalDiscoveryAgent
             agent = TerminalDiscoveryAgent(self.client.api_key, self.db_path)
             result = agent.discover_terminals(
-                force_refresh=parameters.get('force_refresh', False)
+                force_refresh=parameters.get('force_refresh', False),
+                task_id=task_id
             )
             
+        elif agent_type == 'linkage_validation':
+            # Native set-based scan - no API call needed
+            from referential_integrity import validate_linkages
+            fix = parameters.get('fix_mode', 'end_date') if parameters.get('fix_orphans') else None
+            result = validate_linkages(self.db_path, fix=fix)
+            
         # Add other agent types here as they're implemented
         # elif agent_type == 'pipeline_tariff':
         #     from pipeline_tariff_agent import PipelineTariffAgent
@@ -472,6 +485,37 @@ class SupplyChainOrchestrator:
         conn.commit()
         conn.close()
     
+    def retry_failed_tasks(self, agent_type: Optional[str] = None) -> List[str]:
+        """
+        Put failed tasks back in the queue under their original task_id
+        
+        Agents that checkpoint their phases (e.g., terminal discovery) resume
+        from the last completed phase instead of starting over.
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        query = "SELECT task_id FROM agent_tasks WHERE status = 'Failed'"
+        params = []
+        if agent_type:
+            query += " AND agent_type = ?"
+            params.append(agent_type)
+        
+        task_ids = [row[0] for row in cursor.execute(query, params).fetchall()]
+        
+        cursor.executemany("""
+            UPDATE agent_tasks
+            SET status = 'Pending',
+                error_message = NULL,
+                retry_count = COALESCE(retry_count, 0) + 1
+            WHERE task_id = ?
+        """, [(task_id,) for task_id in task_ids])
+        
+        conn.commit()
+        conn.close()
+        
+        return task_ids
+    
     # ============================================================================
     # HUMAN REVIEW MANAGEMENT
     # ============================================================================
@@ -535,6 +579,14 @@ class SupplyChainOrchestrator:
             GROUP BY status
         """).fetchall()
         
+        # Completed tasks moved to the monthly archives (history_archive.py)
+        archived_tasks = 0
+        if cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'archive_index'").fetchone():
+            archived_tasks = cursor.execute("""
+                SELECT COALESCE(SUM(row_count), 0) FROM archive_index
+                WHERE table_name = 'agent_tasks'
+            """).fetchone()[0]
+        
         # Data statistics
         terminal_count = cursor.execute("""
             SELECT COUNT(*) FROM v_active_terminals
@@ -559,6 +611,7 @@ class SupplyChainOrchestrator:
         report = {
             'timestamp': datetime.now().isoformat(),
             'tasks': {status: count for status, count in task_stats},
+            'archived_tasks': archived_tasks,
             'data': {
                 'terminals': terminal_count,
                 'pipelines': pipeline_count,
@@ -581,6 +634,8 @@ class SupplyChainOrchestrator:
         print(f"\n📋 Tasks:")
         for status, count in report['tasks'].items():
             print(f"   {status}: {count}")
+        if report['archived_tasks']:
+            print(f"   Archived: {report['archived_tasks']}")
         
         print(f"\n📁 Data Coverage:")
         print(f"   Terminals: {report['data']['terminals']}")
@@ -617,6 +672,9 @@ def main():
     process_parser.add_argument('--max-tasks', type=int, default=10)
     process_parser.add_argument('--agent-type', help='Only process specific agent type')
     
+    retry_parser = subparsers.add_parser('retry', help='Re-queue failed tasks and process them')
+    retry_parser.add_argument('--agent-type', help='Only retry specific agent type')
+    
     # Status commands
     subparsers.add_parser('status', help='Show status report')
     subparsers.add_parser('review', help='Show review queue')
@@ -647,6 +705,16 @@ def main():
             agent_type=args.agent_type
         )
         
+    elif args.command == 'retry':
+        task_ids = orchestrator.retry_failed_tasks(agent_type=args.agent_type)
+        print(f"\n🔁 Re-queued {len(task_ids)} failed tasks")
+        if task_ids:
+            orchestrator.process_task_queue(
+                max_tasks=len(task_ids),
+                agent_type=args.agent_type,
+                task_ids=task_ids
+            )
+        
     elif args.command == 'status':
         orchestrator.print_status_report()
         
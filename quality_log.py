@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Data Quality Log Sink
+Buffered bulk writer for data_quality_log, shared by all agents
+
+Agents add one record per checked row; the sink buffers them and writes
+with executemany() through the caller's cursor, so the log commits (or
+rolls back) together with the data it describes. Rows use the canonical
+create_database.py schema:
+
+    log_id, table_name, record_id, quality_check_type,
+    quality_score, issues_found, checked_by, checked_at
+"""
+
+import json
+import uuid
+from datetime import datetime
+
+# Buffered records before an automatic flush
+DEFAULT_FLUSH_SIZE = 5000
+
+
+class QualityLogSink:
+    """
+    Buffers data_quality_log rows and flushes them in bulk
+
+    Usage:
+        sink = QualityLogSink(cursor, checked_by='excel_import_agent')
+        for terminal in terminals:
+            sink.add('terminals', terminal_id, 'excel_import', 0.95, issues)
+        sink.flush()
+        conn.commit()
+    """
+
+    def __init__(self, cursor, checked_by, flush_size=DEFAULT_FLUSH_SIZE):
+        self.cursor = cursor
+        self.checked_by = checked_by
+        self.flush_size = flush_size
+        self.records_written = 0
+        self._buffer = []
+        self._checked_at = datetime.now()
+
+    def __len__(self):
+        return len(self._buffer)
+
+    def add(self, table_name, record_id, quality_check_type,
+            quality_score=None, issues=None):
+        """
+        Buffer one quality check result
+
+        Args:
+            table_name: Table the checked record lives in (e.g., 'terminals')
+            record_id: Primary key of the checked record
+            quality_check_type: Name of the check (e.g., 'terminal_validation')
+            quality_score: 0-1 score, if the check produces one
+            issues: List/dict of issues found - stored as JSON
+        """
+        self._buffer.append((
+            str(uuid.uuid4()),
+            table_name,
+            record_id,
+            quality_check_type,
+            quality_score,
+            json.dumps(issues) if issues is not None else None,
+            self.checked_by,
+            self._checked_at
+        ))
+        if len(self._buffer) >= self.flush_size:
+            self.flush()
+
+    def flush(self):
+        """Write all buffered records in the caller's transaction"""
+        if not self._buffer:
+            return 0
+
+        self.cursor.executemany("""
+            INSERT INTO data_quality_log (
+                log_id, table_name, record_id, quality_check_type,
+                quality_score, issues_found, checked_by, checked_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, self._buffer)
+
+        written = len(self._buffer)
+        self.records_written += written
+        self._buffer = []
+        return written
@@ -0,0 +1,470 @@
+#!/usr/bin/env python3
+"""
+Query Plan Benchmark
+EXPLAIN QUERY PLAN and timing for the views, orchestrator queries and
+EN validation queries, on a scaled synthetic database
+
+Every query in QUERIES is planned with EXPLAIN QUERY PLAN and executed
+(best of BENCHMARK_REPEATS) against a database from synthetic_data.py at
+the chosen scale. A query fails the benchmark when its plan
+
+  - SCANs a large table (LARGE_TABLE_ROWS or more rows at that scale), or
+  - builds an AUTOMATIC index - SQLite found no index and makes a
+    throw-away one on every execution
+
+unless the table is listed in the query's 'full_scan' (queries that read
+the whole table by design, e.g. a full export). A new query that has no
+index to use therefore fails here before it reaches production.
+
+The EN validation queries in Reference/Domain Knowledge/sql_queries are
+PostgreSQL against the EN schema; the entries here are their SQLite
+translations against create_database.py, with the literal dates turned
+into parameters and this schema's end dates (exclusive, NULL = open).
+
+Usage:
+    python query_benchmark.py [--scale 1.0] [--output query_plan_report.json] [--db path]
+
+Exit status is 1 when any query fails.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from as_of import as_of_sql
+from materialized_views import READ_SQL
+from synthetic_data import generate_database
+
+# Rows at which a table counts as large at the benchmark scale
+LARGE_TABLE_ROWS = 5000
+
+# Executions per query; the fastest is reported
+BENCHMARK_REPEATS = 3
+
+# Date the effective-dated queries ask about
+AS_OF_DATE = '2024-02-01'
+
+# Cut-off of the incremental shipping -> BCS push (the latest synthetic month)
+MODIFIED_SINCE = '2024-12-01'
+
+# Registered queries. 'full_scan' lists tables the query reads in full on purpose.
+QUERIES = [
+    # ---- Views -------------------------------------------------------------
+    {
+        'name': 'v_active_shipping',
+        'source': 'create_database.py (view)',
+        'sql': "SELECT * FROM v_active_shipping",
+    },
+    {
+        'name': 'v_active_shipping_terminal',
+        'source': 'create_database.py (view)',
+        'sql': "SELECT * FROM v_active_shipping WHERE terminal_id = :terminal_id",
+    },
+    {
+        'name': 'v_bcs_detail_export',
+        'source': 'excel_export.py (en_bcs)',
+        'sql': "SELECT * FROM v_bcs_detail ORDER BY bcs_code, start_date",
+        'full_scan': ('bcs', 'bcs_periods', 'bcs_line_items'),
+    },
+    {
+        'name': 'v_bcs_detail_code',
+        'source': 'create_database.py (view)',
+        'sql': "SELECT * FROM v_bcs_detail WHERE bcs_code = :bcs_code",
+    },
+    {
+        'name': 'v_terminal_products_terminal',
+        'source': 'create_database.py (view)',
+        'sql': "SELECT * FROM v_terminal_products WHERE terminal_id = :terminal_id",
+    },
+    # ---- Materialized views (materialized_views.py) ------------------------
+    {
+        'name': 'mv_active_shipping',
+        'source': 'materialized_views.py (READ_SQL)',
+        'sql': READ_SQL['v_active_shipping'],
+        'full_scan': ('mv_active_shipping',),
+    },
+    {
+        'name': 'mv_active_shipping_terminal',
+        'source': 'materialized_views.py (READ_SQL)',
+        'sql': READ_SQL['v_active_shipping'] + " AND terminal_id = :terminal_id",
+    },
+    # ---- Orchestrator ------------------------------------------------------
+    {
+        'name': 'orchestrator_pending_tasks',
+        'source': 'orchestrator.py (process_task_queue)',
+        'sql': """
+            SELECT task_id, agent_type, task_description, task_parameters
+            FROM agent_tasks
+            WHERE status = 'Pending' AND agent_type = :agent_type
+            ORDER BY priority DESC, assigned_timestamp ASC
+            LIMIT 10
+        """,
+    },
+    {
+        'name': 'orchestrator_failed_tasks',
+        'source': 'orchestrator.py (retry_failed_tasks)',
+        'sql': "SELECT task_id FROM agent_tasks WHERE status = 'Failed'",
+    },
+    {
+        'name': 'orchestrator_review_queue',
+        'source': 'orchestrator.py (get_review_queue)',
+        'sql': """
+            SELECT task_id, agent_type, task_description,
+                   completed_timestamp, result_summary
+            FROM v_review_queue
+        """,
+    },
+    {
+        'name': 'orchestrator_task_stats',
+        'source': 'orchestrator.py (generate_status_report)',
+        'sql': "SELECT status, COUNT(*) AS count FROM agent_tasks GROUP BY status",
+        # Counts every task; reads the status index, not the table
+        'full_scan': ('agent_tasks',),
+    },
+    {
+        'name': 'orchestrator_active_terminals',
+        'source': 'orchestrator.py (generate_status_report)',
+        'sql': "SELECT COUNT(*) FROM v_active_terminals",
+        'full_scan': ('terminals',),
+    },
+    # ---- EN validation (Reference/Domain Knowledge/sql_queries) -------------
+    {
+        'name': 'en_costing_tariff_values',
+        'source': '0 - Validate EN Costing Tariff Values.sql',
+        'sql': """
+            SELECT co.terminal_id, co.product_category_id, pc.category_code,
+                   COUNT(co.costing_id) AS costing_count,
+                   SUM(co.costing_value) AS costing_value,
+                   aa.tariff_count, aa.tariff_cost
+            FROM costing co
+            JOIN product_categories pc ON co.product_category_id = pc.category_id
+            JOIN costing_items ci ON co.costing_item_id = ci.costing_item_id
+            JOIN (
+                SELECT tpl.terminal_id, tpl.product_category_id,
+                       COUNT(DISTINCT tarpl.tariff_id) AS tariff_count,
+                       SUM(DISTINCT tc.tariff_value) AS tariff_cost
+                FROM terminal_path_links tpl
+                JOIN tariff_path_links tarpl ON tpl.shipping_path_id = tarpl.shipping_path_id
+                JOIN tariff_costs tc ON tarpl.tariff_id = tc.tariff_id
+                JOIN tariff_libraries tl ON tc.tariff_library_id = tl.tariff_library_id
+                WHERE tl.tariff_start_date <= :as_of
+                  AND (tl.tariff_end_date IS NULL OR tl.tariff_end_date > :as_of)
+                GROUP BY tpl.terminal_id, tpl.product_category_id
+            ) aa ON aa.terminal_id = co.terminal_id
+                AND aa.product_category_id = co.product_category_id
+            WHERE co.start_date <= :as_of AND (co.end_date IS NULL OR co.end_date > :as_of)
+              AND ci.costing_item_name = 'tariff'
+              AND pc.category_code IN ('GAS', 'ETH')
+            GROUP BY co.terminal_id, co.product_category_id
+        """,
+        # The tariff side is aggregated for every terminal before the join
+        'full_scan': ('terminal_path_links',),
+    },
+    {
+        'name': 'en_costing_detail_terminal',
+        'source': '0 - Validate EN Costing Tariff Values.sql',
+        'sql': """
+            SELECT co.costing_id, co.start_date, co.end_date, co.costing_value, ci.costing_item_name
+            FROM costing co
+            JOIN costing_items ci ON co.costing_item_id = ci.costing_item_id
+            WHERE co.terminal_id = :terminal_id
+            ORDER BY ci.costing_item_name, co.start_date
+        """,
+    },
+    {
+        'name': 'en_costing_to_shipping_periods',
+        'source': '1 - EN Costing to EN Shipping Queries.sql',
+        'sql': """
+            SELECT co.terminal_id, MAX(co.start_date) AS shipping_period_start_date,
+                   MIN(co.end_date) AS shipping_period_end_date
+            FROM costing co
+            JOIN costing_items ci ON co.costing_item_id = ci.costing_item_id
+            WHERE co.start_date <= :as_of AND (co.end_date IS NULL OR co.end_date > :as_of)
+              AND ci.shipping_status = 1
+              AND co.terminal_id IN (
+                  SELECT terminal_id FROM terminal_products WHERE shipping_status = 1
+              )
+            GROUP BY co.terminal_id
+        """,
+        'full_scan': ('terminal_products',),
+    },
+    {
+        'name': 'en_shipping_setup_terminal',
+        'source': '1 - EN Costing to EN Shipping Queries.sql',
+        'sql': """
+            SELECT tp.terminal_id, tp.product_id, ss.line_item_type_id, ss.base_product_id,
+                   ss.line_item_percent, SUM(co.costing_value) AS costing_value
+            FROM terminal_products tp
+            JOIN shipping_setup ss ON ss.terminal_product_id = tp.terminal_product_id
+            JOIN products bpr ON ss.base_product_id = bpr.product_id
+            LEFT JOIN costing co ON co.terminal_id = tp.terminal_id
+                AND co.product_category_id = bpr.product_category_id
+                AND co.start_date <= :as_of AND (co.end_date IS NULL OR co.end_date > :as_of)
+            WHERE tp.terminal_id = :terminal_id AND tp.shipping_status = 1
+            GROUP BY tp.terminal_id, tp.product_id, ss.line_item_type_id,
+                     ss.base_product_id, ss.line_item_percent
+        """,
+    },
+    {
+        'name': 'en_shipping_to_bcs_periods',
+        'source': '2 - EN Shipping to EN BCS Queries.sql',
+        'sql': """
+            SELECT DISTINCT b.bcs_id, sp.start_date, sp.end_date
+            FROM shipping_periods sp
+            JOIN bcs b ON b.primary_terminal_alias = sp.terminal_id
+            WHERE sp.modified_date >= :modified_since
+            ORDER BY b.bcs_id
+        """,
+    },
+    {
+        'name': 'en_shipping_to_bcs_line_items',
+        'source': '2 - EN Shipping to EN BCS Queries.sql',
+        'sql': """
+            SELECT b.bcs_code, bp.bcs_period_id, bp.start_date, bp.end_date,
+                   sli.product_id AS product_alias,
+                   sli.line_item_type_id AS line_item_type_alias,
+                   si.spot_index_id AS index_alias,
+                   sli.line_item_percent
+            FROM shipping_periods sp
+            JOIN shipping_line_items sli ON sli.shipping_period_id = sp.shipping_period_id
+            JOIN bcs b ON b.primary_terminal_alias = sp.terminal_id
+            JOIN bcs_periods bp ON bp.bcs_id = b.bcs_id
+                AND bp.start_date = sp.start_date AND bp.end_date IS sp.end_date
+            LEFT JOIN spot_indices si ON si.spot_index_id = sli.spot_index_id
+            WHERE sp.modified_date >= :modified_since
+            ORDER BY b.bcs_code
+        """,
+    },
+    # ---- As-of queries (as_of.py) ------------------------------------------
+    {
+        'name': 'as_of_terminals',
+        'source': 'as_of.py',
+        'sql': as_of_sql('terminals'),
+    },
+    {
+        'name': 'as_of_pipeline_tariffs',
+        'source': 'as_of.py',
+        'sql': as_of_sql('pipeline_tariffs'),
+    },
+    {
+        'name': 'as_of_transportation_costs',
+        'source': 'as_of.py',
+        'sql': as_of_sql('transportation_costs'),
+        # Lists every series from the (series, start) index, then one seek each
+        'full_scan': ('transportation_costs',),
+    },
+    {
+        'name': 'as_of_costing',
+        'source': 'as_of.py',
+        'sql': as_of_sql('costing'),
+        'full_scan': ('costing',),
+    },
+    {
+        'name': 'as_of_costing_terminal',
+        'source': 'as_of.py',
+        'sql': as_of_sql('costing', ['terminal_id']),
+    },
+    {
+        'name': 'as_of_shipping_periods',
+        'source': 'as_of.py',
+        'sql': as_of_sql('shipping_periods'),
+        'full_scan': ('shipping_periods',),
+    },
+    {
+        'name': 'as_of_shipping_periods_terminal',
+        'source': 'as_of.py',
+        'sql': as_of_sql('shipping_periods', ['terminal_id']),
+    },
+    {
+        'name': 'as_of_bcs_periods',
+        'source': 'as_of.py',
+        'sql': as_of_sql('bcs_periods'),
+        'full_scan': ('bcs_periods',),
+    },
+    {
+        'name': 'as_of_bcs_periods_bcs',
+        'source': 'as_of.py',
+        'sql': as_of_sql('bcs_periods', ['bcs_id']),
+    },
+]
+
+
+# ============================================================================
+# PLAN ANALYSIS
+# ============================================================================
+
+TABLE_REFERENCE = re.compile(r'\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', re.IGNORECASE)
+SQL_KEYWORDS = {'on', 'using', 'where', 'join', 'left', 'inner', 'cross', 'group', 'order',
+                'limit', 'natural', 'outer', 'as', 'union', 'having', 'window'}
+
+
+def _alias_map(conn, sql):
+    """Plan names (aliases and table names) -> tables, from the query and every view"""
+    texts = [sql] + [row[0] for row in conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'view' AND sql IS NOT NULL")]
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    aliases = {}
+    for text in texts:
+        for table, alias in TABLE_REFERENCE.findall(text):
+            if table not in tables:
+                continue
+            aliases.setdefault(table, set()).add(table)
+            if alias and alias.lower() not in SQL_KEYWORDS:
+                aliases.setdefault(alias, set()).add(table)
+    return aliases
+
+
+def table_row_counts(conn):
+    """Rows per table"""
+    tables = [row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")]
+    return {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in tables}
+
+
+def check_plan(plan, aliases, row_counts, full_scan=()):
+    """
+    Full scans and automatic indexes on large tables in a query plan
+
+    Returns:
+        list: Violation dicts (table, rows, detail)
+    """
+    violations = []
+    for detail in plan:
+        match = re.match(r'(SCAN|SEARCH) (\S+)', detail)
+        if not match:
+            continue
+        operation, name = match.groups()
+        automatic = 'AUTOMATIC' in detail
+        if operation == 'SEARCH' and not automatic:
+            continue
+        for table in sorted(aliases.get(name, {name})):
+            rows = row_counts.get(table, 0)
+            if rows < LARGE_TABLE_ROWS or (table in full_scan and not automatic):
+                continue
+            violations.append({'table': table, 'rows': rows, 'detail': detail})
+    return violations
+
+
+def benchmark_params(conn):
+    """
+    Parameters of the registered queries, with ids taken from the database
+
+    Ids come from the first row by rowid, so a copy of the database (e.g.
+    compact_keys.py) is queried for the same terminal / BCS.
+    """
+    params = {
+        'terminal_id': conn.execute("SELECT terminal_id FROM shipping_periods ORDER BY rowid LIMIT 1").fetchone(),
+        'bcs_code': conn.execute("SELECT bcs_code FROM bcs ORDER BY rowid LIMIT 1").fetchone(),
+        'bcs_id': conn.execute("SELECT bcs_id FROM bcs_periods ORDER BY rowid LIMIT 1").fetchone(),
+        'agent_type': 'terminal_discovery',
+        'as_of': AS_OF_DATE,
+        'modified_since': MODIFIED_SINCE,
+    }
+    return {key: value[0] if isinstance(value, tuple) else value for key, value in params.items()}
+
+
+def benchmark_query(conn, query, params, aliases, row_counts, repeats=BENCHMARK_REPEATS):
+    """Plan, check and time one registered query"""
+    plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query['sql']}", params)]
+    violations = check_plan(plan, aliases, row_counts, query.get('full_scan', ()))
+
+    timings = []
+    rows = 0
+    for _ in range(repeats):
+        started = time.perf_counter()
+        rows = len(conn.execute(query['sql'], params).fetchall())
+        timings.append(time.perf_counter() - started)
+
+    return {
+        'name': query['name'],
+        'source': query['source'],
+        'plan': plan,
+        'violations': violations,
+        'passed': not violations,
+        'rows': rows,
+        'seconds': round(min(timings), 6),
+    }
+
+
+def run_benchmark(db_path=None, scale=1.0, output_path='query_plan_report.json', seed=42):
+    """
+    Plan and time every registered query and write the JSON report
+
+    Args:
+        db_path: Existing database to benchmark; a synthetic database at
+                 scale is built in a temporary file when omitted
+
+    Returns:
+        dict: The report
+    """
+    temp_dir = None
+    if db_path is None:
+        temp_dir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(temp_dir.name, 'benchmark.db')
+        generate_database(db_path, scale, seed)
+    conn = sqlite3.connect(db_path)
+
+    try:
+        row_counts = table_row_counts(conn)
+        params = benchmark_params(conn)
+
+        results = []
+        print(f"\n  {'Query':<34} {'Rows':>8} {'Seconds':>10}  Plan")
+        print("  " + "-" * 76)
+        for query in QUERIES:
+            result = benchmark_query(conn, query, params, _alias_map(conn, query['sql']), row_counts)
+            results.append(result)
+            status = '✓' if result['passed'] else '❌'
+            print(f"  {status} {result['name']:<32} {result['rows']:>8} {result['seconds']:>10.4f}")
+            for violation in result['violations']:
+                print(f"      ⚠️  {violation['detail']} ({violation['table']}: {violation['rows']:,} rows)")
+    finally:
+        conn.close()
+        if temp_dir:
+            temp_dir.cleanup()
+
+    failed = [result['name'] for result in results if not result['passed']]
+    report = {
+        'generated_at': datetime.now().isoformat(),
+        'sqlite_version': sqlite3.sqlite_version,
+        'scale': scale,
+        'large_table_rows': LARGE_TABLE_ROWS,
+        'table_rows': {table: rows for table, rows in row_counts.items() if rows},
+        'queries': results,
+        'failed': failed,
+        'passed': not failed,
+    }
+    with open(output_path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print("  " + "-" * 76)
+    if failed:
+        print(f"  ❌ {len(failed)} of {len(results)} queries scan large tables: {', '.join(failed)}")
+    else:
+        print(f"  ✓ All {len(results)} queries use indexes")
+    print(f"  Report: {output_path}")
+    return report
+
+
+# Command-line interface
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Check query plans and timings of the registered queries')
+    parser.add_argument('--scale', type=float, default=1.0, help='Synthetic data scale (1.0 = 1,000 terminals)')
+    parser.add_argument('--seed', type=int, default=42, help='Synthetic data seed')
+    parser.add_argument('--db', help='Benchmark an existing database instead of synthetic data')
+    parser.add_argument('--output', default='query_plan_report.json', help='JSON report path')
+    args = parser.parse_args()
+
+    print("\n" + "=" * 80)
+    print("QUERY PLAN BENCHMARK")
+    print("=" * 80)
+
+    report = run_benchmark(args.db, args.scale, args.output, args.seed)
+    sys.exit(0 if report['passed'] else 1)
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Read Replica
+A consistent read-only snapshot of the database for reports and exports
+
+Full exports and validation queries run for minutes; on supply_chain.db they
+compete with the agents' writes. take_snapshot() copies the database with
+the SQLite backup API, BACKUP_PAGES_PER_STEP pages at a time with a short
+sleep between steps, into <name>_replica.db:
+
+  - the source connection holds one read transaction for the whole copy.
+    In WAL mode (create_database / migrations.py set it) writers keep
+    committing meanwhile, and every step reads the same snapshot - without
+    the transaction each concurrent write would restart the backup
+  - the copy is written to a temporary file, switched to a rollback
+    journal, its materialized views refreshed, and then moved over the old
+    replica in one rename; readers never see a half-written replica
+  - replica_snapshot in the replica records when it was taken
+
+connect_for_reporting() is what reporting commands open: the replica when
+there is one (read-only), with a warning when it is older than
+REPLICA_MAX_AGE_MINUTES and the database has changed since; the database
+itself, with a warning, when there is no replica yet. reporting_path() is
+the same choice as a file path, for readers that open it themselves.
+
+Usage:
+    python read_replica.py [db_path]               # take a snapshot now
+    python read_replica.py [db_path] --every 30    # take one every 30 minutes
+    python read_replica.py [db_path] --status
+"""
+
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from urllib.request import pathname2url
+
+# Pages copied per backup step (4 MB with the default 4 KB pages)
+BACKUP_PAGES_PER_STEP = 1024
+
+# Seconds between backup steps - lets writers' I/O through
+BACKUP_STEP_SLEEP = 0.005
+
+# A replica older than this, of a database that changed since, is stale
+REPLICA_MAX_AGE_MINUTES = 60
+
+
+def replica_path_for(db_path):
+    """supply_chain.db -> supply_chain_replica.db"""
+    root, ext = os.path.splitext(db_path)
+    return f"{root}_replica{ext or '.db'}"
+
+
+def last_modified(db_path):
+    """Last write to the database (its file or its WAL), as a timestamp"""
+    times = [os.path.getmtime(path) for path in (db_path, db_path + '-wal') if os.path.exists(path)]
+    return max(times) if times else None
+
+
+def take_snapshot(db_path='supply_chain.db', replica_path=None,
+                  pages_per_step=BACKUP_PAGES_PER_STEP, step_sleep=BACKUP_STEP_SLEEP):
+    """
+    Copy db_path into its read replica
+
+    Returns:
+        dict: Replica path, pages copied, backup steps and seconds
+    """
+    from materialized_views import refresh as refresh_materialized_views
+
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"{db_path} not found")
+    replica_path = replica_path or replica_path_for(db_path)
+    temp_path = replica_path + '.tmp'
+    for suffix in ('', '-journal', '-wal', '-shm'):
+        if os.path.exists(temp_path + suffix):
+            os.remove(temp_path + suffix)
+
+    started = time.perf_counter()
+    source_modified = last_modified(db_path)
+    source = sqlite3.connect(db_path, isolation_level=None)
+    target = sqlite3.connect(temp_path)
+    steps = 0
+
+    def progress(status, remaining, total):
+        nonlocal steps
+        steps += 1
+
+    try:
+        source.execute("PRAGMA busy_timeout = 30000")
+        journal_mode = source.execute("PRAGMA journal_mode").fetchone()[0]
+        if journal_mode.lower() != 'wal':
+            print(f"  ⚠️  {db_path} is in {journal_mode} journal mode - writers wait for the copy "
+                  "(python migrations.py switches it to WAL)")
+
+        source.execute("BEGIN")
+        try:
+            source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+            source.backup(target, pages=pages_per_step, progress=progress, sleep=step_sleep)
+        finally:
+            source.execute("COMMIT")
+        pages = target.execute("PRAGMA page_count").fetchone()[0]
+        page_size = target.execute("PRAGMA page_size").fetchone()[0]
+        backup_seconds = time.perf_counter() - started
+
+        # Read-only readers cannot use a WAL database without its -shm file
+        target.execute("PRAGMA journal_mode = DELETE").fetchone()
+        if target.execute("SELECT 1 FROM sqlite_master WHERE name = 'mv_change_log'").fetchone():
+            refresh_materialized_views(target)
+        target.execute("""
+            CREATE TABLE IF NOT EXISTS replica_snapshot (
+                source_path TEXT,
+                taken_at TIMESTAMP,
+                source_modified_at TIMESTAMP,
+                pages INTEGER,
+                backup_seconds REAL
+            )
+        """)
+        target.execute("DELETE FROM replica_snapshot")
+        target.execute("INSERT INTO replica_snapshot VALUES (?, ?, ?, ?, ?)", (
+            os.path.abspath(db_path),
+            datetime.now().isoformat(sep=' ', timespec='seconds'),
+            datetime.fromtimestamp(source_modified).isoformat(sep=' ', timespec='seconds'),
+            pages,
+            round(backup_seconds, 3),
+        ))
+        target.commit()
+    except Exception:
+        target.close()
+        os.remove(temp_path)
+        raise
+    finally:
+        source.close()
+        target.close()
+
+    os.replace(temp_path, replica_path)
+    elapsed = time.perf_counter() - started
+    print(f"  ✓ Snapshot {replica_path}: {pages:,} pages ({pages * page_size / 1024 / 1024:,.0f} MB) "
+          f"in {steps} steps, {elapsed:.1f}s")
+    return {'replica_path': replica_path, 'pages': pages, 'steps': steps, 'seconds': round(elapsed, 2)}
+
+
+def replica_status(db_path='supply_chain.db', replica_path=None, max_age_minutes=REPLICA_MAX_AGE_MINUTES):
+    """
+    Age of the replica and whether the database changed after it was taken
+
+    Returns:
+        dict: replica_path, exists, taken_at, age_minutes, source_changed, stale
+    """
+    replica_path = replica_path or replica_path_for(db_path)
+    status = {'replica_path': replica_path, 'exists': os.path.exists(replica_path),
+              'taken_at': None, 'age_minutes': None, 'source_changed': None, 'stale': True}
+    if not status['exists']:
+        return status
+
+    conn = sqlite3.connect(f"file:{pathname2url(os.path.abspath(replica_path))}?mode=ro", uri=True)
+    try:
+        row = conn.execute("SELECT taken_at, source_modified_at FROM replica_snapshot").fetchone()
+    except sqlite3.OperationalError:
+        row = None
+    finally:
+        conn.close()
+    if not row:
+        return status
+
+    taken_at = datetime.fromisoformat(row[0])
+    source_modified = last_modified(db_path)
+    status['taken_at'] = row[0]
+    status['age_minutes'] = round((datetime.now() - taken_at).total_seconds() / 60, 1)
+    status['source_changed'] = (source_modified is not None
+                                and datetime.fromtimestamp(source_modified).replace(microsecond=0)
+                                > datetime.fromisoformat(row[1]))
+    status['stale'] = status['source_changed'] and status['age_minutes'] > max_age_minutes
+    return status
+
+
+def reporting_path(db_path='supply_chain.db'):
+    """The file reports read: the replica once one has been taken, otherwise db_path"""
+    status = replica_status(db_path)
+    return status['replica_path'] if status['exists'] and status['taken_at'] else db_path
+
+
+def connect_for_reporting(db_path='supply_chain.db', max_age_minutes=REPLICA_MAX_AGE_MINUTES):
+    """
+    Read-only connection for long reporting queries
+
+    Returns:
+        tuple: (connection, reading_replica) - the replica when there is one,
+               otherwise db_path itself
+    """
+    status = replica_status(db_path, max_age_minutes=max_age_minutes)
+    if not status['exists'] or status['taken_at'] is None:
+        print(f"  ⚠️  No read replica ({status['replica_path']}) - reading {db_path} directly; "
+              f"take one with: python read_replica.py {db_path}")
+        return sqlite3.connect(db_path), False
+
+    if status['stale']:
+        print(f"  ⚠️  Read replica is {status['age_minutes']:.0f} minutes old and {db_path} has changed "
+              f"since - refresh it with: python read_replica.py {db_path}")
+    else:
+        print(f"  → Reading replica taken {status['taken_at']}")
+    uri = f"file:{pathname2url(os.path.abspath(status['replica_path']))}?mode=ro"
+    return sqlite3.connect(uri, uri=True), True
+
+
+# Command-line interface
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Snapshot the database into its read replica')
+    parser.add_argument('db_path', nargs='?', default='supply_chain.db', help='Database to copy')
+    parser.add_argument('--every', type=float, metavar='MINUTES', help='Keep taking snapshots at this interval')
+    parser.add_argument('--status', action='store_true', help='Show the age of the replica')
+    args = parser.parse_args()
+
+    print("\n" + "=" * 80)
+    print(f"READ REPLICA - {args.db_path}")
+    print("=" * 80)
+
+    if args.status:
+        status = replica_status(args.db_path)
+        if not status['exists']:
+            print(f"  ⚠️  No replica at {status['replica_path']}")
+        else:
+            flag = '⚠️  STALE' if status['stale'] else '✓ Current'
+            changed = 'changed since' if status['source_changed'] else 'unchanged since'
+            print(f"  {flag}: {status['replica_path']} taken {status['taken_at']} "
+                  f"({status['age_minutes']:.0f} min ago, database {changed})")
+        sys.exit(1 if status['stale'] else 0)
+
+    while True:
+        try:
+            take_snapshot(args.db_path)
+        except (OSError, sqlite3.Error) as e:
+            print(f"\n❌ Snapshot failed: {e}")
+            if args.every is None:
+                sys.exit(1)
+        if args.every is None:
+            break
+        print(f"  Next snapshot in {args.every:g} minutes (Ctrl+C to stop)")
+        time.sleep(args.every * 60)
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Referential Integrity
+Set-based orphan scan over every foreign key in the database
+
+The schema declares its foreign keys, but SQLite only enforces them on
+connections that turn PRAGMA foreign_keys on - and the import agents do
+not. scan() finds the damage after the fact:
+
+  - the relationships are read from the database itself (sqlite_master and
+    PRAGMA foreign_key_list), plus the undeclared references compact_keys.py
+    knows about (IMPLICIT_REFERENCES), so new tables need no registration
+  - each relationship is one anti-join - child rows whose key has no parent
+    row - seeking the parent's primary key index, so a full scan reads each
+    child table once per foreign key it declares
+  - orphans are counted, with the number still open (end_date NULL or in
+    the future) for effective-dated tables, and a few sample rows
+
+fix_orphans() repairs declared relationships in bulk, one statement per
+relationship:
+
+  - 'end_date'   ends open orphan rows today; tables without an end_date
+                 are left for review
+  - 'quarantine' moves orphan rows, as JSON, to orphan_quarantine and
+                 deletes them; rows orphaned by a deletion are picked up by
+                 the next round, until a round finds nothing
+
+Implicit references are only reported, never fixed.
+
+Usage:
+    python referential_integrity.py [db_path] [--samples 3]
+    python referential_integrity.py [db_path] --fix end_date|quarantine
+"""
+
+import json
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+from compact_keys import IMPLICIT_REFERENCES
+
+# Sample orphan rows reported per relationship
+ORPHAN_SAMPLE_SIZE = 3
+
+# Where quarantined orphans go
+QUARANTINE_TABLE = 'orphan_quarantine'
+
+FIX_MODES = ('end_date', 'quarantine')
+
+# Quarantine rounds before giving up on a cascade
+MAX_QUARANTINE_ROUNDS = 10
+
+
+def _tables(conn):
+    return [row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name")]
+
+
+def _columns(conn, table_name):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table_name})")]
+
+
+def _primary_key(conn, table_name):
+    key = sorted((row[5], row[1]) for row in conn.execute(f"PRAGMA table_info({table_name})") if row[5])
+    return [column for _, column in key] or ['rowid']
+
+
+def foreign_keys(conn, implicit=True):
+    """
+    Every reference between tables in the database
+
+    Returns:
+        list: Dicts with table, columns, parent, parent_columns, declared
+    """
+    tables = _tables(conn)
+    relationships = []
+    for table_name in tables:
+        declared = {}
+        for row in conn.execute(f"PRAGMA foreign_key_list({table_name})"):
+            fk_id, seq, parent, column, parent_column = row[0], row[1], row[2], row[3], row[4]
+            fk = declared.setdefault(fk_id, {'table': table_name, 'columns': [], 'parent': parent,
+                                             'parent_columns': [], 'declared': True})
+            fk['columns'].append(column)
+            fk['parent_columns'].append(parent_column)
+        for fk in declared.values():
+            # REFERENCES parent without columns means the parent's primary key
+            if None in fk['parent_columns'] and fk['parent'] in tables:
+                fk['parent_columns'] = _primary_key(conn, fk['parent'])
+            relationships.append(fk)
+
+    if implicit:
+        for (table_name, column), parent in IMPLICIT_REFERENCES.items():
+            if (table_name in tables and parent in tables and column in _columns(conn, table_name)
+                    and not any(fk['table'] == table_name and fk['columns'] == [column]
+                                for fk in relationships)):
+                relationships.append({'table': table_name, 'columns': [column], 'parent': parent,
+                                      'parent_columns': _primary_key(conn, parent), 'declared': False})
+    return relationships
+
+
+def describe(fk):
+    """terminal_products(terminal_id) -> terminals(terminal_id)"""
+    implicit = '' if fk['declared'] else ' [implicit]'
+    return (f"{fk['table']}({', '.join(fk['columns'])}) -> "
+            f"{fk['parent']}({', '.join(fk['parent_columns'])}){implicit}")
+
+
+def orphan_condition(fk, parent_exists=True, alias='c'):
+    """WHERE condition matching the child rows of fk whose parent row is missing"""
+    present = " AND ".join(f"{alias}.{column} IS NOT NULL" for column in fk['columns'])
+    if not parent_exists:
+        return present
+    match = " AND ".join(f"p.{parent_column} = {alias}.{column}"
+                         for column, parent_column in zip(fk['columns'], fk['parent_columns']))
+    return f"{present} AND NOT EXISTS (SELECT 1 FROM {fk['parent']} p WHERE {match})"
+
+
+def scan(conn, samples=ORPHAN_SAMPLE_SIZE, implicit=True):
+    """
+    Count the orphans of every relationship
+
+    Returns:
+        dict: relationships (one dict per foreign key: orphans, open_orphans,
+              samples), total_orphans, open_orphans, seconds
+    """
+    started = time.perf_counter()
+    tables = set(_tables(conn))
+    results = []
+    for fk in foreign_keys(conn, implicit):
+        parent_exists = fk['parent'] in tables
+        condition = orphan_condition(fk, parent_exists)
+        effective_dated = 'end_date' in _columns(conn, fk['table'])
+        open_count = ("SUM(c.end_date IS NULL OR c.end_date > date('now'))"
+                      if effective_dated else "COUNT(*)")
+
+        fk_started = time.perf_counter()
+        orphans, open_orphans = conn.execute(f"""
+            SELECT COUNT(*), {open_count} FROM {fk['table']} c WHERE {condition}
+        """).fetchone()
+        sample_rows = []
+        if orphans and samples:
+            key = _primary_key(conn, fk['table'])
+            cursor = conn.execute(f"""
+                SELECT {', '.join(f'c.{column}' for column in dict.fromkeys(key + fk['columns']))}
+                FROM {fk['table']} c WHERE {condition} LIMIT ?
+            """, (samples,))
+            names = [column[0] for column in cursor.description]
+            sample_rows = [dict(zip(names, row)) for row in cursor]
+
+        results.append({
+            **fk,
+            'parent_exists': parent_exists,
+            'effective_dated': effective_dated,
+            'orphans': orphans,
+            'open_orphans': open_orphans or 0,
+            'samples': sample_rows,
+            'seconds': round(time.perf_counter() - fk_started, 3),
+        })
+
+    return {
+        'relationships': results,
+        'total_orphans': sum(result['orphans'] for result in results),
+        'open_orphans': sum(result['open_orphans'] for result in results),
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+
+
+def _ensure_quarantine_table(conn):
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {QUARANTINE_TABLE} (
+            quarantine_id INTEGER PRIMARY KEY,
+            table_name TEXT NOT NULL,
+            foreign_key TEXT NOT NULL,
+            row_data TEXT NOT NULL,
+            quarantined_at TIMESTAMP NOT NULL
+        )
+    """)
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{QUARANTINE_TABLE}_table "
+                 f"ON {QUARANTINE_TABLE}(table_name)")
+
+
+def fix_orphans(conn, mode='end_date'):
+    """
+    Repair the orphans of every declared relationship
+
+    Args:
+        mode: 'end_date' (end open orphans today) or 'quarantine' (move
+              orphans to orphan_quarantine)
+
+    Returns:
+        dict: fixed (rows per relationship description), rounds, seconds
+    """
+    if mode not in FIX_MODES:
+        raise ValueError(f"Unknown fix mode {mode!r} (one of: {', '.join(FIX_MODES)})")
+
+    started = time.perf_counter()
+    fixed = {}
+    rounds = 0
+    if mode == 'quarantine':
+        _ensure_quarantine_table(conn)
+        conn.commit()
+
+    while rounds < (MAX_QUARANTINE_ROUNDS if mode == 'quarantine' else 1):
+        rounds += 1
+        tables = set(_tables(conn))
+        changed = 0
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for fk in foreign_keys(conn, implicit=False):
+                condition = orphan_condition(fk, fk['parent'] in tables)
+                if mode == 'end_date':
+                    if 'end_date' not in _columns(conn, fk['table']):
+                        continue
+                    count = conn.execute(f"""
+                        UPDATE {fk['table']} AS c SET end_date = date('now')
+                        WHERE (c.end_date IS NULL OR c.end_date > date('now')) AND {condition}
+                    """).rowcount
+                else:
+                    row_json = ", ".join(f"'{column}', c.{column}" for column in _columns(conn, fk['table']))
+                    count = conn.execute(f"""
+                        INSERT INTO {QUARANTINE_TABLE} (table_name, foreign_key, row_data, quarantined_at)
+                        SELECT ?, ?, json_object({row_json}), ?
+                        FROM {fk['table']} c WHERE {condition}
+                    """, (fk['table'], describe(fk), datetime.now().isoformat(sep=' ', timespec='seconds'))).rowcount
+                    if count:
+                        conn.execute(f"DELETE FROM {fk['table']} AS c WHERE {condition}")
+                if count:
+                    fixed[describe(fk)] = fixed.get(describe(fk), 0) + count
+                    changed += count
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if not changed:
+            break
+
+    return {'mode': mode, 'fixed': fixed, 'rounds': rounds,
+            'seconds': round(time.perf_counter() - started, 3)}
+
+
+def validate_linkages(db_path='supply_chain.db', fix=None, samples=ORPHAN_SAMPLE_SIZE):
+    """
+    Scan (and optionally fix) the database - the linkage_validation task
+
+    Returns:
+        dict: Task result - status, summary, requires_review, scan results
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.execute("PRAGMA busy_timeout = 30000")
+        before = scan(conn, samples)
+        repair = fix_orphans(conn, fix) if fix and before['total_orphans'] else None
+        after = scan(conn, samples) if repair and repair['fixed'] else before
+    finally:
+        conn.close()
+
+    broken = [result for result in after['relationships'] if result['open_orphans']]
+    summary = (f"{before['total_orphans']:,} orphan rows in "
+               f"{sum(1 for result in before['relationships'] if result['orphans'])} of "
+               f"{len(before['relationships'])} relationships")
+    if repair:
+        summary += f"; {sum(repair['fixed'].values()):,} fixed ({fix})"
+    summary += f"; {after['open_orphans']:,} open orphans remain"
+
+    return {
+        'status': 'completed',
+        'summary': summary,
+        'requires_review': bool(broken),
+        'orphans_found': before['total_orphans'],
+        'orphans_fixed': sum(repair['fixed'].values()) if repair else 0,
+        'open_orphans': after['open_orphans'],
+        'relationships': [{key: result[key] for key in
+                           ('table', 'columns', 'parent', 'declared', 'orphans', 'open_orphans', 'samples')}
+                          for result in after['relationships'] if result['orphans']],
+        'scan_seconds': before['seconds'],
+    }
+
+
+def print_scan(result):
+    """Print a scan() result, relationships with orphans first"""
+    relationships = sorted(result['relationships'], key=lambda r: (-r['orphans'], describe(r)))
+    for fk in relationships:
+        if not fk['orphans']:
+            continue
+        missing = '' if fk['parent_exists'] else f" (table {fk['parent']} does not exist)"
+        open_note = f", {fk['open_orphans']:,} open" if fk['effective_dated'] else ''
+        print(f"  ❌ {describe(fk)}: {fk['orphans']:,} orphans{open_note}{missing}")
+        for sample in fk['samples']:
+            print("       " + ", ".join(f"{key}={value}" for key, value in sample.items()))
+    clean = sum(1 for fk in relationships if not fk['orphans'])
+    print(f"\n  ✓ {clean} of {len(relationships)} relationships clean "
+          f"({result['total_orphans']:,} orphan rows, {result['open_orphans']:,} open) "
+          f"in {result['seconds']:.2f}s")
+
+
+# Command-line interface
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Scan every foreign key for orphan rows')
+    parser.add_argument('db_path', nargs='?', default='supply_chain.db', help='Database to scan')
+    parser.add_argument('--fix', choices=FIX_MODES, help='Repair orphans of declared foreign keys')
+    parser.add_argument('--samples', type=int, default=ORPHAN_SAMPLE_SIZE, help='Sample rows per relationship')
+    parser.add_argument('--json', action='store_true', help='Print the result as JSON')
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db_path, isolation_level=None)
+    conn.execute("PRAGMA busy_timeout = 30000")
+    try:
+        result = scan(conn, args.samples)
+        if args.json:
+            print(json.dumps(result, indent=2, default=str))
+        else:
+            print("\n" + "=" * 80)
+            print(f"REFERENTIAL INTEGRITY - {args.db_path}")
+            print("=" * 80)
+            print_scan(result)
+
+        if args.fix and result['total_orphans']:
+            repair = fix_orphans(conn, args.fix)
+            print(f"\n→ Fix ({args.fix}): {sum(repair['fixed'].values()):,} rows "
+                  f"in {repair['rounds']} round(s), {repair['seconds']:.2f}s")
+            for relationship, count in repair['fixed'].items():
+                print(f"  ✓ {relationship}: {count:,}")
+            print()
+            print_scan(scan(conn, args.samples))
+    except (sqlite3.Error, ValueError) as e:
+        print(f"\n❌ {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Run Checkpoints
+Run-scoped staging of phase outputs so long agent runs can resume
+
+Each phase of a run (fetch, validate, diff, store, ...) saves its output
+to the run_checkpoints table before the next phase starts. If the run dies,
+rerunning the same task_id loads the completed phases and continues from
+the first missing one - an expensive extraction is paid for once even when
+a later phase is retried several times.
+
+Once the final (store) phase commits, the intermediate payloads are
+discarded; the store row stays so a rerun of the task returns its saved
+results. Completed runs are purged after CHECKPOINT_RETENTION_DAYS.
+"""
+
+import json
+import sqlite3
+from datetime import datetime, timedelta
+
+# Days a completed run's saved results are kept for reruns of its task
+CHECKPOINT_RETENTION_DAYS = 30
+
+
+def ensure_checkpoint_table(cursor):
+    """Create the staging table on databases that predate it"""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS run_checkpoints (
+        run_id TEXT NOT NULL,
+        agent_type TEXT NOT NULL,
+        phase TEXT NOT NULL,
+        payload TEXT,
+        completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (run_id, phase)
+    )
+    """)
+
+
+class RunCheckpoints:
+    """
+    Phase checkpoints for one run of an agent
+
+    Usage:
+        checkpoints = RunCheckpoints(db_path, task_id, 'terminal_discovery')
+        data = checkpoints.load('fetch')
+        if data is None:
+            data = expensive_fetch()
+            checkpoints.save('fetch', data)
+    """
+
+    def __init__(self, db_path, run_id, agent_type):
+        self.db_path = db_path
+        self.run_id = run_id
+        self.agent_type = agent_type
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            ensure_checkpoint_table(conn.cursor())
+            conn.commit()
+        finally:
+            conn.close()
+
+    def load(self, phase):
+        """Return the saved output of a completed phase, or None"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            row = conn.execute("""
+                SELECT payload FROM run_checkpoints
+                WHERE run_id = ? AND phase = ?
+            """, (self.run_id, phase)).fetchone()
+        finally:
+            conn.close()
+        return json.loads(row[0]) if row else None
+
+    def save(self, phase, payload):
+        """Persist a phase's output - the phase counts as complete once this commits"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute("""
+                INSERT OR REPLACE INTO run_checkpoints (
+                    run_id, agent_type, phase, payload, completed_at
+                ) VALUES (?, ?, ?, ?, ?)
+            """, (
+                self.run_id,
+                self.agent_type,
+                phase,
+                json.dumps(payload, default=str),
+                datetime.now()
+            ))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def completed_phases(self):
+        """Names of the phases this run has already completed"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            rows = conn.execute("""
+                SELECT phase FROM run_checkpoints
+                WHERE run_id = ?
+                ORDER BY completed_at
+            """, (self.run_id,)).fetchall()
+        finally:
+            conn.close()
+        return [row[0] for row in rows]
+
+    def purge_completed(self, final_phase='store', retention_days=CHECKPOINT_RETENTION_DAYS):
+        """
+        Delete every phase of this agent's runs whose final phase completed
+        more than retention_days ago
+
+        Returns:
+            int: Checkpoint rows deleted
+        """
+        cutoff = datetime.now() - timedelta(days=retention_days)
+        conn = sqlite3.connect(self.db_path)
+        try:
+            deleted = conn.execute("""
+                DELETE FROM run_checkpoints
+                WHERE run_id IN (
+                    SELECT run_id FROM run_checkpoints
+                    WHERE agent_type = ? AND phase = ? AND completed_at < ?
+                )
+            """, (self.agent_type, final_phase, cutoff)).rowcount
+            conn.commit()
+        finally:
+            conn.close()
+        return deleted
+
+    def discard(self, phases):
+        """Drop staged payloads that are no longer needed (e.g., after the final phase)"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.executemany("""
+                DELETE FROM run_checkpoints
+                WHERE run_id = ? AND phase = ?
+            """, [(self.run_id, phase) for phase in phases])
+            conn.commit()
+        finally:
+            conn.close()
@@ -76,6 +76,9 @@ if %ERRORLEVEL% EQU 0 (
     echo    Update complete!
     echo ================================================
     echo.
+    echo Refreshing read replica for reports...
+    python read_replica.py supply_chain.db
+    echo.
 ) else (
     echo.
     echo ================================================
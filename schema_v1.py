@@ -0,0 +1,893 @@
+#!/usr/bin/env python3
+"""
+Schema Version 1
+The schema migration 1 reconciles a database with - frozen
+
+Tables, indexes and views exactly as create_database.py built them when
+versioned migrations were introduced, and the seed rows of the reference
+tables. migrations.reconcile_schema() diffs a database against this, so the
+step does the same thing whatever create_database.py looks like today.
+
+Never edit this file. A schema change goes into create_database.py AND is
+added to migrations.py as the next numbered migration.
+"""
+
+# CREATE TABLE / INDEX / VIEW statements, in creation order
+SCHEMA_SQL = [
+    """CREATE TABLE product_categories (
+        category_id TEXT PRIMARY KEY,
+        category_code TEXT NOT NULL UNIQUE,
+        category_name TEXT NOT NULL,
+        is_active BOOLEAN DEFAULT 1,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+    """CREATE TABLE products (
+        product_id TEXT PRIMARY KEY,
+        product_code TEXT NOT NULL UNIQUE,
+        product_name TEXT NOT NULL,
+        product_category_id TEXT NOT NULL,
+        is_active BOOLEAN DEFAULT 1,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (product_category_id) REFERENCES product_categories(category_id)
+    )""",
+    """CREATE TABLE terminals (
+        terminal_id TEXT PRIMARY KEY,
+        terminal_name TEXT NOT NULL,
+        terminal_code TEXT,
+        irs_tcn TEXT UNIQUE,
+        tcn4 TEXT,
+        state TEXT,
+        city TEXT,
+        county TEXT,
+        market TEXT,
+        terminal_market_id TEXT,
+        region TEXT,
+        latitude REAL,
+        longitude REAL,
+        operator TEXT,
+        owner TEXT,
+        capacity_bpd INTEGER,
+        receiving_methods TEXT,
+        effective_date DATE,
+        end_date DATE,
+        data_quality_score REAL DEFAULT 0.0,
+        last_verified TIMESTAMP,
+        row_fingerprint TEXT,
+        created_by TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+    """CREATE TABLE terminal_products (
+        terminal_product_id TEXT PRIMARY KEY,
+        terminal_id TEXT NOT NULL,
+        product_id TEXT NOT NULL,
+        shipping_status INTEGER DEFAULT 0,
+        effective_date DATE,
+        end_date DATE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (terminal_id) REFERENCES terminals(terminal_id),
+        FOREIGN KEY (product_id) REFERENCES products(product_id),
+        UNIQUE (terminal_id, product_id)
+    )""",
+    """CREATE TABLE pipelines (
+        pipeline_id TEXT PRIMARY KEY,
+        pipeline_name TEXT NOT NULL,
+        operator TEXT,
+        owner TEXT,
+        pipeline_type TEXT,
+        origin_point TEXT,
+        destination_point TEXT,
+        length_miles REAL,
+        flow_speed_mph REAL,
+        effective_date DATE,
+        end_date DATE,
+        created_by TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+    """CREATE TABLE refineries (
+        refinery_id TEXT PRIMARY KEY,
+        refinery_name TEXT NOT NULL,
+        operator TEXT,
+        owner TEXT,
+        state TEXT,
+        city TEXT,
+        latitude REAL,
+        longitude REAL,
+        capacity_bpd INTEGER,
+        products_produced TEXT,
+        effective_date DATE,
+        end_date DATE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+    """CREATE TABLE rail_connections (
+        connection_id TEXT PRIMARY KEY,
+        terminal_id TEXT,
+        railroad_name TEXT NOT NULL,
+        siding_name TEXT,
+        car_capacity INTEGER,
+        loading_unloading TEXT,
+        effective_date DATE,
+        end_date DATE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (terminal_id) REFERENCES terminals(terminal_id)
+    )""",
+    """CREATE TABLE marine_facilities (
+        facility_id TEXT PRIMARY KEY,
+        terminal_id TEXT,
+        facility_name TEXT NOT NULL,
+        dock_type TEXT,
+        vessel_capacity TEXT,
+        loading_unloading TEXT,
+        effective_date DATE,
+        end_date DATE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (terminal_id) REFERENCES terminals(terminal_id)
+    )""",
+    """CREATE TABLE line_item_types (
+        line_item_type_id TEXT PRIMARY KEY,
+        line_item_type_name TEXT NOT NULL UNIQUE,
+        display_order INTEGER,
+        shipping_status INTEGER DEFAULT 1,
+        is_active BOOLEAN DEFAULT 1,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+    """CREATE TABLE costing_items (
+        costing_item_id TEXT PRIMARY KEY,
+        costing_item_name TEXT NOT NULL UNIQUE,
+        costing_item_description TEXT,
+        shipping_status INTEGER DEFAULT 1,
+        is_active BOOLEAN DEFAULT 1,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+    """CREATE TABLE price_days (
+        price_day_id TEXT PRIMARY KEY,
+        price_day_name TEXT NOT NULL UNIQUE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+    """CREATE TABLE shipping_setup (
+        shipping_setup_id TEXT PRIMARY KEY,
+        terminal_product_id TEXT NOT NULL,
+        line_item_type_id TEXT NOT NULL,
+        base_product_id TEXT,
+        line_item_percent REAL DEFAULT 1.0,
+        index_id TEXT,
+        is_active BOOLEAN DEFAULT 1,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (terminal_product_id) REFERENCES terminal_products(terminal_product_id),
+        FOREIGN KEY (line_item_type_id) REFERENCES line_item_types(line_item_type_id),
+        FOREIGN KEY (base_product_id) REFERENCES products(product_id)
+    )""",
+    """CREATE TABLE terminal_pipeline_links (
+        link_id TEXT PRIMARY KEY,
+        terminal_id TEXT,
+        pipeline_id TEXT,
+        connection_type TEXT,
+        direction TEXT,
+        capacity_bpd INTEGER,
+        is_published BOOLEAN DEFAULT 0,
+        is_included BOOLEAN DEFAULT 1,
+        effective_date DATE,
+        end_date DATE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (terminal_id) REFERENCES terminals(terminal_id),
+        FOREIGN KEY (pipeline_id) REFERENCES pipelines(pipeline_id)
+    )""",
+    """CREATE TABLE pipeline_refinery_links (
+        link_id TEXT PRIMARY KEY,
+        pipeline_id TEXT,
+        refinery_id TEXT,
+        connection_type TEXT,
+        direction TEXT,
+        effective_date DATE,
+        end_date DATE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (pipeline_id) REFERENCES pipelines(pipeline_id),
+        FOREIGN KEY (refinery_id) REFERENCES refineries(refinery_id)
+    )""",
+    """CREATE TABLE shipping_paths (
+        shipping_path_id TEXT PRIMARY KEY,
+        shipping_path_name TEXT,
+        shipping_path_origin_id TEXT,
+        shipping_path_description TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+    """CREATE TABLE terminal_path_links (
+        terminal_path_link_id TEXT PRIMARY KEY,
+        terminal_id TEXT NOT NULL,
+        product_category_id TEXT NOT NULL,
+        shipping_path_id TEXT NOT NULL,
+        is_active BOOLEAN DEFAULT 1,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (terminal_id) REFERENCES terminals(terminal_id),
+        FOREIGN KEY (product_category_id) REFERENCES product_categories(category_id),
+        FOREIGN KEY (shipping_path_id) REFERENCES shipping_paths(shipping_path_id),
+        UNIQUE (terminal_id, product_category_id, shipping_path_id)
+    )""",
+    """CREATE TABLE tariff_path_links (
+        tariff_path_link_id TEXT PRIMARY KEY,
+        shipping_path_id TEXT NOT NULL,
+        tariff_id TEXT NOT NULL,
+        is_active BOOLEAN DEFAULT 1,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (shipping_path_id) REFERENCES shipping_paths(shipping_path_id),
+        FOREIGN KEY (tariff_id) REFERENCES pipeline_tariffs(tariff_id)
+    )""",
+    """CREATE TABLE tariff_libraries (
+        tariff_library_id TEXT PRIMARY KEY,
+        tariff_library_code TEXT NOT NULL,
+        tariff_library_name TEXT,
+        tariff_start_date DATE,
+        tariff_end_date DATE,
+        source_document TEXT,
+        created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        modified_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+    """CREATE TABLE pipeline_tariffs (
+        tariff_id TEXT PRIMARY KEY,
+        pipeline_id TEXT,
+        pipeline_name TEXT,
+        tariff_code TEXT,
+        origin TEXT NOT NULL,
+        destination TEXT NOT NULL,
+        origin_county TEXT,
+        destination_county TEXT,
+        product_type TEXT,
+        rate_per_gallon REAL,
+        rate_basis TEXT,
+        miles INTEGER,
+        tariff_library_name TEXT,
+        tariff_library_id TEXT,
+        shipping_period_id TEXT,
+        line_item_type_id TEXT,
+        spot_index_id TEXT,
+        effective_date DATE,
+        end_date DATE,
+        source_document TEXT,
+        ferc_tariff_number TEXT,
+        created_by TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (pipeline_id) REFERENCES pipelines(pipeline_id),
+        FOREIGN KEY (tariff_library_id) REFERENCES tariff_libraries(tariff_library_id),
+        FOREIGN KEY (line_item_type_id) REFERENCES line_item_types(line_item_type_id)
+    )""",
+    """CREATE TABLE tariff_costs (
+        tariff_cost_id TEXT PRIMARY KEY,
+        tariff_id TEXT NOT NULL,
+        tariff_library_id TEXT NOT NULL,
+        tariff_value REAL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (tariff_id) REFERENCES pipeline_tariffs(tariff_id),
+        FOREIGN KEY (tariff_library_id) REFERENCES tariff_libraries(tariff_library_id)
+    )""",
+    """CREATE TABLE terminal_rates (
+        rate_id TEXT PRIMARY KEY,
+        terminal_id TEXT,
+        product_type TEXT,
+        facilities_charge REAL,
+        throughput_rate REAL,
+        terminaling_estimate REAL,
+        additive REAL,
+        rate_basis TEXT,
+        shipping_period_id TEXT,
+        line_item_type_id TEXT,
+        spot_index_id TEXT,
+        effective_date DATE,
+        end_date DATE,
+        source_document TEXT,
+        created_by TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (terminal_id) REFERENCES terminals(terminal_id),
+        FOREIGN KEY (line_item_type_id) REFERENCES line_item_types(line_item_type_id)
+    )""",
+    """CREATE TABLE transportation_costs (
+        transport_cost_id TEXT PRIMARY KEY,
+        terminal_id TEXT,
+        product_type TEXT,
+        tariff_cost REAL,
+        tvm_cost REAL,
+        basis_cost REAL,
+        fuel_surcharge REAL,
+        transload_cost REAL,
+        truck_freight REAL,
+        line_loss REAL,
+        margin REAL,
+        transportation_estimate REAL,
+        combined_adder REAL,
+        shipping_period_id TEXT,
+        line_item_type_id TEXT,
+        spot_index_id TEXT,
+        effective_date DATE,
+        end_date DATE,
+        created_by TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (terminal_id) REFERENCES terminals(terminal_id),
+        FOREIGN KEY (line_item_type_id) REFERENCES line_item_types(line_item_type_id)
+    )""",
+    """CREATE TABLE rail_rates (
+        rate_id TEXT PRIMARY KEY,
+        railroad_name TEXT NOT NULL,
+        origin TEXT NOT NULL,
+        destination TEXT NOT NULL,
+        product_type TEXT,
+        rate_per_gallon REAL,
+        rate_basis TEXT,
+        mileage INTEGER,
+        shipping_period_id TEXT,
+        line_item_type_id TEXT,
+        rail_connection_id TEXT,
+        effective_date DATE,
+        end_date DATE,
+        source_document TEXT,
+        created_by TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (rail_connection_id) REFERENCES rail_connections(connection_id),
+        FOREIGN KEY (line_item_type_id) REFERENCES line_item_types(line_item_type_id)
+    )""",
+    """CREATE TABLE costing (
+        costing_id TEXT PRIMARY KEY,
+        terminal_id TEXT NOT NULL,
+        product_category_id TEXT NOT NULL,
+        costing_item_id TEXT NOT NULL,
+        costing_value REAL,
+        start_date DATE NOT NULL,
+        end_date DATE,
+        created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        modified_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (terminal_id) REFERENCES terminals(terminal_id),
+        FOREIGN KEY (product_category_id) REFERENCES product_categories(category_id),
+        FOREIGN KEY (costing_item_id) REFERENCES costing_items(costing_item_id)
+    )""",
+    """CREATE TABLE shipping_periods (
+        shipping_period_id TEXT PRIMARY KEY,
+        terminal_id TEXT NOT NULL,
+        start_date DATE NOT NULL,
+        end_date DATE,
+        period_status TEXT DEFAULT 'Active',
+        created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        modified_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (terminal_id) REFERENCES terminals(terminal_id)
+    )""",
+    """CREATE TABLE shipping_line_items (
+        shipping_line_item_id TEXT PRIMARY KEY,
+        shipping_period_id TEXT NOT NULL,
+        product_id TEXT NOT NULL,
+        line_item_type_id TEXT NOT NULL,
+        base_product_id TEXT,
+        line_item_adder REAL,
+        line_item_percent REAL DEFAULT 1.0,
+        spot_index_id TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (shipping_period_id) REFERENCES shipping_periods(shipping_period_id),
+        FOREIGN KEY (product_id) REFERENCES products(product_id),
+        FOREIGN KEY (line_item_type_id) REFERENCES line_item_types(line_item_type_id),
+        FOREIGN KEY (base_product_id) REFERENCES products(product_id)
+    )""",
+    """CREATE TABLE spot_markets (
+        spot_market_id TEXT PRIMARY KEY,
+        spot_market_name TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+    """CREATE TABLE spot_market_location_links (
+        link_id TEXT PRIMARY KEY,
+        transportation_location_link_id TEXT,
+        spot_market_id TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (spot_market_id) REFERENCES spot_markets(spot_market_id)
+    )""",
+    """CREATE TABLE index_components (
+        index_component_id TEXT PRIMARY KEY,
+        index_component_code TEXT NOT NULL UNIQUE,
+        index_component_name TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+    """CREATE TABLE spot_indices (
+        spot_index_id TEXT PRIMARY KEY,
+        spot_index_code TEXT NOT NULL,
+        spot_market_id TEXT NOT NULL,
+        product_id TEXT NOT NULL,
+        index_component_id TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (spot_market_id) REFERENCES spot_markets(spot_market_id),
+        FOREIGN KEY (product_id) REFERENCES products(product_id),
+        FOREIGN KEY (index_component_id) REFERENCES index_components(index_component_id)
+    )""",
+    """CREATE TABLE bcs_types (
+        bcs_type_id TEXT PRIMARY KEY,
+        bcs_type_name TEXT NOT NULL UNIQUE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+    """CREATE TABLE bcs_period_statuses (
+        bcs_period_status_id TEXT PRIMARY KEY,
+        bcs_period_status_name TEXT NOT NULL UNIQUE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+    """CREATE TABLE bcs (
+        bcs_id TEXT PRIMARY KEY,
+        bcs_code TEXT NOT NULL UNIQUE,
+        bcs_name TEXT NOT NULL,
+        bcs_type_id TEXT NOT NULL,
+        primary_terminal_alias TEXT,
+        terminal_alias_type_code TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (bcs_type_id) REFERENCES bcs_types(bcs_type_id)
+    )""",
+    """CREATE TABLE bcs_periods (
+        bcs_period_id TEXT PRIMARY KEY,
+        bcs_id TEXT NOT NULL,
+        start_date DATE NOT NULL,
+        end_date DATE,
+        bcs_period_status_id TEXT NOT NULL,
+        bcs_period_status_override INTEGER DEFAULT 0,
+        cwg_status_id TEXT,
+        created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        modified_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (bcs_id) REFERENCES bcs(bcs_id),
+        FOREIGN KEY (bcs_period_status_id) REFERENCES bcs_period_statuses(bcs_period_status_id)
+    )""",
+    """CREATE TABLE bcs_line_items (
+        bcs_line_item_id TEXT PRIMARY KEY,
+        bcs_period_id TEXT NOT NULL,
+        product_alias TEXT,
+        product_alias_type_code TEXT,
+        line_item_type_alias TEXT,
+        lit_alias_type_code TEXT,
+        index_alias TEXT,
+        index_alias_type_code TEXT,
+        price_day_alias TEXT,
+        price_day_alias_type_code TEXT,
+        line_item_adder REAL,
+        line_item_percent REAL DEFAULT 1.0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        modified_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (bcs_period_id) REFERENCES bcs_periods(bcs_period_id)
+    )""",
+    """CREATE TABLE alias_types (
+        alias_type_id TEXT PRIMARY KEY,
+        alias_type_code TEXT NOT NULL UNIQUE,
+        alias_type_description TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+    """CREATE TABLE terminal_aliases (
+        terminal_alias_id TEXT PRIMARY KEY,
+        terminal_alias_code TEXT NOT NULL,
+        alias_type_id TEXT NOT NULL,
+        terminal_id TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (alias_type_id) REFERENCES alias_types(alias_type_id),
+        FOREIGN KEY (terminal_id) REFERENCES terminals(terminal_id),
+        UNIQUE (terminal_alias_code, alias_type_id)
+    )""",
+    """CREATE TABLE product_aliases (
+        product_alias_id TEXT PRIMARY KEY,
+        product_alias_code TEXT NOT NULL,
+        alias_type_id TEXT NOT NULL,
+        product_id TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (alias_type_id) REFERENCES alias_types(alias_type_id),
+        FOREIGN KEY (product_id) REFERENCES products(product_id),
+        UNIQUE (product_alias_code, alias_type_id)
+    )""",
+    """CREATE TABLE line_item_type_aliases (
+        lit_alias_id TEXT PRIMARY KEY,
+        alias_code TEXT NOT NULL,
+        alias_type_id TEXT NOT NULL,
+        line_item_type_id TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (alias_type_id) REFERENCES alias_types(alias_type_id),
+        FOREIGN KEY (line_item_type_id) REFERENCES line_item_types(line_item_type_id),
+        UNIQUE (alias_code, alias_type_id)
+    )""",
+    """CREATE TABLE index_aliases (
+        index_alias_id TEXT PRIMARY KEY,
+        alias_code TEXT NOT NULL,
+        alias_type_id TEXT NOT NULL,
+        spot_index_id TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (alias_type_id) REFERENCES alias_types(alias_type_id),
+        FOREIGN KEY (spot_index_id) REFERENCES spot_indices(spot_index_id),
+        UNIQUE (alias_code, alias_type_id)
+    )""",
+    """CREATE TABLE price_day_aliases (
+        price_day_alias_id TEXT PRIMARY KEY,
+        alias_code TEXT NOT NULL,
+        alias_type_id TEXT NOT NULL,
+        price_day_id TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (alias_type_id) REFERENCES alias_types(alias_type_id),
+        FOREIGN KEY (price_day_id) REFERENCES price_days(price_day_id),
+        UNIQUE (alias_code, alias_type_id)
+    )""",
+    """CREATE TABLE agent_tasks (
+        task_id TEXT PRIMARY KEY,
+        agent_type TEXT NOT NULL,
+        task_description TEXT,
+        task_parameters TEXT,
+        priority INTEGER DEFAULT 5,
+        status TEXT DEFAULT 'Pending',
+        assigned_timestamp TIMESTAMP,
+        started_timestamp TIMESTAMP,
+        completed_timestamp TIMESTAMP,
+        result_summary TEXT,
+        result_data TEXT,
+        requires_human_review BOOLEAN DEFAULT 0,
+        human_reviewed BOOLEAN DEFAULT 0,
+        human_review_notes TEXT,
+        error_message TEXT,
+        retry_count INTEGER DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+    """CREATE TABLE data_quality_log (
+        log_id TEXT PRIMARY KEY,
+        table_name TEXT NOT NULL,
+        record_id TEXT,
+        quality_check_type TEXT,
+        quality_score REAL,
+        issues_found TEXT,
+        checked_by TEXT,
+        checked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+    """CREATE TABLE agent_metrics (
+        metric_id TEXT PRIMARY KEY,
+        agent_type TEXT NOT NULL,
+        tasks_completed INTEGER DEFAULT 0,
+        tasks_failed INTEGER DEFAULT 0,
+        avg_execution_time REAL,
+        human_review_rate REAL,
+        data_quality_avg REAL,
+        period_start DATE,
+        period_end DATE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+    """CREATE TABLE ownership_changes (
+        change_id TEXT PRIMARY KEY,
+        asset_type TEXT NOT NULL,
+        asset_id TEXT NOT NULL,
+        previous_owner TEXT,
+        new_owner TEXT,
+        transaction_date DATE,
+        transaction_value REAL,
+        source_document TEXT,
+        notes TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+    """CREATE TABLE source_documents (
+        document_id TEXT PRIMARY KEY,
+        document_type TEXT NOT NULL,
+        document_name TEXT,
+        document_url TEXT,
+        local_path TEXT,
+        location_aliases TEXT,
+        rate_examples TEXT,
+        effective_date DATE,
+        retrieved_date DATE,
+        hash_checksum TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+    """CREATE TABLE terminal_alias_errors (
+            error_id TEXT PRIMARY KEY,
+            alias_code TEXT NOT NULL,
+            alias_type_id TEXT,
+            error_message TEXT,
+            batch_id TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (alias_type_id) REFERENCES alias_types(alias_type_id)
+        )""",
+    """CREATE TABLE product_alias_errors (
+            error_id TEXT PRIMARY KEY,
+            alias_code TEXT NOT NULL,
+            alias_type_id TEXT,
+            error_message TEXT,
+            batch_id TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (alias_type_id) REFERENCES alias_types(alias_type_id)
+        )""",
+    """CREATE TABLE line_item_type_alias_errors (
+            error_id TEXT PRIMARY KEY,
+            alias_code TEXT NOT NULL,
+            alias_type_id TEXT,
+            error_message TEXT,
+            batch_id TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (alias_type_id) REFERENCES alias_types(alias_type_id)
+        )""",
+    """CREATE TABLE index_alias_errors (
+            error_id TEXT PRIMARY KEY,
+            alias_code TEXT NOT NULL,
+            alias_type_id TEXT,
+            error_message TEXT,
+            batch_id TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (alias_type_id) REFERENCES alias_types(alias_type_id)
+        )""",
+    """CREATE TABLE price_day_alias_errors (
+            error_id TEXT PRIMARY KEY,
+            alias_code TEXT NOT NULL,
+            alias_type_id TEXT,
+            error_message TEXT,
+            batch_id TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (alias_type_id) REFERENCES alias_types(alias_type_id)
+        )""",
+    """CREATE TABLE batches (
+        batch_id TEXT PRIMARY KEY,
+        batch_type TEXT,
+        batch_status TEXT DEFAULT 'Pending',
+        records_processed INTEGER DEFAULT 0,
+        records_succeeded INTEGER DEFAULT 0,
+        records_failed INTEGER DEFAULT 0,
+        error_message TEXT,
+        started_at TIMESTAMP,
+        completed_at TIMESTAMP,
+        parent_batch_id TEXT,
+        source_path TEXT,
+        rows_per_second REAL,
+        phase_timings TEXT,
+        created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+    """CREATE TABLE shipping_tracking (
+        tracking_id TEXT PRIMARY KEY,
+        tenant_id TEXT,
+        filename TEXT,
+        activity_type_name TEXT,
+        count INTEGER DEFAULT 0,
+        activity_date DATE,
+        created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+    """CREATE TABLE run_checkpoints (
+        run_id TEXT NOT NULL,
+        agent_type TEXT NOT NULL,
+        phase TEXT NOT NULL,
+        payload TEXT,
+        completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (run_id, phase)
+    )""",
+    """CREATE TABLE source_row_fingerprints (
+        document_type TEXT NOT NULL,
+        document_name TEXT NOT NULL,
+        table_name TEXT NOT NULL,
+        record_id TEXT NOT NULL,
+        row_fingerprint TEXT NOT NULL,
+        PRIMARY KEY (document_type, document_name, table_name, record_id)
+    )""",
+    """CREATE INDEX idx_terminals_state ON terminals(state)""",
+    """CREATE INDEX idx_terminals_tcn ON terminals(irs_tcn)""",
+    """CREATE INDEX idx_terminals_code ON terminals(terminal_code)""",
+    """CREATE INDEX idx_terminals_market ON terminals(terminal_market_id)""",
+    """CREATE INDEX idx_terminal_products_terminal ON terminal_products(terminal_id)""",
+    """CREATE INDEX idx_terminal_products_product ON terminal_products(product_id)""",
+    """CREATE INDEX idx_products_category ON products(product_category_id)""",
+    """CREATE INDEX idx_tasks_status ON agent_tasks(status)""",
+    """CREATE INDEX idx_tasks_agent_type ON agent_tasks(agent_type)""",
+    """CREATE INDEX idx_source_documents_name ON source_documents(document_type, document_name)""",
+    """CREATE INDEX idx_tariffs_pipeline ON pipeline_tariffs(pipeline_id)""",
+    """CREATE INDEX idx_tariffs_library ON pipeline_tariffs(tariff_library_id)""",
+    """CREATE INDEX idx_transport_costs_terminal ON transportation_costs(terminal_id)""",
+    """CREATE INDEX idx_costing_terminal_category ON costing(terminal_id, product_category_id)""",
+    """CREATE INDEX idx_costing_dates ON costing(start_date, end_date)""",
+    """CREATE INDEX idx_costing_item ON costing(costing_item_id)""",
+    """CREATE INDEX idx_shipping_periods_terminal ON shipping_periods(terminal_id)""",
+    """CREATE INDEX idx_shipping_periods_dates ON shipping_periods(start_date, end_date)""",
+    """CREATE INDEX idx_shipping_line_items_period ON shipping_line_items(shipping_period_id)""",
+    """CREATE INDEX idx_shipping_line_items_product ON shipping_line_items(product_id)""",
+    """CREATE INDEX idx_shipping_line_items_lit ON shipping_line_items(line_item_type_id)""",
+    """CREATE INDEX idx_spot_indices_market ON spot_indices(spot_market_id)""",
+    """CREATE INDEX idx_spot_indices_product ON spot_indices(product_id)""",
+    """CREATE INDEX idx_bcs_type ON bcs(bcs_type_id)""",
+    """CREATE INDEX idx_bcs_periods_bcs ON bcs_periods(bcs_id)""",
+    """CREATE INDEX idx_bcs_line_items_period ON bcs_line_items(bcs_period_id)""",
+    """CREATE INDEX idx_terminal_path_links_terminal ON terminal_path_links(terminal_id)""",
+    """CREATE INDEX idx_terminal_path_links_path ON terminal_path_links(shipping_path_id)""",
+    """CREATE INDEX idx_tariff_path_links_path ON tariff_path_links(shipping_path_id)""",
+    """CREATE INDEX idx_tariff_costs_tariff ON tariff_costs(tariff_id)""",
+    """CREATE INDEX idx_tariff_costs_library ON tariff_costs(tariff_library_id)""",
+    """CREATE INDEX idx_shipping_setup_tp ON shipping_setup(terminal_product_id)""",
+    """CREATE INDEX idx_shipping_setup_lit ON shipping_setup(line_item_type_id)""",
+    """CREATE INDEX idx_batches_parent ON batches(parent_batch_id)""",
+    """CREATE INDEX idx_batches_type_started ON batches(batch_type, started_at)""",
+    """CREATE UNIQUE INDEX idx_transport_costs_version
+        ON transportation_costs(terminal_id, product_type, effective_date)
+    """,
+    """CREATE UNIQUE INDEX idx_costing_version
+        ON costing(terminal_id, product_category_id, costing_item_id, start_date)
+    """,
+    """CREATE VIEW v_active_terminals AS
+    SELECT * FROM terminals
+    WHERE (end_date IS NULL OR end_date > date('now'))
+    AND (effective_date IS NULL OR effective_date <= date('now'))""",
+    """CREATE VIEW v_active_pipeline_tariffs AS
+    SELECT * FROM pipeline_tariffs
+    WHERE (end_date IS NULL OR end_date > date('now'))
+    AND (effective_date IS NULL OR effective_date <= date('now'))""",
+    """CREATE VIEW v_review_queue AS
+    SELECT
+        task_id,
+        agent_type,
+        task_description,
+        completed_timestamp,
+        result_summary
+    FROM agent_tasks
+    WHERE requires_human_review = 1
+    AND human_reviewed = 0
+    AND status = 'Completed'
+    ORDER BY priority DESC, completed_timestamp ASC""",
+    """CREATE VIEW v_terminal_products AS
+    SELECT
+        tp.terminal_product_id,
+        t.terminal_id,
+        t.terminal_name,
+        t.terminal_code,
+        t.state,
+        t.city,
+        t.market,
+        p.product_id,
+        p.product_code,
+        p.product_name,
+        pc.category_code AS product_category_code,
+        tp.shipping_status,
+        tp.effective_date,
+        tp.end_date
+    FROM terminal_products tp
+    JOIN terminals t ON tp.terminal_id = t.terminal_id
+    JOIN products p ON tp.product_id = p.product_id
+    JOIN product_categories pc ON p.product_category_id = pc.category_id""",
+    """CREATE VIEW v_active_shipping AS
+    SELECT
+        sp.shipping_period_id,
+        t.terminal_id,
+        t.terminal_name,
+        t.state,
+        t.city,
+        sp.start_date,
+        sp.end_date,
+        sp.period_status,
+        sli.shipping_line_item_id,
+        p.product_code,
+        lit.line_item_type_name,
+        sli.line_item_adder,
+        sli.line_item_percent,
+        si.spot_index_code
+    FROM shipping_periods sp
+    JOIN terminals t ON sp.terminal_id = t.terminal_id
+    LEFT JOIN shipping_line_items sli ON sp.shipping_period_id = sli.shipping_period_id
+    LEFT JOIN products p ON sli.product_id = p.product_id
+    LEFT JOIN line_item_types lit ON sli.line_item_type_id = lit.line_item_type_id
+    LEFT JOIN spot_indices si ON sli.spot_index_id = si.spot_index_id
+    WHERE sp.period_status = 'Active'
+    AND (sp.end_date IS NULL OR sp.end_date >= date('now'))""",
+    """CREATE VIEW v_bcs_detail AS
+    SELECT
+        b.bcs_id,
+        b.bcs_code,
+        b.bcs_name,
+        bt.bcs_type_name,
+        b.primary_terminal_alias,
+        bp.bcs_period_id,
+        bp.start_date,
+        bp.end_date,
+        bps.bcs_period_status_name,
+        bli.bcs_line_item_id,
+        bli.product_alias,
+        bli.line_item_type_alias,
+        bli.index_alias,
+        bli.price_day_alias,
+        bli.line_item_adder,
+        bli.line_item_percent
+    FROM bcs b
+    JOIN bcs_types bt ON b.bcs_type_id = bt.bcs_type_id
+    LEFT JOIN bcs_periods bp ON b.bcs_id = bp.bcs_id
+    LEFT JOIN bcs_period_statuses bps ON bp.bcs_period_status_id = bps.bcs_period_status_id
+    LEFT JOIN bcs_line_items bli ON bp.bcs_period_id = bli.bcs_period_id""",
+]
+
+# Seed rows of the reference tables: table -> (columns, rows)
+SEED_ROWS = {
+    'product_categories': (
+        ('category_id', 'category_code', 'category_name', 'is_active'),
+        [
+            ('cd17dd02-7156-4b37-b5ac-6ce24bba3c5c', 'GAS', 'Gasoline', 1),
+            ('eecf231d-96e4-484c-9b88-abd07957b27c', 'ETH', 'Ethanol', 1),
+            ('92729b6b-4afb-424d-a9a6-0cdcb56d1dc1', 'DSL', 'Diesel', 1),
+        ],
+    ),
+    'products': (
+        ('product_id', 'product_code', 'product_name', 'product_category_id', 'is_active'),
+        [
+            ('59cca2f7-7033-4991-b3d5-478ca364027e', 'CLEAR_GAS', 'Clear Gasoline', 'cd17dd02-7156-4b37-b5ac-6ce24bba3c5c', 1),
+            ('77ea576b-925b-41a8-a8e9-18d42c4677be', 'E10', 'E10 (10% Ethanol)', 'cd17dd02-7156-4b37-b5ac-6ce24bba3c5c', 1),
+            ('e2028fe2-78f1-461e-b36f-17ce573ce121', 'E15', 'E15 (15% Ethanol)', 'cd17dd02-7156-4b37-b5ac-6ce24bba3c5c', 1),
+            ('4005d970-ab70-418e-ae19-b38aaff6b469', 'E85', 'E85 (85% Ethanol)', 'eecf231d-96e4-484c-9b88-abd07957b27c', 1),
+            ('47e0f4e9-350a-4a5c-959d-54fd6ce197ae', 'ETHANOL', 'Ethanol (Pure)', 'eecf231d-96e4-484c-9b88-abd07957b27c', 1),
+        ],
+    ),
+    'line_item_types': (
+        ('line_item_type_id', 'line_item_type_name', 'display_order', 'shipping_status', 'is_active'),
+        [
+            ('1f8cf0df-cc31-4480-99b9-73dce228ea25', 'Tariff', 1, 1, 1),
+            ('7574b9cb-2f89-4c1e-94d9-1370be700fc7', 'Facilities Charge', 2, 1, 1),
+            ('7286df28-c462-4aaf-a51b-7263aed541e7', 'Throughput', 3, 1, 1),
+            ('ea2d3b60-3615-4907-b484-bdc571987394', 'Terminaling Estimate', 4, 1, 1),
+            ('d3827f03-c8b4-431a-91c2-5416d0a07e29', 'Additive', 5, 1, 1),
+            ('3c6c2ccf-c6d3-4b93-b1fa-d70cd851ac8b', 'Time Value of Money', 6, 1, 1),
+            ('b9986b1b-43f3-49e5-a241-eb40a9891fa9', 'Basis', 7, 1, 1),
+            ('b382ee6f-8349-4155-a721-60c809aff116', 'Margin', 8, 1, 1),
+            ('752d760f-1326-4f0d-b927-f76ec5dd649f', 'Fuel Surcharge', 9, 1, 1),
+            ('971beaae-e437-413e-b5d6-3605aa76c084', 'Transloading Estimate', 10, 1, 1),
+            ('20feac17-4988-4ff8-afa5-769a868005f4', 'Truck Freight Estimate', 11, 1, 1),
+            ('6ba23218-6ba6-49b2-88bd-e9e6cd49d84d', 'Line Loss', 12, 1, 1),
+            ('1479693a-9c6a-4208-b423-8bff34bdb36c', 'RIN', 13, 1, 1),
+            ('a42fe541-38b5-4561-8ac9-d12abe01c595', 'CARB 1', 14, 1, 1),
+            ('60408e7b-66a2-44a3-a7a9-e72ace5f1d83', 'CARB 2', 15, 1, 1),
+            ('a52b29e0-2d73-4382-a9be-1972ffbc61b2', 'Line Space', 16, 1, 1),
+            ('7be2d724-5148-4a5e-a28f-78a8e8ef7d9c', 'Ethanol', 17, 1, 1),
+            ('48560dd0-afab-4d19-aac8-94a298693bca', 'Combined Adder', 99, 1, 1),
+        ],
+    ),
+    'costing_items': (
+        ('costing_item_id', 'costing_item_name', 'costing_item_description', 'shipping_status', 'is_active'),
+        [
+            ('f7269635-2d77-4185-b514-3ab834ba3e03', 'tariff', 'Pipeline tariff cost', 1, 1),
+            ('6a13566e-d41e-4cff-8df7-8d5edc305771', 'facilities_charge', 'Terminal facilities charge', 1, 1),
+            ('b0de554f-b4a4-4045-a1c9-eec1fa739e8f', 'throughput', 'Terminal throughput rate', 1, 1),
+            ('48ef5cc4-63d7-4f0a-8585-2df7b76c9057', 'terminaling_estimate', 'Estimated terminaling cost (if not using facilities + throughput)', 1, 1),
+            ('41c1db65-81df-4164-b2a0-735641b9b97f', 'additive', 'Additive cost', 1, 1),
+            ('b0ec94df-8f82-42a6-806b-07c426eec494', 'tvm', 'Time value of money (interest rate)', 1, 1),
+            ('9e4699d3-eb47-47a9-89e9-fdf7daef78fd', 'basis', 'Basis offset from market of origin', 1, 1),
+            ('b0bd705a-b98f-4be3-a9b2-a735e897d1e1', 'margin', 'Ethanol margin correction', 1, 1),
+            ('1a05422d-4764-4b1e-9a1a-c66370cfe8fa', 'fuel_surcharge', 'Ethanol fuel surcharge', 1, 1),
+            ('9c15d351-c0bc-4bf0-9aa2-b06a18020cbd', 'transloading_estimate', 'Ethanol transloading cost', 1, 1),
+            ('dad7e90f-381b-46d1-8dd6-ec6bd6175d29', 'truck_freight_estimate', 'Ethanol truck freight cost', 1, 1),
+            ('2e5cb5d8-b6e1-45c7-a08f-ec1789577406', 'line_loss', 'Pipeline line loss', 1, 1),
+            ('25667156-cd6c-45e9-bc39-f80f8b734eb3', 'transportation_estimate', 'Estimated transportation cost (if not itemized)', 1, 1),
+        ],
+    ),
+    'price_days': (
+        ('price_day_id', 'price_day_name'),
+        [
+            ('7cd6317d-51bf-4d4e-b726-fd67bb1077fc', 'Prior Day'),
+            ('8bfdc59e-b964-45a1-a63b-71d8432e03f5', 'Spot'),
+            ('02242e3a-b4ed-4686-a430-2ca777e6d60d', 'Same Day'),
+        ],
+    ),
+    'bcs_types': (
+        ('bcs_type_id', 'bcs_type_name'),
+        [
+            ('b26b02ce-4347-4b1b-a987-aa7698710935', 'Shipping'),
+            ('bfec06f0-5529-409d-9024-e849ee956df0', 'Contract'),
+        ],
+    ),
+    'bcs_period_statuses': (
+        ('bcs_period_status_id', 'bcs_period_status_name'),
+        [
+            ('1860ee37-a03a-4a0d-9e3e-08e50ecc8c9f', 'In Progress'),
+            ('9b10a22c-4948-4084-b9f3-6cb7704d3d3c', 'Approved'),
+            ('e2bcda39-7248-49f6-8e9d-eda8d494e3fc', 'Archived'),
+            ('798cea26-a320-4779-951a-4ee5085d48bc', 'Expired'),
+        ],
+    ),
+    'alias_types': (
+        ('alias_type_id', 'alias_type_code', 'alias_type_description'),
+        [
+            ('69dbb82d-769a-46fa-ba82-995ceae05faf', 'EN Master UUID', 'EN system master UUID identifiers'),
+            ('ee4e6cae-9d44-43c5-97aa-ad675244faa8', 'BM Code', 'Benchmark system codes'),
+        ],
+    ),
+    'index_components': (
+        ('index_component_id', 'index_component_code', 'index_component_name'),
+        [
+            ('7642c4fe-44e6-4df3-a4cc-07b04a6a1f99', 'C', 'Component'),
+        ],
+    ),
+}
@@ -253,13 +253,13 @@ def create_database(db_path='supply_chain.db'):
     cursor.execute("""
     CREATE TABLE IF NOT EXISTS data_quality_log (
         log_id TEXT PRIMARY KEY,
-        record_type TEXT NOT NULL,
-        record_id TEXT NOT NULL,
-        quality_check TEXT,
-        check_result TEXT,
-        check_details TEXT,
-        check_timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        agent_name TEXT
+        table_name TEXT NOT NULL,
+        record_id TEXT,
+        quality_check_type TEXT,
+        quality_score REAL,
+        issues_found TEXT,
+        checked_by TEXT,
+        checked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
     )
     """)
     
@@ -0,0 +1,598 @@
+#!/usr/bin/env python3
+"""
+Sheet Mappings
+Declarative layouts for the workbooks we ingest, compiled into fast row extractors
+
+A mapping describes where a sheet's header row is, which columns feed which
+fields, how each field is coerced, and (for generic loads) the target table:
+
+    {
+        'name': 'en_shipping_periods',
+        'sheet': 'Sheet6',
+        'header_row': 1,
+        'table': 'shipping_periods',
+        'key': ('shipping_period_id',),
+        'columns': {
+            'shipping_period_id': {'header': 'shipping_period_id', 'type': 'str'},
+            'start_date': {'header': 'start_date', 'type': 'date'},
+            ...
+        },
+        'required': ('shipping_period_id', 'terminal_id'),
+    }
+
+Columns are located by 'header' (exact, case-insensitive), 'pattern' (regex,
+first match) or 'index' (0-based). 'column_groups' collect every column whose
+header matches a pattern into one {header: value} dict - e.g. the product
+adder columns of Costing Detail. A group's optional 'start' / 'stop' (0-based,
+stop exclusive) limit it to a block of columns, for sheets that repeat the
+same headers per section.
+
+compile_mapping() resolves all of that against the real header row once, so
+per-row work is a single operator.itemgetter call plus the precomputed
+coercers - no header lookups, no per-cell bounds checks.
+
+The same mappings read CSV and Parquet exports of a sheet (read_csv,
+read_parquet). Those paths work a batch of rows at a time and coerce whole
+columns at once - a numeric column is one parse_numbers() call, or one
+pyarrow.compute pass for Parquet - which is what makes them much faster
+than walking a workbook cell by cell.
+"""
+
+import csv
+import os
+import re
+from datetime import date, datetime
+from itertools import islice
+from operator import itemgetter
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pc = pq = None
+
+# Rows per batch for the CSV / Parquet readers
+COLUMN_BATCH_SIZE = 10000
+
+# Currency/thousands formatting stripped before a number is parsed
+_NUMBER_JUNK = str.maketrans('', '', '$, ')
+
+
+def parse_number(value):
+    """Parse number from various formats"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value.translate(_NUMBER_JUNK))
+        except ValueError:
+            return None
+    return None
+
+
+def parse_numbers(values):
+    """
+    Column version of parse_number
+
+    Clean columns (all numbers or plain numeric strings) convert in one
+    map(float) pass. A text column with '$', ',' or spaces is cleaned with a
+    single translate() over the joined column, then converted again; only
+    values that still fail (blanks, text) are handled one at a time.
+    """
+    try:
+        return list(map(float, values))
+    except (TypeError, ValueError):
+        pass
+
+    if not all(type(value) is str for value in values):
+        return [parse_number(value) for value in values]
+
+    cleaned = '\x1f'.join(values).translate(_NUMBER_JUNK).split('\x1f')
+    try:
+        return list(map(float, cleaned))
+    except ValueError:
+        return [_float_or_none(value) for value in cleaned]
+
+
+def _float_or_none(value):
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def arrow_numbers(array):
+    """parse_number for a whole pyarrow column, done in Arrow compute kernels"""
+    if pa.types.is_integer(array.type) or pa.types.is_floating(array.type):
+        return pc.cast(array, pa.float64()).to_pylist()
+    if not pa.types.is_string(array.type) and not pa.types.is_large_string(array.type):
+        return parse_numbers(array.to_pylist())
+    cleaned = pc.replace_substring_regex(array, pattern=r'[$, ]', replacement='')
+    valid = pc.match_substring_regex(cleaned, pattern=r'^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$')
+    return pc.cast(pc.if_else(valid, cleaned, pa.scalar(None, cleaned.type)), pa.float64()).to_pylist()
+
+
+def _to_str(value):
+    if value is None:
+        return None
+    return str(value).strip() or None
+
+
+def _to_int(value):
+    number = parse_number(value)
+    return int(number) if number is not None else None
+
+
+def _to_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date) or value is None:
+        return value
+    try:
+        return date.fromisoformat(str(value).strip()[:10])
+    except ValueError:
+        return None
+
+
+def _to_datetime(value):
+    if isinstance(value, datetime) or value is None:
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    try:
+        return datetime.fromisoformat(str(value).strip())
+    except ValueError:
+        return None
+
+
+def _to_bool(value):
+    if value is None or isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return bool(value)
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'y', 't')
+
+
+# Named coercions usable as a column 'type'; None means "keep the cell value"
+COERCERS = {
+    None: None,
+    'raw': None,
+    'str': _to_str,
+    'number': parse_number,
+    'int': _to_int,
+    'date': _to_date,
+    'datetime': _to_datetime,
+    'bool': _to_bool,
+}
+
+
+def _coercer(type_name):
+    """Look up a coercion by name (or accept a callable as-is)"""
+    if callable(type_name):
+        return type_name
+    if type_name not in COERCERS:
+        raise ValueError(f"Unknown column type: {type_name}")
+    return COERCERS[type_name]
+
+
+# Whole-column versions of the coercers above (anything else is mapped per value)
+COLUMN_COERCERS = {
+    parse_number: parse_numbers,
+}
+
+
+def _column_coercer(coerce):
+    """Column version of a coercer"""
+    if coerce in COLUMN_COERCERS:
+        return COLUMN_COERCERS[coerce]
+    return lambda values: list(map(coerce, values))
+
+
+def _getter(indexes):
+    """itemgetter that always returns a tuple, even for 0 or 1 indexes"""
+    if not indexes:
+        return lambda row: ()
+    if len(indexes) == 1:
+        index = indexes[0]
+        return lambda row: (row[index],)
+    return itemgetter(*indexes)
+
+
+class CompiledMapping:
+    """
+    A mapping resolved against one sheet's header row
+
+    Usage:
+        compiled = compile_mapping(spec, header_row)
+        for row in data_rows:
+            record = compiled.extract(row)
+    """
+
+    def __init__(self, spec, headers, fields, indexes, coercers, required, groups):
+        self.spec = spec
+        self.headers = headers
+        self.fields = fields
+        self.missing = tuple(name for name in spec.get('columns', {}) if name not in fields)
+        self.groups = {name: group_headers for name, group_headers, _, _ in groups}
+
+        all_indexes = list(indexes) + [i for _, _, group_indexes, _ in groups for i in group_indexes]
+        self._width = max(all_indexes) + 1 if all_indexes else 0
+        self._indexes = tuple(indexes)
+        self._getter = _getter(indexes)
+        self._field_coercers = tuple(coercers)
+        self._coercers = tuple((pos, fn) for pos, fn in enumerate(coercers) if fn is not None)
+        self._required = tuple(fields.index(name) for name in required)
+        self._groups = tuple(
+            (name, group_headers, group_indexes, _getter(group_indexes), coerce)
+            for name, group_headers, group_indexes, coerce in groups
+        )
+        self._padding = (None,) * self._width
+
+    def extract(self, row):
+        """
+        Turn one sheet row into a record dict
+
+        Returns:
+            dict, or None when a required field is empty
+        """
+        if len(row) < self._width:
+            row = tuple(row) + self._padding[len(row):]
+
+        values = list(self._getter(row))
+        for pos, coerce in self._coercers:
+            values[pos] = coerce(values[pos])
+        for pos in self._required:
+            if not values[pos]:
+                return None
+
+        record = dict(zip(self.fields, values))
+        for name in self.missing:
+            record[name] = None
+        for name, group_headers, _, getter, coerce in self._groups:
+            group_values = getter(row)
+            if coerce is not None:
+                group_values = [coerce(value) for value in group_values]
+            record[name] = dict(zip(group_headers, group_values))
+        return record
+
+    def extract_batch(self, rows, blank_to_none=False):
+        """
+        Column-at-a-time extract() for a batch of rows
+
+        Args:
+            rows: List of row tuples
+            blank_to_none: Treat '' as empty in uncoerced columns (CSV has no nulls)
+
+        Returns:
+            list: Record dicts (rows missing a required field are dropped)
+        """
+        if not rows:
+            return []
+        width = self._width
+        padding = self._padding
+        rows = [row if len(row) >= width else tuple(row) + padding[len(row):] for row in rows]
+
+        columns = list(zip(*map(self._getter, rows))) or [()] * len(self.fields)
+        columns = [
+            _column_coercer(coerce)(column) if coerce is not None
+            else ([value if value != '' else None for value in column] if blank_to_none else column)
+            for column, coerce in zip(columns, self._field_coercers)
+        ]
+        groups = []
+        for name, group_headers, _, getter, coerce in self._groups:
+            group_columns = list(zip(*map(getter, rows))) or [()] * len(group_headers)
+            if coerce is not None:
+                group_columns = [_column_coercer(coerce)(column) for column in group_columns]
+            groups.append((name, group_headers, group_columns))
+        return self._records(columns, groups, len(rows))
+
+    def extract_columns(self, column_values):
+        """
+        Build records from whole columns (e.g., a Parquet record batch)
+
+        Args:
+            column_values: Callable(column index, coerce) -> list of coerced values
+                           (by position - headers such as Subtotal repeat)
+
+        Returns:
+            list: Record dicts (rows missing a required field are dropped)
+        """
+        columns = [column_values(index, coerce)
+                   for index, coerce in zip(self._indexes, self._field_coercers)]
+        groups = [
+            (name, group_headers, [column_values(index, coerce) for index in group_indexes])
+            for name, group_headers, group_indexes, _, coerce in self._groups
+        ]
+        count = len(columns[0]) if columns else len(groups[0][2][0]) if groups and groups[0][2] else 0
+        return self._records(columns, groups, count)
+
+    def _records(self, columns, groups, count):
+        """Zip coerced columns back into record dicts"""
+        fields = self.fields
+        required = self._required
+        missing = {name: None for name in self.missing}
+        group_rows = [
+            (name, group_headers, zip(*group_columns) if group_columns else iter([()] * count))
+            for name, group_headers, group_columns in groups
+        ]
+
+        records = []
+        for values in zip(*columns) if columns else iter([()] * count):
+            group_values = [(name, group_headers, next(rows)) for name, group_headers, rows in group_rows]
+            if any(not values[pos] for pos in required):
+                continue
+            record = dict(zip(fields, values))
+            if missing:
+                record.update(missing)
+            for name, group_headers, row_values in group_values:
+                record[name] = dict(zip(group_headers, row_values))
+            records.append(record)
+        return records
+
+
+def compile_mapping(spec, header_row):
+    """
+    Resolve a mapping spec against a sheet's header row
+
+    Raises:
+        ValueError: When a required column cannot be found
+    """
+    headers = [str(h).strip() if h is not None else f'col_{i}' for i, h in enumerate(header_row)]
+    by_name = {}
+    for i, header in enumerate(headers):
+        by_name.setdefault(header.lower(), i)
+
+    required = tuple(spec.get('required', ()))
+    fields = []
+    indexes = []
+    coercers = []
+    for name, column in spec.get('columns', {}).items():
+        index = None
+        if 'index' in column:
+            index = column['index'] if column['index'] < len(headers) else None
+        elif 'header' in column:
+            index = by_name.get(str(column['header']).strip().lower())
+        elif 'pattern' in column:
+            regex = re.compile(column['pattern'], re.IGNORECASE)
+            index = next((i for i, header in enumerate(headers) if regex.search(header)), None)
+
+        if index is None:
+            if name in required:
+                raise ValueError(f"{spec.get('name', spec.get('sheet'))}: column for '{name}' not found")
+            continue
+        fields.append(name)
+        indexes.append(index)
+        coercers.append(_coercer(column.get('type')))
+
+    groups = []
+    for name, group in spec.get('column_groups', {}).items():
+        regex = re.compile(group['pattern'], re.IGNORECASE)
+        start, stop = group.get('start', 0), group.get('stop', len(headers))
+        matched = [(header, i) for i, header in enumerate(headers)
+                   if start <= i < stop and regex.search(header)]
+        groups.append((
+            name,
+            tuple(header for header, _ in matched),
+            tuple(i for _, i in matched),
+            _coercer(group.get('type'))
+        ))
+
+    return CompiledMapping(spec, headers, tuple(fields), indexes, coercers, required, groups)
+
+
+def read_sheet(sheet, spec):
+    """
+    Stream a worksheet through a mapping
+
+    Args:
+        sheet: openpyxl worksheet (read_only works best)
+        spec: Mapping spec
+
+    Returns:
+        tuple: (compiled, records) - records is a generator of record dicts
+    """
+    sheet_rows = sheet.iter_rows(min_row=spec.get('header_row', 1), values_only=True)
+    compiled = compile_mapping(spec, next(sheet_rows, None) or ())
+
+    def records():
+        extract = compiled.extract
+        for row in sheet_rows:
+            if not row or not any(row):
+                continue
+            record = extract(row)
+            if record is not None:
+                yield record
+
+    return compiled, records()
+
+
+def read_csv(path, spec, header_row=1):
+    """
+    Stream a CSV export of a sheet through a mapping
+
+    Upstream exports put the header on the first line, so header_row
+    defaults to 1 rather than the spec's workbook header row.
+
+    Returns:
+        tuple: (compiled, records) - records is a generator of record dicts
+    """
+    f = open(path, newline='', encoding='utf-8-sig')
+    try:
+        reader = csv.reader(f)
+        for _ in range(header_row - 1):
+            next(reader, None)
+        compiled = compile_mapping(spec, next(reader, None) or ())
+    except Exception:
+        # No generator will own the file - close it here
+        f.close()
+        raise
+
+    def records():
+        try:
+            while True:
+                batch = [row for row in islice(reader, COLUMN_BATCH_SIZE) if any(row)]
+                if not batch:
+                    break
+                yield from compiled.extract_batch(batch, blank_to_none=True)
+        finally:
+            f.close()
+
+    return compiled, records()
+
+
+def read_parquet(path, spec):
+    """
+    Stream a Parquet export of a sheet through a mapping, a record batch at a time
+
+    Requires pyarrow (pip install pyarrow).
+
+    Returns:
+        tuple: (compiled, records) - records is a generator of record dicts
+    """
+    if pq is None:
+        raise ImportError("pyarrow is required for Parquet imports: pip install pyarrow")
+
+    parquet_file = pq.ParquetFile(path)
+    try:
+        compiled = compile_mapping(spec, parquet_file.schema_arrow.names)
+    except Exception:
+        parquet_file.close()
+        raise
+
+    def records():
+        try:
+            for batch in parquet_file.iter_batches(batch_size=COLUMN_BATCH_SIZE):
+                def column_values(index, coerce, batch=batch):
+                    array = batch.column(index)
+                    if coerce is parse_number:
+                        return arrow_numbers(array)
+                    values = array.to_pylist()
+                    return _column_coercer(coerce)(values) if coerce is not None else values
+                yield from compiled.extract_columns(column_values)
+        finally:
+            parquet_file.close()
+
+    return compiled, records()
+
+
+def read_source(path, spec, workbook=None):
+    """
+    Read one mapped sheet from a workbook, CSV or Parquet file
+
+    Args:
+        path: Source file (.xlsx/.xlsm, .csv or .parquet)
+        spec: Mapping spec
+        workbook: Open openpyxl workbook for .xlsx sources
+
+    Returns:
+        tuple: (compiled, records), or (None, None) if the workbook lacks the sheet
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        return read_csv(path, spec)
+    if extension in ('.parquet', '.pq'):
+        return read_parquet(path, spec)
+    if spec['sheet'] not in workbook.sheetnames:
+        return None, None
+    return read_sheet(workbook[spec['sheet']], spec)
+
+
+def table_mapping(sheet_name, table_name, table_columns, key, header_row=1):
+    """
+    Mapping for a sheet whose headers are the target table's column names
+
+    Used for database exports such as supply_chain.xlsx, where every sheet
+    is named after a table and row 1 holds its columns.
+    """
+    return {
+        'name': table_name,
+        'sheet': sheet_name,
+        'header_row': header_row,
+        'table': table_name,
+        'key': tuple(key),
+        'columns': {column: {'header': column} for column in table_columns},
+        'required': tuple(key),
+    }
+
+
+# ============================================================================
+# BUILT-IN MAPPINGS
+# ============================================================================
+
+# Component columns of Costing Detail (Subtotal / Total columns are derived)
+COSTING_COMPONENT_PATTERN = (
+    r'^(facilities charge|throughput|terminaling estimate|generic additive|tariff|tvm|'
+    r'basis|line loss|fuel surcharge|transload|truck freight|wholesale margin|'
+    r'transportation estimate)$'
+)
+
+# Costing_Data_Final.xlsx - one terminal per row, product adders in named columns
+COSTING_DETAIL = {
+    'name': 'costing_detail',
+    'sheet': 'Costing Detail',
+    'header_row': 3,
+    'columns': {
+        'state': {'index': 0},          # Column A
+        'city': {'index': 1},           # Column B
+        'market': {'index': 2},         # Column C
+        'region': {'index': 3},         # Column D
+        'terminal_code': {'index': 4},  # Column E
+        'terminal_name': {'index': 5},  # Column F
+    },
+    'column_groups': {
+        'products': {'pattern': r'^(Clear Gas|E10|E15)$', 'type': 'number'},
+        # Cost components - row 1 of the sheet puts G:S under ETH and U:AC under GAS
+        'eth_components': {'pattern': COSTING_COMPONENT_PATTERN, 'start': 6, 'stop': 19, 'type': 'number'},
+        'gas_components': {'pattern': COSTING_COMPONENT_PATTERN, 'start': 20, 'stop': 29, 'type': 'number'},
+    },
+    'required': ('state', 'city', 'terminal_name'),
+}
+
+# EN Costing to EN Shipping.xlsx - shipping periods export
+EN_SHIPPING_PERIODS = {
+    'name': 'en_shipping_periods',
+    'sheet': 'Sheet6',
+    'header_row': 1,
+    'table': 'shipping_periods',
+    'key': ('shipping_period_id',),
+    'columns': {
+        'shipping_period_id': {'header': 'shipping_period_id', 'type': 'str'},
+        'terminal_id': {'header': 'terminal_id', 'type': 'str'},
+        'start_date': {'header': 'start_date', 'type': 'date'},
+        'end_date': {'header': 'end_date', 'type': 'date'},
+        'created_date': {'header': 'created_date', 'type': 'datetime'},
+        'modified_date': {'header': 'modified_date', 'type': 'datetime'},
+    },
+    'required': ('shipping_period_id', 'terminal_id', 'start_date'),
+}
+
+# EN Costing to EN Shipping.xlsx - shipping line items export
+EN_SHIPPING_LINE_ITEMS = {
+    'name': 'en_shipping_line_items',
+    'sheet': 'Sheet7',
+    'header_row': 1,
+    'table': 'shipping_line_items',
+    'key': ('shipping_line_item_id',),
+    'columns': {
+        'shipping_line_item_id': {'header': 'shipping_line_item_id', 'type': 'str'},
+        'shipping_period_id': {'header': 'shipping_period_id', 'type': 'str'},
+        'product_id': {'header': 'product_id', 'type': 'str'},
+        'line_item_type_id': {'header': 'line_item_type_id', 'type': 'str'},
+        'base_product_id': {'header': 'base_product_id', 'type': 'str'},
+        'spot_index_id': {'header': 'spot_index_id', 'type': 'str'},
+        'line_item_adder': {'header': 'line_item_adder', 'type': 'number'},
+        'line_item_percent': {'header': 'line_item_percent', 'type': 'number'},
+        'created_at': {'header': 'created_date', 'type': 'datetime'},
+        'updated_at': {'header': 'modified_date', 'type': 'datetime'},
+    },
+    'required': ('shipping_line_item_id', 'shipping_period_id', 'product_id', 'line_item_type_id'),
+}
+
+# Mapping sets selectable by name (e.g., excel_import_agent.py --mapping en_shipping)
+MAPPINGS = {
+    'costing_detail': [COSTING_DETAIL],
+    'en_shipping': [EN_SHIPPING_PERIODS, EN_SHIPPING_LINE_ITEMS],
+}
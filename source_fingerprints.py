@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Source Document Fingerprinting
+Content hashes for source documents and individual rows
+
+Ingestion agents record a SHA-256 of every source document they process in
+source_documents.hash_checksum. When the next run sees the same hash, the
+agent can skip parsing and writing entirely. Row fingerprints do the same
+job one level down: a stored hash per row lets a diff decide "unchanged"
+with one string comparison instead of comparing every field.
+
+For file imports the row hashes live in source_row_fingerprints, keyed by
+source document, so a re-import can tell new, changed, unchanged and
+removed rows apart without reading the target tables.
+"""
+
+import hashlib
+import json
+import os
+import uuid
+from datetime import datetime
+
+# Read size for streaming file hashes
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def file_hash(path):
+    """SHA-256 of a file's bytes, read in blocks so large workbooks stay cheap"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def content_hash(data):
+    """
+    SHA-256 of structured content (dicts/lists from an API response, etc.)
+
+    Data is serialized as canonical JSON (sorted keys, no whitespace) so the
+    same content always produces the same hash regardless of key order.
+    """
+    canonical = json.dumps(data, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def row_fingerprint(values):
+    """
+    Short hash of a row's business values
+
+    Args:
+        values: Sequence of field values in a fixed order
+
+    Returns:
+        32-character hex digest (128 bits - ample for per-table uniqueness)
+    """
+    joined = '\x1f'.join('' if v is None else str(v) for v in values)
+    return hashlib.blake2b(joined.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def get_last_checksum(cursor, document_type, document_name):
+    """Return the hash recorded for the most recent run of a source document"""
+    row = cursor.execute("""
+        SELECT hash_checksum
+        FROM source_documents
+        WHERE document_type = ? AND document_name = ?
+        ORDER BY created_at DESC, rowid DESC
+        LIMIT 1
+    """, (document_type, document_name)).fetchone()
+    return row[0] if row else None
+
+
+def record_source_document(cursor, document_type, document_name, checksum,
+                           document_url=None, local_path=None, effective_date=None):
+    """
+    Record a processed source document and its content hash
+
+    Written through the caller's cursor so it commits with the data it describes.
+
+    Returns:
+        document_id of the new source_documents row
+    """
+    document_id = str(uuid.uuid4())
+    cursor.execute("""
+        INSERT INTO source_documents (
+            document_id, document_type, document_name, document_url,
+            local_path, effective_date, retrieved_date, hash_checksum
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, (
+        document_id,
+        document_type,
+        document_name,
+        document_url,
+        os.path.abspath(local_path) if local_path else None,
+        effective_date,
+        datetime.now().date(),
+        checksum
+    ))
+    return document_id
+
+
+def ensure_fingerprint_column(cursor, table_name, column_name='row_fingerprint'):
+    """Add the row fingerprint column to databases created before it existed"""
+    columns = {row[1] for row in cursor.execute(f"PRAGMA table_info({table_name})")}
+    if column_name not in columns:
+        cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {column_name} TEXT")
+
+
+def ensure_row_fingerprint_table(cursor):
+    """Create the per-document row hash table on databases that predate it"""
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS source_row_fingerprints (
+        document_type TEXT NOT NULL,
+        document_name TEXT NOT NULL,
+        table_name TEXT NOT NULL,
+        record_id TEXT NOT NULL,
+        row_fingerprint TEXT NOT NULL,
+        PRIMARY KEY (document_type, document_name, table_name, record_id)
+    )
+    """)
+
+
+def load_row_fingerprints(cursor, document_type, document_name):
+    """
+    Row hashes recorded by the last import of a source document
+
+    Returns:
+        dict: (table_name, record_id) -> row_fingerprint
+    """
+    rows = cursor.execute("""
+        SELECT table_name, record_id, row_fingerprint
+        FROM source_row_fingerprints
+        WHERE document_type = ? AND document_name = ?
+    """, (document_type, document_name))
+    return {(table_name, record_id): fingerprint
+            for table_name, record_id, fingerprint in rows}
+
+
+def save_row_fingerprints(cursor, document_type, document_name, table_name, fingerprints):
+    """
+    Record row hashes for a source document
+
+    Args:
+        fingerprints: Iterable of (record_id, row_fingerprint)
+    """
+    cursor.executemany("""
+        INSERT OR REPLACE INTO source_row_fingerprints (
+            document_type, document_name, table_name, record_id, row_fingerprint
+        ) VALUES (?, ?, ?, ?, ?)
+    """, [(document_type, document_name, table_name, record_id, fingerprint)
+          for record_id, fingerprint in fingerprints])
+
+
+def delete_row_fingerprints(cursor, document_type, document_name, table_name, record_ids):
+    """Forget row hashes for records no longer in a source document"""
+    cursor.executemany("""
+        DELETE FROM source_row_fingerprints
+        WHERE document_type = ? AND document_name = ?
+        AND table_name = ? AND record_id = ?
+    """, [(document_type, document_name, table_name, record_id) for record_id in record_ids])
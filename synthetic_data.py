@@ -0,0 +1,800 @@
+#!/usr/bin/env python3
+"""
+Synthetic Data Generator
+Fills every table of the create_database schema with scaled, seeded data
+
+For benchmarks and performance tests only - never point it at a real
+database. The same scale and seed always produce the same database (ids,
+values and timestamps are drawn from one seeded random.Random), so plans
+and timings can be compared between runs and machines.
+
+Shape of the data, per terminal (scale 1.0 = 1,000 terminals):
+  - 2-4 products, with shipping setups (line item types, base products,
+    spot indices of the terminal's market) and path, pipeline, rail and
+    marine links
+  - effective-dated versions over SYNTHETIC_MONTHS months for costing (per
+    product category and costing item), transportation costs and terminal
+    rates - contiguous versions where end_date is the next version's start
+    and the current version is open (end_date NULL), as the imports write them
+  - shipping periods with line items, mirrored into a Shipping BCS with
+    its periods and line items
+plus tariffs, tariff libraries and costs, spot markets and indices, every
+alias table, and management / ETL history (tasks, quality log, batches).
+
+Bulk load: secondary indexes are dropped before the load and rebuilt after
+it, rows go in through executemany() in INSERT_CHUNK_SIZE chunks with the
+journal off, and the database is ANALYZEd at the end.
+
+Usage:
+    python synthetic_data.py benchmark.db [--scale 1.0] [--seed 42] [--force]
+"""
+
+import contextlib
+import io
+import os
+import random
+import sqlite3
+import sys
+import time
+from collections import defaultdict
+from datetime import date
+
+from materialized_views import rebuild as rebuild_materialized_views
+from migrations import SEED_TABLES
+
+# First month of generated history and its length
+SYNTHETIC_START = date(2023, 1, 1)
+SYNTHETIC_MONTHS = 24
+
+# Terminals at scale 1.0
+TERMINALS_PER_SCALE = 1000
+
+# Rows per executemany() during the load
+INSERT_CHUNK_SIZE = 50000
+
+STATES = {
+    # state: (min latitude, max latitude, min longitude, max longitude, cities)
+    'TX': (26.0, 36.0, -106.0, -94.0, ['Houston', 'Dallas', 'Austin', 'San Antonio', 'El Paso', 'Abilene']),
+    'LA': (29.0, 33.0, -94.0, -89.0, ['Baton Rouge', 'Shreveport', 'Lake Charles', 'Monroe']),
+    'OK': (34.0, 37.0, -103.0, -94.5, ['Tulsa', 'Oklahoma City', 'Ardmore', 'Enid']),
+    'AL': (30.2, 35.0, -88.5, -85.0, ['Birmingham', 'Montgomery', 'Mobile', 'Boligee']),
+    'GA': (30.5, 35.0, -85.6, -81.0, ['Atlanta', 'Macon', 'Savannah', 'Albany']),
+    'IL': (37.0, 42.5, -91.5, -87.5, ['Chicago', 'Peoria', 'Joliet', 'Hartford']),
+    'AR': (33.0, 36.5, -94.6, -89.7, ['Fort Smith', 'North Little Rock', 'El Dorado']),
+    'TN': (35.0, 36.7, -90.3, -81.7, ['Nashville', 'Memphis', 'Chattanooga', 'Knoxville']),
+    'MO': (36.0, 40.6, -95.8, -89.1, ['St. Louis', 'Kansas City', 'Springfield']),
+    'OH': (38.4, 42.0, -84.8, -80.5, ['Columbus', 'Lima', 'Toledo', 'Dayton']),
+}
+OPERATORS = ['Buckeye', 'Magellan', 'Kinder Morgan', 'Motiva', 'Marathon', 'NuStar',
+             'Phillips 66', 'Valero', 'TransMontaigne', 'Citgo', 'ERPC', 'Mag']
+RAILROADS = ['BNSF', 'Union Pacific', 'CSX', 'Norfolk Southern', 'Canadian National']
+AGENT_TYPES = ['terminal_discovery', 'tariff_extraction', 'linkage_validation', 'excel_import']
+TASK_STATUSES = ['Completed'] * 90 + ['Failed'] * 4 + ['Pending'] * 5 + ['Running']
+TENANTS = ['tenant_a', 'tenant_b', 'tenant_c']
+
+# Columns written per table, in insert order
+COLUMNS = {
+    'spot_markets': ('spot_market_id', 'spot_market_name', 'created_at'),
+    'spot_market_location_links': ('link_id', 'transportation_location_link_id', 'spot_market_id', 'created_at'),
+    'spot_indices': ('spot_index_id', 'spot_index_code', 'spot_market_id', 'product_id',
+                     'index_component_id', 'created_at'),
+    'refineries': ('refinery_id', 'refinery_name', 'operator', 'owner', 'state', 'city', 'latitude',
+                   'longitude', 'capacity_bpd', 'products_produced', 'effective_date', 'end_date',
+                   'created_at', 'updated_at'),
+    'pipelines': ('pipeline_id', 'pipeline_name', 'operator', 'owner', 'pipeline_type', 'origin_point',
+                  'destination_point', 'length_miles', 'flow_speed_mph', 'effective_date', 'end_date',
+                  'created_by', 'created_at', 'updated_at'),
+    'pipeline_refinery_links': ('link_id', 'pipeline_id', 'refinery_id', 'connection_type', 'direction',
+                                'effective_date', 'end_date', 'created_at'),
+    'tariff_libraries': ('tariff_library_id', 'tariff_library_code', 'tariff_library_name',
+                         'tariff_start_date', 'tariff_end_date', 'source_document', 'created_date',
+                         'modified_date'),
+    'pipeline_tariffs': ('tariff_id', 'pipeline_id', 'pipeline_name', 'tariff_code', 'origin', 'destination',
+                         'product_type', 'rate_per_gallon', 'rate_basis', 'miles', 'tariff_library_name',
+                         'tariff_library_id', 'line_item_type_id', 'effective_date', 'end_date',
+                         'source_document', 'ferc_tariff_number', 'created_by', 'created_at', 'updated_at'),
+    'tariff_costs': ('tariff_cost_id', 'tariff_id', 'tariff_library_id', 'tariff_value', 'created_at',
+                     'updated_at'),
+    'shipping_paths': ('shipping_path_id', 'shipping_path_name', 'shipping_path_origin_id',
+                       'shipping_path_description', 'created_at'),
+    'tariff_path_links': ('tariff_path_link_id', 'shipping_path_id', 'tariff_id', 'is_active', 'created_at'),
+    'terminals': ('terminal_id', 'terminal_name', 'terminal_code', 'irs_tcn', 'tcn4', 'state', 'city',
+                  'county', 'market', 'region', 'latitude', 'longitude', 'operator', 'owner',
+                  'capacity_bpd', 'receiving_methods', 'effective_date', 'end_date', 'data_quality_score',
+                  'last_verified', 'created_by', 'created_at', 'updated_at'),
+    'terminal_products': ('terminal_product_id', 'terminal_id', 'product_id', 'shipping_status',
+                          'effective_date', 'end_date', 'created_at', 'updated_at'),
+    'shipping_setup': ('shipping_setup_id', 'terminal_product_id', 'line_item_type_id', 'base_product_id',
+                       'line_item_percent', 'index_id', 'is_active', 'created_at', 'updated_at'),
+    'terminal_pipeline_links': ('link_id', 'terminal_id', 'pipeline_id', 'connection_type', 'direction',
+                                'capacity_bpd', 'is_published', 'is_included', 'effective_date',
+                                'end_date', 'created_at'),
+    'rail_connections': ('connection_id', 'terminal_id', 'railroad_name', 'siding_name', 'car_capacity',
+                         'loading_unloading', 'effective_date', 'end_date', 'created_at'),
+    'marine_facilities': ('facility_id', 'terminal_id', 'facility_name', 'dock_type', 'vessel_capacity',
+                          'loading_unloading', 'effective_date', 'end_date', 'created_at'),
+    'terminal_path_links': ('terminal_path_link_id', 'terminal_id', 'product_category_id',
+                            'shipping_path_id', 'is_active', 'created_at'),
+    'costing': ('costing_id', 'terminal_id', 'product_category_id', 'costing_item_id', 'costing_value',
+                'start_date', 'end_date', 'created_date', 'modified_date'),
+    'transportation_costs': ('transport_cost_id', 'terminal_id', 'product_type', 'tariff_cost', 'tvm_cost',
+                             'basis_cost', 'fuel_surcharge', 'transload_cost', 'truck_freight',
+                             'line_loss', 'margin', 'transportation_estimate', 'combined_adder',
+                             'effective_date', 'end_date', 'created_by', 'created_at', 'updated_at'),
+    'terminal_rates': ('rate_id', 'terminal_id', 'product_type', 'facilities_charge', 'throughput_rate',
+                       'terminaling_estimate', 'additive', 'rate_basis', 'effective_date', 'end_date',
+                       'source_document', 'created_by', 'created_at', 'updated_at'),
+    'rail_rates': ('rate_id', 'railroad_name', 'origin', 'destination', 'product_type', 'rate_per_gallon',
+                   'rate_basis', 'mileage', 'rail_connection_id', 'effective_date', 'end_date',
+                   'source_document', 'created_by', 'created_at', 'updated_at'),
+    'shipping_periods': ('shipping_period_id', 'terminal_id', 'start_date', 'end_date', 'period_status',
+                         'created_date', 'modified_date'),
+    'shipping_line_items': ('shipping_line_item_id', 'shipping_period_id', 'product_id', 'line_item_type_id',
+                            'base_product_id', 'line_item_adder', 'line_item_percent', 'spot_index_id',
+                            'created_at', 'updated_at'),
+    'bcs': ('bcs_id', 'bcs_code', 'bcs_name', 'bcs_type_id', 'primary_terminal_alias',
+            'terminal_alias_type_code', 'created_at', 'updated_at'),
+    'bcs_periods': ('bcs_period_id', 'bcs_id', 'start_date', 'end_date', 'bcs_period_status_id',
+                    'bcs_period_status_override', 'created_date', 'modified_date'),
+    'bcs_line_items': ('bcs_line_item_id', 'bcs_period_id', 'product_alias', 'product_alias_type_code',
+                       'line_item_type_alias', 'lit_alias_type_code', 'index_alias', 'index_alias_type_code',
+                       'price_day_alias', 'price_day_alias_type_code', 'line_item_adder',
+                       'line_item_percent', 'created_at', 'modified_date'),
+    'terminal_aliases': ('terminal_alias_id', 'terminal_alias_code', 'alias_type_id', 'terminal_id',
+                         'created_at'),
+    'product_aliases': ('product_alias_id', 'product_alias_code', 'alias_type_id', 'product_id', 'created_at'),
+    'line_item_type_aliases': ('lit_alias_id', 'alias_code', 'alias_type_id', 'line_item_type_id',
+                               'created_at'),
+    'index_aliases': ('index_alias_id', 'alias_code', 'alias_type_id', 'spot_index_id', 'created_at'),
+    'price_day_aliases': ('price_day_alias_id', 'alias_code', 'alias_type_id', 'price_day_id', 'created_at'),
+    'terminal_alias_errors': ('error_id', 'alias_code', 'alias_type_id', 'error_message', 'batch_id',
+                              'created_at'),
+    'product_alias_errors': ('error_id', 'alias_code', 'alias_type_id', 'error_message', 'batch_id',
+                             'created_at'),
+    'line_item_type_alias_errors': ('error_id', 'alias_code', 'alias_type_id', 'error_message', 'batch_id',
+                                    'created_at'),
+    'index_alias_errors': ('error_id', 'alias_code', 'alias_type_id', 'error_message', 'batch_id',
+                           'created_at'),
+    'price_day_alias_errors': ('error_id', 'alias_code', 'alias_type_id', 'error_message', 'batch_id',
+                               'created_at'),
+    'agent_tasks': ('task_id', 'agent_type', 'task_description', 'task_parameters', 'priority', 'status',
+                    'assigned_timestamp', 'started_timestamp', 'completed_timestamp', 'result_summary',
+                    'requires_human_review', 'human_reviewed', 'error_message', 'retry_count', 'created_at'),
+    'data_quality_log': ('log_id', 'table_name', 'record_id', 'quality_check_type', 'quality_score',
+                         'issues_found', 'checked_by', 'checked_at'),
+    'agent_metrics': ('metric_id', 'agent_type', 'tasks_completed', 'tasks_failed', 'avg_execution_time',
+                      'human_review_rate', 'data_quality_avg', 'period_start', 'period_end', 'created_at'),
+    'ownership_changes': ('change_id', 'asset_type', 'asset_id', 'previous_owner', 'new_owner',
+                          'transaction_date', 'transaction_value', 'source_document', 'notes', 'created_at'),
+    'source_documents': ('document_id', 'document_type', 'document_name', 'local_path', 'effective_date',
+                         'retrieved_date', 'hash_checksum', 'created_at'),
+    'batches': ('batch_id', 'batch_type', 'batch_status', 'records_processed', 'records_succeeded',
+                'records_failed', 'started_at', 'completed_at', 'parent_batch_id', 'source_path',
+                'rows_per_second', 'phase_timings', 'created_date'),
+    'shipping_tracking': ('tracking_id', 'tenant_id', 'filename', 'activity_type_name', 'count',
+                          'activity_date', 'created_date'),
+    'run_checkpoints': ('run_id', 'agent_type', 'phase', 'payload', 'completed_at'),
+    'source_row_fingerprints': ('document_type', 'document_name', 'table_name', 'record_id',
+                                'row_fingerprint'),
+}
+
+
+class SyntheticDataGenerator:
+    """
+    Builds a complete synthetic database at a given scale
+
+    Usage:
+        counts = SyntheticDataGenerator('benchmark.db', scale=10).generate()
+    """
+
+    def __init__(self, db_path, scale=1.0, seed=42, months=SYNTHETIC_MONTHS,
+                 chunk_size=INSERT_CHUNK_SIZE):
+        self.db_path = db_path
+        self.scale = scale
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.rng = random.Random(seed)
+
+        self.months = [self._add_months(SYNTHETIC_START, m).isoformat() for m in range(months)]
+        self.timestamps = [f"{month} 06:00:00" for month in self.months]
+
+        self.conn = None
+        self._buffers = defaultdict(list)
+        self._counts = defaultdict(int)
+
+    # ------------------------------------------------------------------
+    # Entry point
+    # ------------------------------------------------------------------
+
+    def generate(self):
+        """
+        Create the database and load it
+
+        Returns:
+            dict: Rows per table
+        """
+        from create_database import create_complete_database
+
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.conn = create_complete_database(self.db_path)
+        try:
+            cursor = self.conn.cursor()
+            # Rows go in parent-first; ids are remapped during the re-key
+            cursor.execute("PRAGMA foreign_keys = OFF")
+            self._rekey_seed_data(cursor)
+            self._load_reference(cursor)
+            index_sql = self._drop_secondary_indexes(cursor)
+
+            cursor.execute("PRAGMA journal_mode = OFF").fetchone()
+            cursor.execute("PRAGMA synchronous = OFF")
+            cursor.execute("PRAGMA cache_size = -262144")
+            cursor.execute("BEGIN")
+            self._generate_network()
+            self._generate_terminals()
+            self._generate_history()
+            self._flush_all()
+            self.conn.commit()
+            load_seconds = time.perf_counter() - started
+
+            for sql in index_sql:
+                cursor.execute(sql)
+            self.conn.commit()
+            # The load went through the change-log triggers; one rebuild beats
+            # a refresh of every logged key
+            rebuild_materialized_views(self.conn)
+            cursor.execute("UPDATE mv_refresh_state SET refreshed_at = ?, rebuilt_at = ?, refresh_seconds = 0",
+                           (self.timestamps[-1], self.timestamps[-1]))
+            cursor.execute("ANALYZE")
+            self.conn.commit()
+            cursor.execute("PRAGMA journal_mode = WAL").fetchone()
+        finally:
+            self.conn.close()
+
+        elapsed = time.perf_counter() - started
+        counts = self.table_counts()
+        total = sum(counts.values())
+        print(f"  ✓ {total:,} rows in {elapsed:.1f}s "
+              f"(load {load_seconds:.1f}s, indexes {elapsed - load_seconds:.1f}s, "
+              f"{total / elapsed:,.0f} rows/sec)")
+        return counts
+
+    def table_counts(self):
+        """Rows per table of the generated database"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            tables = [row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY rowid")]
+            return {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in tables}
+        finally:
+            conn.close()
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _add_months(day, months):
+        month = day.month - 1 + months
+        return date(day.year + month // 12, month % 12 + 1, 1)
+
+    def _id(self):
+        """UUID-formatted id drawn from the seeded generator"""
+        value = '%032x' % self.rng.getrandbits(128)
+        return f"{value[:8]}-{value[8:12]}-4{value[13:16]}-{value[16:20]}-{value[20:]}"
+
+    def _versions(self, min_months, max_months, first_month=0):
+        """
+        Contiguous (start, end, month index) versions from first_month to the
+        end of the window; each ends on the next one's start, the last is open
+        """
+        starts = []
+        month = first_month
+        while month < len(self.months):
+            starts.append(month)
+            month += self.rng.randint(min_months, max_months)
+        return [
+            (self.months[start], self.months[following] if following is not None else None, start)
+            for start, following in zip(starts, starts[1:] + [None])
+        ]
+
+    def _add(self, table_name, row):
+        buffer = self._buffers[table_name]
+        buffer.append(row)
+        if len(buffer) >= self.chunk_size:
+            self._flush(table_name)
+
+    def _flush(self, table_name):
+        rows = self._buffers.pop(table_name, None)
+        if not rows:
+            return
+        columns = COLUMNS[table_name]
+        self.conn.executemany(
+            f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+            rows
+        )
+        self._counts[table_name] += len(rows)
+
+    def _flush_all(self):
+        for table_name in list(self._buffers):
+            self._flush(table_name)
+
+    def _drop_secondary_indexes(self, cursor):
+        """Drop the explicit indexes (rebuilt after the load); returns their SQL"""
+        indexes = cursor.execute("""
+            SELECT name, sql FROM sqlite_master
+            WHERE type = 'index' AND sql IS NOT NULL
+        """).fetchall()
+        for name, _ in indexes:
+            cursor.execute(f"DROP INDEX {name}")
+        self.conn.commit()
+        return [sql for _, sql in indexes]
+
+    def _rekey_seed_data(self, cursor):
+        """
+        Give the create_database seed rows seeded ids and timestamps
+
+        create_database seeds with uuid4 ids and CURRENT_TIMESTAMP; both are
+        replaced (and foreign keys between seed tables remapped) so the
+        whole database is reproducible.
+        """
+        references = defaultdict(list)
+        for table_name in SEED_TABLES:
+            for fk in cursor.execute(f"PRAGMA foreign_key_list({table_name})").fetchall():
+                references[fk[2]].append((table_name, fk[3]))
+
+        for table_name in SEED_TABLES:
+            columns = cursor.execute(f"PRAGMA table_info({table_name})").fetchall()
+            key = next(column[1] for column in columns if column[5])
+            natural_key = columns[1][1]
+            for (old_id,) in cursor.execute(
+                    f"SELECT {key} FROM {table_name} ORDER BY {natural_key}").fetchall():
+                new_id = self._id()
+                cursor.execute(f"UPDATE {table_name} SET {key} = ? WHERE {key} = ?", (new_id, old_id))
+                for ref_table, ref_column in references[table_name]:
+                    cursor.execute(f"UPDATE {ref_table} SET {ref_column} = ? WHERE {ref_column} = ?",
+                                   (new_id, old_id))
+            for column in ('created_at', 'updated_at'):
+                if any(c[1] == column for c in columns):
+                    cursor.execute(f"UPDATE {table_name} SET {column} = ?", (self.timestamps[0],))
+        self.conn.commit()
+
+    def _load_reference(self, cursor):
+        """Seed data needed while generating"""
+        self.categories = dict(cursor.execute(
+            "SELECT category_code, category_id FROM product_categories").fetchall())
+        self.products = cursor.execute("""
+            SELECT p.product_id, p.product_code, pc.category_code
+            FROM products p JOIN product_categories pc ON p.product_category_id = pc.category_id
+            ORDER BY p.product_code
+        """).fetchall()
+        self.product_ids = {code: product_id for product_id, code, _ in self.products}
+        self.costing_items = [row[0] for row in cursor.execute(
+            "SELECT costing_item_id FROM costing_items ORDER BY costing_item_name")]
+        self.line_item_types = dict(cursor.execute(
+            "SELECT line_item_type_name, line_item_type_id FROM line_item_types").fetchall())
+        self.price_days = dict(cursor.execute("SELECT price_day_name, price_day_id FROM price_days").fetchall())
+        self.bcs_types = dict(cursor.execute("SELECT bcs_type_name, bcs_type_id FROM bcs_types").fetchall())
+        self.bcs_statuses = dict(cursor.execute(
+            "SELECT bcs_period_status_name, bcs_period_status_id FROM bcs_period_statuses").fetchall())
+        self.alias_types = dict(cursor.execute(
+            "SELECT alias_type_code, alias_type_id FROM alias_types").fetchall())
+        self.index_component_id = cursor.execute(
+            "SELECT index_component_id FROM index_components WHERE index_component_code = 'C'").fetchone()[0]
+
+    def _scaled(self, count, minimum=1):
+        return max(int(count * self.scale), minimum)
+
+    # ------------------------------------------------------------------
+    # Markets, pipelines, tariffs and shipping paths
+    # ------------------------------------------------------------------
+
+    def _generate_network(self):
+        rng = self.rng
+        created = self.timestamps[0]
+
+        # Spot markets: one or more per state/city hub, each with location links
+        self.markets = []
+        hubs = [(state, city) for state, spec in STATES.items() for city in spec[4]]
+        for m in range(self._scaled(50, len(STATES))):
+            state, city = hubs[m % len(hubs)]
+            market_id = self._id()
+            name = f"{city} {state}" + (f" {m // len(hubs) + 1}" if m >= len(hubs) else '')
+            self.markets.append((market_id, name, state))
+            self._add('spot_markets', (market_id, name, created))
+        self.markets_by_state = defaultdict(list)
+        for market in self.markets:
+            self.markets_by_state[market[2]].append(market)
+
+        self.location_links = []
+        for market_id, _, _ in self.markets:
+            for _ in range(rng.randint(1, 3)):
+                location_id = self._id()
+                self.location_links.append((location_id, market_id))
+                self._add('spot_market_location_links', (self._id(), location_id, market_id, created))
+
+        # Spot indices: one per market and product ('C' component)
+        self.spot_indices = {}
+        for market_id, name, _ in self.markets:
+            for product_id, code, _ in self.products:
+                index_id = self._id()
+                self.spot_indices[(market_id, product_id)] = index_id
+                self._add('spot_indices', (index_id, f"{name.upper().replace(' ', '_')}_{code}", market_id,
+                                           product_id, self.index_component_id, created))
+                self._add('index_aliases', (self._id(), index_id, self.alias_types['EN Master UUID'],
+                                            index_id, created))
+
+        # Refineries and pipelines
+        refineries = []
+        for r in range(self._scaled(30, 3)):
+            state = rng.choice(list(STATES))
+            lat0, lat1, lon0, lon1, cities = STATES[state]
+            refinery_id = self._id()
+            refineries.append(refinery_id)
+            self._add('refineries', (
+                refinery_id, f"{rng.choice(cities)} Refinery {r + 1}", rng.choice(OPERATORS),
+                rng.choice(OPERATORS), state, rng.choice(cities), round(rng.uniform(lat0, lat1), 5),
+                round(rng.uniform(lon0, lon1), 5), rng.randrange(50000, 600000, 1000),
+                'Gasoline,Diesel', '2010-01-01', None, created, created
+            ))
+
+        self.pipelines = []
+        for p in range(self._scaled(40, 4)):
+            pipeline_id = self._id()
+            operator = rng.choice(OPERATORS)
+            name = f"{operator} Pipeline {p + 1}"
+            origin, destination = rng.sample(list(STATES), 2)
+            self.pipelines.append((pipeline_id, name))
+            self._add('pipelines', (
+                pipeline_id, name, operator, operator, rng.choice(['Refined Products', 'Ethanol']),
+                origin, destination, round(rng.uniform(50, 1500), 1), round(rng.uniform(2, 6), 1),
+                '2010-01-01', None, 'synthetic_data', created, created
+            ))
+            for refinery_id in rng.sample(refineries, min(2, len(refineries))):
+                self._add('pipeline_refinery_links', (
+                    self._id(), pipeline_id, refinery_id, 'Origin', 'Inbound', '2010-01-01', None, created
+                ))
+
+        # Tariff libraries (one per month) and tariffs with a value per library
+        libraries = []
+        for m, month in enumerate(self.months):
+            library_id = self._id()
+            code = f"TL-{month[:7]}"
+            end = self.months[m + 1] if m + 1 < len(self.months) else None
+            libraries.append((library_id, code))
+            self._add('tariff_libraries', (library_id, code, f"Tariff Library {month[:7]}", month, end,
+                                           f"tariffs_{month[:7]}.pdf", self.timestamps[m], self.timestamps[m]))
+
+        self.tariffs = []
+        tariff_type = self.line_item_types['Tariff']
+        for pipeline_id, pipeline_name in self.pipelines:
+            for t in range(10):
+                tariff_id = self._id()
+                rate = round(rng.uniform(0.01, 0.15), 5)
+                self.tariffs.append(tariff_id)
+                self._add('pipeline_tariffs', (
+                    tariff_id, pipeline_id, pipeline_name, f"{pipeline_name[:3].upper()}-{t + 1:03d}",
+                    rng.choice(list(STATES)), rng.choice(list(STATES)), rng.choice(['Gasoline', 'Ethanol']),
+                    rate, 'per gallon', rng.randint(20, 900), libraries[-1][1], libraries[-1][0],
+                    tariff_type, self.months[0], None, f"{pipeline_name} FERC tariff.pdf",
+                    f"FERC No. {rng.randint(100, 999)}.{rng.randint(0, 9)}", 'synthetic_data', created, created
+                ))
+                for m, (library_id, _) in enumerate(libraries):
+                    if m and rng.random() < 0.7:
+                        continue    # value carried from the previous library
+                    rate = round(rate * rng.uniform(0.97, 1.06), 5)
+                    self._add('tariff_costs', (self._id(), tariff_id, library_id, rate,
+                                               self.timestamps[m], self.timestamps[m]))
+
+        # Shipping paths from market locations, each with 1-3 tariffs
+        self.paths = []
+        for s in range(self._scaled(200, 5)):
+            path_id = self._id()
+            origin_id, market_id = rng.choice(self.location_links)
+            self.paths.append((path_id, market_id))
+            self._add('shipping_paths', (path_id, f"Path {s + 1}", origin_id, 'Synthetic shipping path', created))
+            for tariff_id in rng.sample(self.tariffs, rng.randint(1, 3)):
+                self._add('tariff_path_links', (self._id(), path_id, tariff_id, 1, created))
+
+    # ------------------------------------------------------------------
+    # Terminals and everything keyed by terminal
+    # ------------------------------------------------------------------
+
+    def _generate_terminals(self):
+        rng = self.rng
+        lit = self.line_item_types
+        product_sets = [
+            ['CLEAR_GAS', 'E10'], ['CLEAR_GAS', 'E10', 'E15'], ['E10', 'ETHANOL'],
+            ['CLEAR_GAS', 'E10', 'E85', 'ETHANOL'], ['E10', 'E15', 'E85'],
+        ]
+        # Base products and line item types of each product's shipping setup
+        blends = {
+            'CLEAR_GAS': [('CLEAR_GAS', ['Tariff', 'Facilities Charge', 'Throughput', 'Line Space'])],
+            'E10': [('CLEAR_GAS', ['Tariff', 'Facilities Charge', 'Line Space']), ('ETHANOL', ['Ethanol', 'RIN'])],
+            'E15': [('CLEAR_GAS', ['Tariff', 'Facilities Charge']), ('ETHANOL', ['Ethanol', 'RIN'])],
+            'E85': [('ETHANOL', ['Ethanol', 'Facilities Charge', 'RIN']), ('CLEAR_GAS', ['Additive'])],
+            'ETHANOL': [('ETHANOL', ['Ethanol', 'Throughput', 'Transloading Estimate'])],
+        }
+        percents = {'CLEAR_GAS': 1.0, 'E10': 0.9, 'E15': 0.85, 'E85': 0.85, 'ETHANOL': 1.0}
+        used_codes = set()
+        self.terminal_ids = []
+
+        for t in range(self._scaled(TERMINALS_PER_SCALE, 10)):
+            terminal_id = self._id()
+            self.terminal_ids.append(terminal_id)
+            state = rng.choice(list(STATES))
+            lat0, lat1, lon0, lon1, cities = STATES[state]
+            city = rng.choice(cities)
+            operator = rng.choice(OPERATORS)
+            # 7919 is coprime with 10000: unique TCN suffixes within each block of 10,000
+            tcn4 = f"{(t * 7919 + 1) % 10000:04d}"
+            market_id, market_name, _ = rng.choice(self.markets_by_state[state] or self.markets)
+            opened = rng.randrange(len(self.months) // 3) if rng.random() < 0.15 else 0
+            closed = rng.random() < 0.03
+            created = self.timestamps[opened]
+
+            self._add('terminals', (
+                terminal_id, f"{state} {city} - {operator} - {tcn4}", f"{state}{t:05d}",
+                f"T{60 + t // 10000}{state}{tcn4}", tcn4, state, city, f"{city} County", market_name,
+                'Gulf Coast' if state in ('TX', 'LA') else 'Midcontinent',
+                round(rng.uniform(lat0, lat1), 5), round(rng.uniform(lon0, lon1), 5), operator, operator,
+                rng.randrange(5000, 200000, 500), rng.choice(['Pipeline', 'Pipeline,Truck', 'Pipeline,Rail']),
+                self.months[opened], self.months[-1] if closed else None, round(rng.uniform(0.7, 1.0), 2),
+                self.timestamps[-1], 'synthetic_data', created, created
+            ))
+            self._add('terminal_aliases', (self._id(), terminal_id, self.alias_types['EN Master UUID'],
+                                           terminal_id, created))
+            self._add('terminal_aliases', (self._id(), f"BM{t:06d}", self.alias_types['BM Code'],
+                                           terminal_id, created))
+
+            # Products and shipping setup
+            product_codes = rng.choice(product_sets)
+            categories = sorted({category for _, code, category in self.products if code in product_codes})
+            setups = []
+            for code in product_codes:
+                terminal_product_id = self._id()
+                shipping = 1 if rng.random() < 0.85 else 0
+                self._add('terminal_products', (terminal_product_id, terminal_id, self.product_ids[code],
+                                                shipping, self.months[opened], None, created, created))
+                for base_code, type_names in blends[code]:
+                    base_id = self.product_ids[base_code]
+                    percent = percents[code] if base_code == 'CLEAR_GAS' or code == 'ETHANOL' else round(1 - percents[code], 2)
+                    index_id = self.spot_indices[(market_id, base_id)]
+                    for type_name in type_names:
+                        self._add('shipping_setup', (self._id(), terminal_product_id, lit[type_name], base_id,
+                                                     percent, index_id, 1, created, created))
+                        if shipping:
+                            setups.append((self.product_ids[code], lit[type_name], base_id, percent, index_id))
+
+            # Links
+            for category in categories:
+                path_id = rng.choice(self.paths)[0]
+                self._add('terminal_path_links', (self._id(), terminal_id, self.categories[category],
+                                                  path_id, 1, created))
+            for pipeline_id, _ in rng.sample(self.pipelines, min(rng.randint(1, 3), len(self.pipelines))):
+                self._add('terminal_pipeline_links', (
+                    self._id(), terminal_id, pipeline_id, 'Direct', 'Inbound',
+                    rng.randrange(5000, 100000, 500), 1, 1, self.months[opened], None, created
+                ))
+            if rng.random() < 0.3:
+                connection_id = self._id()
+                railroad = rng.choice(RAILROADS)
+                self._add('rail_connections', (connection_id, terminal_id, railroad, f"{city} Siding",
+                                               rng.randint(10, 120), 'Unloading', self.months[opened],
+                                               None, created))
+                for start, end, m in self._versions(6, 12, opened):
+                    self._add('rail_rates', (
+                        self._id(), railroad, f"{rng.choice(list(STATES))} Origin", f"{city}, {state}",
+                        'Ethanol', round(rng.uniform(0.05, 0.25), 5), 'per gallon', rng.randint(100, 1500),
+                        connection_id, start, end, f"{railroad} tariff.pdf", 'synthetic_data',
+                        self.timestamps[m], self.timestamps[m]
+                    ))
+            if rng.random() < 0.15:
+                self._add('marine_facilities', (self._id(), terminal_id, f"{city} Dock",
+                                                rng.choice(['Barge', 'Ship', 'Barge/Ship']),
+                                                f"{rng.randint(10, 80)}k bbl", 'Loading',
+                                                self.months[opened], None, created))
+
+            # Effective-dated costs
+            for category in categories:
+                category_id = self.categories[category]
+                for item_id in self.costing_items:
+                    value = round(rng.uniform(0, 0.12), 5)
+                    for start, end, m in self._versions(1, 4, opened):
+                        value = round(max(value * rng.uniform(0.9, 1.12), 0), 5)
+                        self._add('costing', (self._id(), terminal_id, category_id, item_id, value,
+                                              start, end, self.timestamps[m], self.timestamps[m]))
+            for product_type in ('Gasoline', 'Ethanol'):
+                for start, end, m in self._versions(2, 6, opened):
+                    costs = [round(rng.uniform(0, 0.08), 5) for _ in range(8)]
+                    self._add('transportation_costs', (
+                        self._id(), terminal_id, product_type, *costs, round(sum(costs), 5),
+                        round(sum(costs) * rng.uniform(0.9, 1.1), 5), start, end, 'synthetic_data',
+                        self.timestamps[m], self.timestamps[m]
+                    ))
+                for start, end, m in self._versions(6, 12, opened):
+                    self._add('terminal_rates', (
+                        self._id(), terminal_id, product_type, round(rng.uniform(0.002, 0.02), 5),
+                        round(rng.uniform(0.002, 0.02), 5), round(rng.uniform(0.005, 0.04), 5),
+                        round(rng.uniform(0, 0.005), 5), 'per gallon', start, end,
+                        f"{operator} rate sheet.pdf", 'synthetic_data', self.timestamps[m], self.timestamps[m]
+                    ))
+
+            if setups:
+                self._generate_shipping(terminal_id, market_name, tcn4, setups, opened, used_codes)
+
+    def _generate_shipping(self, terminal_id, market_name, tcn4, setups, opened, used_codes):
+        """Shipping periods and line items, mirrored into the terminal's Shipping BCS"""
+        rng = self.rng
+        bcs_code = f"EN_Shipping_{market_name.replace(' ', '_')}_{tcn4}"
+        suffix = 1
+        while bcs_code in used_codes:
+            suffix += 1
+            bcs_code = f"EN_Shipping_{market_name.replace(' ', '_')}_{tcn4}_{suffix}"
+        used_codes.add(bcs_code)
+
+        created = self.timestamps[opened]
+        bcs_id = self._id()
+        self._add('bcs', (bcs_id, bcs_code, bcs_code, self.bcs_types['Shipping'], terminal_id,
+                          'EN Master UUID', created, created))
+
+        versions = self._versions(1, 3, opened)
+        prior_day = self.price_days['Prior Day']
+        for start, end, m in versions:
+            current = end is None
+            period_id = self._id()
+            bcs_period_id = self._id()
+            stamp = self.timestamps[m]
+            self._add('shipping_periods', (period_id, terminal_id, start, end,
+                                           'Active' if current else 'Expired', stamp, stamp))
+            status = 'In Progress' if current and rng.random() < 0.1 else ('Approved' if current else 'Archived')
+            self._add('bcs_periods', (bcs_period_id, bcs_id, start, end, self.bcs_statuses[status], 0,
+                                      stamp, stamp))
+            for product_id, line_item_type_id, base_id, percent, index_id in setups:
+                adder = round(rng.uniform(0, 0.1), 5)
+                self._add('shipping_line_items', (self._id(), period_id, product_id, line_item_type_id,
+                                                  base_id, adder, percent, index_id, stamp, stamp))
+                self._add('bcs_line_items', (
+                    self._id(), bcs_period_id, product_id, 'EN Master UUID', line_item_type_id,
+                    'EN Master UUID', index_id, 'EN Master UUID', prior_day, 'EN Master UUID',
+                    0, percent, stamp, stamp
+                ))
+
+    # ------------------------------------------------------------------
+    # Aliases, management and ETL history
+    # ------------------------------------------------------------------
+
+    def _generate_history(self):
+        rng = self.rng
+        created = self.timestamps[0]
+        en_uuid = self.alias_types['EN Master UUID']
+
+        for product_id, code, _ in self.products:
+            self._add('product_aliases', (self._id(), product_id, en_uuid, product_id, created))
+            self._add('product_aliases', (self._id(), code, self.alias_types['BM Code'], product_id, created))
+        for name, line_item_type_id in sorted(self.line_item_types.items()):
+            self._add('line_item_type_aliases', (self._id(), line_item_type_id, en_uuid, line_item_type_id, created))
+        for name, price_day_id in sorted(self.price_days.items()):
+            self._add('price_day_aliases', (self._id(), price_day_id, en_uuid, price_day_id, created))
+
+        # Monthly Costing Detail imports: document, parent batch and one child batch each
+        batch_ids = []
+        for m, month in enumerate(self.months):
+            stamp = self.timestamps[m]
+            name = f"Costing_Detail_{month[:7]}.xlsx"
+            self._add('source_documents', (self._id(), 'Costing Detail', name, f"Reference/Excel/{name}",
+                                           month, month, '%064x' % rng.getrandbits(256), stamp))
+            parent_id, batch_id = self._id(), self._id()
+            rows = self._scaled(TERMINALS_PER_SCALE, 10) * rng.randint(20, 40)
+            seconds = round(rng.uniform(5, 30), 2)
+            self._add('batches', (parent_id, 'Excel Import Run', 'Completed', rows, rows, 0, stamp, stamp,
+                                  None, name, None, None, stamp))
+            self._add('batches', (batch_id, 'Excel Import', 'Completed', rows, rows, 0, stamp, stamp,
+                                  parent_id, name, round(rows / seconds, 1),
+                                  f'{{"parse": {seconds / 2:.2f}, "transform": {seconds / 4:.2f}, '
+                                  f'"write": {seconds / 4:.2f}}}', stamp))
+            batch_ids.append(batch_id)
+            for tenant in TENANTS:
+                self._add('shipping_tracking', (self._id(), tenant, f"{tenant}_bcs_{month[:7]}.csv",
+                                                'BCS Export', rng.randint(100, 5000), month, stamp))
+
+        # Alias errors from the imports
+        for table_name in ('terminal_alias_errors', 'product_alias_errors', 'line_item_type_alias_errors',
+                           'index_alias_errors', 'price_day_alias_errors'):
+            for e in range(self._scaled(20)):
+                self._add(table_name, (self._id(), f"UNKNOWN_{e:04d}", rng.choice(list(self.alias_types.values())),
+                                       'Alias not found', rng.choice(batch_ids), rng.choice(self.timestamps)))
+
+        # Agent task history with quality checks and metrics
+        for i in range(self._scaled(20000, 100)):
+            m = rng.randrange(len(self.months))
+            status = rng.choice(TASK_STATUSES)
+            agent_type = rng.choice(AGENT_TYPES)
+            stamp = self.timestamps[m]
+            finished = stamp if status in ('Completed', 'Failed') else None
+            task_id = self._id()
+            self._add('agent_tasks', (
+                task_id, agent_type, f"{agent_type.replace('_', ' ').title()} #{i + 1}",
+                f'{{"month": "{self.months[m][:7]}"}}', rng.randint(1, 10), status, stamp,
+                stamp if status != 'Pending' else None, finished,
+                'Completed successfully' if status == 'Completed' else None,
+                int(rng.random() < 0.05), int(rng.random() < 0.5),
+                'Timeout' if status == 'Failed' else None, rng.randint(0, 2) if status == 'Failed' else 0, stamp
+            ))
+            if status == 'Completed':
+                for check in ('completeness', 'validity'):
+                    self._add('data_quality_log', (self._id(), 'terminals', task_id, check,
+                                                   round(rng.uniform(0.6, 1.0), 2), None, agent_type, stamp))
+            if status == 'Running':
+                self._add('run_checkpoints', (task_id, agent_type, 'fetch', '{"records": []}', stamp))
+
+        for agent_type in AGENT_TYPES:
+            for m, month in enumerate(self.months):
+                end = self.months[m + 1] if m + 1 < len(self.months) else None
+                self._add('agent_metrics', (
+                    self._id(), agent_type, rng.randint(10, 500), rng.randint(0, 20),
+                    round(rng.uniform(1, 120), 2), round(rng.uniform(0, 0.1), 3),
+                    round(rng.uniform(0.7, 1.0), 3), month, end, self.timestamps[m]
+                ))
+
+        # Ownership changes and fingerprints of the latest import
+        latest = f"Costing_Detail_{self.months[-1][:7]}.xlsx"
+        for terminal_id in self.terminal_ids:
+            if rng.random() < 0.05:
+                old_owner, new_owner = rng.sample(OPERATORS, 2)
+                self._add('ownership_changes', (
+                    self._id(), 'terminal', terminal_id, old_owner, new_owner, rng.choice(self.months),
+                    round(rng.uniform(1e6, 5e8), 2), 'Press release', None, created
+                ))
+            self._add('source_row_fingerprints', ('Costing Detail', latest, 'terminals', terminal_id,
+                                                  '%064x' % rng.getrandbits(256)))
+
+
+def generate_database(db_path, scale=1.0, seed=42, overwrite=False):
+    """
+    Build a synthetic database at db_path
+
+    Args:
+        scale: 1.0 = 1,000 terminals (about 570k rows); 10 = 10,000 terminals (5.7M)
+        seed: Same seed and scale -> identical database
+        overwrite: Replace an existing file at db_path
+
+    Returns:
+        dict: Rows per table
+    """
+    if os.path.exists(db_path):
+        if not overwrite:
+            raise FileExistsError(f"{db_path} exists - synthetic data only goes into a new database")
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+    print(f"\n→ Generating synthetic database {db_path} (scale {scale}, seed {seed})")
+    return SyntheticDataGenerator(db_path, scale, seed).generate()
+
+
+# Command-line interface
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Generate a synthetic database for benchmarks')
+    parser.add_argument('db_path', help='Database file to create')
+    parser.add_argument('--scale', type=float, default=1.0, help='1.0 = 1,000 terminals')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    parser.add_argument('--force', action='store_true', help='Overwrite an existing file')
+    args = parser.parse_args()
+
+    try:
+        counts = generate_database(args.db_path, args.scale, args.seed, args.force)
+    except FileExistsError as e:
+        print(f"\n❌ {e} (use --force to replace it)")
+        sys.exit(1)
+
+    print(f"\n  {'Table':<32} {'Rows':>12}")
+    print("  " + "-" * 45)
+    for table_name, rows in sorted(counts.items(), key=lambda item: -item[1]):
+        print(f"  {table_name:<32} {rows:>12,}")
+    # The change log is empty once the materialized views are rebuilt
+    empty = [table_name for table_name, rows in counts.items() if not rows and table_name != 'mv_change_log']
+    if empty:
+        print(f"\n  ⚠️  Empty tables: {', '.join(empty)}")
@@ -9,7 +9,23 @@ import sqlite3
 import json
 from datetime import datetime
 import re
-import hashlib
+import time
+
+from source_fingerprints import (
+    content_hash, row_fingerprint, get_last_checksum,
+    record_source_document, ensure_fingerprint_column
+)
+from terminal_ids import TerminalIdService, terminal_natural_key
+from quality_log import QualityLogSink
+from run_checkpoints import RunCheckpoints
+from batch_tracking import PhaseTimer, ensure_batch_table, start_batch, finish_batch
+
+# source_documents keys for the IRS terminal listing
+SOURCE_DOCUMENT_TYPE = 'IRS Publication 510'
+SOURCE_DOCUMENT_NAME = 'IRS Publication 510 - Terminal Control Numbers'
+
+# Rows per multi-row upsert statement (12 bound parameters per row)
+UPSERT_CHUNK_SIZE = 500
 
 class TerminalDiscoveryAgent:
     """
@@ -22,42 +38,131 @@ class TerminalDiscoveryAgent:
         self.db_path = db_path
         self.model = "claude-sonnet-4-20250514"
         
-    def discover_terminals(self, force_refresh=False):
+    def discover_terminals(self, force_refresh=False, task_id=None):
         """
         Main discovery workflow
         
+        Each phase (fetch, validate, diff, store) saves its output to the
+        run_checkpoints staging table before the next one starts. Calling
+        this again with the same task_id resumes after the last completed
+        phase, so a failed store never repeats the LLM extraction.
+        
         Args:
-            force_refresh: If True, re-downloads IRS data even if recent version exists
+            force_refresh: If True, re-processes IRS data even if it is unchanged
+                           since the last run
+            task_id: agent_tasks ID this run belongs to - enables resuming
         
         Returns:
             dict: Results summary with new/updated terminals
         """
         print("🔍 Starting Terminal Discovery Agent...")
         
-        # Step 1: Find and download IRS Publication 510
-        print("  → Searching for IRS Publication 510...")
-        pub_510_data = self._find_and_parse_irs_pub_510()
+        run_id = task_id or f"TERM_DISC_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+        checkpoints = RunCheckpoints(self.db_path, run_id, 'terminal_discovery')
+        
+        completed = checkpoints.load('store')
+        if completed is not None:
+            print("  ✓ Run already completed - returning saved results")
+            return completed
         
-        if not pub_510_data:
-            print("  ❌ Could not retrieve IRS Publication 510")
-            return {'status': 'failed', 'error': 'Could not retrieve IRS data'}
+        # Every attempt is a batch, timed as parse (fetch) / transform
+        # (validate, diff) / write (store)
+        batch_id = self._start_batch(run_id)
+        timer = PhaseTimer()
+        started = time.perf_counter()
+        try:
+            results = self._run_phases(checkpoints, force_refresh, timer)
+        except Exception as e:
+            self._finish_batch(batch_id, 'Failed', timer, started, error_message=str(e))
+            raise
+        
+        if results['status'] == 'failed':
+            self._finish_batch(batch_id, 'Failed', timer, started, error_message=results['error'])
+            return results
+        if results.get('skipped'):
+            self._finish_batch(batch_id, 'Skipped', timer, started)
+            return results
+        self._finish_batch(batch_id, 'Completed', timer, started,
+                           processed=results['total_found'],
+                           succeeded=results['new_terminals'] + results['updated_terminals'])
+        
+        print(f"\n✅ Discovery complete!")
+        print(f"   New terminals: {results['new_terminals']}")
+        print(f"   Updated terminals: {results['updated_terminals']}")
+        print(f"   Require review: {results['terminals_requiring_review']}")
+        
+        return results
+    
+    def _run_phases(self, checkpoints, force_refresh, timer):
+        """
+        Fetch, validate, diff and store - resuming from saved checkpoints
+        
+        Returns:
+            dict: Run results (status 'failed' if the publication could not be fetched)
+        """
+        # Step 1: Find and download IRS Publication 510
+        pub_510_data = checkpoints.load('fetch')
+        if pub_510_data is not None:
+            print("  ↻ Resuming - using IRS data extracted by an earlier attempt")
+        else:
+            print("  → Searching for IRS Publication 510...")
+            with timer.phase('parse'):
+                pub_510_data = self._find_and_parse_irs_pub_510()
+            
+            if not pub_510_data:
+                print("  ❌ Could not retrieve IRS Publication 510")
+                return {'status': 'failed', 'error': 'Could not retrieve IRS data'}
+            
+            checkpoints.save('fetch', pub_510_data)
         
         # Step 2: Extract terminal listings
         print(f"  → Extracting terminal listings...")
         terminals = pub_510_data.get('terminals', [])
         print(f"  ✓ Found {len(terminals)} terminals in IRS publication")
         
+        # Skip everything downstream if the publication hasn't changed
+        checksum = content_hash({
+            'publication_date': pub_510_data.get('publication_date'),
+            'terminals': sorted(terminals, key=lambda t: str(t.get('tcn')))
+        })
+        if not force_refresh and checksum == self._get_last_checksum():
+            print("  ✓ Publication unchanged since last run - nothing to do")
+            results = {
+                'status': 'completed',
+                'skipped': True,
+                'reason': 'Source document unchanged',
+                'total_found': len(terminals),
+                'new_terminals': 0,
+                'updated_terminals': 0,
+                'terminals_requiring_review': 0,
+                'timestamp': datetime.now().isoformat()
+            }
+            self._finish_run(checkpoints, results)
+            return results
+        
         # Step 3: Validate and enhance data
-        print("  → Validating terminal data...")
-        validated_terminals = self._validate_terminals(terminals)
+        validated_terminals = checkpoints.load('validate')
+        if validated_terminals is None:
+            print("  → Validating terminal data...")
+            with timer.phase('transform'):
+                validated_terminals = self._validate_terminals(terminals)
+            checkpoints.save('validate', validated_terminals)
         
         # Step 4: Compare with database and identify changes
-        print("  → Comparing with existing database...")
-        new_terminals, updated_terminals = self._identify_changes(validated_terminals)
-        
-        # Step 5: Store in database
+        changes = checkpoints.load('diff')
+        if changes is None:
+            print("  → Comparing with existing database...")
+            with timer.phase('transform'):
+                new_terminals, updated_terminals = self._identify_changes(validated_terminals)
+            changes = {'new': new_terminals, 'updated': updated_terminals}
+            checkpoints.save('diff', changes)
+        new_terminals, updated_terminals = changes['new'], changes['updated']
+        
+        # Step 5: Store in database (one transaction - safe to retry)
         print("  → Updating database...")
-        self._store_terminals(new_terminals, updated_terminals)
+        with timer.phase('write'):
+            self._store_terminals(new_terminals, updated_terminals,
+                                  source=(checksum, pub_510_data))
         
         results = {
             'status': 'completed',
@@ -68,14 +173,15 @@ class TerminalDiscoveryAgent:
                                              if t.get('confidence') == 'low']),
             'timestamp': datetime.now().isoformat()
         }
-        
-        print(f"\n✅ Discovery complete!")
-        print(f"   New terminals: {results['new_terminals']}")
-        print(f"   Updated terminals: {results['updated_terminals']}")
-        print(f"   Require review: {results['terminals_requiring_review']}")
-        
+        self._finish_run(checkpoints, results)
         return results
     
+    def _finish_run(self, checkpoints, results):
+        """Record the final phase, drop the staged intermediate payloads and purge old runs"""
+        checkpoints.save('store', results)
+        checkpoints.discard(['fetch', 'validate', 'diff'])
+        checkpoints.purge_completed('store')
+    
     def _find_and_parse_irs_pub_510(self):
         """
         Use Claude with web search to find and parse IRS Publication 510
@@ -193,10 +299,12 @@ class TerminalDiscoveryAgent:
         """
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
+        ensure_fingerprint_column(cursor, 'terminals')
         
         # Get existing terminals
         existing = cursor.execute("""
-            SELECT terminal_id, irs_tcn, terminal_name, operator, city, state
+            SELECT terminal_id, irs_tcn, terminal_name, operator, city, state,
+                   row_fingerprint
             FROM terminals
         """).fetchall()
         
@@ -211,9 +319,15 @@ class TerminalDiscoveryAgent:
             if tcn not in existing_tcns:
                 # New terminal
                 new_terminals.append(terminal)
+                continue
+            
+            existing_data = existing_tcns[tcn]
+            if existing_data[6] is not None:
+                # Fingerprint match means nothing changed - no field comparison needed
+                if self._terminal_fingerprint(terminal) != existing_data[6]:
+                    updated_terminals.append(terminal)
             else:
-                # Check if any data has changed
-                existing_data = existing_tcns[tcn]
+                # Rows stored before fingerprinting: compare fields directly
                 if (terminal.get('name') != existing_data[2] or
                     terminal.get('operator') != existing_data[3] or
                     terminal.get('city') != existing_data[4] or
@@ -223,80 +337,160 @@ class TerminalDiscoveryAgent:
         conn.close()
         return new_terminals, updated_terminals
     
-    def _store_terminals(self, new_terminals, updated_terminals):
+    def _store_terminals(self, new_terminals, updated_terminals, source=None):
         """
         Store new and updated terminals in database
+
+        New and changed terminals go through one upsert keyed on irs_tcn,
+        sent in multi-row chunks inside a single transaction. RETURNING
+        hands back the terminal_id for every row (inserted or updated), so
+        no follow-up SELECT is needed for the quality log.
+
+        Args:
+            new_terminals: Terminals not yet in the database
+            updated_terminals: Existing terminals whose data changed
+            source: Optional (checksum, publication data) recorded in
+                    source_documents in the same transaction
         """
+        # One row per TCN - a repeated key would hit the same row twice in one statement
+        terminals = list({
+            terminal.get('tcn'): terminal
+            for terminal in list(new_terminals) + list(updated_terminals)
+        }.values())
+        if not terminals and source is None:
+            return 0
+
+        now = datetime.now()
+        today = now.date()
+
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
-        
-        for terminal in new_terminals:
-            terminal_id = self._generate_terminal_id(terminal)
-            
-            cursor.execute("""
-                INSERT INTO terminals (
-                    terminal_id, terminal_name, irs_tcn, state, city,
-                    operator, effective_date, data_quality_score,
-                    created_by, created_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                terminal_id,
-                terminal.get('name'),
-                terminal.get('tcn'),
-                terminal.get('state'),
-                terminal.get('city'),
-                terminal.get('operator'),
-                datetime.now().date(),
-                self._calculate_quality_score(terminal),
-                'terminal_discovery_agent',
-                datetime.now()
-            ))
-            
-            # Log quality check
-            self._log_quality_check(cursor, 'terminal', terminal_id, terminal)
-        
-        for terminal in updated_terminals:
-            cursor.execute("""
-                UPDATE terminals
-                SET terminal_name = ?,
-                    operator = ?,
-                    city = ?,
-                    state = ?,
-                    updated_at = ?,
-                    data_quality_score = ?
-                WHERE irs_tcn = ?
-            """, (
-                terminal.get('name'),
-                terminal.get('operator'),
-                terminal.get('city'),
-                terminal.get('state'),
-                datetime.now(),
-                self._calculate_quality_score(terminal),
-                terminal.get('tcn')
-            ))
-            
-            # Get terminal_id for logging
-            terminal_id = cursor.execute(
-                "SELECT terminal_id FROM terminals WHERE irs_tcn = ?",
-                (terminal.get('tcn'),)
-            ).fetchone()[0]
-            
-            self._log_quality_check(cursor, 'terminal', terminal_id, terminal)
-        
-        conn.commit()
-        conn.close()
+
+        stored_ids = {}
+        try:
+            ensure_fingerprint_column(cursor, 'terminals')
+
+            # Existing TCNs keep their terminal_id; new ones get a stable collision-free ID
+            terminal_ids = TerminalIdService(cursor).resolve_many(
+                [terminal_natural_key(tcn=terminal.get('tcn')) for terminal in terminals]
+            )
+
+            # Build each row once - quality score is computed a single time per terminal
+            rows = []
+            scores = {}
+            for terminal in terminals:
+                score = self._calculate_quality_score(terminal)
+                scores[terminal.get('tcn')] = score
+                rows.append((
+                    terminal_ids[terminal_natural_key(tcn=terminal.get('tcn'))],
+                    terminal.get('name'),
+                    terminal.get('tcn'),
+                    terminal.get('state'),
+                    terminal.get('city'),
+                    terminal.get('operator'),
+                    self._terminal_fingerprint(terminal),
+                    today,
+                    score,
+                    'terminal_discovery_agent',
+                    now,
+                    now
+                ))
+
+            for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+                chunk = rows[start:start + UPSERT_CHUNK_SIZE]
+                placeholders = ", ".join(["(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"] * len(chunk))
+                params = [value for row in chunk for value in row]
+
+                returned = cursor.execute(f"""
+                    INSERT INTO terminals (
+                        terminal_id, terminal_name, irs_tcn, state, city,
+                        operator, row_fingerprint, effective_date,
+                        data_quality_score, created_by, created_at, updated_at
+                    ) VALUES {placeholders}
+                    ON CONFLICT(irs_tcn) DO UPDATE SET
+                        terminal_name = excluded.terminal_name,
+                        operator = excluded.operator,
+                        city = excluded.city,
+                        state = excluded.state,
+                        row_fingerprint = excluded.row_fingerprint,
+                        updated_at = excluded.updated_at,
+                        data_quality_score = excluded.data_quality_score
+                    RETURNING irs_tcn, terminal_id
+                """, params).fetchall()
+                stored_ids.update(returned)
+
+            # Log quality checks for every stored terminal in one batch
+            quality_log = QualityLogSink(cursor, checked_by='terminal_discovery_agent')
+            for terminal in terminals:
+                tcn = terminal.get('tcn')
+                if tcn in stored_ids:
+                    self._log_quality_check(quality_log, stored_ids[tcn], terminal, scores[tcn])
+            quality_log.flush()
+
+            if source is not None:
+                checksum, pub_510_data = source
+                record_source_document(
+                    cursor, SOURCE_DOCUMENT_TYPE, SOURCE_DOCUMENT_NAME, checksum,
+                    document_url=pub_510_data.get('source_url'),
+                    effective_date=pub_510_data.get('publication_date')
+                )
+
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        return len(stored_ids)
     
-    def _generate_terminal_id(self, terminal):
-        """Generate unique terminal ID"""
-        # Format: ST## where ST is state and ## is hash-based number
-        state = terminal.get('state', 'XX')
-        tcn = terminal.get('tcn', '')
-        
-        # Use hash of TCN to generate consistent ID
-        hash_val = int(hashlib.md5(tcn.encode()).hexdigest()[:4], 16)
-        terminal_num = str(hash_val % 10000).zfill(4)
-        
-        return f"{state}{terminal_num}"
+    def _start_batch(self, run_id):
+        """Open the batches row for this discovery attempt"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cursor = conn.cursor()
+            ensure_batch_table(cursor)
+            batch_id = start_batch(cursor, 'Terminal Discovery', source_path=run_id)
+            conn.commit()
+            return batch_id
+        finally:
+            conn.close()
+    
+    def _finish_batch(self, batch_id, status, timer, started, processed=0, succeeded=0,
+                      error_message=None):
+        """Close the batches row with counts, phase timings and throughput"""
+        elapsed = time.perf_counter() - started
+        conn = sqlite3.connect(self.db_path)
+        try:
+            finish_batch(
+                conn.cursor(), batch_id, status,
+                records_processed=processed,
+                records_succeeded=succeeded,
+                records_failed=0,
+                error_message=error_message,
+                phase_timings=timer.as_dict(),
+                rows_per_second=processed / elapsed if processed else None
+            )
+            conn.commit()
+        finally:
+            conn.close()
+    
+    def _get_last_checksum(self):
+        """Hash of the IRS publication content processed on the last run"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return get_last_checksum(conn.cursor(), SOURCE_DOCUMENT_TYPE, SOURCE_DOCUMENT_NAME)
+        finally:
+            conn.close()
+    
+    def _terminal_fingerprint(self, terminal):
+        """Fingerprint of the fields the diff cares about"""
+        return row_fingerprint((
+            terminal.get('name'),
+            terminal.get('operator'),
+            terminal.get('city'),
+            terminal.get('state')
+        ))
     
     def _calculate_quality_score(self, terminal):
         """Calculate data quality score (0-1)"""
@@ -316,26 +510,15 @@ class TerminalDiscoveryAgent:
         
         return max(0.0, score)
     
-    def _log_quality_check(self, cursor, record_type, record_id, terminal):
+    def _log_quality_check(self, quality_log, record_id, terminal, quality_score):
         """Log quality check results"""
-        log_id = f"QC_{record_id}_{datetime.now().timestamp()}"
-        
-        result = 'Pass' if terminal['confidence'] == 'high' else 'Warning'
-        details = json.dumps({
-            'confidence': terminal['confidence'],
-            'issues': terminal.get('validation_issues', []),
-            'quality_score': self._calculate_quality_score(terminal)
-        })
-        
-        cursor.execute("""
-            INSERT INTO data_quality_log (
-                log_id, record_type, record_id, quality_check,
-                check_result, check_details, agent_name
-            ) VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            log_id, record_type, record_id, 'terminal_validation',
-            result, details, 'terminal_discovery_agent'
-        ))
+        quality_log.add(
+            'terminals', record_id, 'terminal_validation', quality_score,
+            issues={
+                'confidence': terminal['confidence'],
+                'issues': terminal.get('validation_issues', [])
+            }
+        )
     
     def create_discovery_task(self):
         """
@@ -365,6 +548,28 @@ class TerminalDiscoveryAgent:
         conn.close()
         return task_id
     
+    def resume_task(self, task_id):
+        """Put an earlier (failed) discovery task back in progress"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            UPDATE agent_tasks
+            SET status = 'In Progress',
+                started_timestamp = ?,
+                error_message = NULL,
+                retry_count = COALESCE(retry_count, 0) + 1
+            WHERE task_id = ?
+        """, (datetime.now(), task_id))
+        
+        if cursor.rowcount == 0:
+            conn.close()
+            raise ValueError(f"Unknown task: {task_id}")
+        
+        conn.commit()
+        conn.close()
+        return task_id
+    
     def complete_task(self, task_id, results, requires_review=False):
         """Mark task as complete"""
         conn = sqlite3.connect(self.db_path)
@@ -389,19 +594,28 @@ class TerminalDiscoveryAgent:
         conn.commit()
         conn.close()
 
-def run_discovery(api_key):
+def run_discovery(api_key, resume_task_id=None):
     """
     Convenience function to run terminal discovery
+    
+    Args:
+        api_key: Anthropic API key
+        resume_task_id: task_id of an earlier failed run to resume from its
+                        last completed phase
     """
     agent = TerminalDiscoveryAgent(api_key)
     
-    # Create task
-    task_id = agent.create_discovery_task()
-    print(f"📋 Created task: {task_id}\n")
+    if resume_task_id:
+        task_id = agent.resume_task(resume_task_id)
+        print(f"📋 Resuming task: {task_id}\n")
+    else:
+        # Create task
+        task_id = agent.create_discovery_task()
+        print(f"📋 Created task: {task_id}\n")
     
     try:
         # Run discovery
-        results = agent.discover_terminals()
+        results = agent.discover_terminals(task_id=task_id)
         
         # Check if human review needed
         requires_review = results.get('terminals_requiring_review', 0) > 0
@@ -434,11 +648,19 @@ if __name__ == "__main__":
     import sys
     
     if len(sys.argv) < 2:
-        print("Usage: python terminal_discovery_agent.py <ANTHROPIC_API_KEY>")
+        print("Usage: python terminal_discovery_agent.py <ANTHROPIC_API_KEY> [--resume TASK_ID]")
         sys.exit(1)
     
     api_key = sys.argv[1]
-    results = run_discovery(api_key)
+    resume_task_id = None
+    if '--resume' in sys.argv:
+        resume_index = sys.argv.index('--resume') + 1
+        if resume_index >= len(sys.argv):
+            print("Usage: python terminal_discovery_agent.py <ANTHROPIC_API_KEY> [--resume TASK_ID]")
+            sys.exit(1)
+        resume_task_id = sys.argv[resume_index]
+    
+    results = run_discovery(api_key, resume_task_id)
     
     print(f"\n📊 Final Results:")
     print(json.dumps(results, indent=2))
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Terminal ID Service
+One terminal_id scheme shared by every ingestion path
+
+Each terminal has a natural key - its IRS TCN when known, otherwise its
+state + terminal code (codes repeat across states), otherwise state + city.
+IDs are resolved in two steps:
+
+  1. Existing terminals are matched on the natural key through the
+     terminals indexes (irs_tcn, terminal_code, and the normalized state
+     of idx_terminals_location), so rows keep whatever ID they already
+     have - including legacy formats.
+  2. Unmatched terminals get a UUIDv5 of the natural key. The ID is stable
+     (same key -> same ID on every run) and 122 bits wide, so bulk inserts
+     of any realistic size never collide and never need retries.
+"""
+
+import uuid
+
+# Namespace for UUIDv5 terminal IDs - never change this, IDs depend on it
+TERMINAL_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, 'supply-chain-mapping/terminals')
+
+# Keys per IN (...) lookup - stays well under SQLite's bound-parameter limit
+LOOKUP_CHUNK_SIZE = 500
+
+
+def terminal_natural_key(tcn=None, terminal_code=None, state=None, city=None):
+    """
+    Build the natural key for a terminal from the strongest identifier available
+
+    Returns:
+        'tcn:<TCN>', 'code:<STATE>|<CODE>' or 'loc:<STATE>|<city>'
+    """
+    if tcn:
+        return f"tcn:{str(tcn).strip()}"
+    state = str(state or '').strip().upper()
+    if terminal_code:
+        return f"code:{state}|{str(terminal_code).strip()}"
+    city = ' '.join(str(city or '').split()).lower()
+    return f"loc:{state}|{city}"
+
+
+def stable_terminal_id(natural_key):
+    """Deterministic UUIDv5 terminal_id for a natural key"""
+    return str(uuid.uuid5(TERMINAL_ID_NAMESPACE, natural_key))
+
+
+class TerminalIdService:
+    """
+    Resolves natural keys to terminal_ids for a batch of terminals
+
+    Usage:
+        ids = TerminalIdService(cursor)
+        id_map = ids.resolve_many([terminal_natural_key(tcn=t['tcn']) for t in terminals])
+    """
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self._cache = {}
+
+    def resolve(self, natural_key):
+        """Resolve a single natural key (prefer resolve_many for batches)"""
+        return self.resolve_many([natural_key])[natural_key]
+
+    def resolve_many(self, natural_keys):
+        """
+        Resolve natural keys to terminal_ids
+
+        Existing terminals are found with indexed IN lookups, a chunk at a
+        time; everything else gets its stable UUIDv5.
+
+        Returns:
+            dict: natural_key -> terminal_id
+        """
+        pending = {key for key in natural_keys if key not in self._cache}
+
+        by_kind = {'tcn': [], 'code': [], 'loc': []}
+        for key in pending:
+            kind, _, value = key.partition(':')
+            by_kind[kind].append(value)
+
+        if by_kind['tcn']:
+            self._lookup("""
+                SELECT irs_tcn, terminal_id FROM terminals
+                WHERE irs_tcn IN ({})
+            """, 'tcn', by_kind['tcn'])
+
+        if by_kind['code']:
+            self._lookup_codes(by_kind['code'])
+
+        if by_kind['loc']:
+            self._lookup_locations(by_kind['loc'])
+
+        for key in pending:
+            if key not in self._cache:
+                self._cache[key] = stable_terminal_id(key)
+
+        return {key: self._cache[key] for key in natural_keys}
+
+    def _lookup(self, query, kind, values):
+        """Match existing terminals on one indexed column"""
+        for start in range(0, len(values), LOOKUP_CHUNK_SIZE):
+            chunk = values[start:start + LOOKUP_CHUNK_SIZE]
+            placeholders = ", ".join("?" * len(chunk))
+            for value, terminal_id in self.cursor.execute(query.format(placeholders), chunk):
+                self._cache.setdefault(f"{kind}:{value}", terminal_id)
+
+    def _lookup_codes(self, values):
+        """
+        Match existing terminals on terminal code, then on state normalized like the key
+
+        The same code in two states is two terminals, as in the legacy
+        TERM_<state>_<code> IDs.
+        """
+        wanted = set(values)
+        codes = sorted({value.partition('|')[2] for value in values})
+        for start in range(0, len(codes), LOOKUP_CHUNK_SIZE):
+            chunk = codes[start:start + LOOKUP_CHUNK_SIZE]
+            placeholders = ", ".join("?" * len(chunk))
+            rows = self.cursor.execute(f"""
+                SELECT terminal_code, state, terminal_id FROM terminals
+                WHERE terminal_code IN ({placeholders})
+            """, chunk)
+            for code, state, terminal_id in rows:
+                value = terminal_natural_key(terminal_code=code, state=state).partition(':')[2]
+                if value in wanted:
+                    self._cache.setdefault(f"code:{value}", terminal_id)
+
+    def _lookup_locations(self, values):
+        """
+        Match existing terminals that have neither TCN nor code on state + city
+
+        Stored states are normalized like the natural key ('tx ' matches TX),
+        so mixed-case rows are found instead of getting a second ID; the
+        expression index idx_terminals_location serves the normalized IN.
+        """
+        wanted = set(values)
+        states = sorted({value.partition('|')[0] for value in values})
+        for start in range(0, len(states), LOOKUP_CHUNK_SIZE):
+            chunk = states[start:start + LOOKUP_CHUNK_SIZE]
+            placeholders = ", ".join("?" * len(chunk))
+            # Unary + keeps the IS NULL terms off the irs_tcn / terminal_code
+            # indexes, which would otherwise be picked over the state index
+            rows = self.cursor.execute(f"""
+                SELECT state, city, terminal_id FROM terminals
+                WHERE UPPER(TRIM(COALESCE(state, ''))) IN ({placeholders})
+                AND +irs_tcn IS NULL AND +terminal_code IS NULL
+            """, chunk)
+            for state, city, terminal_id in rows:
+                value = terminal_natural_key(state=state, city=city).partition(':')[2]
+                if value in wanted:
+                    self._cache.setdefault(f"loc:{value}", terminal_id)
@@ -0,0 +1,33 @@
+"""Make the top-level modules importable from the tests, and shared fixtures"""
+
+import contextlib
+import io
+import os
+import shutil
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Synthetic database size for the tests - 20 terminals, a few thousand rows
+TEST_SCALE = 0.02
+
+
+@pytest.fixture(scope='session')
+def synthetic_template(tmp_path_factory):
+    """One synthetic database per test session - copy it before writing (see synthetic_db)"""
+    from synthetic_data import generate_database
+
+    db_path = str(tmp_path_factory.mktemp('synthetic') / 'synthetic.db')
+    with contextlib.redirect_stdout(io.StringIO()):
+        generate_database(db_path, scale=TEST_SCALE, seed=42)
+    return db_path
+
+
+@pytest.fixture
+def synthetic_db(synthetic_template, tmp_path):
+    """A private copy of the synthetic database"""
+    db_path = str(tmp_path / 'supply_chain.db')
+    shutil.copyfile(synthetic_template, db_path)
+    return db_path
@@ -0,0 +1,83 @@
+"""Rows in effect on a date, against hand-built version chains"""
+
+import contextlib
+import io
+
+import pytest
+
+from as_of import as_of_sql, rows_as_of
+from create_database import create_complete_database
+
+# shipping_period_id -> (terminal_id, start_date, end_date); end dates are exclusive
+PERIODS = {
+    'A1': ('T1', '2024-01-01', '2024-04-01'),
+    'A2': ('T1', '2024-04-01', '2024-07-01'),
+    'A3': ('T1', '2024-09-01', None),          # gap in July and August
+    'B1': ('T2', '2024-03-01', None),
+}
+
+# terminal_id -> (effective_date, end_date)
+TERMINALS = {
+    'OPEN': ('2024-01-01', None),
+    'OPEN_UNDATED': (None, None),
+    'ENDED': ('2024-01-01', '2024-06-01'),
+    'ENDED_UNDATED': (None, '2024-03-01'),
+    'FUTURE': ('2025-01-01', None),
+    'T1': (None, None),
+    'T2': (None, None),
+}
+
+DATES = ['2023-12-31', '2024-01-01', '2024-02-29', '2024-03-01', '2024-04-01',
+         '2024-06-01', '2024-07-15', '2024-09-01', '2025-06-01']
+
+
+@pytest.fixture
+def cursor():
+    with contextlib.redirect_stdout(io.StringIO()):
+        conn = create_complete_database(':memory:')
+    cursor = conn.cursor()
+    cursor.executemany(
+        "INSERT INTO terminals (terminal_id, terminal_name, state, city, effective_date, end_date) "
+        "VALUES (?, ?, 'TX', 'Houston', ?, ?)",
+        [(terminal_id, terminal_id, start, end) for terminal_id, (start, end) in TERMINALS.items()],
+    )
+    cursor.executemany(
+        "INSERT INTO shipping_periods (shipping_period_id, terminal_id, start_date, end_date, period_status) "
+        "VALUES (?, ?, ?, ?, 'Active')",
+        [(period_id,) + period for period_id, period in PERIODS.items()],
+    )
+    yield cursor
+    conn.close()
+
+
+def in_effect(start, end, as_of):
+    return (start is None or start <= as_of) and (end is None or end > as_of)
+
+
+@pytest.mark.parametrize('as_of', DATES)
+def test_versioned_table(cursor, as_of):
+    expected = sorted(period_id for period_id, (_, start, end) in PERIODS.items()
+                      if in_effect(start, end, as_of))
+    rows = rows_as_of(cursor, 'shipping_periods', as_of)
+    assert sorted(row['shipping_period_id'] for row in rows) == expected
+
+
+@pytest.mark.parametrize('as_of', DATES)
+def test_entity_table(cursor, as_of):
+    expected = sorted(terminal_id for terminal_id, (start, end) in TERMINALS.items()
+                      if in_effect(start, end, as_of))
+    rows = rows_as_of(cursor, 'terminals', as_of)
+    assert sorted(row['terminal_id'] for row in rows) == expected
+
+
+def test_series_filter(cursor):
+    assert [row['shipping_period_id'] for row in rows_as_of(cursor, 'shipping_periods', '2024-05-01',
+                                                           terminal_id='T1')] == ['A2']
+    assert rows_as_of(cursor, 'shipping_periods', '2024-08-01', terminal_id='T1') == []
+
+
+def test_unknown_table_and_column(cursor):
+    with pytest.raises(ValueError, match='not an effective-dated table'):
+        as_of_sql('products')
+    with pytest.raises(ValueError, match='no column'):
+        rows_as_of(cursor, 'shipping_periods', '2024-01-01', bcs_id='B1')
@@ -0,0 +1,77 @@
+"""INTEGER-keyed copy: every key and reference round-trips to the TEXT ids"""
+
+import contextlib
+import io
+import sqlite3
+
+import pytest
+
+from compact_keys import EXTERNAL_ID_COLUMN, JOIN_QUERIES, build_compact_database, key_for
+from materialized_views import MATERIALIZED_VIEWS, verify
+
+
+@pytest.fixture
+def compact(synthetic_db, tmp_path):
+    compact_path = str(tmp_path / 'compact.db')
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = build_compact_database(synthetic_db, compact_path)
+    conn = sqlite3.connect(compact_path)
+    conn.execute("ATTACH DATABASE ? AS src", (synthetic_db,))
+    yield conn, result
+    conn.close()
+
+
+def test_rows_and_keys_round_trip(compact):
+    conn, result = compact
+    for table_name, key_column in result['keyed_tables'].items():
+        assert conn.execute(f"SELECT COUNT(*) FROM main.{table_name}").fetchone() == \
+            conn.execute(f"SELECT COUNT(*) FROM src.{table_name}").fetchone(), table_name
+        types = {row[0] for row in conn.execute(f"SELECT DISTINCT typeof({key_column}) FROM main.{table_name}")}
+        assert types <= {'integer'}, table_name
+        missing = conn.execute(f"""
+            SELECT COUNT(*) FROM src.{table_name} s
+            WHERE NOT EXISTS (SELECT 1 FROM main.{table_name} c WHERE c.{EXTERNAL_ID_COLUMN} = s.{key_column})
+        """).fetchone()[0]
+        assert missing == 0, table_name
+
+    terminal_id = conn.execute("SELECT terminal_id FROM src.terminals LIMIT 1").fetchone()[0]
+    key = key_for(conn.cursor(), 'terminals', terminal_id)
+    assert conn.execute(f"SELECT {EXTERNAL_ID_COLUMN} FROM terminals WHERE terminal_id = ?",
+                        (key,)).fetchone()[0] == terminal_id
+    assert key_for(conn.cursor(), 'terminals', 'no such id') is None
+
+
+def test_references_round_trip(compact):
+    conn, result = compact
+    keyed = result['keyed_tables']
+    for reference, parent in result['references'].items():
+        table_name, column = reference.split('.')
+        if table_name not in keyed:
+            continue
+        # The parent row's external_id (or the kept TEXT id) equals the source value
+        mismatched = conn.execute(f"""
+            SELECT COUNT(*) FROM main.{table_name} c
+            JOIN src.{table_name} s ON s.{keyed[table_name]} = c.{EXTERNAL_ID_COLUMN}
+            LEFT JOIN main.{parent} p ON p.{keyed[parent]} = c.{column} AND typeof(c.{column}) = 'integer'
+            WHERE COALESCE(p.{EXTERNAL_ID_COLUMN}, c.{column}) IS NOT s.{column}
+        """).fetchone()[0]
+        assert mismatched == 0, reference
+        unresolved = conn.execute(
+            f"SELECT COUNT(*) FROM main.{table_name} WHERE typeof({column}) = 'text'").fetchone()[0]
+        assert unresolved == result['unresolved'].get(reference, 0), reference
+
+
+def test_queries_and_views_agree(compact, synthetic_db):
+    conn, _ = compact
+    source = sqlite3.connect(synthetic_db)
+    try:
+        # Key columns differ in type; totals and counts must not
+        totals = JOIN_QUERIES[0]['sql']
+        assert conn.execute(totals).fetchone() == source.execute(totals).fetchone()
+        for view in ('v_bcs_detail', 'v_active_shipping'):
+            count = f"SELECT COUNT(*) FROM {view}"
+            assert conn.execute(count).fetchone() == source.execute(count).fetchone(), view
+    finally:
+        source.close()
+    for mv_name in MATERIALIZED_VIEWS:
+        assert verify(conn.cursor(), mv_name) == {'missing': 0, 'extra': 0}
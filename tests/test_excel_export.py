@@ -0,0 +1,29 @@
+"""Exported QA workbooks against the EN templates"""
+
+import contextlib
+import io
+import os
+
+import openpyxl
+
+from excel_export import EXPORTS, ExcelExporter
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            'Reference', 'Domain Knowledge', 'exel_templates')
+
+
+def header_row(sheet):
+    return [value for value in next(sheet.iter_rows(max_row=1, values_only=True)) if value is not None]
+
+
+def test_table_tabs_match_template_headers(synthetic_db, tmp_path):
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = ExcelExporter(synthetic_db, use_replica=False).export('en_shipping', str(tmp_path))
+
+    template = openpyxl.load_workbook(os.path.join(TEMPLATE_DIR, EXPORTS['en_shipping']['filename']),
+                                      read_only=True)
+    exported = openpyxl.load_workbook(result['path'], read_only=True)
+    for tab in ('Sheet6', 'Sheet7'):
+        assert result['tabs'][tab] > 0
+        assert header_row(exported[tab]) == header_row(template[tab])
+    assert 'v_active_shipping' not in template.sheetnames
@@ -0,0 +1,222 @@
+"""Costing Detail imports: snapshots, versions and the unpivoted components"""
+
+import contextlib
+import csv
+import io
+import os
+import sqlite3
+
+import pytest
+
+from create_database import create_complete_database
+from excel_import_agent import COSTING_SHEET, ExcelImportAgent
+
+# Costing Detail headers (row 3 of the workbook; line 1 of a CSV export)
+HEADERS = [
+    'State', 'Terminal City', 'Terminal Market', 'Region', 'Terminal Code', 'EN Terminal Name',
+    'facilities charge', 'throughput', 'terminaling estimate', 'Subtotal', 'tariff', 'tvm', 'basis',
+    'fuel surcharge', 'transload', 'truck freight', 'wholesale margin', 'transportation estimate',
+    'Subtotal', 'Total', 'throughput', 'generic additive', 'terminaling estimate', 'Subtotal',
+    'tariff', 'tvm', 'line loss', 'transportation estimate', 'Subtotal', 'Total',
+    'Clear Gas', 'E10', 'E15', 'Notes',
+]
+
+# Component columns per row: 11 ETH + 7 GAS
+COMPONENTS_PER_TERMINAL = 18
+
+TERMINALS = {
+    'A': ('TX', 'Houston TX', 'TX01', 'TX Houston - Alpha - 0001'),
+    'B': ('TX', 'Dallas TX', 'TX02', 'TX Dallas - Beta - 0002'),
+    'C': ('OK', 'Tulsa OK', 'OK03', 'OK Tulsa - Gamma - 0003'),
+}
+
+# Monthly snapshots: terminal -> value of every cost column
+SNAPSHOTS = {
+    '2024-01': {'A': 1.0, 'B': 1.0, 'C': 1.0},
+    '2024-02': {'A': 2.0, 'C': 1.0},           # B removed, A changed
+    '2024-03': {'A': 2.0, 'B': 3.0},           # B back, C removed
+}
+
+
+def costing_row(terminal, value):
+    state, city, code, name = TERMINALS[terminal]
+    row = [state, city, city, 'PADD 3', code, name]
+    for header in HEADERS[6:]:
+        if header in ('Subtotal', 'Total', 'Notes'):
+            row.append('')
+        else:
+            row.append(value)
+    return row
+
+
+def write_snapshots(directory, months):
+    paths = []
+    for month in months:
+        path = os.path.join(directory, f"Costing_{month}.csv")
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(HEADERS)
+            for terminal, value in SNAPSHOTS[month].items():
+                writer.writerow(costing_row(terminal, value))
+        paths.append(path)
+    return paths
+
+
+def write_workbook(path, month):
+    """The same snapshot as a workbook - headers on row 3 of the Costing Detail sheet"""
+    openpyxl = pytest.importorskip('openpyxl')
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = COSTING_SHEET
+    sheet.append(['Costing Detail'])
+    sheet.append([])
+    sheet.append(HEADERS)
+    for terminal, value in SNAPSHOTS[month].items():
+        sheet.append(costing_row(terminal, value))
+    workbook.save(path)
+    return str(path)
+
+
+def new_database(path):
+    with contextlib.redirect_stdout(io.StringIO()):
+        create_complete_database(str(path)).close()
+    return str(path)
+
+
+def history(db_path):
+    """Every version the import wrote, by natural keys - seed IDs differ per database"""
+    conn = sqlite3.connect(db_path)
+    try:
+        return {
+            'terminals': sorted(conn.execute(
+                "SELECT terminal_code, terminal_name, effective_date, end_date FROM terminals")),
+            'transportation_costs': sorted(conn.execute("""
+                SELECT t.terminal_code, tc.product_type, tc.combined_adder, tc.effective_date, tc.end_date
+                FROM transportation_costs tc JOIN terminals t USING (terminal_id)
+            """)),
+            'costing': sorted(conn.execute("""
+                SELECT t.terminal_code, pc.category_code, ci.costing_item_name,
+                       c.costing_value, c.start_date, c.end_date
+                FROM costing c
+                JOIN terminals t USING (terminal_id)
+                JOIN product_categories pc ON c.product_category_id = pc.category_id
+                JOIN costing_items ci USING (costing_item_id)
+            """)),
+        }
+    finally:
+        conn.close()
+
+
+def import_files(db_path, paths):
+    agent = ExcelImportAgent(db_path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return [agent.import_excel(path)['status'] for path in paths]
+
+
+@pytest.fixture
+def snapshots(tmp_path):
+    directory = tmp_path / 'snapshots'
+    directory.mkdir()
+    return write_snapshots(str(directory), SNAPSHOTS)
+
+
+def test_in_order_versions(tmp_path, snapshots):
+    db_path = new_database(tmp_path / 'in_order.db')
+    assert import_files(db_path, snapshots) == ['completed'] * 3
+
+    costs = history(db_path)['transportation_costs']
+    clear_gas = [row for row in costs if row[1] == 'Clear Gas']
+    assert clear_gas == [
+        ('OK03', 'Clear Gas', 1.0, '2024-01-01', '2024-03-01'),
+        ('TX01', 'Clear Gas', 1.0, '2024-01-01', '2024-02-01'),
+        ('TX01', 'Clear Gas', 2.0, '2024-02-01', None),
+        ('TX02', 'Clear Gas', 1.0, '2024-01-01', '2024-02-01'),
+        ('TX02', 'Clear Gas', 3.0, '2024-03-01', None),
+    ]
+
+
+def test_back_dated_snapshot_is_rejected(tmp_path, snapshots):
+    jan, feb, mar = snapshots
+    only_latest = new_database(tmp_path / 'latest.db')
+    import_files(only_latest, [mar])
+
+    out_of_order = new_database(tmp_path / 'out_of_order.db')
+    assert import_files(out_of_order, [mar, jan, feb]) == ['completed', 'failed', 'failed']
+    assert history(out_of_order) == history(only_latest)
+
+
+def test_import_many_loads_in_date_order(tmp_path, snapshots):
+    in_order = new_database(tmp_path / 'in_order.db')
+    import_files(in_order, snapshots)
+
+    # Whatever order the directory lists them in, the load writes oldest first
+    many = new_database(tmp_path / 'many.db')
+    agent = ExcelImportAgent(many)
+    with contextlib.redirect_stdout(io.StringIO()):
+        summary = agent.import_many(os.path.dirname(snapshots[0]), workers=1)
+    assert summary['files_imported'] == 3
+    assert history(many) == history(in_order)
+
+
+def unpivot_counts(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        terminals = dict(conn.execute("""
+            SELECT t.terminal_code, COUNT(*) FROM costing c JOIN terminals t USING (terminal_id)
+            GROUP BY t.terminal_code
+        """))
+        categories = dict(conn.execute("""
+            SELECT pc.category_code, COUNT(*) FROM costing c
+            JOIN product_categories pc ON c.product_category_id = pc.category_id
+            GROUP BY pc.category_code
+        """))
+    finally:
+        conn.close()
+    return terminals, categories
+
+
+def test_costing_unpivot_row_counts(tmp_path, snapshots):
+    db_path = new_database(tmp_path / 'unpivot.db')
+    import_files(db_path, snapshots[:1])
+
+    terminals, categories = unpivot_counts(db_path)
+    assert terminals == {'TX01': COMPONENTS_PER_TERMINAL, 'TX02': COMPONENTS_PER_TERMINAL,
+                         'OK03': COMPONENTS_PER_TERMINAL}
+    assert categories == {'ETH': 11 * 3, 'GAS': 7 * 3}
+
+
+def test_workbook_unpivots_like_csv(tmp_path, snapshots):
+    from_csv = new_database(tmp_path / 'csv.db')
+    import_files(from_csv, snapshots[:1])
+
+    from_workbook = new_database(tmp_path / 'workbook.db')
+    workbook = write_workbook(tmp_path / 'Costing_2024-01.xlsx', '2024-01')
+    assert import_files(from_workbook, [workbook]) == ['completed']
+    assert unpivot_counts(from_workbook) == unpivot_counts(from_csv)
+    assert history(from_workbook)['costing'] == history(from_csv)['costing']
+
+
+def test_same_file_name_in_two_folders(tmp_path):
+    # Two regions each export Costing_2024-01.csv - neither closes the other's rows
+    source = tmp_path / 'regions'
+    for region, terminals in (('north', 'AB'), ('south', 'C')):
+        directory = source / region
+        directory.mkdir(parents=True)
+        with open(directory / 'Costing_2024-01.csv', 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(HEADERS)
+            for terminal in terminals:
+                writer.writerow(costing_row(terminal, 1.0))
+
+    db_path = new_database(tmp_path / 'regions.db')
+    agent = ExcelImportAgent(db_path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert agent.import_many(str(source), workers=1)['files_imported'] == 2
+        assert agent.import_many(str(source), workers=1)['files_skipped'] == 2
+
+    conn = sqlite3.connect(db_path)
+    documents = sorted(conn.execute("SELECT DISTINCT document_name FROM source_row_fingerprints"))
+    closed = conn.execute("SELECT COUNT(*) FROM transportation_costs WHERE end_date IS NOT NULL").fetchone()[0]
+    conn.close()
+    assert documents == [('north/Costing_.csv',), ('south/Costing_.csv',)]
+    assert closed == 0
@@ -0,0 +1,86 @@
+"""Monthly archiving and history reads across more months than SQLite attaches"""
+
+import contextlib
+import io
+import os
+import sqlite3
+from datetime import date
+
+import pytest
+
+from create_database import create_complete_database
+from history_archive import ARCHIVE_DIR, archive, archived_months, attach_limit, history_batches, history_view
+
+# Months of completed tasks, counting back from this month
+HISTORY_MONTHS = 24
+
+
+def month_start(months_back):
+    today = date.today()
+    months = today.year * 12 + today.month - 1 - months_back
+    return date(months // 12, months % 12 + 1, 1)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    db_path = str(tmp_path / 'supply_chain.db')
+    with contextlib.redirect_stdout(io.StringIO()):
+        create_complete_database(db_path).close()
+    conn = sqlite3.connect(db_path)
+    tasks = []
+    for months_back in range(HISTORY_MONTHS):
+        day = month_start(months_back).isoformat()
+        tasks += [(f"DONE_{months_back}_{i}", 'Completed', f"{day} 0{i}:00:00", 0, 0) for i in range(3)]
+    oldest = f"{month_start(HISTORY_MONTHS - 1).isoformat()} 12:00:00"
+    tasks += [
+        ('FAILED_OLD', 'Failed', oldest, 0, 0),          # kept for retry_failed_tasks
+        ('UNREVIEWED_OLD', 'Completed', oldest, 1, 0),   # review still pending
+    ]
+    conn.executemany(
+        "INSERT INTO agent_tasks (task_id, agent_type, status, completed_timestamp, "
+        "requires_human_review, human_reviewed) VALUES (?, 'terminal_discovery', ?, ?, ?, ?)",
+        tasks,
+    )
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+def test_archive_moves_finished_history(db_path):
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = archive(db_path, keep_months=3, chunk_size=2)
+
+    assert len(result['moved']['agent_tasks']) == HISTORY_MONTHS - 3
+    assert all(rows == 3 for rows in result['moved']['agent_tasks'].values())
+    conn = sqlite3.connect(db_path)
+    kept = {row[0] for row in conn.execute("SELECT task_id FROM agent_tasks")}
+    months = archived_months(conn, 'agent_tasks')
+    conn.close()
+    assert {'FAILED_OLD', 'UNREVIEWED_OLD'} <= kept
+    assert len(kept) == 3 * 3 + 2
+    assert [entry['row_count'] for entry in months] == [3] * (HISTORY_MONTHS - 3)
+    assert all(os.path.exists(os.path.join(os.path.dirname(db_path), entry['archive_path']))
+               for entry in months)
+    assert months[0]['archive_path'].startswith(ARCHIVE_DIR)
+
+
+def test_history_batches_cover_every_month(db_path):
+    with contextlib.redirect_stdout(io.StringIO()):
+        archive(db_path, keep_months=3)
+
+    conn = sqlite3.connect(db_path)
+    limit = attach_limit(conn)
+    batches = 0
+    task_ids = []
+    for view in history_batches(conn, 'agent_tasks'):
+        batches += 1
+        task_ids += [row[0] for row in conn.execute(f"SELECT task_id FROM {view}")]
+    attached = {row[1] for row in conn.execute("PRAGMA database_list")}
+
+    assert batches == -(-(HISTORY_MONTHS - 3) // limit)
+    assert len(task_ids) == len(set(task_ids)) == 3 * HISTORY_MONTHS + 2
+    assert attached - {'temp'} == {'main'}  # every batch detached its archives
+    if HISTORY_MONTHS - 3 > limit:
+        with pytest.raises(ValueError, match='history_batches'):
+            history_view(conn, 'agent_tasks')
+    conn.close()
@@ -0,0 +1,62 @@
+"""Change-log triggers and refresh of the materialized views"""
+
+import contextlib
+import io
+
+import pytest
+
+from create_database import create_complete_database
+from materialized_views import refresh, verify
+
+TERMINAL_UPSERT = """
+    INSERT INTO terminals (terminal_id, terminal_name, state, city)
+    VALUES (?, ?, 'TX', 'Houston')
+    ON CONFLICT(terminal_id) DO UPDATE SET
+        terminal_name = excluded.terminal_name,
+        city = excluded.city
+"""
+
+
+@pytest.fixture
+def conn():
+    with contextlib.redirect_stdout(io.StringIO()):
+        conn = create_complete_database(':memory:')
+    cursor = conn.cursor()
+    cursor.execute(TERMINAL_UPSERT, ('T1', 'Houston Terminal'))
+    cursor.executemany(
+        "INSERT INTO shipping_periods (shipping_period_id, terminal_id, start_date, end_date, period_status) "
+        "VALUES (?, 'T1', ?, ?, 'Active')",
+        [('SP1', '2024-01-01', '2024-07-01'), ('SP2', '2024-07-01', None)],
+    )
+    conn.commit()
+    refresh(conn)
+    yield conn
+    conn.close()
+
+
+def pending_keys(conn):
+    return sorted(conn.execute(
+        "SELECT key_value FROM mv_change_log WHERE view_name = 'mv_active_shipping'").fetchall())
+
+
+def test_upsert_terminal_with_shipping_periods(conn):
+    conn.execute(TERMINAL_UPSERT, ('T1', 'Houston Terminal 2'))
+    conn.commit()
+
+    assert pending_keys(conn) == [('SP1',), ('SP2',)]
+    refresh(conn)
+    assert pending_keys(conn) == []
+    names = {row[0] for row in conn.execute("SELECT terminal_name FROM mv_active_shipping")}
+    assert names == {'Houston Terminal 2'}
+    assert verify(conn.cursor(), 'mv_active_shipping') == {'missing': 0, 'extra': 0}
+
+
+def test_upsert_with_keys_already_pending(conn):
+    conn.execute(TERMINAL_UPSERT, ('T1', 'Houston Terminal 2'))
+    conn.execute("UPDATE shipping_periods SET period_status = 'Active' WHERE shipping_period_id = 'SP1'")
+    conn.execute(TERMINAL_UPSERT, ('T1', 'Houston Terminal 3'))
+    conn.commit()
+
+    assert pending_keys(conn) == [('SP1',), ('SP2',)]
+    refresh(conn)
+    assert verify(conn.cursor(), 'mv_active_shipping') == {'missing': 0, 'extra': 0}
@@ -0,0 +1,95 @@
+"""Upgrading a version 0 database matches a freshly created one"""
+
+import contextlib
+import io
+import os
+import re
+import shutil
+import sqlite3
+
+import pytest
+
+from create_database import create_complete_database
+from migrations import SCHEMA_VERSION, SEED_TABLES, current_version, migrate, pending_migrations
+
+OLD_DATABASE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'supply_chain_old.db')
+
+# Columns of the pre-version-1 schema that reconcile_schema leaves in place
+LEGACY_COLUMNS = {('pipelines', 'product_types'), ('terminals', 'products_handled')}
+
+
+def schema(db_path):
+    """Tables and their columns, and the SQL of every index, view and trigger"""
+    conn = sqlite3.connect(db_path)
+    try:
+        objects = conn.execute("""
+            SELECT type, name, sql FROM sqlite_master
+            WHERE name NOT LIKE 'sqlite_%' AND sql IS NOT NULL
+        """).fetchall()
+        columns = {(name, column[1]) for kind, name, _ in objects if kind == 'table'
+                   for column in conn.execute(f"PRAGMA table_info({name})")}
+        definitions = {(kind, name): re.sub(r'\s+', ' ', re.sub(r'IF NOT EXISTS ', '', sql)).strip()
+                       for kind, name, sql in objects if kind != 'table'}
+        return columns, definitions
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def migrated(tmp_path):
+    if not os.path.exists(OLD_DATABASE):
+        pytest.skip('supply_chain_old.db not in this checkout')
+    db_path = str(tmp_path / 'supply_chain.db')
+    shutil.copyfile(OLD_DATABASE, db_path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        migrate(db_path)
+    return db_path
+
+
+@pytest.fixture
+def fresh(tmp_path):
+    db_path = str(tmp_path / 'fresh.db')
+    with contextlib.redirect_stdout(io.StringIO()):
+        create_complete_database(db_path).close()
+    return db_path
+
+
+def test_upgrade_reaches_latest_version(migrated):
+    conn = sqlite3.connect(migrated)
+    assert current_version(conn) == SCHEMA_VERSION
+    assert pending_migrations(conn) == []
+    conn.close()
+
+
+def test_upgrade_matches_new_database(migrated, fresh):
+    migrated_columns, migrated_definitions = schema(migrated)
+    fresh_columns, fresh_definitions = schema(fresh)
+
+    assert migrated_columns - fresh_columns == LEGACY_COLUMNS
+    assert fresh_columns - migrated_columns == set()
+    assert set(migrated_definitions) == set(fresh_definitions)
+    differing = [key for key in fresh_definitions if migrated_definitions[key] != fresh_definitions[key]]
+    assert differing == []
+
+
+def test_upgrade_has_the_seed_rows(migrated, fresh):
+    # IDs are random per database - compare the rows' codes and names
+    def seed_rows(db_path, table_name):
+        conn = sqlite3.connect(db_path)
+        try:
+            cursor = conn.execute(f"SELECT * FROM {table_name}")
+            text = [i for i, column in enumerate(cursor.description)
+                    if not column[0].endswith('_id') and not column[0].endswith(('_at', '_date'))]
+            return sorted(tuple(row[i] for i in text) for row in cursor)
+        finally:
+            conn.close()
+
+    for table_name in SEED_TABLES:
+        assert set(seed_rows(fresh, table_name)) <= set(seed_rows(migrated, table_name)), table_name
+
+
+def test_upgrade_is_idempotent(migrated):
+    before = schema(migrated)
+    with contextlib.redirect_stdout(io.StringIO()):
+        migrate(migrated)
+    assert schema(migrated) == before
@@ -0,0 +1,96 @@
+"""Snapshots into the read replica and their staleness"""
+
+import contextlib
+import io
+import os
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from read_replica import (
+    REPLICA_MAX_AGE_MINUTES, connect_for_reporting, replica_path_for, replica_status, reporting_path,
+    take_snapshot,
+)
+
+
+def snapshot(db_path):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return take_snapshot(db_path)
+
+
+def touch_source(db_path, seconds=5):
+    """A write to the database after the snapshot (mtimes are compared to the second)"""
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE terminals SET city = city || ' ' WHERE rowid = 1")
+    conn.commit()
+    conn.close()
+    later = datetime.now().timestamp() + seconds
+    for path in (db_path, db_path + '-wal'):
+        if os.path.exists(path):
+            os.utime(path, (later, later))
+
+
+def age_replica(db_path, minutes):
+    conn = sqlite3.connect(replica_path_for(db_path))
+    taken_at = (datetime.now() - timedelta(minutes=minutes)).isoformat(sep=' ', timespec='seconds')
+    conn.execute("UPDATE replica_snapshot SET taken_at = ?", (taken_at,))
+    conn.commit()
+    conn.close()
+
+
+def test_no_replica(synthetic_db):
+    status = replica_status(synthetic_db)
+    assert (status['exists'], status['stale']) == (False, True)
+    assert reporting_path(synthetic_db) == synthetic_db
+    with contextlib.redirect_stdout(io.StringIO()):
+        conn, reading_replica = connect_for_reporting(synthetic_db)
+    conn.close()
+    assert reading_replica is False
+
+
+def test_snapshot_copies_the_database(synthetic_db):
+    result = snapshot(synthetic_db)
+    assert result['replica_path'] == replica_path_for(synthetic_db)
+    assert not os.path.exists(result['replica_path'] + '.tmp')
+
+    source = sqlite3.connect(synthetic_db)
+    replica = sqlite3.connect(result['replica_path'])
+    for table_name in ('terminals', 'costing', 'shipping_line_items'):
+        count = f"SELECT COUNT(*) FROM {table_name}"
+        assert replica.execute(count).fetchone() == source.execute(count).fetchone()
+    assert replica.execute("PRAGMA journal_mode").fetchone()[0] == 'delete'
+    assert replica.execute("SELECT source_path FROM replica_snapshot").fetchone()[0] == os.path.abspath(synthetic_db)
+    source.close()
+    replica.close()
+
+    status = replica_status(synthetic_db)
+    assert (status['exists'], status['source_changed'], status['stale']) == (True, False, False)
+    assert reporting_path(synthetic_db) == result['replica_path']
+
+
+def test_staleness(synthetic_db):
+    snapshot(synthetic_db)
+    touch_source(synthetic_db)
+    status = replica_status(synthetic_db)
+    assert (status['source_changed'], status['stale']) == (True, False)  # changed, but recent
+
+    age_replica(synthetic_db, REPLICA_MAX_AGE_MINUTES + 5)
+    assert replica_status(synthetic_db)['stale'] is True
+
+    # Old but unchanged since is not stale
+    snapshot(synthetic_db)
+    age_replica(synthetic_db, REPLICA_MAX_AGE_MINUTES + 5)
+    assert replica_status(synthetic_db)['stale'] is False
+
+
+def test_reporting_connection_is_read_only(synthetic_db):
+    snapshot(synthetic_db)
+    with contextlib.redirect_stdout(io.StringIO()):
+        conn, reading_replica = connect_for_reporting(synthetic_db)
+    try:
+        assert reading_replica is True
+        with pytest.raises(sqlite3.OperationalError, match='readonly'):
+            conn.execute("DELETE FROM terminals")
+    finally:
+        conn.close()
@@ -0,0 +1,83 @@
+"""Orphan scan and the end_date / quarantine fixes"""
+
+import contextlib
+import io
+import json
+
+import pytest
+
+from create_database import create_complete_database
+from referential_integrity import QUARANTINE_TABLE, fix_orphans, scan
+
+
+@pytest.fixture
+def conn():
+    with contextlib.redirect_stdout(io.StringIO()):
+        conn = create_complete_database(':memory:')
+    conn.commit()
+    conn.isolation_level = None
+    # Like the import agents' connections - orphans get written
+    conn.execute("PRAGMA foreign_keys = OFF")
+    product_id = conn.execute("SELECT product_id FROM products LIMIT 1").fetchone()[0]
+    line_item_type_id = conn.execute("SELECT line_item_type_id FROM line_item_types LIMIT 1").fetchone()[0]
+    conn.execute("INSERT INTO terminals (terminal_id, terminal_name, state, city) VALUES ('T1', 'Houston', 'TX', 'Houston')")
+    conn.executemany(
+        "INSERT INTO shipping_periods (shipping_period_id, terminal_id, start_date, end_date, period_status) "
+        "VALUES (?, ?, ?, ?, 'Active')",
+        [
+            ('KEPT', 'T1', '2024-01-01', None),
+            ('ORPHAN_OPEN', 'GONE', '2024-01-01', None),
+            ('ORPHAN_ENDED', 'GONE', '2023-01-01', '2023-07-01'),
+        ],
+    )
+    # Line items of the orphaned period - orphaned in turn once it is quarantined
+    conn.executemany(
+        "INSERT INTO shipping_line_items (shipping_line_item_id, shipping_period_id, product_id, line_item_type_id) "
+        "VALUES (?, ?, ?, ?)",
+        [('LI_KEPT', 'KEPT', product_id, line_item_type_id),
+         ('LI_ORPHAN', 'ORPHAN_OPEN', product_id, line_item_type_id)],
+    )
+    yield conn
+    conn.close()
+
+
+def relationship(result, description):
+    return next(r for r in result['relationships']
+                if f"{r['table']}({', '.join(r['columns'])})" == description)
+
+
+def test_scan_counts_orphans(conn):
+    periods = relationship(scan(conn), 'shipping_periods(terminal_id)')
+    assert (periods['orphans'], periods['open_orphans']) == (2, 1)
+    assert {row['shipping_period_id'] for row in periods['samples']} == {'ORPHAN_OPEN', 'ORPHAN_ENDED'}
+
+
+def test_end_date_ends_open_orphans_only(conn):
+    today = conn.execute("SELECT date('now')").fetchone()[0]
+    result = fix_orphans(conn, 'end_date')
+
+    assert result['fixed'] == {'shipping_periods(terminal_id) -> terminals(terminal_id)': 1}
+    end_dates = dict(conn.execute("SELECT shipping_period_id, end_date FROM shipping_periods"))
+    assert end_dates == {'KEPT': None, 'ORPHAN_OPEN': today, 'ORPHAN_ENDED': '2023-07-01'}
+    assert relationship(scan(conn), 'shipping_periods(terminal_id)')['open_orphans'] == 0
+
+
+def test_quarantine_moves_orphans_and_their_children(conn):
+    result = fix_orphans(conn, 'quarantine')
+
+    assert result['rounds'] == 3  # periods, then their line items, then nothing left
+    assert sorted(conn.execute("SELECT shipping_period_id FROM shipping_periods")) == [('KEPT',)]
+    assert sorted(conn.execute("SELECT shipping_line_item_id FROM shipping_line_items")) == [('LI_KEPT',)]
+    quarantined = {(table_name, json.loads(row_data).get('shipping_line_item_id')
+                    or json.loads(row_data)['shipping_period_id'])
+                   for table_name, row_data in conn.execute(
+                       f"SELECT table_name, row_data FROM {QUARANTINE_TABLE}")}
+    assert quarantined == {('shipping_periods', 'ORPHAN_OPEN'), ('shipping_periods', 'ORPHAN_ENDED'),
+                           ('shipping_line_items', 'LI_ORPHAN')}
+    declared = [r for r in scan(conn)['relationships'] if r['declared']]
+    assert sum(r['orphans'] for r in declared) == 0
+
+
+def test_unknown_mode(conn):
+    with pytest.raises(ValueError, match='Unknown fix mode'):
+        fix_orphans(conn, 'delete')
@@ -0,0 +1,51 @@
+"""Phase checkpoints: resume, discard and purge"""
+
+import sqlite3
+from datetime import datetime, timedelta
+
+from run_checkpoints import CHECKPOINT_RETENTION_DAYS, RunCheckpoints
+
+
+def finish(checkpoints, results):
+    """What an agent does at the end of a run (see terminal_discovery_agent._finish_run)"""
+    checkpoints.save('store', results)
+    checkpoints.discard(['fetch', 'validate'])
+    return checkpoints.purge_completed('store')
+
+
+def test_run_resumes_from_saved_phases(tmp_path):
+    db_path = str(tmp_path / 'checkpoints.db')
+    checkpoints = RunCheckpoints(db_path, 'TASK_1', 'terminal_discovery')
+    checkpoints.save('fetch', {'records': [1, 2]})
+
+    resumed = RunCheckpoints(db_path, 'TASK_1', 'terminal_discovery')
+    assert resumed.load('fetch') == {'records': [1, 2]}
+    assert resumed.load('validate') is None
+    assert resumed.completed_phases() == ['fetch']
+
+
+def test_completed_runs_keep_only_results_until_purged(tmp_path):
+    db_path = str(tmp_path / 'checkpoints.db')
+    old = RunCheckpoints(db_path, 'OLD', 'terminal_discovery')
+    unfinished = RunCheckpoints(db_path, 'UNFINISHED', 'terminal_discovery')
+    other_agent = RunCheckpoints(db_path, 'OTHER', 'excel_import')
+    for checkpoints in (old, unfinished, other_agent):
+        checkpoints.save('fetch', {'records': []})
+    finish(old, {'status': 'completed'})
+    other_agent.save('store', {'status': 'completed'})
+    assert old.completed_phases() == ['store']
+
+    long_ago = datetime.now() - timedelta(days=CHECKPOINT_RETENTION_DAYS + 1)
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE run_checkpoints SET completed_at = ?", (long_ago,))
+    conn.commit()
+    conn.close()
+
+    current = RunCheckpoints(db_path, 'CURRENT', 'terminal_discovery')
+    current.save('fetch', {'records': []})
+    assert finish(current, {'status': 'completed'}) == 1
+
+    assert old.load('store') is None
+    assert current.load('store') == {'status': 'completed'}
+    assert unfinished.completed_phases() == ['fetch']
+    assert sorted(other_agent.completed_phases()) == ['fetch', 'store']
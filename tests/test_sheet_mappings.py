@@ -0,0 +1,72 @@
+"""Mapped reads of CSV and Parquet exports"""
+
+import csv
+import os
+
+import pytest
+
+from sheet_mappings import COSTING_DETAIL, read_csv, read_source
+from test_excel_import import HEADERS, TERMINALS, costing_row
+
+
+def open_files(path):
+    """Descriptors this process holds on path (Linux /proc)"""
+    fd_dir = '/proc/self/fd'
+    if not os.path.isdir(fd_dir):
+        pytest.skip('needs /proc/self/fd')
+    found = 0
+    for fd in os.listdir(fd_dir):
+        try:
+            found += os.readlink(os.path.join(fd_dir, fd)) == str(path)
+        except OSError:
+            pass
+    return found
+
+
+def write_csv(path, headers, rows):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(headers)
+        writer.writerows(rows)
+    return str(path)
+
+
+def test_csv_missing_column_closes_file(tmp_path):
+    path = write_csv(tmp_path / 'costing.csv', ['Notes'], [['x']])
+    # The traceback is kept (as an error log would), so only an explicit close frees the file
+    with pytest.raises(ValueError, match='not found') as error:
+        read_csv(path, COSTING_DETAIL)
+    assert open_files(path) == 0
+    assert error.traceback
+
+
+def test_csv_records(tmp_path):
+    path = write_csv(tmp_path / 'costing.csv', HEADERS, [costing_row(t, 2.0) for t in TERMINALS])
+    compiled, records = read_source(path, COSTING_DETAIL)
+    records = list(records)
+    assert [record['terminal_code'] for record in records] == ['TX01', 'TX02', 'OK03']
+    assert records[0]['products'] == {'Clear Gas': 2.0, 'E10': 2.0, 'E15': 2.0}
+    assert open_files(path) == 0
+
+
+def test_parquet_matches_csv(tmp_path):
+    pa = pytest.importorskip('pyarrow')
+    pq = pytest.importorskip('pyarrow.parquet')
+
+    rows = [costing_row(t, 2.0) for t in TERMINALS]
+    csv_path = write_csv(tmp_path / 'costing.csv', HEADERS, rows)
+    parquet_path = str(tmp_path / 'costing.parquet')
+    # Text columns as strings, cost columns as doubles (blank -> null);
+    # Costing Detail repeats headers (throughput, Subtotal), as the export does
+    arrays = []
+    for i, header in enumerate(HEADERS):
+        values = [row[i] for row in rows]
+        if i < 6 or header == 'Notes':
+            arrays.append(pa.array([value or None for value in values], pa.string()))
+        else:
+            arrays.append(pa.array([value if value != '' else None for value in values], pa.float64()))
+    pq.write_table(pa.Table.from_arrays(arrays, names=HEADERS), parquet_path)
+
+    _, csv_records = read_source(csv_path, COSTING_DETAIL)
+    _, parquet_records = read_source(parquet_path, COSTING_DETAIL)
+    assert list(parquet_records) == list(csv_records)
@@ -0,0 +1,45 @@
+"""Same seed and scale, same database"""
+
+import contextlib
+import io
+import sqlite3
+
+import pytest
+
+from conftest import TEST_SCALE
+from synthetic_data import generate_database
+
+
+def generate(db_path, seed, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return generate_database(str(db_path), scale=TEST_SCALE, seed=seed, **kwargs)
+
+
+def contents(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        tables = [name for (name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name")]
+        return {table_name: sorted(map(repr, conn.execute(f"SELECT * FROM {table_name}")))
+                for table_name in tables}
+    finally:
+        conn.close()
+
+
+def test_same_seed_same_database(synthetic_template, tmp_path):
+    again = tmp_path / 'again.db'
+    counts = generate(again, seed=42)
+    assert contents(str(again)) == contents(synthetic_template)
+    assert counts['terminals'] > 0 and counts['shipping_line_items'] > 0
+
+
+def test_other_seed_other_rows(synthetic_template, tmp_path):
+    other = tmp_path / 'other.db'
+    generate(other, seed=7)
+    assert contents(str(other))['terminals'] != contents(synthetic_template)['terminals']
+
+
+def test_existing_file_needs_overwrite(synthetic_db):
+    with pytest.raises(FileExistsError):
+        generate(synthetic_db, seed=42)
+    generate(synthetic_db, seed=7, overwrite=True)
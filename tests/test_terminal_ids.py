@@ -0,0 +1,54 @@
+"""Natural keys and existing-terminal matching"""
+
+import contextlib
+import io
+
+import pytest
+
+from create_database import create_complete_database
+from terminal_ids import TerminalIdService, stable_terminal_id, terminal_natural_key
+
+
+@pytest.fixture
+def cursor():
+    with contextlib.redirect_stdout(io.StringIO()):
+        conn = create_complete_database(':memory:')
+    cursor = conn.cursor()
+    cursor.executemany(
+        "INSERT INTO terminals (terminal_id, terminal_name, terminal_code, state, city) VALUES (?, ?, ?, ?, ?)",
+        [
+            ('TERM_TX_T100', 'Houston', 'T100', 'TX', 'Houston'),
+            ('TERM_OK_T100', 'Tulsa', 'T100', 'ok ', 'Tulsa'),
+            ('LEGACY_LOC', 'Dallas', None, 'tx', 'Dallas'),
+        ],
+    )
+    yield cursor
+    conn.close()
+
+
+def test_code_key_includes_state():
+    assert terminal_natural_key(terminal_code=' T100 ', state='tx ') == 'code:TX|T100'
+    assert terminal_natural_key(terminal_code='T100', state='TX') != terminal_natural_key(
+        terminal_code='T100', state='OK')
+
+
+def test_same_code_in_two_states(cursor):
+    keys = [terminal_natural_key(terminal_code='T100', state=state) for state in ('TX', 'OK', 'LA')]
+    ids = TerminalIdService(cursor).resolve_many(keys)
+    assert [ids[key] for key in keys] == ['TERM_TX_T100', 'TERM_OK_T100', stable_terminal_id(keys[2])]
+
+
+def test_location_key_matches_normalized_state(cursor):
+    key = terminal_natural_key(state='TX', city='dallas')
+    assert TerminalIdService(cursor).resolve(key) == 'LEGACY_LOC'
+
+
+def test_location_lookup_uses_state_index(cursor):
+    statements = []
+    cursor.connection.set_trace_callback(statements.append)
+    TerminalIdService(cursor).resolve(terminal_natural_key(state='TX', city='Dallas'))
+    cursor.connection.set_trace_callback(None)
+
+    lookup = next(sql for sql in statements if 'UPPER(TRIM' in sql)
+    plan = cursor.execute(f"EXPLAIN QUERY PLAN {lookup}").fetchall()
+    assert any('idx_terminals_location' in row[-1] for row in plan)